@@ -24,6 +24,9 @@ datas = [
     # リソースファイル（アイコン、スタイルなど）
     ('resources', 'resources'),
 
+    # タグ辞書（オフラインのラベル生成用、ai/tag_dictionary.py と同じ配置）
+    ('src/ai/data/tag_dictionary.csv', 'ai/data'),
+
     # サンプルワイルドカード（個人情報を含まないサンプルのみ）
     # 注意: 個人のワイルドカードは除外
     # ('wildcards', 'wildcards_samples'),  # 必要に応じてコメント解除
@@ -67,6 +70,7 @@ a = Analysis(
         'ai.api_key_manager',
         'ai.cost_estimator',
         'ai.label_generator',
+        'ai.tag_dictionary',
         # core
         'core',
         'core.backup_manager',
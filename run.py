@@ -45,4 +45,7 @@ sys.path.insert(0, str(application_path))
 from main import main
 
 if __name__ == "__main__":
+    # EXE化時にプロセスプール（ラベル保持の並列化など）の子プロセスを正しく起動
+    import multiprocessing
+    multiprocessing.freeze_support()
     main()
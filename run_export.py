@@ -0,0 +1,191 @@
+"""Pfft_maker 一括出力スクリプト（ヘッドレス）
+
+GUIを起動せずに、複数のプロジェクトファイルから
+Prompts from file形式のプロンプトファイルを並列に出力します。
+
+使用例:
+    python run_export.py "projects/**/*.pfft" -o output --completed-only
+    python run_export.py a.pfft --format txt --format a1111 --shard-scenes 10
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+# srcディレクトリをパスに追加
+if getattr(sys, 'frozen', False):
+    # PyInstallerでEXE化されている場合
+    application_path = Path(sys.executable).parent
+else:
+    # 開発環境
+    application_path = Path(__file__).parent
+
+src_path = application_path / "src"
+sys.path.insert(0, str(src_path))
+sys.path.insert(0, str(application_path))
+
+from core.batch_exporter import BatchExporter, expand_input_patterns
+from core.prompt_exporter import EXPORT_TARGETS
+
+
+def positive_int(value: str) -> int:
+    """正の整数の引数を変換（argparseのtype用）
+
+    Args:
+        value: 引数の文字列
+
+    Returns:
+        整数
+
+    Raises:
+        argparse.ArgumentTypeError: 正の整数でない場合
+    """
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"整数を指定してください: {value!r}")
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f"1以上の値を指定してください: {number}")
+    return number
+
+
+def load_json_object(path: str) -> dict:
+    """JSONオブジェクトのファイルを読み込み（argparseのtype用）
+
+    Args:
+        path: JSONファイルのパス
+
+    Returns:
+        読み込んだ辞書
+
+    Raises:
+        argparse.ArgumentTypeError: 読み込めない場合、JSONオブジェクトでない場合
+    """
+    try:
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+    except OSError as e:
+        raise argparse.ArgumentTypeError(f"ファイルを読み込めません: {e}")
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(f"JSONの解析に失敗しました: {path}: {e}")
+    if not isinstance(data, dict):
+        raise argparse.ArgumentTypeError(f"JSONオブジェクトを記述してください: {path}")
+    return data
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    """コマンドライン引数を解析
+
+    Args:
+        argv: 引数リスト（Noneの場合はsys.argv）
+
+    Returns:
+        解析結果
+    """
+    parser = argparse.ArgumentParser(
+        description="プロジェクトファイルからプロンプトファイルを一括出力します（GUI不要）"
+    )
+    parser.add_argument(
+        "inputs", nargs="+",
+        help="プロジェクトファイル（.pfft）のパスまたはglobパターン"
+    )
+    parser.add_argument(
+        "-o", "--output-dir",
+        help="出力ディレクトリ（省略時は入力ファイルと同じ場所）"
+    )
+    parser.add_argument(
+        "--completed-only", action="store_true",
+        help="完成シーンのみを出力"
+    )
+    parser.add_argument(
+        "--include-comment", action="store_true",
+        help="シーン番号コメントを含める"
+    )
+    parser.add_argument(
+        "-f", "--format", dest="formats", action="append",
+        choices=sorted(EXPORT_TARGETS.keys()),
+        help="出力形式（複数指定可、省略時はtxt）: "
+             "txt=1シーン1行, jsonl=メタデータ付き, a1111=txt2img APIペイロード"
+    )
+    parser.add_argument(
+        "--shard-scenes", type=positive_int, default=None,
+        help="1ファイルあたりの最大シーン数（超えた場合は連番ファイルに分割）"
+    )
+    parser.add_argument(
+        "--shard-bytes", type=positive_int, default=None,
+        help="1ファイルあたりの最大バイト数（超えた場合は連番ファイルに分割）"
+    )
+    parser.add_argument(
+        "--a1111-defaults", type=load_json_object,
+        help="A1111ペイロードの既定値を記述したJSONファイル（例: steps, width, height）"
+    )
+    parser.add_argument(
+        "-j", "--jobs", type=positive_int, default=None,
+        help="並列ワーカー数（省略時はCPUコア数）"
+    )
+    parser.add_argument(
+        "--settings",
+        help="設定ファイル（settings.json）のパス（省略時はアプリの設定を使用）"
+    )
+    parser.add_argument(
+        "--no-common-prompts", action="store_true",
+        help="共通プロンプト（品質タグなど）を挿入しない"
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    """メイン処理
+
+    Args:
+        argv: 引数リスト（Noneの場合はsys.argv）
+
+    Returns:
+        終了コード（全件成功: 0、失敗あり: 1）
+    """
+    args = parse_args(argv)
+
+    project_paths = expand_input_patterns(args.inputs)
+    if not project_paths:
+        print("[ERROR] 入力ファイルが見つかりません", file=sys.stderr)
+        return 1
+
+    # 共通プロンプト用の設定
+    settings = None
+    if not args.no_common_prompts:
+        from config.settings import Settings
+        settings = Settings(Path(args.settings)) if args.settings else Settings()
+
+    exporter = BatchExporter(settings, max_workers=args.jobs)
+
+    def on_progress(current, total, message):
+        print(f"[{current}/{total}] {message}")
+
+    results = exporter.export(
+        project_paths,
+        output_dir=Path(args.output_dir) if args.output_dir else None,
+        formats=list(dict.fromkeys(args.formats)) if args.formats else None,
+        include_comment=args.include_comment,
+        completed_only=args.completed_only,
+        max_scenes_per_file=args.shard_scenes,
+        max_bytes_per_file=args.shard_bytes,
+        payload_defaults=args.a1111_defaults,
+        progress_callback=on_progress
+    )
+
+    failed = [r for r in results if not r.success]
+    for result in failed:
+        print(f"[ERROR] {result.source_path}: {result.error}", file=sys.stderr)
+
+    total_scenes = sum(r.scene_count for r in results)
+    total_files = sum(len(r.output_paths) for r in results)
+    print(
+        f"完了: {len(results) - len(failed)}/{len(results)}プロジェクト, "
+        f"{total_scenes}シーン, {total_files}ファイル"
+    )
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
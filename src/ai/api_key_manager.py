@@ -6,8 +6,9 @@ FR-017: セキュアなAPIキー管理
 
 import os
 import json
+import threading
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Optional
 
 from cryptography.fernet import Fernet
 
@@ -17,6 +18,7 @@ class APIKeyManager:
 
     Fernet（AES128）で暗号化してAPIキーを保存します。
     マスターキーは環境変数またはOSキーチェーンに保存。
+    キーファイルの内容と復号済みのキーはメモリにキャッシュし、保存・削除時に破棄します。
     """
 
     def __init__(self, data_dir: Path):
@@ -32,6 +34,11 @@ class APIKeyManager:
         self.master_key = self._get_or_create_master_key()
         self.fernet = Fernet(self.master_key)
 
+        # キャッシュ（並列処理のスレッドから参照されるためロックで保護）
+        self._cache_lock = threading.Lock()
+        self._keys_cache: Optional[dict] = None
+        self._decrypted_cache: Dict[str, Optional[str]] = {}
+
     def _get_or_create_master_key(self) -> bytes:
         """マスターキーを取得または生成
 
@@ -82,6 +89,7 @@ class APIKeyManager:
 
         # ファイルに保存
         self._save_keys(keys)
+        self.clear_cache()
 
     def get_api_key(self, service: str) -> Optional[str]:
         """APIキーを取得
@@ -92,18 +100,25 @@ class APIKeyManager:
         Returns:
             APIキー、存在しない場合None
         """
+        with self._cache_lock:
+            if service in self._decrypted_cache:
+                return self._decrypted_cache[service]
+
         keys = self._load_keys()
 
-        if service not in keys:
-            return None
+        api_key = None
+        if service in keys:
+            # 復号化
+            try:
+                encrypted_key = keys[service].encode()
+                api_key = self.fernet.decrypt(encrypted_key).decode()
+            except Exception as e:
+                print(f"[Warning] Failed to decrypt API key for {service}: {e}")
+                return None
 
-        # 復号化
-        try:
-            encrypted_key = keys[service].encode()
-            return self.fernet.decrypt(encrypted_key).decode()
-        except Exception as e:
-            print(f"[Warning] Failed to decrypt API key for {service}: {e}")
-            return None
+        with self._cache_lock:
+            self._decrypted_cache[service] = api_key
+        return api_key
 
     def delete_api_key(self, service: str):
         """APIキーを削除
@@ -116,6 +131,13 @@ class APIKeyManager:
         if service in keys:
             del keys[service]
             self._save_keys(keys)
+            self.clear_cache()
+
+    def clear_cache(self):
+        """キャッシュを破棄（他のインスタンスがキーを変更した場合など）"""
+        with self._cache_lock:
+            self._keys_cache = None
+            self._decrypted_cache.clear()
 
     def has_api_key(self, service: str) -> bool:
         """APIキーが存在するかチェック
@@ -133,17 +155,25 @@ class APIKeyManager:
         """キーファイルを読み込み
 
         Returns:
-            キー辞書
+            キー辞書（呼び出し側で変更できるようにコピーを返す）
         """
+        with self._cache_lock:
+            if self._keys_cache is not None:
+                return dict(self._keys_cache)
+
         if not self.key_file.exists():
             return {}
 
         try:
-            return json.loads(self.key_file.read_text(encoding="utf-8"))
+            keys = json.loads(self.key_file.read_text(encoding="utf-8"))
         except Exception as e:
             print(f"[Warning] Failed to load API keys: {e}")
             return {}
 
+        with self._cache_lock:
+            self._keys_cache = keys
+        return dict(keys)
+
     def _save_keys(self, keys: dict):
         """キーファイルに保存
 
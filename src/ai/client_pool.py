@@ -0,0 +1,115 @@
+"""APIクライアントプール
+
+Claude / OpenAI / LM Studio のSDKクライアントをセッション中に1つずつだけ作成して再利用します。
+SDKクライアントは内部でHTTP接続を保持（Keep-Alive）するため、
+リクエストごとに作成する場合と比べてTLSハンドシェイクが発生しません。
+"""
+
+import threading
+from typing import Dict, Optional, Tuple
+
+from utils.logger import get_logger
+
+
+class APIClientPool:
+    """APIクライアントプール
+
+    クライアントは (サービス, APIキー, エンドポイント) ごとに作成する。
+    APIキーが変更された場合は新しいクライアントを作成する。
+    SDKクライアントはスレッドセーフなため、並列処理のスレッド間で共有できる。
+    """
+
+    def __init__(self, api_key_manager=None):
+        """初期化
+
+        Args:
+            api_key_manager: APIKeyManagerインスタンス（オプション）
+        """
+        self.api_key_manager = api_key_manager
+        self.logger = get_logger()
+        self._lock = threading.Lock()
+        self._clients: Dict[Tuple[str, str, Optional[str]], object] = {}
+
+    def get_claude_client(self):
+        """Claude APIクライアントを取得
+
+        Returns:
+            anthropic.Anthropic（APIキー未設定の場合None）
+        """
+        api_key = self._get_api_key("claude")
+        if not api_key:
+            return None
+
+        def create():
+            import anthropic
+            return anthropic.Anthropic(api_key=api_key)
+
+        return self._get_or_create(("claude", api_key, None), create)
+
+    def get_openai_client(self):
+        """OpenAI APIクライアントを取得
+
+        Returns:
+            openai.OpenAI（APIキー未設定の場合None）
+        """
+        api_key = self._get_api_key("openai")
+        if not api_key:
+            return None
+
+        def create():
+            import openai
+            return openai.OpenAI(api_key=api_key)
+
+        return self._get_or_create(("openai", api_key, None), create)
+
+    def get_lm_studio_client(self, base_url: str):
+        """LM Studio（OpenAI互換API）クライアントを取得
+
+        Args:
+            base_url: LM StudioのエンドポイントURL
+
+        Returns:
+            openai.OpenAI
+        """
+        def create():
+            import openai
+            # LM Studioはダミーキーで動作
+            return openai.OpenAI(base_url=base_url, api_key="lm-studio")
+
+        return self._get_or_create(("lm_studio", "lm-studio", base_url), create)
+
+    def close(self):
+        """すべてのクライアントを閉じる（HTTP接続を解放）"""
+        with self._lock:
+            clients = list(self._clients.values())
+            self._clients.clear()
+
+        for client in clients:
+            try:
+                client.close()
+            except Exception as e:
+                self.logger.debug(f"APIクライアントのクローズに失敗: {e}")
+
+    def _get_api_key(self, service: str) -> Optional[str]:
+        """APIキーを取得（APIKeyManagerのキャッシュを使用）"""
+        if not self.api_key_manager:
+            return None
+        return self.api_key_manager.get_api_key(service)
+
+    def _get_or_create(self, key: Tuple[str, str, Optional[str]], create):
+        """クライアントを取得（未作成の場合は作成）
+
+        Args:
+            key: (サービス, APIキー, エンドポイント)
+            create: クライアントを作成する関数
+
+        Returns:
+            クライアント
+        """
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                client = create()
+                self._clients[key] = client
+                self.logger.debug(f"APIクライアントを作成: {key[0]}")
+            return client
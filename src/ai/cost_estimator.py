@@ -3,8 +3,11 @@
 Claude APIの使用コストを事前に見積もります。
 """
 
-from typing import List, Tuple
+import math
+from typing import List, Optional, Tuple
 from models import Prompt
+from .label_cache import LabelCache, normalize_prompt_text
+from .label_suggester import LabelSuggester
 
 
 class CostEstimator:
@@ -33,6 +36,10 @@ class CostEstimator:
     # 出力トークン数（max_tokens設定）
     OUTPUT_TOKENS_PER_REQUEST = 50
 
+    # 複数プロンプトをまとめて送信する場合の追加指示・1件あたりの出力トークン数
+    PACKED_INSTRUCTION_TOKENS = 60
+    OUTPUT_TOKENS_PER_PACKED_ITEM = 20
+
     def __init__(self, model: str = "claude-3-haiku-20240307"):
         """初期化
 
@@ -58,16 +65,42 @@ class CostEstimator:
 
     def estimate_label_generation_cost(
         self,
-        prompts: List[Prompt]
+        prompts: List[Prompt],
+        prompts_per_request: int = 1,
+        label_cache: Optional[LabelCache] = None,
+        label_suggester: Optional[LabelSuggester] = None
     ) -> Tuple[float, int, dict]:
         """ラベル生成コストを見積もり
 
+        LabelGenerator と同様に、キャッシュ済みのプロンプト、同じテキストの重複、
+        確信度の高いラベル候補があるプロンプトは送信しないものとして数える。
+        複数のプロンプトを1リクエストにまとめる場合、システムプロンプトはリクエストごとに1回だけ数える。
+
         Args:
             prompts: Promptオブジェクトのリスト
+            prompts_per_request: 1リクエストにまとめるプロンプト数
+            label_cache: ラベルキャッシュ（オプション）
+            label_suggester: 学習済みのラベル候補（オプション）
 
         Returns:
-            (総コスト(USD), プロンプト数, 詳細辞書)
+            (総コスト(USD), 送信するプロンプト数, 詳細辞書)
         """
+        unique_prompts = {}
+        cached_count = 0
+        for prompt in prompts:
+            if label_cache is not None and label_cache.get(prompt.prompt):
+                cached_count += 1
+            else:
+                unique_prompts.setdefault(normalize_prompt_text(prompt.prompt), prompt)
+        duplicate_count = len(prompts) - cached_count - len(unique_prompts)
+
+        suggested_count = 0
+        if label_suggester is not None:
+            for key, prompt in list(unique_prompts.items()):
+                if label_suggester.suggest(prompt.prompt):
+                    suggested_count += 1
+                    del unique_prompts[key]
+        prompts = list(unique_prompts.values())
         count = len(prompts)
 
         if count == 0:
@@ -78,17 +111,27 @@ class CostEstimator:
                 "output_cost": 0.0,
                 "total_cost": 0.0,
                 "count": 0,
+                "request_count": 0,
+                "cached_count": cached_count,
+                "duplicate_count": duplicate_count,
+                "suggested_count": suggested_count,
             }
 
-        # 入力トークン数の推定
-        total_input_tokens = 0
+        prompts_per_request = max(1, prompts_per_request)
+        request_count = math.ceil(count / prompts_per_request)
+
+        # 入力トークン数の推定（システムプロンプトはリクエストごと）
+        total_input_tokens = request_count * self.SYSTEM_PROMPT_TOKENS
         for prompt in prompts:
-            # システムプロンプト + ユーザープロンプト
             prompt_tokens = self.estimate_tokens(prompt.prompt)
-            total_input_tokens += self.SYSTEM_PROMPT_TOKENS + prompt_tokens + 20  # 20はフォーマット用
+            total_input_tokens += prompt_tokens + 20  # 20はフォーマット用
 
         # 出力トークン数の推定
-        total_output_tokens = count * self.OUTPUT_TOKENS_PER_REQUEST
+        if prompts_per_request > 1:
+            total_input_tokens += request_count * self.PACKED_INSTRUCTION_TOKENS
+            total_output_tokens = count * self.OUTPUT_TOKENS_PER_PACKED_ITEM + request_count * 20
+        else:
+            total_output_tokens = count * self.OUTPUT_TOKENS_PER_REQUEST
 
         # コスト計算
         input_cost = (total_input_tokens / 1_000_000) * self.pricing["input"]
@@ -103,6 +146,10 @@ class CostEstimator:
             "output_cost": output_cost,
             "total_cost": total_cost,
             "count": count,
+            "request_count": request_count,
+            "cached_count": cached_count,
+            "duplicate_count": duplicate_count,
+            "suggested_count": suggested_count,
             "cost_per_prompt": total_cost / count if count > 0 else 0.0,
         }
 
@@ -118,6 +165,11 @@ class CostEstimator:
             フォーマットされたコストサマリー
         """
         if details["count"] == 0:
+            if details.get("cached_count") or details.get("suggested_count"):
+                return (
+                    f"すべてのプロンプトのラベルがキャッシュ済み（{details.get('cached_count', 0):,}件）"
+                    f"または学習済みの候補（{details.get('suggested_count', 0):,}件）です（APIコストは発生しません）"
+                )
             return "見積もり対象のプロンプトがありません"
 
         # 日本円換算（1 USD = 150 JPY と仮定）
@@ -129,7 +181,8 @@ class CostEstimator:
 
 モデル: {details['model'].replace('claude-3-', 'Claude 3 ').replace('-20240307', '').replace('-20240229', '')}
 
-プロンプト数: {details['count']:,}件
+プロンプト数: {details['count']:,}件（{details['request_count']:,}リクエスト）
+  キャッシュ済み: {details.get('cached_count', 0):,}件 / 重複: {details.get('duplicate_count', 0):,}件 / 学習済みの候補: {details.get('suggested_count', 0):,}件（送信しません）
 
 推定トークン数:
   入力: {details['input_tokens']:,} tokens
@@ -0,0 +1,125 @@
+"""ラベルキャッシュ
+
+生成済みのラベルを、正規化したプロンプト文字列のハッシュをキーとして永続的に保存します。
+同じプロンプトが複数のワイルドカードファイルに含まれる場合や、同期後の再生成時に
+APIへ再送信しないために使用します。
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+from utils.logger import get_logger
+
+
+def normalize_prompt_text(text: str) -> str:
+    """キャッシュキー用にプロンプト文字列を正規化
+
+    大文字・小文字、連続する空白、カンマ前後の空白の違いを同一視する。
+
+    Args:
+        text: プロンプト文字列
+
+    Returns:
+        正規化した文字列
+    """
+    text = " ".join(text.lower().split())
+    return re.sub(r"\s*,\s*", ", ", text).strip(", ")
+
+
+def make_label_cache_key(text: str) -> str:
+    """プロンプト文字列からキャッシュキーを生成
+
+    Args:
+        text: プロンプト文字列
+
+    Returns:
+        キャッシュキー（正規化した文字列のSHA1）
+    """
+    return hashlib.sha1(normalize_prompt_text(text).encode('utf-8')).hexdigest()
+
+
+class LabelCache:
+    """ラベルキャッシュ
+
+    Attributes:
+        path: キャッシュファイルのパス
+        entries: キャッシュキー → {"label", "source", "model"} の辞書
+    """
+
+    FILENAME = "label_cache.json"
+    VERSION = 1
+
+    def __init__(self, path: Path):
+        """初期化
+
+        Args:
+            path: キャッシュファイルのパス
+        """
+        self.path = path
+        self.entries: Dict[str, dict] = {}
+        self.logger = get_logger()
+        self._lock = threading.Lock()
+        self._dirty = False
+        self.load()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def load(self):
+        """ファイルから読み込み（存在しない・壊れている場合は空）"""
+        self.entries = {}
+        self._dirty = False
+        if not self.path.exists():
+            return
+
+        try:
+            with self.path.open('r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == self.VERSION:
+                self.entries = data.get('entries', {})
+        except Exception as e:
+            self.logger.warning(f"ラベルキャッシュの読み込みに失敗（再作成します）: {e}")
+
+    def save(self):
+        """変更があればファイルに保存（一時ファイル経由で置き換え）"""
+        with self._lock:
+            if not self._dirty:
+                return
+            content = json.dumps({'version': self.VERSION, 'entries': self.entries}, ensure_ascii=False)
+            self._dirty = False
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        with temp_path.open('w', encoding='utf-8') as f:
+            f.write(content)
+        os.replace(temp_path, self.path)
+
+    def get(self, text: str) -> Optional[dict]:
+        """キャッシュ済みのラベルを取得
+
+        Args:
+            text: プロンプト文字列
+
+        Returns:
+            {"label", "source", "model"}（キャッシュにない場合None）
+        """
+        with self._lock:
+            return self.entries.get(make_label_cache_key(text))
+
+    def set(self, text: str, label: str, source: str, model: str):
+        """ラベルを保存（ファイルへの書き込みは save() で行う）
+
+        Args:
+            text: プロンプト文字列
+            label: ラベル
+            source: ラベルの生成方法（label_source）
+            model: 生成に使用したモデル名
+        """
+        with self._lock:
+            self.entries[make_label_cache_key(text)] = {'label': label, 'source': source, 'model': model}
+            self._dirty = True
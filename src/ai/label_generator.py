@@ -5,12 +5,160 @@ FR-016: ラベル・タグ自動生成
 """
 
 import re
+import json
 import asyncio
-from typing import List, Optional, Tuple
+import threading
+from typing import Awaitable, Callable, Dict, Iterator, List, Optional, Set, Tuple
 from datetime import datetime
 from concurrent.futures import ThreadPoolExecutor
 
 from models import Prompt
+from utils.logger import get_logger
+from .client_pool import APIClientPool
+from .cost_estimator import CostEstimator
+from .label_cache import LabelCache, make_label_cache_key, normalize_prompt_text
+from .label_job import LabelJobJournal
+from .label_suggester import LabelSuggester
+from .rate_limiter import AdaptiveRateLimiter, RetryableError
+from .tag_dictionary import TagDictionary
+
+
+# ラベル生成に使用するモデル
+CLAUDE_LABEL_MODEL = "claude-3-haiku-20240307"
+OPENAI_LABEL_MODEL = "gpt-3.5-turbo"
+
+# ラベル生成のシステムプロンプト
+LABEL_SYSTEM_PROMPT = """あなたはStable Diffusion用のプロンプトに日本語ラベルを付けるアシスタントです。
+以下のルールに従って、簡潔で分かりやすい日本語ラベルを生成してください：
+
+1. 最も重要な要素を3-5文字程度で表現
+2. 平易な日本語を使用（カタカナ混在OK）
+3. ラベルのみを出力（説明不要）
+
+例：
+- "clothed masturbation" → "服着たままオナニー"
+- "school infirmary, beds with curtain dividers" → "保健室"
+- "classroom interior, desks in rows" → "教室"
+- "sitting, spread legs" → "座り開脚"
+"""
+
+# 複数プロンプトをまとめて送信する場合の追加指示（番号付きで入力し、JSONで出力させる）
+PACKED_SYSTEM_PROMPT = LABEL_SYSTEM_PROMPT + """
+複数のプロンプトが番号付きで与えられます。
+各プロンプトのラベルを、次の形式のJSONのみで出力してください（説明やコードブロックは不要）：
+{"labels": [{"id": 1, "label": "ラベル"}, {"id": 2, "label": "ラベル"}]}
+"""
+
+# まとめて送信する場合の1件あたりの出力トークン数（JSONの記号を含む）
+PACKED_OUTPUT_TOKENS_PER_ITEM = 30
+
+# 再試行対象のHTTPステータス（529: Claude APIの過負荷）
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504, 529}
+
+# レート制限を示すHTTPステータス（同時実行数を減らす）
+THROTTLE_STATUS = {429, 529}
+
+
+def _sanitize_label(label: str) -> Optional[str]:
+    """APIの応答からラベルを取り出す（改行や余分な文字を削除）
+
+    Args:
+        label: APIの応答テキスト
+
+    Returns:
+        ラベル（空の場合None）
+    """
+    label = re.sub(r'[\n\r]', '', label.strip())
+    label = label.strip('"').strip("'").strip()
+    return label if label else None
+
+
+def _build_user_message(prompt: str) -> str:
+    """1件分のユーザーメッセージを作成
+
+    Args:
+        prompt: プロンプト文字列
+
+    Returns:
+        ユーザーメッセージ
+    """
+    return f"プロンプト: {prompt}\n\n日本語ラベル:"
+
+
+def _build_packed_user_message(prompts: List[str]) -> str:
+    """複数件分のユーザーメッセージを作成（1から始まる番号付き）
+
+    Args:
+        prompts: プロンプト文字列のリスト
+
+    Returns:
+        ユーザーメッセージ
+    """
+    lines = [f"{i}. {' '.join(prompt.split())}" for i, prompt in enumerate(prompts, 1)]
+    return "プロンプト:\n" + "\n".join(lines) + "\n\nJSON:"
+
+
+def _parse_packed_labels(text: str, count: int) -> Dict[int, str]:
+    """まとめて送信した場合の応答（JSON）を解析・検証
+
+    番号が範囲外・重複している項目や、ラベルが空の項目は除外する。
+
+    Args:
+        text: 応答テキスト
+        count: 送信したプロンプト数
+
+    Returns:
+        番号（1から） → ラベル の辞書（解析できない場合は空）
+    """
+    start = text.find("{")
+    end = text.rfind("}")
+    if start < 0 or end < start:
+        return {}
+    try:
+        data = json.loads(text[start:end + 1])
+    except ValueError:
+        return {}
+
+    items = data.get("labels") if isinstance(data, dict) else None
+    if not isinstance(items, list):
+        return {}
+
+    labels: Dict[int, str] = {}
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        index = item.get("id")
+        label = item.get("label")
+        if type(index) is not int or not 1 <= index <= count or index in labels:
+            continue
+        if not isinstance(label, str):
+            continue
+        label = _sanitize_label(label)
+        if label:
+            labels[index] = label
+    return labels
+
+
+def _to_retryable_error(e: Exception) -> Optional[RetryableError]:
+    """SDKのHTTPエラーを RetryableError に変換
+
+    Args:
+        e: SDK（anthropic / openai）が送出した例外
+
+    Returns:
+        再試行対象の場合は RetryableError（それ以外はNone）
+    """
+    status = getattr(e, "status_code", None)
+    if status not in RETRYABLE_STATUS:
+        return None
+
+    retry_after = None
+    headers = getattr(getattr(e, "response", None), "headers", None) or {}
+    try:
+        retry_after = float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        pass
+    return RetryableError(f"HTTP {status}: {e}", retry_after=retry_after, throttled=status in THROTTLE_STATUS)
 
 
 class LabelGenerator:
@@ -21,9 +169,25 @@ class LabelGenerator:
     2. OpenAI API（次点）- ChatGPT、要APIキー
     3. LM Studio（フォールバック）- ローカルLLM、オフライン可能
     4. 辞書ベース（最終手段）- 単語分割のみ、常に有効
+
+    並列処理（async）では各APIの非同期クライアントを使用し、
+    送信レート（トークンバケット）と同時実行数（AIMD）をAPIごとに自動調整する。
     """
 
-    def __init__(self, api_key_manager=None, use_claude: bool = True, use_openai: bool = False, use_lm_studio: bool = False, max_concurrent: int = 10, settings=None):
+    ASYNC_REQUESTS_PER_SECOND = 10.0  # 並列処理時の1秒あたりの最大リクエスト数（APIごと）
+    ASYNC_MAX_CONCURRENT = 50  # 並列処理時の同時実行数の上限（クラウドAPI）
+    ASYNC_MAX_RETRIES = 5  # レート制限・一時的なエラー時の最大再試行回数
+    REQUEST_TIMEOUT = 60.0  # LM Studioへのリクエストのタイムアウト（秒）
+    PACKED_MAX_INPUT_TOKENS = 2000  # まとめて送信する場合の1リクエストあたりの入力トークン数の上限
+    BATCH_MAX_REQUESTS = 10000  # Batch APIの1バッチあたりのリクエスト数（APIの上限は100,000件）
+    BATCH_MAX_BYTES = 100 * 1024 * 1024  # Batch APIの1バッチあたりのサイズ（APIの上限は256MB）
+    BATCH_POLL_INITIAL = 5.0  # Batch APIのポーリング間隔の初期値（秒）
+    BATCH_POLL_MAX = 60.0  # Batch APIのポーリング間隔の上限（秒）
+    BATCH_MAX_WAIT = 24 * 3600  # Batch APIの最大待機時間（秒、バッチは24時間で期限切れ）
+
+    def __init__(self, api_key_manager=None, use_claude: bool = True, use_openai: bool = False, use_lm_studio: bool = False, max_concurrent: int = 10, settings=None, prompts_per_request: int = 1,
+                 label_cache: Optional[LabelCache] = None, tag_dictionary: Optional[TagDictionary] = None,
+                 label_suggester: Optional[LabelSuggester] = None):
         """初期化
 
         Args:
@@ -33,12 +197,20 @@ class LabelGenerator:
             use_lm_studio: LM Studioを使用するか
             max_concurrent: 並列処理時の最大同時実行数（デフォルト: 10）
             settings: Settings インスタンス（LM Studio設定用、オプション）
+            prompts_per_request: 1リクエストにまとめるプロンプト数（1の場合は1件ずつ送信）
+            label_cache: ラベルキャッシュ（指定した場合、キャッシュ済みのプロンプトはAPIに送信しない）
+            tag_dictionary: タグ辞書（未指定の場合は同梱の辞書とユーザー辞書を初回使用時に読み込む）
+            label_suggester: 学習済みのラベル候補（指定した場合、確信度の高いプロンプトはAPIに送信しない）
         """
         self.api_key_manager = api_key_manager
         self.use_claude = use_claude
         self.use_openai = use_openai
         self.use_lm_studio = use_lm_studio
         self.settings = settings
+        self.prompts_per_request = max(1, prompts_per_request)
+        self.label_cache = label_cache
+        self.tag_dictionary = tag_dictionary
+        self.label_suggester = label_suggester
 
         # LM Studioの場合は設定から同時実行数を取得
         if use_lm_studio and settings:
@@ -46,18 +218,71 @@ class LabelGenerator:
         else:
             self.max_concurrent = max_concurrent
 
+        # SDKクライアントはセッション中に1つだけ作成して再利用（HTTP接続を維持）
+        self.client_pool = APIClientPool(api_key_manager)
+
+        # 並列処理で使用したレート制御（API名 → AdaptiveRateLimiter）
+        self.rate_limiters: Dict[str, AdaptiveRateLimiter] = {}
+        self.logger = get_logger()
+
+        # generate_labels_batch の実行中のみ設定する状態
+        self._label_applied_callback: Optional[Callable[[Prompt], None]] = None  # ラベル適用時の通知先
+        self._journal: Optional[LabelJobJournal] = None  # ジョブの記録
+        self._resume_batches: Dict[str, Dict[str, Optional[str]]] = {}  # 中断したジョブのバッチ
+        self._pending_batches: Set[str] = set()  # 結果を取得していないバッチ
+        self._cancel_event: Optional[threading.Event] = None  # キャンセル要求
+
+    def close(self):
+        """APIクライアントを閉じる（HTTP接続を解放）"""
+        self.client_pool.close()
+
+    def _get_settings(self):
+        """設定を取得（未指定の場合は一度だけ読み込み）"""
+        if self.settings is None:
+            from config.settings import Settings
+            self.settings = Settings()
+        return self.settings
+
+    def _get_tag_dictionary(self) -> TagDictionary:
+        """タグ辞書を取得（未指定の場合は一度だけ読み込み）"""
+        if self.tag_dictionary is None:
+            user_path = self._get_settings().get_data_dir() / TagDictionary.USER_FILENAME
+            self.tag_dictionary = TagDictionary.load(user_path)
+        return self.tag_dictionary
+
     def generate_labels_batch(
         self,
         prompts: List[Prompt],
         progress_callback=None,
-        mode: str = "auto"
+        mode: str = "auto",
+        journal: Optional[LabelJobJournal] = None,
+        label_callback: Optional[Callable[[Prompt], None]] = None,
+        cancel_event: Optional[threading.Event] = None
     ) -> Tuple[int, int, List[str]]:
         """プロンプトリストに対して一括でラベルを生成
 
+        ラベルキャッシュがある場合はキャッシュ済みのラベルを適用し、残りのみ生成する。
+        正規化後に同じテキストのプロンプトは1件だけ生成し、結果を他のプロンプトにも適用する。
+        学習済みのラベル候補がある場合は確信度の高い候補を適用し（label_source は "suggested"）、
+        確信度の低いプロンプトのみ生成する。生成したラベルは候補の学習にも加える。
+
+        journal を指定した場合は生成したラベルとBatch APIのバッチIDを逐次記録する。
+        中断後に再実行すると、記録済みのラベルを適用し、送信済みのバッチは再送信せずに結果を取得する
+        （プロンプトIDではなくプロンプト文字列で照合するため、同期で行がずれても別のプロンプトに適用しない）。
+        記録ファイルは記録済みのすべてのバッチの結果を取得できた時点で削除する
+        （Batch API以外のモードで実行した場合は、送信済みのバッチを次回まで残す）。
+
+        cancel_event を設定すると、同期処理は次のプロンプトの前で、Batch APIは送信・待機中に中断する
+        （送信済みのバッチは記録に残し、次回の実行で結果を取得する）。
+
         Args:
             prompts: Promptオブジェクトのリスト
             progress_callback: 進捗コールバック関数(current, total, message)
-            mode: 処理モード - "auto" (自動判定), "async" (並列処理), "batch" (Batch API), "sync" (同期処理)
+            mode: 処理モード - "auto" (自動判定), "async" (並列処理), "batch" (Batch API), "sync" (同期処理),
+                "dictionary" (タグ辞書のみ、APIを使用しない)
+            journal: ジョブの記録（オプション）
+            label_callback: ラベルを設定するたびに呼び出す関数(prompt)（ライブラリへの逐次保存用）
+            cancel_event: キャンセル要求を通知するイベント（オプション）
 
         Returns:
             (成功数, 失敗数, エラーメッセージリスト)
@@ -66,9 +291,144 @@ class LabelGenerator:
         target_prompts = [p for p in prompts if not p.label_ja or p.label_ja == p.prompt]
         total = len(target_prompts)
 
+        state = journal.load() if journal else None
+
         if total == 0:
+            if journal and not (state and state.batches):
+                journal.finish()
             return 0, 0, ["ラベル生成が必要なプロンプトがありません"]
 
+        labeled: Set[int] = set()
+
+        def on_label_applied(prompt: Prompt):
+            labeled.add(id(prompt))
+            if journal:
+                journal.record_label(
+                    prompt.id, make_label_cache_key(prompt.prompt), prompt.label_ja, prompt.label_source
+                )
+            if label_callback:
+                label_callback(prompt)
+
+        self._journal = journal
+        self._resume_batches = dict(state.batches) if state else {}
+        self._pending_batches = set(self._resume_batches)
+        self._cancel_event = cancel_event
+        self._label_applied_callback = label_callback
+        if journal:
+            journal.start(mode)
+
+        try:
+            success_count = 0
+            failure_count = 0
+            errors: List[str] = []
+
+            # 中断したジョブで生成済みのラベル、キャッシュ済みのラベルを適用
+            pending = []
+            for prompt in target_prompts:
+                resumed = state.labels.get(make_label_cache_key(prompt.prompt)) if state else None
+                if resumed:
+                    self._apply_label(prompt, *resumed)
+                    success_count += 1
+                    continue
+
+                entry = self.label_cache.get(prompt.prompt) if self.label_cache else None
+                if entry:
+                    self._apply_label(prompt, entry['label'], entry['source'])
+                    success_count += 1
+                else:
+                    pending.append(prompt)
+
+            # 同じテキストのプロンプトは1件だけ生成
+            groups: Dict[str, List[Prompt]] = {}
+            for prompt in pending:
+                groups.setdefault(normalize_prompt_text(prompt.prompt), []).append(prompt)
+
+            # 確信度の高いラベル候補があるプロンプトはAPIに送信しない
+            if self.label_suggester is not None:
+                for key, group in list(groups.items()):
+                    suggestion = self.label_suggester.suggest(group[0].prompt)
+                    if suggestion:
+                        for prompt in group:
+                            self._apply_label(prompt, suggestion.label, "suggested")
+                        success_count += len(group)
+                        del groups[key]
+
+            unique_prompts = [group[0] for group in groups.values()]
+
+            if unique_prompts:
+                self._label_applied_callback = on_label_applied
+                generated, failed, errors = self._generate_labels_by_mode(unique_prompts, progress_callback, mode)
+                success_count += generated
+                failure_count += failed
+
+                # 同じテキストのプロンプトに反映し、APIで生成したラベルをキャッシュ・ラベル候補の学習に追加
+                model = self._get_label_model()
+                for group in groups.values():
+                    head = group[0]
+                    if id(head) not in labeled:
+                        failure_count += len(group) - 1
+                        continue
+
+                    for duplicate in group[1:]:
+                        self._apply_label(duplicate, head.label_ja, head.label_source)
+                    success_count += len(group) - 1
+
+                    if (
+                        (self.label_cache is not None or self.label_suggester is not None)
+                        and head.label_source == "ai_generated"
+                    ):
+                        if self.label_cache is not None:
+                            self.label_cache.set(head.prompt, head.label_ja, head.label_source, model)
+                        if self.label_suggester is not None:
+                            self.label_suggester.learn(head)
+
+                if self.label_cache is not None:
+                    try:
+                        self.label_cache.save()
+                    except OSError as e:
+                        self.logger.warning(f"ラベルキャッシュの保存に失敗: {e}")
+                if self.label_suggester is not None:
+                    try:
+                        self.label_suggester.save()
+                    except OSError as e:
+                        self.logger.warning(f"ラベル候補の学習データの保存に失敗: {e}")
+
+            # 結果を取得していないバッチがあれば記録を残す（次回の実行で再開）
+            if journal and not self._pending_batches:
+                journal.finish()
+
+            return success_count, failure_count, errors
+
+        finally:
+            self._label_applied_callback = None
+            self._journal = None
+            self._resume_batches = {}
+            self._cancel_event = None
+            if journal:
+                journal.close()
+
+    def _generate_labels_by_mode(
+        self,
+        target_prompts: List[Prompt],
+        progress_callback=None,
+        mode: str = "auto"
+    ) -> Tuple[int, int, List[str]]:
+        """処理モードを選択してラベルを生成
+
+        Args:
+            target_prompts: 対象プロンプトのリスト
+            progress_callback: 進捗コールバック関数(current, total, message)
+            mode: 処理モード（generate_labels_batch と同じ）
+
+        Returns:
+            (成功数, 失敗数, エラーメッセージリスト)
+        """
+        total = len(target_prompts)
+
+        # APIを使用しない場合はタグ辞書のみ（ネットワーク不要、1件ずつの進捗通知も省略）
+        if mode == "dictionary" or not self._has_api():
+            return self._generate_labels_with_dictionary(target_prompts, progress_callback)
+
         # モード自動判定
         if mode == "auto":
             if total > 1000:
@@ -86,12 +446,50 @@ class LabelGenerator:
         else:  # sync
             return self._generate_labels_sync(target_prompts, progress_callback)
 
+    def _generate_labels_with_dictionary(
+        self,
+        target_prompts: List[Prompt],
+        progress_callback=None
+    ) -> Tuple[int, int, List[str]]:
+        """タグ辞書のみでラベルを生成（オフライン）
+
+        Args:
+            target_prompts: 対象プロンプトのリスト
+            progress_callback: 進捗コールバック関数(current, total, message)
+
+        Returns:
+            (成功数, 失敗数, エラーメッセージリスト)
+        """
+        total = len(target_prompts)
+        interval = max(1, total // 100)
+        for i, prompt in enumerate(target_prompts, 1):
+            self._apply_label(prompt, self._generate_with_dictionary(prompt.prompt), "auto_extract")
+            if progress_callback and (i % interval == 0 or i == total):
+                progress_callback(i, total, f"[辞書] ラベル生成中: {i}/{total}")
+        return total, 0, []
+
+    def _apply_label(self, prompt: Prompt, label_ja: str, label_source: str):
+        """プロンプトにラベルを設定
+
+        Args:
+            prompt: Promptオブジェクト
+            label_ja: ラベル
+            label_source: ラベルの生成方法
+        """
+        prompt.label_ja = label_ja
+        prompt.label_source = label_source
+        if self._label_applied_callback:
+            self._label_applied_callback(prompt)
+
     def _generate_labels_sync(
         self,
         target_prompts: List[Prompt],
         progress_callback=None
     ) -> Tuple[int, int, List[str]]:
-        """同期処理でラベルを生成（従来の実装）
+        """同期処理でラベルを生成
+
+        prompts_per_request が2以上の場合は複数のプロンプトを1リクエストにまとめ、
+        ラベルを取得できなかったプロンプトのみ1件ずつ再送信する。
 
         Args:
             target_prompts: 対象プロンプトのリスト
@@ -104,28 +502,114 @@ class LabelGenerator:
         failure_count = 0
         errors = []
         total = len(target_prompts)
+        completed = 0
 
-        for i, prompt in enumerate(target_prompts):
-            if progress_callback:
-                progress_callback(i + 1, total, f"[同期] ラベル生成中: {prompt.prompt[:30]}...")
+        for batch in self._pack_prompts(target_prompts):
+            if self._is_cancelled():
+                failure_count += total - completed
+                errors.append("ラベル生成がキャンセルされました")
+                break
 
-            try:
-                # ラベル生成
-                label_ja = self.generate_label(prompt.prompt)
+            packed_labels = self._generate_labels_packed([p.prompt for p in batch]) if len(batch) > 1 else {}
 
-                if label_ja:
-                    prompt.label_ja = label_ja
-                    prompt.label_source = self._get_label_source()
-                    success_count += 1
-                else:
+            for i, prompt in enumerate(batch, 1):
+                completed += 1
+                if progress_callback:
+                    progress_callback(completed, total, f"[同期] ラベル生成中: {prompt.prompt[:30]}...")
+
+                try:
+                    # ラベル生成（まとめて取得できなかった場合は1件ずつ）
+                    if i in packed_labels:
+                        label_ja, label_source = packed_labels[i], "ai_generated"
+                    else:
+                        label_ja, label_source = self._generate_label_with_source(prompt.prompt)
+
+                    if label_ja:
+                        self._apply_label(prompt, label_ja, label_source)
+                        success_count += 1
+                    else:
+                        failure_count += 1
+                        errors.append(f"ラベル生成失敗: {prompt.prompt[:30]}...")
+
+                except Exception as e:
                     failure_count += 1
-                    errors.append(f"ラベル生成失敗: {prompt.prompt[:30]}...")
+                    errors.append(f"エラー: {prompt.prompt[:30]}... - {str(e)}")
+
+        return success_count, failure_count, errors
+
+    def _pack_prompts(self, target_prompts: List[Prompt]) -> List[List[Prompt]]:
+        """プロンプトを1リクエスト分ずつに分割
+
+        prompts_per_request 件、または入力トークン数が PACKED_MAX_INPUT_TOKENS に達した時点で区切る。
+
+        Args:
+            target_prompts: 対象プロンプトのリスト
+
+        Returns:
+            1リクエスト分のプロンプトのリストのリスト
+        """
+        if self.prompts_per_request <= 1:
+            return [[prompt] for prompt in target_prompts]
+
+        estimator = CostEstimator()
+        batches = []
+        current: List[Prompt] = []
+        tokens = 0
+        for prompt in target_prompts:
+            prompt_tokens = estimator.estimate_tokens(prompt.prompt) + 5  # 5は番号・改行用
+            if current and (
+                len(current) >= self.prompts_per_request
+                or tokens + prompt_tokens > self.PACKED_MAX_INPUT_TOKENS
+            ):
+                batches.append(current)
+                current = []
+                tokens = 0
+            current.append(prompt)
+            tokens += prompt_tokens
+        if current:
+            batches.append(current)
+        return batches
+
+    def _generate_labels_packed(self, prompts: List[str]) -> Dict[int, str]:
+        """複数のプロンプトのラベルを1リクエストで生成
+
+        Claude API → OpenAI API → LM Studio の順に試し、有効なラベルを1件以上取得できた時点で終了する。
 
+        Args:
+            prompts: プロンプト文字列のリスト
+
+        Returns:
+            番号（1から） → ラベル の辞書（取得できなかった番号は含まない）
+        """
+        user_message = _build_packed_user_message(prompts)
+        max_tokens = PACKED_OUTPUT_TOKENS_PER_ITEM * len(prompts) + 20
+
+        for name, chat in self._get_chat_backends():
+            try:
+                text = chat(PACKED_SYSTEM_PROMPT, user_message, max_tokens)
             except Exception as e:
-                failure_count += 1
-                errors.append(f"エラー: {prompt.prompt[:30]}... - {str(e)}")
+                print(f"[Warning] {name} error: {e}")
+                continue
 
-        return success_count, failure_count, errors
+            labels = _parse_packed_labels(text or "", len(prompts))
+            if labels:
+                return labels
+        return {}
+
+    def _get_chat_backends(self) -> List[Tuple[str, Callable[[str, str, int], Optional[str]]]]:
+        """使用するAPIの送信関数を取得（フォールバック順）
+
+        Returns:
+            [(API名, 送信関数(system_prompt, user_message, max_tokens))]
+        """
+        backends = []
+        if self.use_claude and self.api_key_manager:
+            backends.append(("Claude API", self._chat_with_claude))
+        if self.use_openai and self.api_key_manager:
+            backends.append(("OpenAI API", self._chat_with_openai))
+        if self.use_lm_studio:
+            backends.append(("LM Studio", self._chat_with_lm_studio))
+        return backends
 
     def _generate_labels_async(
         self,
@@ -162,6 +646,11 @@ class LabelGenerator:
     ) -> Tuple[int, int, List[str]]:
         """非同期でラベルを一括生成
 
+        APIごとに非同期クライアントを作成し、AdaptiveRateLimiter を通して呼び出す。
+        prompts_per_request が2以上の場合は複数のプロンプトを1リクエストにまとめ、
+        ラベルを取得できなかったプロンプトのみ1件ずつ再送信する。
+        すべてのAPIで失敗した場合は辞書ベースでラベルを生成する。
+
         Args:
             target_prompts: 対象プロンプトのリスト
             progress_callback: 進捗コールバック関数(current, total, message)
@@ -175,49 +664,251 @@ class LabelGenerator:
         total = len(target_prompts)
         completed = 0
 
-        # セマフォで同時実行数を制限
-        semaphore = asyncio.Semaphore(self.max_concurrent)
+        backends, clients = self._create_async_backends()
+        self.rate_limiters = {name: limiter for name, limiter, _ in backends}
 
-        async def generate_with_semaphore(prompt: Prompt):
-            nonlocal success_count, failure_count, completed
+        async def request_labels(prompts: List[str]) -> Dict[int, str]:
+            """APIをフォールバック順に呼び出してラベルを取得"""
+            packed = len(prompts) > 1
+            if packed:
+                system_prompt = PACKED_SYSTEM_PROMPT
+                user_message = _build_packed_user_message(prompts)
+                max_tokens = PACKED_OUTPUT_TOKENS_PER_ITEM * len(prompts) + 20
+            else:
+                system_prompt = LABEL_SYSTEM_PROMPT
+                user_message = _build_user_message(prompts[0])
+                max_tokens = 50
 
-            async with semaphore:
+            for name, limiter, chat in backends:
                 try:
-                    # 同期関数を別スレッドで実行
-                    loop = asyncio.get_event_loop()
-                    label_ja = await loop.run_in_executor(
-                        None,
-                        self.generate_label,
-                        prompt.prompt
-                    )
+                    text = await limiter.call(lambda: chat(system_prompt, user_message, max_tokens))
+                except Exception as e:
+                    self.logger.warning(f"{name} でのラベル生成に失敗: {e}")
+                    continue
 
-                    if label_ja:
-                        prompt.label_ja = label_ja
-                        prompt.label_source = self._get_label_source()
-                        success_count += 1
-                    else:
-                        failure_count += 1
-                        errors.append(f"ラベル生成失敗: {prompt.prompt[:30]}...")
+                if packed:
+                    labels = _parse_packed_labels(text or "", len(prompts))
+                else:
+                    label = _sanitize_label(text) if text else None
+                    labels = {1: label} if label else {}
+                if labels:
+                    return labels
+            return {}
+
+        def finish(
+            prompt: Prompt,
+            label_ja: Optional[str],
+            label_source: str = "ai_generated",
+            error: Optional[str] = None
+        ):
+            nonlocal success_count, failure_count, completed
 
-                except Exception as e:
-                    failure_count += 1
-                    errors.append(f"エラー: {prompt.prompt[:30]}... - {str(e)}")
+            if label_ja:
+                self._apply_label(prompt, label_ja, label_source)
+                success_count += 1
+            else:
+                failure_count += 1
+                errors.append(error or f"ラベル生成失敗: {prompt.prompt[:30]}...")
 
-                finally:
-                    completed += 1
-                    if progress_callback:
-                        progress_callback(
-                            completed,
-                            total,
-                            f"[並列 {self.max_concurrent}] ラベル生成中: {prompt.prompt[:30]}..."
-                        )
+            completed += 1
+            if progress_callback:
+                concurrency = backends[0][1].concurrency if backends else 1
+                progress_callback(
+                    completed,
+                    total,
+                    f"[並列 {concurrency}] ラベル生成中: {prompt.prompt[:30]}..."
+                )
+
+        async def generate_one(prompt: Prompt):
+            try:
+                labels = await request_labels([prompt.prompt])
+                if 1 in labels:
+                    finish(prompt, labels[1])
+                else:
+                    # すべてのAPIで失敗した場合は辞書ベース（AI生成としては扱わない）
+                    finish(prompt, self._generate_with_dictionary(prompt.prompt), "auto_extract")
+            except Exception as e:
+                finish(prompt, None, error=f"エラー: {prompt.prompt[:30]}... - {str(e)}")
+
+        async def generate(batch: List[Prompt]):
+            if len(batch) == 1:
+                await generate_one(batch[0])
+                return
+
+            labels = await request_labels([p.prompt for p in batch])
+            retry = []
+            for i, prompt in enumerate(batch, 1):
+                if i in labels:
+                    finish(prompt, labels[i])
+                else:
+                    retry.append(prompt)
 
-        # すべてのタスクを並列実行
-        tasks = [generate_with_semaphore(prompt) for prompt in target_prompts]
-        await asyncio.gather(*tasks)
+            # まとめて取得できなかったプロンプトのみ1件ずつ再送信
+            await asyncio.gather(*(generate_one(prompt) for prompt in retry))
+
+        try:
+            # 同時実行数は各APIの AdaptiveRateLimiter が制御する
+            await asyncio.gather(*(generate(batch) for batch in self._pack_prompts(target_prompts)))
+        finally:
+            for client in clients:
+                try:
+                    await client.close()
+                except Exception as e:
+                    self.logger.debug(f"非同期クライアントのクローズに失敗: {e}")
 
         return success_count, failure_count, errors
 
+    def _create_async_backends(
+        self
+    ) -> Tuple[List[Tuple[str, AdaptiveRateLimiter, Callable[[str, str, int], Awaitable[Optional[str]]]]], list]:
+        """並列処理で使用するAPIを準備（フォールバック順）
+
+        非同期クライアントは実行中のイベントループに結び付くため、並列処理ごとに作成して閉じる。
+        SDK内部の自動再試行は無効にし、レート制限は AdaptiveRateLimiter で扱う。
+
+        Returns:
+            ([(API名, AdaptiveRateLimiter, 送信関数(system_prompt, user_message, max_tokens))],
+             終了時に閉じるクライアントのリスト)
+        """
+        backends = []
+        clients = []
+
+        def add(name: str, chat, initial: int, maximum: int):
+            backends.append((name, AdaptiveRateLimiter(
+                name,
+                requests_per_second=self.ASYNC_REQUESTS_PER_SECOND,
+                initial_concurrency=initial,
+                max_concurrency=maximum,
+                max_retries=self.ASYNC_MAX_RETRIES
+            ), chat))
+
+        if self.use_claude and self.api_key_manager:
+            api_key = self.api_key_manager.get_api_key("claude")
+            if api_key:
+                try:
+                    import anthropic
+                    client = anthropic.AsyncAnthropic(api_key=api_key, max_retries=0)
+                    clients.append(client)
+                    add("Claude API", lambda *args: self._achat_with_claude(client, *args),
+                        self.max_concurrent, self.ASYNC_MAX_CONCURRENT)
+                except ImportError as e:
+                    self.logger.warning(f"anthropicパッケージを読み込めません: {e}")
+
+        if self.use_openai and self.api_key_manager:
+            api_key = self.api_key_manager.get_api_key("openai")
+            if api_key:
+                try:
+                    import openai
+                    openai_client = openai.AsyncOpenAI(api_key=api_key, max_retries=0)
+                    clients.append(openai_client)
+                    add("OpenAI API", lambda *args: self._achat_with_openai(openai_client, *args),
+                        self.max_concurrent, self.ASYNC_MAX_CONCURRENT)
+                except ImportError as e:
+                    self.logger.warning(f"openaiパッケージを読み込めません: {e}")
+
+        if self.use_lm_studio:
+            settings = self._get_settings()
+            try:
+                import openai
+                # LM Studioはダミーキーで動作
+                lm_studio_client = openai.AsyncOpenAI(
+                    base_url=settings.lm_studio_endpoint, api_key="lm-studio",
+                    max_retries=0, timeout=self.REQUEST_TIMEOUT
+                )
+                clients.append(lm_studio_client)
+                # ローカルLLMは設定した同時実行数（VRAMに応じた値）を上限とする
+                add("LM Studio", lambda *args: self._achat_with_lm_studio(lm_studio_client, *args),
+                    settings.lm_studio_max_concurrent, settings.lm_studio_max_concurrent)
+            except ImportError as e:
+                self.logger.warning(f"openaiパッケージを読み込めません: {e}")
+
+        return backends, clients
+
+    async def _achat_with_claude(self, client, system_prompt: str, user_message: str, max_tokens: int) -> str:
+        """Claude API（非同期クライアント）にメッセージを送信
+
+        Args:
+            client: anthropic.AsyncAnthropic
+            system_prompt: システムプロンプト
+            user_message: ユーザーメッセージ
+            max_tokens: 最大出力トークン数
+
+        Returns:
+            応答テキスト
+
+        Raises:
+            RetryableError: レート制限・一時的なエラーの場合
+        """
+        try:
+            message = await client.messages.create(
+                model=CLAUDE_LABEL_MODEL,
+                max_tokens=max_tokens,
+                system=system_prompt,
+                messages=[
+                    {"role": "user", "content": user_message}
+                ]
+            )
+        except Exception as e:
+            raise _to_retryable_error(e) or e
+        return message.content[0].text
+
+    async def _achat_with_openai(self, client, system_prompt: str, user_message: str, max_tokens: int) -> str:
+        """OpenAI API（非同期クライアント）にメッセージを送信
+
+        Args:
+            client: openai.AsyncOpenAI
+            system_prompt: システムプロンプト
+            user_message: ユーザーメッセージ
+            max_tokens: 最大出力トークン数
+
+        Returns:
+            応答テキスト
+
+        Raises:
+            RetryableError: レート制限・一時的なエラーの場合
+        """
+        try:
+            response = await client.chat.completions.create(
+                model=OPENAI_LABEL_MODEL,
+                max_tokens=max_tokens,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_message}
+                ]
+            )
+        except Exception as e:
+            raise _to_retryable_error(e) or e
+        return response.choices[0].message.content
+
+    async def _achat_with_lm_studio(self, client, system_prompt: str, user_message: str, max_tokens: int) -> str:
+        """LM Studio（OpenAI互換API、非同期クライアント）にメッセージを送信
+
+        Args:
+            client: openai.AsyncOpenAI（base_urlにLM Studioのエンドポイントを指定）
+            system_prompt: システムプロンプト
+            user_message: ユーザーメッセージ
+            max_tokens: 最大出力トークン数
+
+        Returns:
+            応答テキスト
+
+        Raises:
+            RetryableError: レート制限・一時的なエラーの場合
+        """
+        try:
+            response = await client.chat.completions.create(
+                model=self._get_settings().lm_studio_model,
+                max_tokens=max_tokens,
+                temperature=0.7,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_message}
+                ]
+            )
+        except Exception as e:
+            raise _to_retryable_error(e) or e
+        return response.choices[0].message.content
+
     def _generate_labels_batch_api(
         self,
         target_prompts: List[Prompt],
@@ -225,6 +916,11 @@ class LabelGenerator:
     ) -> Tuple[int, int, List[str]]:
         """Claude Batch APIでラベルを生成（大量処理向け、50%コスト削減）
 
+        対象を BATCH_MAX_REQUESTS 件・BATCH_MAX_BYTES ごとのバッチに分割して送信し（APIが並列に処理）、
+        すべてのバッチを指数バックオフでポーリングする。完了したバッチから順に結果を適用する。
+        中断したジョブの記録にあるバッチは再送信せずに結果を取得し、プロンプト文字列のキーが一致する
+        対象プロンプトにのみ適用する（対象がないバッチも、記録を削除できるように結果を取得済みとする）。
+
         Args:
             target_prompts: 対象プロンプトのリスト
             progress_callback: 進捗コールバック関数(current, total, message)
@@ -232,165 +928,236 @@ class LabelGenerator:
         Returns:
             (成功数, 失敗数, エラーメッセージリスト)
         """
-        success_count = 0
-        failure_count = 0
         errors = []
         total = len(target_prompts)
 
-        try:
-            import anthropic
-            import json
-            import time
-            from pathlib import Path
-            import tempfile
+        # 送信済みのバッチ（バッチID → {custom_id: プロンプト文字列のキー}）と結果を取得したバッチ
+        batches: Dict[str, Dict[str, Optional[str]]] = {}
+        collected: Set[str] = set()
+        labeled: Set[str] = set()
 
-            api_key = self.api_key_manager.get_api_key("claude")
-            if not api_key:
+        try:
+            client = self.client_pool.get_claude_client()
+            if not client:
                 errors.append("Claude APIキーが設定されていません")
                 return 0, total, errors
 
-            client = anthropic.Anthropic(api_key=api_key)
+            # 対象プロンプトは同じテキストが1件ずつのため、キーで一意に引ける
+            prompts_by_key = {make_label_cache_key(prompt.prompt): prompt for prompt in target_prompts}
 
-            if progress_callback:
-                progress_callback(0, total, "[Batch API] リクエストを準備中...")
+            batches.update(self._resume_batches)
+            submitted = {key for requests in batches.values() for key in requests.values()}
 
-            # システムプロンプト
-            system_prompt = """あなたはStable Diffusion用のプロンプトに日本語ラベルを付けるアシスタントです。
-以下のルールに従って、簡潔で分かりやすい日本語ラベルを生成してください：
+            if batches and progress_callback:
+                progress_callback(0, total, f"[Batch API] 中断したジョブを再開: {len(batches)}バッチ")
 
-1. 最も重要な要素を3-5文字程度で表現
-2. 平易な日本語を使用（カタカナ混在OK）
-3. ラベルのみを出力（説明不要）
+            # 未送信のプロンプトをバッチに分割して送信
+            new_prompts = [prompt for key, prompt in prompts_by_key.items() if key not in submitted]
+            for shard in self._iter_batch_shards(new_prompts):
+                if self._is_cancelled():
+                    break
+                batch_id, requests = self._submit_label_batch(client, shard)
+                batches[batch_id] = requests
+                if progress_callback:
+                    progress_callback(
+                        0, total, f"[Batch API] バッチを送信: {len(batches)}件目（{len(shard)}プロンプト）"
+                    )
 
-例：
-- "clothed masturbation" → "服着たままオナニー"
-- "school infirmary, beds with curtain dividers" → "保健室"
-- "classroom interior, desks in rows" → "教室"
-- "sitting, spread legs" → "座り開脚"
-"""
+            def collect(batch_id: str):
+                """完了したバッチの結果をプロンプトに適用"""
+                requests = batches[batch_id]
+                for result in client.messages.batches.results(batch_id):
+                    prompt = prompts_by_key.get(requests.get(result.custom_id))
+                    if prompt is None or prompt.id in labeled:
+                        continue
+                    if result.result.type == "succeeded":
+                        label = _sanitize_label(result.result.message.content[0].text)
+                        if label:
+                            self._apply_label(prompt, label, "ai_generated")
+                            labeled.add(prompt.id)
+                collected.add(batch_id)
+                self._pending_batches.discard(batch_id)
+
+            errors.extend(self._wait_for_label_batches(
+                client, list(batches), collect, lambda: len(labeled), total, progress_callback
+            ))
+
+            for prompt in target_prompts:
+                if prompt.id not in labeled:
+                    errors.append(f"ラベル生成失敗: {prompt.prompt[:30]}...")
 
-            # バッチリクエスト作成
-            requests = []
-            for i, prompt in enumerate(target_prompts):
-                requests.append({
-                    "custom_id": f"prompt_{i}",
-                    "params": {
-                        "model": "claude-3-haiku-20240307",
-                        "max_tokens": 50,
-                        "system": system_prompt,
-                        "messages": [
-                            {"role": "user", "content": f"プロンプト: {prompt.prompt}\n\n日本語ラベル:"}
-                        ]
-                    }
-                })
-
-            # 一時ファイルに保存
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.jsonl', delete=False, encoding='utf-8') as f:
-                for req in requests:
-                    f.write(json.dumps(req, ensure_ascii=False) + '\n')
-                batch_file_path = f.name
+            return len(labeled), total - len(labeled), errors
 
-            if progress_callback:
-                progress_callback(0, total, "[Batch API] バッチジョブを送信中...")
+        except Exception as e:
+            # 結果を取得できなかったバッチは記録を残す（次回再開）
+            self._pending_batches.update(set(batches) - collected)
 
-            # バッチジョブ作成
-            with open(batch_file_path, 'rb') as f:
-                message_batch = client.messages.batches.create(
-                    requests=requests
-                )
+            import traceback
+            error_detail = traceback.format_exc()
+            errors.append(f"Batch API エラー: {str(e)}\n\n{error_detail}")
+            return len(labeled), total - len(labeled), errors
 
-            batch_id = message_batch.id
+    def _iter_batch_shards(self, prompts: List[Prompt]) -> Iterator[List[Prompt]]:
+        """Batch APIの1バッチ分ずつにプロンプトを分割
 
-            if progress_callback:
-                progress_callback(0, total, f"[Batch API] ジョブID: {batch_id}\n処理待機中...")
+        Args:
+            prompts: プロンプトのリスト
 
-            # バッチ処理完了を待機（ポーリング）
-            max_wait_time = 3600  # 最大1時間
-            poll_interval = 10  # 10秒ごとにチェック
-            elapsed_time = 0
+        Yields:
+            BATCH_MAX_REQUESTS 件・BATCH_MAX_BYTES 以下（推定）のプロンプトのリスト
+        """
+        # システムプロンプト・パラメータ等の1リクエストあたりのサイズ
+        overhead = len(LABEL_SYSTEM_PROMPT.encode('utf-8')) + 300
+
+        shard: List[Prompt] = []
+        size = 0
+        for prompt in prompts:
+            request_size = overhead + len(prompt.prompt.encode('utf-8'))
+            if shard and (len(shard) >= self.BATCH_MAX_REQUESTS or size + request_size > self.BATCH_MAX_BYTES):
+                yield shard
+                shard = []
+                size = 0
+            shard.append(prompt)
+            size += request_size
+        if shard:
+            yield shard
+
+    def _submit_label_batch(self, client, prompts: List[Prompt]) -> Tuple[str, Dict[str, str]]:
+        """Batch APIにバッチジョブを送信し、バッチIDを記録
+
+        リクエストはこのバッチ分のみ作成する（全件分を同時にメモリに保持しない）。
 
-            while elapsed_time < max_wait_time:
-                batch_status = client.messages.batches.retrieve(batch_id)
+        Args:
+            client: anthropic.Anthropic
+            prompts: 送信するプロンプトのリスト
+
+        Returns:
+            (バッチID, {custom_id: プロンプト文字列のキー})
+        """
+        requests = {
+            f"prompt_{i}": (prompt.id, make_label_cache_key(prompt.prompt)) for i, prompt in enumerate(prompts)
+        }
+        message_batch = client.messages.batches.create(requests=[
+            {
+                "custom_id": f"prompt_{i}",
+                "params": {
+                    "model": CLAUDE_LABEL_MODEL,
+                    "max_tokens": 50,
+                    "system": LABEL_SYSTEM_PROMPT,
+                    "messages": [
+                        {"role": "user", "content": _build_user_message(prompt.prompt)}
+                    ]
+                }
+            }
+            for i, prompt in enumerate(prompts)
+        ])
+
+        # 再送信すると料金が二重に発生するため、送信直後に記録
+        if self._journal:
+            self._journal.record_batch(message_batch.id, requests)
+
+        return message_batch.id, {custom_id: key for custom_id, (_, key) in requests.items()}
+
+    def _wait_for_label_batches(
+        self,
+        client,
+        batch_ids: List[str],
+        on_batch_ended: Callable[[str], None],
+        get_completed: Callable[[], int],
+        total: int,
+        progress_callback=None
+    ) -> List[str]:
+        """すべてのバッチの完了を待機（指数バックオフでポーリング）
+
+        完了したバッチはその時点で on_batch_ended を呼び出す。
+        送信・ポーリング・結果の取得はブロッキングするため、UIからはワーカースレッドで呼び出す。
+        待機中もキャンセル要求があればすぐに中断する。
+        BATCH_MAX_WAIT を超えた場合、またはキャンセルされた場合、未完了のバッチは _pending_batches に追加する
+        （記録を残して次回再開）。
 
+        Args:
+            client: anthropic.Anthropic
+            batch_ids: バッチIDのリスト
+            on_batch_ended: バッチ完了時に呼び出す関数(batch_id)
+            get_completed: 適用済みのラベル数を返す関数（進捗表示用）
+            total: 進捗表示用の総数
+            progress_callback: 進捗コールバック関数(current, total, message)
+
+        Returns:
+            エラーメッセージのリスト
+        """
+        import time
+
+        errors = []
+        pending = list(batch_ids)
+        started = time.monotonic()
+        poll_interval = self.BATCH_POLL_INITIAL
+
+        while pending:
+            in_progress = 0
+            for batch_id in list(pending):
+                batch_status = client.messages.batches.retrieve(batch_id)
                 status = batch_status.processing_status
 
                 if status == "ended":
-                    # 完了
-                    break
+                    pending.remove(batch_id)
+                    on_batch_ended(batch_id)
+                    # 完了が続く間は間隔を短く保つ
+                    poll_interval = self.BATCH_POLL_INITIAL
                 elif status in ["canceling", "canceled"]:
-                    errors.append("バッチジョブがキャンセルされました")
-                    return 0, total, errors
+                    pending.remove(batch_id)
+                    self._pending_batches.discard(batch_id)
+                    errors.append(f"バッチジョブがキャンセルされました: {batch_id}")
                 elif status == "expired":
-                    errors.append("バッチジョブがタイムアウトしました")
-                    return 0, total, errors
-
-                # 進捗表示
-                processing_count = getattr(batch_status.request_counts, 'processing', 0) or 0
-                succeeded_count = getattr(batch_status.request_counts, 'succeeded', 0) or 0
-                processed = processing_count + succeeded_count
-                if progress_callback:
-                    progress_callback(
-                        processed,
-                        total,
-                        f"[Batch API] 処理中... ({status})\n処理済み: {processed}/{total}"
-                    )
+                    pending.remove(batch_id)
+                    self._pending_batches.discard(batch_id)
+                    errors.append(f"バッチジョブが期限切れになりました: {batch_id}")
+                else:
+                    counts = batch_status.request_counts
+                    in_progress += (getattr(counts, 'succeeded', 0) or 0) + (getattr(counts, 'errored', 0) or 0)
 
-                time.sleep(poll_interval)
-                elapsed_time += poll_interval
+            if not pending:
+                break
 
-            if elapsed_time >= max_wait_time:
-                errors.append("バッチ処理がタイムアウトしました")
-                return 0, total, errors
+            if time.monotonic() - started >= self.BATCH_MAX_WAIT:
+                self._pending_batches.update(pending)
+                errors.append(f"バッチ処理がタイムアウトしました（次回の実行で再開します: {', '.join(pending)}）")
+                break
 
-            # 結果取得
             if progress_callback:
-                progress_callback(total, total, "[Batch API] 結果を取得中...")
-
-            results = client.messages.batches.results(batch_id)
-
-            # 結果を各プロンプトに適用
-            result_map = {}
-            for result in results:
-                custom_id = result.custom_id
-                if result.result.type == "succeeded":
-                    message = result.result.message
-                    label = message.content[0].text.strip()
+                processed = min(total, get_completed() + in_progress)
+                progress_callback(
+                    processed,
+                    total,
+                    f"[Batch API] 処理中... 残り{len(pending)}/{len(batch_ids)}バッチ\n処理済み: {processed}/{total}"
+                )
 
-                    # サニタイズ
-                    import re
-                    label = re.sub(r'[\n\r]', '', label)
-                    label = label.strip('"').strip("'").strip()
+            if self._sleep_between_polls(poll_interval):
+                self._pending_batches.update(pending)
+                errors.append(f"ラベル生成がキャンセルされました（次回の実行で再開します: {', '.join(pending)}）")
+                break
+            poll_interval = min(poll_interval * 2, self.BATCH_POLL_MAX)
 
-                    result_map[custom_id] = label
-                else:
-                    result_map[custom_id] = None
+        return errors
 
-            # プロンプトに適用
-            for i, prompt in enumerate(target_prompts):
-                custom_id = f"prompt_{i}"
-                label = result_map.get(custom_id)
+    def _sleep_between_polls(self, interval: float) -> bool:
+        """次のポーリングまで待機（キャンセル要求があれば待機を中断）
 
-                if label:
-                    prompt.label_ja = label
-                    prompt.label_source = "ai_generated"
-                    success_count += 1
-                else:
-                    failure_count += 1
-                    errors.append(f"ラベル生成失敗: {prompt.prompt[:30]}...")
-
-            # 一時ファイル削除
-            try:
-                Path(batch_file_path).unlink()
-            except:
-                pass
+        Args:
+            interval: 待機時間（秒）
 
-            return success_count, failure_count, errors
+        Returns:
+            キャンセルされた場合True
+        """
+        if self._cancel_event is None:
+            import time
+            time.sleep(interval)
+            return False
+        return self._cancel_event.wait(interval)
 
-        except Exception as e:
-            import traceback
-            error_detail = traceback.format_exc()
-            errors.append(f"Batch API エラー: {str(e)}\n\n{error_detail}")
-            return 0, total, errors
+    def _is_cancelled(self) -> bool:
+        """キャンセル要求があるか"""
+        return self._cancel_event is not None and self._cancel_event.is_set()
 
     def generate_label(self, prompt: str) -> Optional[str]:
         """プロンプトから日本語ラベルを生成
@@ -401,26 +1168,38 @@ class LabelGenerator:
         Returns:
             日本語ラベル、生成失敗時はNone
         """
+        return self._generate_label_with_source(prompt)[0]
+
+    def _generate_label_with_source(self, prompt: str) -> Tuple[Optional[str], str]:
+        """プロンプトから日本語ラベルを生成し、生成方法とともに返す
+
+        Args:
+            prompt: プロンプト文字列
+
+        Returns:
+            (日本語ラベル（生成失敗時はNone）, label_source)
+            APIで生成した場合は "ai_generated"、辞書ベースの場合は "auto_extract"
+        """
         # ステップ1: Claude API（優先）
         if self.use_claude and self.api_key_manager:
             label = self._generate_with_claude(prompt)
             if label:
-                return label
+                return label, "ai_generated"
 
         # ステップ2: OpenAI API（次点）
         if self.use_openai and self.api_key_manager:
             label = self._generate_with_openai(prompt)
             if label:
-                return label
+                return label, "ai_generated"
 
         # ステップ3: LM Studio（フォールバック）
         if self.use_lm_studio:
             label = self._generate_with_lm_studio(prompt)
             if label:
-                return label
+                return label, "ai_generated"
 
         # ステップ4: 辞書ベース（最終手段）
-        return self._generate_with_dictionary(prompt)
+        return self._generate_with_dictionary(prompt), "auto_extract"
 
     def _generate_with_claude(self, prompt: str) -> Optional[str]:
         """Claude APIで日本語ラベルを生成
@@ -432,47 +1211,8 @@ class LabelGenerator:
             日本語ラベル、失敗時はNone
         """
         try:
-            import anthropic
-
-            api_key = self.api_key_manager.get_api_key("claude")
-            if not api_key:
-                return None
-
-            client = anthropic.Anthropic(api_key=api_key)
-
-            # プロンプト作成
-            system_prompt = """あなたはStable Diffusion用のプロンプトに日本語ラベルを付けるアシスタントです。
-以下のルールに従って、簡潔で分かりやすい日本語ラベルを生成してください：
-
-1. 最も重要な要素を3-5文字程度で表現
-2. 平易な日本語を使用（カタカナ混在OK）
-3. ラベルのみを出力（説明不要）
-
-例：
-- "clothed masturbation" → "服着たままオナニー"
-- "school infirmary, beds with curtain dividers" → "保健室"
-- "classroom interior, desks in rows" → "教室"
-- "sitting, spread legs" → "座り開脚"
-"""
-
-            message = client.messages.create(
-                model="claude-3-haiku-20240307",  # コスト効率の良いHaikuを使用
-                max_tokens=50,
-                system=system_prompt,
-                messages=[
-                    {"role": "user", "content": f"プロンプト: {prompt}\n\n日本語ラベル:"}
-                ]
-            )
-
-            # レスポンス抽出
-            label = message.content[0].text.strip()
-
-            # サニタイズ（改行や余分な文字を削除）
-            label = re.sub(r'[\n\r]', '', label)
-            label = label.strip('"').strip("'").strip()
-
-            return label if label else None
-
+            text = self._chat_with_claude(LABEL_SYSTEM_PROMPT, _build_user_message(prompt), 50)
+            return _sanitize_label(text) if text else None
         except Exception as e:
             print(f"[Warning] Claude API error: {e}")
             return None
@@ -487,48 +1227,8 @@ class LabelGenerator:
             日本語ラベル、失敗時はNone
         """
         try:
-            import openai
-
-            api_key = self.api_key_manager.get_api_key("openai")
-            if not api_key:
-                return None
-
-            client = openai.OpenAI(api_key=api_key)
-
-            # プロンプト作成
-            system_prompt = """あなたはStable Diffusion用のプロンプトに日本語ラベルを付けるアシスタントです。
-以下のルールに従って、簡潔で分かりやすい日本語ラベルを生成してください：
-
-1. 最も重要な要素を3-5文字程度で表現
-2. 平易な日本語を使用（カタカナ混在OK）
-3. ラベルのみを出力（説明不要）
-
-例：
-- "clothed masturbation" → "服着たままオナニー"
-- "school infirmary, beds with curtain dividers" → "保健室"
-- "classroom interior, desks in rows" → "教室"
-- "sitting, spread legs" → "座り開脚"
-"""
-
-            response = client.chat.completions.create(
-                model="gpt-3.5-turbo",  # コスト効率の良いgpt-3.5-turboを使用
-                max_tokens=50,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": f"プロンプト: {prompt}\n\n日本語ラベル:"}
-                ]
-            )
-
-            # レスポンス抽出
-            label = response.choices[0].message.content.strip()
-
-            # サニタイズ（改行や余分な文字を削除）
-            import re
-            label = re.sub(r'[\n\r]', '', label)
-            label = label.strip('"').strip("'").strip()
-
-            return label if label else None
-
+            text = self._chat_with_openai(LABEL_SYSTEM_PROMPT, _build_user_message(prompt), 50)
+            return _sanitize_label(text) if text else None
         except Exception as e:
             print(f"[Warning] OpenAI API error: {e}")
             return None
@@ -543,86 +1243,132 @@ class LabelGenerator:
             日本語ラベル、失敗時はNone
         """
         try:
-            import openai
-            from config.settings import Settings
+            text = self._chat_with_lm_studio(LABEL_SYSTEM_PROMPT, _build_user_message(prompt), 50)
+            return _sanitize_label(text) if text else None
+        except Exception as e:
+            print(f"[Warning] LM Studio API error: {e}")
+            return None
 
-            settings = Settings()
+    def _chat_with_claude(self, system_prompt: str, user_message: str, max_tokens: int) -> Optional[str]:
+        """Claude APIにメッセージを送信
 
-            # LM StudioはOpenAI互換APIを提供
-            client = openai.OpenAI(
-                base_url=settings.lm_studio_endpoint,
-                api_key="lm-studio"  # LM Studioはダミーキーで動作
-            )
+        Args:
+            system_prompt: システムプロンプト
+            user_message: ユーザーメッセージ
+            max_tokens: 最大出力トークン数
 
-            # プロンプト作成
-            system_prompt = """あなたはStable Diffusion用のプロンプトに日本語ラベルを付けるアシスタントです。
-以下のルールに従って、簡潔で分かりやすい日本語ラベルを生成してください：
+        Returns:
+            応答テキスト（APIキー未設定の場合None）
+        """
+        client = self.client_pool.get_claude_client()
+        if not client:
+            return None
 
-1. 最も重要な要素を3-5文字程度で表現
-2. 平易な日本語を使用（カタカナ混在OK）
-3. ラベルのみを出力（説明不要）
+        message = client.messages.create(
+            model=CLAUDE_LABEL_MODEL,  # コスト効率の良いHaikuを使用
+            max_tokens=max_tokens,
+            system=system_prompt,
+            messages=[
+                {"role": "user", "content": user_message}
+            ]
+        )
+        return message.content[0].text
 
-例：
-- "clothed masturbation" → "服着たままオナニー"
-- "school infirmary, beds with curtain dividers" → "保健室"
-- "classroom interior, desks in rows" → "教室"
-- "sitting, spread legs" → "座り開脚"
-"""
+    def _chat_with_openai(self, system_prompt: str, user_message: str, max_tokens: int) -> Optional[str]:
+        """OpenAI APIにメッセージを送信
 
-            response = client.chat.completions.create(
-                model=settings.lm_studio_model,
-                max_tokens=50,
-                temperature=0.7,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": f"プロンプト: {prompt}\n\n日本語ラベル:"}
-                ]
-            )
+        Args:
+            system_prompt: システムプロンプト
+            user_message: ユーザーメッセージ
+            max_tokens: 最大出力トークン数
 
-            # レスポンス抽出
-            label = response.choices[0].message.content.strip()
+        Returns:
+            応答テキスト（APIキー未設定の場合None）
+        """
+        client = self.client_pool.get_openai_client()
+        if not client:
+            return None
 
-            # サニタイズ（改行や余分な文字を削除）
-            label = re.sub(r'[\n\r]', '', label)
-            label = label.strip('"').strip("'").strip()
+        response = client.chat.completions.create(
+            model=OPENAI_LABEL_MODEL,  # コスト効率の良いgpt-3.5-turboを使用
+            max_tokens=max_tokens,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_message}
+            ]
+        )
+        return response.choices[0].message.content
 
-            return label if label else None
+    def _chat_with_lm_studio(self, system_prompt: str, user_message: str, max_tokens: int) -> Optional[str]:
+        """LM Studioにメッセージを送信
 
-        except Exception as e:
-            print(f"[Warning] LM Studio API error: {e}")
-            return None
+        Args:
+            system_prompt: システムプロンプト
+            user_message: ユーザーメッセージ
+            max_tokens: 最大出力トークン数
+
+        Returns:
+            応答テキスト
+        """
+        settings = self._get_settings()
+
+        # LM StudioはOpenAI互換APIを提供
+        client = self.client_pool.get_lm_studio_client(settings.lm_studio_endpoint)
+        response = client.chat.completions.create(
+            model=settings.lm_studio_model,
+            max_tokens=max_tokens,
+            temperature=0.7,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_message}
+            ]
+        )
+        return response.choices[0].message.content
 
     def _generate_with_dictionary(self, prompt: str) -> Optional[str]:
         """辞書ベースでラベルを生成
 
-        プロンプトの先頭部分を抽出してラベルとする。
+        タグ辞書に一致したタグの日本語からラベルを組み立てる。
+        一致するタグがない場合はプロンプトの先頭部分を抽出してラベルとする。
 
         Args:
             prompt: プロンプト文字列
 
         Returns:
-            ラベル（プロンプトの先頭30文字）
+            ラベル（一致するタグがない場合はプロンプトの先頭30文字）
         """
+        label = self._get_tag_dictionary().generate_label(prompt)
+        if label:
+            return label
+
         # プロンプトの先頭部分を抽出（最大30文字）
         label = prompt.strip()
         if len(label) > 30:
             label = label[:30] + "..."
         return label
 
-    def _get_label_source(self) -> str:
-        """現在使用している生成方法を返す
+    def _has_api(self) -> bool:
+        """ラベル生成にAPI（Claude・OpenAI・LM Studio）を使用するか"""
+        return bool(
+            (self.use_claude and self.api_key_manager)
+            or (self.use_openai and self.api_key_manager)
+            or self.use_lm_studio
+        )
+
+    def _get_label_model(self) -> str:
+        """現在使用しているモデル名を返す（ラベルキャッシュに記録）
 
         Returns:
-            "ai_generated" または "auto_extract"
+            モデル名（APIを使用しない場合は "dictionary"）
         """
         if self.use_claude and self.api_key_manager:
-            return "ai_generated"
+            return CLAUDE_LABEL_MODEL
         elif self.use_openai and self.api_key_manager:
-            return "ai_generated"
+            return OPENAI_LABEL_MODEL
         elif self.use_lm_studio:
-            return "ai_generated"
+            return self._get_settings().lm_studio_model
         else:
-            return "auto_extract"
+            return "dictionary"
 
 
 def generate_tags_auto(prompt: str) -> List[str]:
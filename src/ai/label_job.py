@@ -0,0 +1,154 @@
+"""ラベル生成ジョブの記録
+
+ラベル一括生成の途中経過（Batch APIのバッチID、生成済みのラベル）を
+JSON Lines形式のファイルに追記し、アプリの終了・クラッシュ後に再開できるようにします。
+
+記録ファイルの各行:
+    {"type": "start", "mode": ..., "created": ...}
+    {"type": "batch", "batch_id": ..., "requests": {custom_id: [prompt_id, text_key]}}
+    {"type": "label", "id": prompt_id, "key": text_key, "label": ..., "source": ...}
+
+text_key はプロンプト文字列のキー（make_label_cache_key）。プロンプトIDはファイルの行番号を含み、
+中断後の同期で行がずれると別のプロンプトを指すため、再開時はテキストのキーで照合する。
+"""
+
+import json
+import os
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from utils.logger import get_logger
+
+
+@dataclass
+class LabelJobState:
+    """記録ファイルから復元したジョブの状態
+
+    Attributes:
+        mode: 処理モード
+        created: 開始日時（ISO形式）
+        batches: バッチID → {custom_id: プロンプト文字列のキー}（キーのない古い記録はNone）
+        labels: プロンプト文字列のキー → (ラベル, label_source)
+    """
+    mode: str = ""
+    created: str = ""
+    batches: Dict[str, Dict[str, Optional[str]]] = field(default_factory=dict)
+    labels: Dict[str, Tuple[str, str]] = field(default_factory=dict)
+
+
+class LabelJobJournal:
+    """ラベル生成ジョブの記録ファイル（追記のみ）
+
+    ラベルは生成されるたびに1行追記してフラッシュする（アプリが異常終了しても失われない）。
+    バッチIDは再送信すると料金が二重に発生するため、追記後にディスクへ同期する。
+    ジョブが完了したら finish() で記録ファイルを削除する。
+    """
+
+    FILENAME = "label_job.jsonl"
+
+    def __init__(self, path: Path):
+        """初期化
+
+        Args:
+            path: 記録ファイルのパス
+        """
+        self.path = path
+        self.logger = get_logger()
+        self._lock = threading.Lock()
+        self._file = None
+
+    def load(self) -> Optional[LabelJobState]:
+        """記録ファイルから中断したジョブの状態を復元
+
+        Returns:
+            ジョブの状態（記録ファイルがない場合None）
+        """
+        if not self.path.exists():
+            return None
+
+        state = LabelJobState()
+        with self.path.open('r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # 書き込み途中で終了した最終行は無視
+                    continue
+
+                record_type = record.get('type')
+                if record_type == 'start':
+                    state.mode = record.get('mode', '')
+                    state.created = record.get('created', '')
+                elif record_type == 'batch':
+                    # キーのない古い記録は照合できないため、バッチのみ追跡する（結果は適用しない）
+                    state.batches[record['batch_id']] = {
+                        custom_id: request[1] if isinstance(request, list) else None
+                        for custom_id, request in record.get('requests', {}).items()
+                    }
+                elif record_type == 'label' and 'key' in record:
+                    state.labels[record['key']] = (record['label'], record.get('source', 'ai_generated'))
+        return state
+
+    def start(self, mode: str):
+        """ジョブの記録を開始（記録ファイルがある場合は追記して再開）
+
+        Args:
+            mode: 処理モード
+        """
+        with self._lock:
+            resuming = self.path.exists()
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = self.path.open('a', encoding='utf-8')
+            if not resuming:
+                self._write({'type': 'start', 'mode': mode, 'created': datetime.now().isoformat()})
+
+    def record_batch(self, batch_id: str, requests: Dict[str, Tuple[str, str]]):
+        """送信したバッチを記録（ディスクへ同期）
+
+        Args:
+            batch_id: バッチID
+            requests: custom_id → (プロンプトID, プロンプト文字列のキー)
+        """
+        with self._lock:
+            self._write({'type': 'batch', 'batch_id': batch_id, 'requests': requests}, sync=True)
+
+    def record_label(self, prompt_id: str, key: str, label: str, source: str):
+        """生成したラベルを記録
+
+        Args:
+            prompt_id: プロンプトID
+            key: プロンプト文字列のキー（make_label_cache_key）
+            label: ラベル
+            source: label_source
+        """
+        with self._lock:
+            self._write({'type': 'label', 'id': prompt_id, 'key': key, 'label': label, 'source': source})
+
+    def close(self):
+        """記録ファイルを閉じる（ファイルは残るため、次回再開できる）"""
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+    def finish(self):
+        """ジョブの完了時に記録ファイルを削除"""
+        self.close()
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            self.logger.warning(f"ラベル生成ジョブの記録ファイルを削除できません: {e}")
+
+    def _write(self, record: dict, sync: bool = False):
+        """1行追記（ロック取得済みで呼び出す）"""
+        if self._file is None:
+            return
+        self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self._file.flush()
+        if sync:
+            os.fsync(self._file.fileno())
@@ -0,0 +1,330 @@
+"""学習済みのラベル候補
+
+ライブラリの手動ラベル・AI生成ラベル（label_source が manual / ai_generated）から、
+プロンプトのトークン → ラベル断片の対応をTF-IDFの重みで学習し、
+新しいプロンプトのラベル候補をオフラインで提案します。
+確信度の高い候補はそのまま採用し、低いプロンプトのみAPIに送信するために使用します。
+
+学習はプロンプト単位の差分で行う（ラベルが変わったプロンプトのみ、以前の寄与を除いてから追加する）。
+"""
+
+import json
+import math
+import os
+import re
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from models import Prompt
+from utils.logger import get_logger
+from .tag_dictionary import normalize_tag_text
+
+
+# 学習に使用する label_source
+TRAINING_SOURCES = ('manual', 'ai_generated')
+
+# タグの区切り（カンマ・括弧・ワイルドカードの選択肢など）と重み指定（":1.2"）
+_TAG_SPLIT_PATTERN = re.compile(r'[,()\[\]{}|<>]+')
+_WEIGHT_PATTERN = re.compile(r':\s*[\d.]*$')
+
+# ラベル断片の区切り
+_FRAGMENT_SPLIT_PATTERN = re.compile(r'[・、,/／\s]+')
+
+
+def tokenize_prompt(text: str) -> List[str]:
+    """プロンプトを学習用のトークンに分割
+
+    カンマ区切りのタグ（複数語の場合）と、タグに含まれる単語をトークンとする。
+
+    Args:
+        text: プロンプト文字列
+
+    Returns:
+        トークンのリスト（重複なし）
+    """
+    tokens = {}
+    for tag in _TAG_SPLIT_PATTERN.split(normalize_tag_text(text)):
+        tag = _WEIGHT_PATTERN.sub('', tag).strip()
+        if not tag:
+            continue
+        words = [w for w in tag.split(' ') if len(w) > 1 and not w.replace('.', '').isdigit()]
+        if len(words) > 1:
+            tokens[tag] = None
+        for word in words:
+            tokens[word] = None
+    return list(tokens)
+
+
+def split_label(label: str) -> List[str]:
+    """ラベルを断片に分割（"制服・教室" → ["制服", "教室"]）
+
+    Args:
+        label: ラベル
+
+    Returns:
+        断片のリスト（重複なし）
+    """
+    return list(dict.fromkeys(f for f in _FRAGMENT_SPLIT_PATTERN.split(label) if f))
+
+
+@dataclass
+class LabelSuggestion:
+    """ラベル候補
+
+    Attributes:
+        label: 提案するラベル
+        confidence: 確信度（0〜1、プロンプトのTF-IDFの重みのうち最も有力な断片を支持する割合）
+    """
+    label: str
+    confidence: float
+
+
+class LabelSuggester:
+    """トークン → ラベル断片の対応を学習してラベル候補を提案
+
+    Attributes:
+        path: 学習データの保存先
+        threshold: 候補を採用する確信度の下限
+    """
+
+    FILENAME = "label_suggester.json"
+    VERSION = 1
+    DEFAULT_THRESHOLD = 0.6
+    MAX_FRAGMENTS = 3  # 候補に含める断片数の上限
+    FRAGMENT_RATIO = 0.5  # 最も有力な断片に対して、この割合以上のスコアの断片を候補に含める
+    COMMON_TOKEN_RATIO = 0.2  # この割合を超えるプロンプトに含まれるトークンは断片の集計を省略
+    COMMON_TOKEN_MIN_ROWS = 100  # 上記の省略は、トークンを含むプロンプトがこの数を超える場合のみ
+    PRIOR_ROWS = 2  # 断片を含む割合の計算で、トークンを含むプロンプト数に加える仮の数（根拠が少ないほど確信度が下がる）
+    SEPARATOR = "・"
+
+    def __init__(self, path: Optional[Path] = None, threshold: float = DEFAULT_THRESHOLD):
+        """初期化
+
+        Args:
+            path: 学習データの保存先（Noneの場合は保存しない）
+            threshold: 候補を採用する確信度の下限
+        """
+        self.path = path
+        self.threshold = threshold
+        self.logger = get_logger()
+        self._lock = threading.Lock()
+        self._dirty = False
+
+        # プロンプトID → {"signature", "tokens", "fragments"}
+        self._rows: Dict[str, dict] = {}
+        # トークン → 出現したプロンプト数
+        self._token_counts: Dict[str, int] = {}
+        # トークン → {ラベル断片: 同時に出現したプロンプト数}
+        self._cooccurrence: Dict[str, Dict[str, int]] = {}
+
+        if path is not None:
+            self.load()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def load(self):
+        """ファイルから読み込み（存在しない・壊れている場合は空）"""
+        self._rows = {}
+        self._token_counts = {}
+        self._cooccurrence = {}
+        self._dirty = False
+        if self.path is None or not self.path.exists():
+            return
+
+        try:
+            with self.path.open('r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == self.VERSION:
+                self._rows = data.get('rows', {})
+                self._token_counts = data.get('token_counts', {})
+                self._cooccurrence = data.get('cooccurrence', {})
+        except Exception as e:
+            self.logger.warning(f"ラベル候補の学習データの読み込みに失敗（再学習します）: {e}")
+
+    def save(self):
+        """変更があればファイルに保存（一時ファイル経由で置き換え）"""
+        if self.path is None:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            content = json.dumps({
+                'version': self.VERSION,
+                'rows': self._rows,
+                'token_counts': self._token_counts,
+                'cooccurrence': self._cooccurrence,
+            }, ensure_ascii=False)
+            self._dirty = False
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        with temp_path.open('w', encoding='utf-8') as f:
+            f.write(content)
+        os.replace(temp_path, self.path)
+
+    def learn(self, prompt: Prompt) -> bool:
+        """1件のプロンプトのラベルを学習（変更がなければ何もしない）
+
+        label_source が学習対象外に変わった場合は、以前の学習内容を取り除く。
+
+        Args:
+            prompt: Promptオブジェクト
+
+        Returns:
+            学習内容が変わった場合True
+        """
+        if prompt.label_source not in TRAINING_SOURCES or not prompt.label_ja:
+            return self.forget(prompt.id)
+
+        signature = f"{prompt.label_ja}\n{prompt.prompt}"
+        with self._lock:
+            row = self._rows.get(prompt.id)
+            if row is not None and row['signature'] == signature:
+                return False
+
+            if row is not None:
+                self._remove_row(row)
+            row = {
+                'signature': signature,
+                'tokens': tokenize_prompt(prompt.prompt),
+                'fragments': split_label(prompt.label_ja),
+            }
+            self._add_row(row)
+            self._rows[prompt.id] = row
+            self._dirty = True
+            return True
+
+    def forget(self, prompt_id: str) -> bool:
+        """プロンプトの学習内容を取り除く
+
+        Args:
+            prompt_id: プロンプトID
+
+        Returns:
+            学習内容が変わった場合True
+        """
+        with self._lock:
+            row = self._rows.pop(prompt_id, None)
+            if row is None:
+                return False
+            self._remove_row(row)
+            self._dirty = True
+            return True
+
+    def update(self, prompts: Iterable[Prompt]) -> int:
+        """ライブラリとの差分を学習
+
+        ラベル・プロンプトが変わったもの、追加・削除されたもののみ学習し直す。
+
+        Args:
+            prompts: ライブラリの全プロンプト
+
+        Returns:
+            学習内容が変わったプロンプト数
+        """
+        changed = 0
+        seen = set()
+        for prompt in prompts:
+            seen.add(prompt.id)
+            if self.learn(prompt):
+                changed += 1
+
+        for prompt_id in [prompt_id for prompt_id in self._rows if prompt_id not in seen]:
+            if self.forget(prompt_id):
+                changed += 1
+
+        if changed:
+            self.logger.info(f"ラベル候補の学習を更新: {changed}件（学習済み {len(self._rows)}件）")
+        return changed
+
+    def suggest(self, text: str, min_confidence: Optional[float] = None) -> Optional[LabelSuggestion]:
+        """プロンプトのラベル候補を提案
+
+        各トークンについて、そのトークンを含む学習済みプロンプトのうち断片を含む割合を
+        トークンのIDF（珍しいトークンほど大きい）で重み付けして合計し、
+        プロンプトの全トークンの重みの合計で割った値を断片のスコアとする。
+        割合の分母には PRIOR_ROWS を加えるため、1〜2件の学習例だけでは確信度が下限に届かない。
+        未学習のトークンは学習済みのトークンの平均の重みとして、重みの合計にのみ含める
+        （見たことのないタグが多いプロンプトほど確信度が下がる）。
+        多くのプロンプトに含まれるトークン（"1girl" など）は重みが小さいため、断片の集計を省略する。
+
+        Args:
+            text: プロンプト文字列
+            min_confidence: 確信度の下限（Noneの場合は threshold）
+
+        Returns:
+            ラベル候補（確信度が下限未満、または候補がない場合None）
+        """
+        if min_confidence is None:
+            min_confidence = self.threshold
+
+        with self._lock:
+            row_count = len(self._rows)
+            if row_count == 0:
+                return None
+
+            scores: Dict[str, float] = {}
+            known_weight = 0.0
+            known_count = 0
+            unknown_count = 0
+            for token in tokenize_prompt(text):
+                token_count = self._token_counts.get(token, 0)
+                if token_count == 0:
+                    unknown_count += 1
+                    continue
+
+                weight = math.log((row_count + 1) / (token_count + 1)) + 1.0
+                known_weight += weight
+                known_count += 1
+                if (
+                    token_count > self.COMMON_TOKEN_MIN_ROWS
+                    and token_count > row_count * self.COMMON_TOKEN_RATIO
+                ):
+                    continue
+                for fragment, count in self._cooccurrence[token].items():
+                    scores[fragment] = scores.get(fragment, 0.0) + weight * count / (token_count + self.PRIOR_ROWS)
+
+        if not scores:
+            return None
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        best = ranked[0][1]
+        total_weight = known_weight + unknown_count * known_weight / known_count
+        confidence = best / total_weight
+        if confidence < min_confidence:
+            return None
+
+        fragments = [
+            fragment for fragment, score in ranked[:self.MAX_FRAGMENTS]
+            if score >= best * self.FRAGMENT_RATIO
+        ]
+        return LabelSuggestion(self.SEPARATOR.join(fragments), confidence)
+
+    def _add_row(self, row: dict):
+        """学習内容を集計に加える（ロック取得済みで呼び出す）"""
+        for token in row['tokens']:
+            self._token_counts[token] = self._token_counts.get(token, 0) + 1
+            fragments = self._cooccurrence.setdefault(token, {})
+            for fragment in row['fragments']:
+                fragments[fragment] = fragments.get(fragment, 0) + 1
+
+    def _remove_row(self, row: dict):
+        """学習内容を集計から除く（ロック取得済みで呼び出す）"""
+        for token in row['tokens']:
+            count = self._token_counts.get(token, 0) - 1
+            if count <= 0:
+                self._token_counts.pop(token, None)
+                self._cooccurrence.pop(token, None)
+                continue
+
+            self._token_counts[token] = count
+            fragments = self._cooccurrence[token]
+            for fragment in row['fragments']:
+                remaining = fragments.get(fragment, 0) - 1
+                if remaining <= 0:
+                    fragments.pop(fragment, None)
+                else:
+                    fragments[fragment] = remaining
@@ -0,0 +1,244 @@
+"""API呼び出しのレート制御
+
+非同期でAPIを呼び出す際の送信レートと同時実行数を制御します。
+
+- TokenBucket: 1秒あたりのリクエスト数を制限（Retry-After指定時は送信を一時停止）
+- AIMDLimiter: 同時実行数を加算増加・乗算減少（AIMD）で自動調整
+- AdaptiveRateLimiter: 上記を組み合わせ、レート制限（429等）時に再試行する
+"""
+
+import asyncio
+import random
+import time
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from utils.logger import get_logger
+
+
+T = TypeVar("T")
+
+
+class RetryableError(Exception):
+    """再試行で回復する可能性のあるAPIエラー
+
+    Attributes:
+        retry_after: サーバーが指定した再試行までの秒数
+        throttled: レート制限（429・過負荷）によるエラーか（同時実行数を減らす）
+    """
+
+    def __init__(self, message: str, retry_after: Optional[float] = None, throttled: bool = False):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.throttled = throttled
+
+
+class TokenBucket:
+    """トークンバケット
+
+    rate 個/秒 でトークンが補充され、最大 capacity 個まで貯まる。
+    acquire() はトークンを1つ消費し、不足している場合は補充まで待機する。
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        """初期化
+
+        Args:
+            rate: 1秒あたりの補充数（リクエスト数/秒）
+            capacity: バケットの容量（Noneの場合は rate、最小1）
+        """
+        self.rate = rate
+        self.capacity = max(1.0, capacity if capacity is not None else rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def pause(self, seconds: float):
+        """指定秒数の間、トークンの払い出しを停止（Retry-After対応）
+
+        Args:
+            seconds: 停止する秒数
+        """
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self._tokens = 0.0
+
+    async def acquire(self):
+        """トークンを1つ取得（不足・停止中の場合は待機）"""
+        # ロックで待機順を保つ（先に待ち始めたリクエストから送信）
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    self._updated = time.monotonic()
+                    continue
+
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                await asyncio.sleep((1.0 - self._tokens) / self.rate)
+
+
+class AIMDLimiter:
+    """AIMD（加算増加・乗算減少）による同時実行数の制御
+
+    成功するたびに同時実行数の上限を 1/limit ずつ増やし（上限分の成功でおよそ +1）、
+    レート制限を受けた場合は decrease 倍に減らす。
+    1回のレート制限で実行中のリクエストが一斉に失敗しても減少は1回のみとするため、
+    acquire() が返す世代番号を throttled() に渡す。
+
+    Attributes:
+        limit: 現在の同時実行数の上限
+        active: 実行中の数
+    """
+
+    def __init__(self, initial: int, minimum: int = 1, maximum: int = 50, decrease: float = 0.5):
+        """初期化
+
+        Args:
+            initial: 同時実行数の初期値
+            minimum: 同時実行数の下限
+            maximum: 同時実行数の上限
+            decrease: レート制限時の減少率
+        """
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.decrease = decrease
+        self.limit = float(min(max(initial, self.minimum), self.maximum))
+        self.active = 0
+        self._generation = 0
+        self._condition = asyncio.Condition()
+
+    async def acquire(self) -> int:
+        """実行枠を取得（上限に達している場合は待機）
+
+        Returns:
+            世代番号（throttled() に渡す）
+        """
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.active < int(self.limit))
+            self.active += 1
+            return self._generation
+
+    async def release(self):
+        """実行枠を返却"""
+        async with self._condition:
+            self.active -= 1
+            self._condition.notify_all()
+
+    def succeeded(self):
+        """成功時（加算増加）"""
+        self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+
+    def throttled(self, generation: int):
+        """レート制限時（乗算減少）
+
+        Args:
+            generation: acquire() が返した世代番号（減少後に開始したリクエストのみ再度減少させる）
+        """
+        if generation != self._generation:
+            return
+        self._generation += 1
+        self.limit = max(self.minimum, self.limit * self.decrease)
+
+
+class AdaptiveRateLimiter:
+    """送信レートと同時実行数を自動調整してAPIを呼び出す
+
+    TokenBucket で送信レートを、AIMDLimiter で同時実行数を制限する。
+    RetryableError の場合は Retry-After（指定がなければ指数バックオフ）だけ待って再試行し、
+    レート制限であれば同時実行数を減らしてバケットを一時停止する。
+    """
+
+    def __init__(
+        self,
+        name: str,
+        requests_per_second: float,
+        initial_concurrency: int,
+        max_concurrency: int,
+        max_retries: int = 5,
+        backoff_base: float = 1.0,
+        backoff_max: float = 60.0
+    ):
+        """初期化
+
+        Args:
+            name: 名前（ログ表示用）
+            requests_per_second: 1秒あたりの最大リクエスト数
+            initial_concurrency: 同時実行数の初期値
+            max_concurrency: 同時実行数の上限
+            max_retries: 最大再試行回数
+            backoff_base: バックオフの基準秒数
+            backoff_max: 待機秒数の上限
+        """
+        self.name = name
+        self.bucket = TokenBucket(requests_per_second)
+        self.limiter = AIMDLimiter(initial_concurrency, maximum=max_concurrency)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.throttled_count = 0
+        self.logger = get_logger()
+
+    @property
+    def concurrency(self) -> int:
+        """現在の同時実行数の上限"""
+        return int(self.limiter.limit)
+
+    async def call(self, func: Callable[[], Awaitable[T]]) -> T:
+        """レート制御付きで呼び出し
+
+        Args:
+            func: 呼び出す非同期関数（引数なし）
+
+        Returns:
+            func の戻り値
+
+        Raises:
+            RetryableError: 再試行回数を超えた場合
+            Exception: func が送出したその他の例外
+        """
+        attempt = 0
+        while True:
+            attempt += 1
+            generation = await self.limiter.acquire()
+            try:
+                await self.bucket.acquire()
+                result = await func()
+                self.limiter.succeeded()
+                return result
+            except RetryableError as e:
+                if e.throttled:
+                    self.throttled_count += 1
+                    self.limiter.throttled(generation)
+                if attempt > self.max_retries:
+                    raise
+
+                delay = self._get_backoff(attempt, e.retry_after)
+                if e.throttled:
+                    self.bucket.pause(delay)
+                self.logger.debug(
+                    f"{self.name}: 再試行 {attempt}/{self.max_retries}（{delay:.1f}秒後、"
+                    f"同時実行数 {self.concurrency}）: {e}"
+                )
+            finally:
+                await self.limiter.release()
+
+            await asyncio.sleep(delay)
+
+    def _get_backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """再試行までの待機秒数を取得（指数バックオフ + ジッター）
+
+        Args:
+            attempt: これまでの試行回数
+            retry_after: サーバーが指定した待機秒数
+
+        Returns:
+            待機秒数
+        """
+        if retry_after is not None:
+            return min(retry_after, self.backoff_max)
+        delay = min(self.backoff_base * (2 ** (attempt - 1)), self.backoff_max)
+        return delay * random.uniform(0.5, 1.0)
@@ -0,0 +1,195 @@
+"""タグ辞書によるオフラインのラベル生成
+
+英語タグ → 日本語の辞書（同梱の辞書 + ユーザー辞書CSV）をAho-Corasickオートマトンに登録し、
+プロンプトを1回走査するだけで一致したタグを抽出して日本語ラベルを組み立てます。
+APIキーを使用できない環境でのラベル生成、およびAPI使用時の最終手段として使用します。
+
+辞書CSVの形式（UTF-8、1行目はヘッダー）:
+    tag,label
+    school uniform,制服
+    masterpiece,
+
+label が空のタグは一致しても無視する（品質タグなど、ラベルに含めないタグ用）。
+"""
+
+import csv
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from utils.logger import get_logger
+
+
+BUNDLED_DICTIONARY_PATH = Path(__file__).parent / "data" / "tag_dictionary.csv"
+
+# 照合前の正規化（アンダースコア区切りのタグも空白区切りとして扱う）
+_NORMALIZE_TABLE = str.maketrans('_', ' ')
+
+
+def normalize_tag_text(text: str) -> str:
+    """照合用に文字列を正規化（小文字化、アンダースコア・連続する空白を1つの空白に）
+
+    Args:
+        text: タグまたはプロンプト文字列
+
+    Returns:
+        正規化した文字列
+    """
+    return ' '.join(text.lower().translate(_NORMALIZE_TABLE).split())
+
+
+class TagDictionary:
+    """英語タグ → 日本語のAho-Corasickオートマトン
+
+    Attributes:
+        entries: 正規化したタグ → 日本語（空文字列はラベルに含めないタグ）
+    """
+
+    USER_FILENAME = "tag_dictionary.csv"
+    MAX_LABEL_TAGS = 3  # ラベルに含めるタグ数の上限
+    SEPARATOR = "・"
+
+    def __init__(self, entries: Optional[Dict[str, str]] = None):
+        """初期化
+
+        Args:
+            entries: 英語タグ → 日本語
+        """
+        self.entries: Dict[str, str] = {}
+        for tag, label in (entries or {}).items():
+            tag = normalize_tag_text(tag)
+            if tag:
+                self.entries[tag] = label.strip()
+        self._build()
+
+    @classmethod
+    def load(cls, user_path: Optional[Path] = None) -> "TagDictionary":
+        """同梱の辞書とユーザー辞書を読み込む（同じタグはユーザー辞書を優先）
+
+        Args:
+            user_path: ユーザー辞書CSVのパス（存在しない場合は同梱の辞書のみ）
+
+        Returns:
+            TagDictionaryインスタンス
+        """
+        entries = cls.read_csv(BUNDLED_DICTIONARY_PATH)
+        if user_path is not None and user_path.exists():
+            entries.update(cls.read_csv(user_path))
+        return cls(entries)
+
+    @staticmethod
+    def read_csv(path: Path) -> Dict[str, str]:
+        """辞書CSVを読み込む（"#" で始まる行はコメント）
+
+        Args:
+            path: CSVファイルのパス
+
+        Returns:
+            英語タグ → 日本語（読み込めない場合は空）
+        """
+        entries: Dict[str, str] = {}
+        try:
+            with path.open('r', encoding='utf-8-sig', newline='') as f:
+                for row in csv.DictReader(f):
+                    tag = (row.get('tag') or '').strip()
+                    if not tag or tag.startswith('#'):
+                        continue
+                    entries[tag] = (row.get('label') or '').strip()
+        except (OSError, csv.Error, UnicodeDecodeError) as e:
+            get_logger().warning(f"タグ辞書の読み込みに失敗: {path}: {e}")
+        return entries
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def _build(self):
+        """オートマトンを構築（goto・failure・output）"""
+        goto: List[Dict[str, int]] = [{}]
+        output: List[List[Tuple[int, str]]] = [[]]
+
+        for tag, label in self.entries.items():
+            state = 0
+            for ch in tag:
+                next_state = goto[state].get(ch)
+                if next_state is None:
+                    next_state = len(goto)
+                    goto[state][ch] = next_state
+                    goto.append({})
+                    output.append([])
+                state = next_state
+            output[state].append((len(tag), label))
+
+        # 幅優先でfailureリンクを設定し、failure先の出力を併合（長いタグから順に）
+        fail = [0] * len(goto)
+        queue = list(goto[0].values())
+        for state in queue:
+            for ch, next_state in goto[state].items():
+                queue.append(next_state)
+                link = fail[state]
+                while link and ch not in goto[link]:
+                    link = fail[link]
+                fail[next_state] = goto[link].get(ch, 0)
+                output[next_state] = output[next_state] + output[fail[next_state]]
+
+        self._goto = goto
+        self._fail = fail
+        self._output = [tuple(sorted(items, reverse=True)) for items in output]
+
+    def find(self, text: str) -> List[Tuple[int, int, str]]:
+        """プロンプトに含まれるタグを抽出（単語の途中での一致は除く）
+
+        重なり合う一致は、先に現れるもの・長いものを優先する（"school uniform" は "school" より優先）。
+
+        Args:
+            text: プロンプト文字列
+
+        Returns:
+            (開始位置, 終了位置, 日本語) のリスト（出現順、位置は正規化後の文字列上）
+        """
+        text = normalize_tag_text(text)
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+        last = len(text) - 1
+
+        candidates = []
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if not output[state]:
+                continue
+            if i < last and text[i + 1].isalnum():
+                continue
+            for length, label in output[state]:
+                start = i - length + 1
+                if start == 0 or not text[start - 1].isalnum():
+                    candidates.append((start, -length, label))
+
+        candidates.sort()
+        matches = []
+        end = 0
+        for start, negative_length, label in candidates:
+            if start >= end:
+                end = start - negative_length
+                matches.append((start, end, label))
+        return matches
+
+    def generate_label(self, text: str) -> Optional[str]:
+        """プロンプトから日本語ラベルを組み立てる
+
+        一致したタグの日本語を出現順に、重複を除いて最大 MAX_LABEL_TAGS 件連結する。
+
+        Args:
+            text: プロンプト文字列
+
+        Returns:
+            日本語ラベル（ラベルに含めるタグが1つもない場合None）
+        """
+        parts: List[str] = []
+        for _start, _end, label in self.find(text):
+            if label and label not in parts:
+                parts.append(label)
+                if len(parts) >= self.MAX_LABEL_TAGS:
+                    break
+        return self.SEPARATOR.join(parts) if parts else None
@@ -77,6 +77,15 @@ class Settings:
     DEFAULT_LM_STUDIO_MODEL = "local-model"
     DEFAULT_LM_STUDIO_MAX_CONCURRENT = 2  # VRAM 16GBで安全な同時実行数
 
+    # AIラベル生成 デフォルト設定
+    DEFAULT_LABEL_PROMPTS_PER_REQUEST = 20  # 1リクエストにまとめるプロンプト数
+    DEFAULT_LABEL_SUGGESTION_THRESHOLD = 0.6  # 学習済みのラベル候補を採用する確信度の下限
+
+    # Stable Diffusion WebUI デフォルト設定（画像生成ディスパッチ用）
+    DEFAULT_WEBUI_ENDPOINTS = [
+        {"url": "http://127.0.0.1:7860", "max_concurrent": 1}
+    ]
+
     def __init__(self, config_path: Optional[Path] = None):
         """初期化
 
@@ -105,6 +114,14 @@ class Settings:
         self.lm_studio_model: str = self.DEFAULT_LM_STUDIO_MODEL
         self.lm_studio_max_concurrent: int = self.DEFAULT_LM_STUDIO_MAX_CONCURRENT
 
+        # AIラベル生成設定
+        self.label_prompts_per_request: int = self.DEFAULT_LABEL_PROMPTS_PER_REQUEST
+        self.label_suggestion_threshold: float = self.DEFAULT_LABEL_SUGGESTION_THRESHOLD
+
+        # WebUI設定（エンドポイント: {"url", "max_concurrent"} のリスト）
+        self.webui_endpoints: list = [dict(ep) for ep in self.DEFAULT_WEBUI_ENDPOINTS]
+        self.webui_payload_defaults: dict = {}  # txt2img APIペイロードの既定値
+
         # 設定を読み込み
         self.load()
 
@@ -133,6 +150,18 @@ class Settings:
             self.lm_studio_model = data.get('lm_studio_model', self.DEFAULT_LM_STUDIO_MODEL)
             self.lm_studio_max_concurrent = data.get('lm_studio_max_concurrent', self.DEFAULT_LM_STUDIO_MAX_CONCURRENT)
 
+            # AIラベル生成設定を読み込み
+            self.label_prompts_per_request = data.get(
+                'label_prompts_per_request', self.DEFAULT_LABEL_PROMPTS_PER_REQUEST
+            )
+            self.label_suggestion_threshold = data.get(
+                'label_suggestion_threshold', self.DEFAULT_LABEL_SUGGESTION_THRESHOLD
+            )
+
+            # WebUI設定を読み込み
+            self.webui_endpoints = data.get('webui_endpoints', [dict(ep) for ep in self.DEFAULT_WEBUI_ENDPOINTS])
+            self.webui_payload_defaults = data.get('webui_payload_defaults', {})
+
             # 共通プロンプトを読み込み
             common_prompts_data = data.get('common_prompts', [])
             if common_prompts_data:
@@ -164,7 +193,11 @@ class Settings:
             'lora_directory': self.lora_directory,
             'lm_studio_endpoint': self.lm_studio_endpoint,
             'lm_studio_model': self.lm_studio_model,
-            'lm_studio_max_concurrent': self.lm_studio_max_concurrent
+            'lm_studio_max_concurrent': self.lm_studio_max_concurrent,
+            'label_prompts_per_request': self.label_prompts_per_request,
+            'label_suggestion_threshold': self.label_suggestion_threshold,
+            'webui_endpoints': self.webui_endpoints,
+            'webui_payload_defaults': self.webui_payload_defaults
         }
 
         with self.config_path.open('w', encoding='utf-8') as f:
@@ -0,0 +1,273 @@
+"""一括出力（ヘッドレス）
+
+複数のプロジェクトファイルからプロンプトファイルを並列に出力します。
+出力形式・ファイル分割は core.prompt_exporter に従います。
+PyQt6に依存しないため、コマンドラインから実行できます。
+"""
+
+import glob
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from models import Project
+from core.prompt_builder import PromptBuilder
+from core.prompt_exporter import StreamingExporter, TextExportTarget, create_export_target
+
+
+@dataclass
+class ExportResult:
+    """1プロジェクト分の出力結果
+
+    Attributes:
+        source_path: 入力プロジェクトファイルのパス
+        output_paths: 出力したファイルパスのリスト
+        scene_count: 出力したシーン数
+        error: エラーメッセージ（成功時は空文字）
+    """
+    source_path: str
+    output_paths: List[str] = field(default_factory=list)
+    scene_count: int = 0
+    error: str = ""
+
+    @property
+    def success(self) -> bool:
+        """成功したかどうか"""
+        return not self.error
+
+
+def load_project(project_path: Path) -> Project:
+    """プロジェクトファイル（.pfft / JSON）を読み込み
+
+    Args:
+        project_path: プロジェクトファイルのパス
+
+    Returns:
+        Projectオブジェクト
+    """
+    project_dict = json.loads(Path(project_path).read_text(encoding="utf-8"))
+    return Project.from_dict(project_dict)
+
+
+def expand_input_patterns(patterns: List[str]) -> List[Path]:
+    """入力パターン（globまたはパス）を展開
+
+    重複は除外し、指定順を保持する。
+
+    Args:
+        patterns: ファイルパスまたはglobパターンのリスト（例: "projects/**/*.pfft"）
+
+    Returns:
+        プロジェクトファイルのパスリスト
+    """
+    paths = []
+    seen = set()
+
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern, recursive=True)) or [pattern]
+        for match in matches:
+            path = Path(match)
+            key = str(path.resolve())
+            if key in seen or not path.is_file():
+                continue
+            seen.add(key)
+            paths.append(path)
+
+    return paths
+
+
+def export_project_file(
+    project_path: str,
+    output_base: str,
+    settings=None,
+    formats: Optional[List[str]] = None,
+    include_comment: bool = False,
+    completed_only: bool = False,
+    max_scenes_per_file: Optional[int] = None,
+    max_bytes_per_file: Optional[int] = None,
+    payload_defaults: Optional[Dict[str, Any]] = None
+) -> ExportResult:
+    """1プロジェクトを指定形式で出力
+
+    プロセスプールのワーカーから呼ばれるため、例外は結果に格納して返す。
+
+    Args:
+        project_path: 入力プロジェクトファイルのパス
+        output_base: 出力ファイルのベースパス（拡張子は形式ごとに付与）
+        settings: 設定オブジェクト（Noneの場合は共通プロンプト挿入なし）
+        formats: 出力形式名のリスト（Noneの場合はtxtのみ）
+        include_comment: シーン番号コメントを含めるか
+        completed_only: 完成シーンのみを含めるか
+        max_scenes_per_file: 1ファイルあたりの最大シーン数
+        max_bytes_per_file: 1ファイルあたりの最大バイト数
+        payload_defaults: A1111ペイロードの既定値
+
+    Returns:
+        出力結果
+    """
+    result = ExportResult(source_path=str(project_path))
+
+    try:
+        project = load_project(Path(project_path))
+        # 同じ形式が重複指定された場合は1回のみ出力（同じファイルへの二重書き込みを防ぐ）
+        targets = [
+            create_export_target(name, include_comment, payload_defaults)
+            for name in dict.fromkeys(formats or [TextExportTarget.name])
+        ]
+
+        # シーンを1つずつ構築して全形式へ書き込み
+        exporter = StreamingExporter(PromptBuilder(settings))
+        output_paths = exporter.export(
+            project, Path(output_base), targets, completed_only,
+            max_scenes_per_file, max_bytes_per_file
+        )
+
+        result.output_paths = [str(path) for paths in output_paths.values() for path in paths]
+        result.scene_count = sum(
+            1 for scene in project.scenes
+            if not completed_only or scene.is_completed
+        )
+
+    except Exception as e:
+        result.error = str(e)
+
+    return result
+
+
+class BatchExporter:
+    """一括出力クラス
+
+    プロジェクトファイルごとにプロセスプールでプロンプトを構築し、
+    完了したものから順次ファイルに書き出す。
+    """
+
+    def __init__(self, settings=None, max_workers: Optional[int] = None):
+        """初期化
+
+        Args:
+            settings: 設定オブジェクト（Noneの場合は共通プロンプト挿入なし）
+            max_workers: 最大ワーカープロセス数（Noneの場合はCPUコア数）
+        """
+        self.settings = settings
+        self.max_workers = max_workers or os.cpu_count() or 1
+
+    def get_output_base(self, project_path: Path, output_dir: Optional[Path] = None) -> Path:
+        """出力ファイルのベースパスを取得
+
+        Args:
+            project_path: 入力プロジェクトファイルのパス
+            output_dir: 出力ディレクトリ（Noneの場合は入力ファイルと同じ場所）
+
+        Returns:
+            出力ファイルのベースパス（拡張子なし）
+        """
+        directory = output_dir if output_dir else project_path.parent
+        return directory / project_path.stem
+
+    def get_output_bases(self, project_paths: List[Path], output_dir: Optional[Path] = None) -> List[Path]:
+        """全プロジェクトの出力ファイルのベースパスを取得（重複しないように調整）
+
+        別のディレクトリにある同名のプロジェクト（a/proj.pfft と b/proj.pfft）や、
+        拡張子のみ異なるプロジェクトは、親ディレクトリ名を付けて区別し（a_proj, b_proj）、
+        それでも重複する場合は連番を付ける。
+
+        Args:
+            project_paths: 入力プロジェクトファイルのパスリスト
+            output_dir: 出力ディレクトリ（Noneの場合は入力ファイルと同じ場所）
+
+        Returns:
+            出力ファイルのベースパスのリスト（入力順）
+        """
+        def key(path: Path) -> str:
+            # Windows・macOSではファイル名の大文字・小文字を区別しない
+            return os.path.normcase(str(path.resolve())).lower()
+
+        bases = [self.get_output_base(path, output_dir) for path in project_paths]
+        counts: Dict[str, int] = {}
+        for base in bases:
+            counts[key(base)] = counts.get(key(base), 0) + 1
+
+        used = set()
+        unique_bases = []
+        for path, base in zip(project_paths, bases):
+            if counts[key(base)] > 1:
+                parent_name = path.resolve().parent.name
+                base = base.with_name(f"{parent_name}_{base.name}" if parent_name else base.name)
+            candidate = base
+            number = 2
+            while key(candidate) in used:
+                candidate = base.with_name(f"{base.name}_{number}")
+                number += 1
+            used.add(key(candidate))
+            unique_bases.append(candidate)
+        return unique_bases
+
+    def export(
+        self,
+        project_paths: List[Path],
+        output_dir: Optional[Path] = None,
+        formats: Optional[List[str]] = None,
+        include_comment: bool = False,
+        completed_only: bool = False,
+        max_scenes_per_file: Optional[int] = None,
+        max_bytes_per_file: Optional[int] = None,
+        payload_defaults: Optional[Dict[str, Any]] = None,
+        progress_callback=None
+    ) -> List[ExportResult]:
+        """複数プロジェクトを並列に出力
+
+        Args:
+            project_paths: 入力プロジェクトファイルのパスリスト
+            output_dir: 出力ディレクトリ（Noneの場合は入力ファイルと同じ場所）
+            formats: 出力形式名のリスト（Noneの場合はtxtのみ）
+            include_comment: シーン番号コメントを含めるか
+            completed_only: 完成シーンのみを含めるか
+            max_scenes_per_file: 1ファイルあたりの最大シーン数
+            max_bytes_per_file: 1ファイルあたりの最大バイト数
+            payload_defaults: A1111ペイロードの既定値
+            progress_callback: 進捗コールバック関数（オプション）
+                              progress_callback(current, total, message)
+
+        Returns:
+            出力結果のリスト（入力順）
+        """
+        total = len(project_paths)
+        results: List[Optional[ExportResult]] = [None] * total
+
+        if total == 0:
+            return []
+
+        jobs = [
+            (str(path), str(base))
+            for path, base in zip(project_paths, self.get_output_bases(project_paths, output_dir))
+        ]
+        options = (
+            self.settings, formats, include_comment, completed_only,
+            max_scenes_per_file, max_bytes_per_file, payload_defaults
+        )
+
+        # 1件またはワーカー1つの場合はプロセスを起動しない
+        if total == 1 or self.max_workers == 1:
+            for i, (source, output) in enumerate(jobs):
+                results[i] = export_project_file(source, output, *options)
+                if progress_callback:
+                    progress_callback(i + 1, total, f"Exported: {source}")
+            return results
+
+        with ProcessPoolExecutor(max_workers=min(self.max_workers, total)) as executor:
+            futures = {
+                executor.submit(export_project_file, source, output, *options): i
+                for i, (source, output) in enumerate(jobs)
+            }
+
+            for done, future in enumerate(as_completed(futures), 1):
+                index = futures[future]
+                results[index] = future.result()
+
+                if progress_callback:
+                    progress_callback(done, total, f"Exported: {jobs[index][0]}")
+
+        return results
@@ -4,12 +4,15 @@
 """
 
 import hashlib
+import threading
 from pathlib import Path
-from typing import List, Dict, Tuple, Optional, Callable
+from typing import List, Dict, Tuple, Optional, Callable, Iterable
 from datetime import datetime
 
 from config.settings import Settings
-from utils.file_utils import scan_text_files
+from core.sync_job import SyncCancelledError
+from core.sync_manifest import SyncManifest
+from utils.file_utils import scan_text_files, copy_files_parallel, format_bytes, should_exclude
 from utils.logger import get_logger
 
 
@@ -18,8 +21,17 @@ class FileSyncManager:
 
     元ディレクトリとローカルディレクトリの差分を検出し、
     更新されたファイルを同期します。
+
+    前回同期時の (サイズ, 更新日時, 内容ハッシュ) をマニフェストに保存し、
+    サイズか更新日時が変わったファイルのみハッシュを計算して、内容の変更だけを検出します。
     """
 
+    # マニフェストのファイル名（データディレクトリに保存）
+    MANIFEST_FILENAME = "sync_manifest.json"
+
+    # 並列コピーのスレッド数（低速ディスク・ネットワーク共有でも待ち時間を重ねられる数）
+    COPY_MAX_WORKERS = 16
+
     def __init__(self, settings: Settings):
         """初期化
 
@@ -31,11 +43,17 @@ class FileSyncManager:
         self.local_dir = settings.get_local_dir()
         self.logger = get_logger()
 
+        self.manifest = SyncManifest(settings.get_data_dir() / self.MANIFEST_FILENAME)
+        # 直近の check_updates() の結果（has_updates / get_update_summary で再利用）
+        self._snapshot: Optional[Dict[str, List[Path]]] = None
+        # 変更を検出したファイルの (サイズ, 更新日時, ハッシュ)（同期時に再計算しないため）
+        self._pending_entries: Dict[str, Tuple[int, int, str]] = {}
+
     def check_updates(self) -> Dict[str, List[Path]]:
         """更新チェック
 
         元ディレクトリとローカルディレクトリを比較し、
-        変更されたファイルを検出します。
+        内容が変更されたファイルを検出します。結果はスナップショットとして保持します。
 
         Returns:
             差分情報の辞書:
@@ -72,6 +90,7 @@ class FileSyncManager:
         added = []
         modified = []
         deleted = []
+        self._pending_entries = {}
 
         # 新規追加・変更検出
         for rel_path, source_file in source_paths.items():
@@ -81,7 +100,7 @@ class FileSyncManager:
             else:
                 # 変更チェック
                 local_file = local_paths[rel_path]
-                if self._is_file_modified(source_file, local_file):
+                if self._is_file_modified(rel_path.as_posix(), source_file, local_file):
                     modified.append(source_file)
 
         # 削除検出
@@ -89,39 +108,142 @@ class FileSyncManager:
             if rel_path not in source_paths:
                 deleted.append(local_file)
 
-        return {
+        # 内容が同じだったファイルの更新日時を記録（次回はハッシュ計算不要）
+        if self.manifest.dirty:
+            self.manifest.save()
+
+        self._snapshot = {
             "added": added,
             "modified": modified,
             "deleted": deleted
         }
+        return self._snapshot
+
+    def get_updates(self, refresh: bool = False) -> Dict[str, List[Path]]:
+        """更新情報を取得（スナップショットがあれば再スキャンしない）
+
+        Args:
+            refresh: 強制的に再スキャンするか
 
-    def _is_file_modified(self, source_file: Path, local_file: Path) -> bool:
-        """ファイルが変更されているかチェック
+        Returns:
+            差分情報の辞書（check_updates() と同じ形式）
+        """
+        if refresh or self._snapshot is None:
+            return self.check_updates()
+        return self._snapshot
 
-        更新日時とファイルサイズを比較します。
+    def apply_changes(self, changed_paths: Iterable[Path]) -> Dict[str, List[Path]]:
+        """変更されたパスのみを再判定してスナップショットを更新
+
+        ファイル監視から通知されたパスについてのみ状態を判定するため、
+        コストはツリー全体ではなく変更数に比例する。スナップショットがない場合は一度だけ全体をチェックする。
 
         Args:
-            source_file: 元ファイル
-            local_file: ローカルファイル
+            changed_paths: 変更された元ディレクトリ内のパス（ファイルまたはディレクトリ）
 
         Returns:
-            変更されている場合True
+            更新後の差分情報の辞書（check_updates() と同じ形式）
         """
-        # 更新日時比較
-        source_mtime = source_file.stat().st_mtime
-        local_mtime = local_file.stat().st_mtime
+        snapshot = self.get_updates()
+
+        # 対象の相対パスを収集（ディレクトリは配下のテキストファイルに展開）
+        rel_paths = set()
+        directories = []
+        for path in changed_paths:
+            try:
+                rel_path = Path(path).relative_to(self.source_dir)
+            except ValueError:
+                continue
+
+            if rel_path.suffix.lower() == ".txt" and not (self.source_dir / rel_path).is_dir():
+                rel_paths.add(rel_path)
+                continue
+
+            # ディレクトリ（削除済みを含む）
+            directories.append(rel_path)
+            for root in (self.source_dir, self.local_dir):
+                directory = root / rel_path
+                if directory.is_dir():
+                    rel_paths.update(f.relative_to(root) for f in scan_text_files(directory))
+
+        # 削除されたディレクトリ配下で、前回の差分に含まれていたファイル
+        if directories:
+            for key, root in (("added", self.source_dir), ("modified", self.source_dir), ("deleted", self.local_dir)):
+                for f in snapshot[key]:
+                    rel_path = f.relative_to(root)
+                    if any(rel_path.is_relative_to(d) for d in directories):
+                        rel_paths.add(rel_path)
+
+        if not rel_paths:
+            return snapshot
+
+        added = [f for f in snapshot["added"] if f.relative_to(self.source_dir) not in rel_paths]
+        modified = [f for f in snapshot["modified"] if f.relative_to(self.source_dir) not in rel_paths]
+        deleted = [f for f in snapshot["deleted"] if f.relative_to(self.local_dir) not in rel_paths]
+
+        for rel_path in sorted(rel_paths):
+            source_file = self.source_dir / rel_path
+            local_file = self.local_dir / rel_path
+            source_exists = (
+                source_file.is_file()
+                and not should_exclude(source_file, self.settings.exclude_patterns, self.source_dir)
+            )
+
+            if source_exists and not local_file.is_file():
+                added.append(source_file)
+            elif source_exists:
+                if self._is_file_modified(rel_path.as_posix(), source_file, local_file):
+                    modified.append(source_file)
+            elif local_file.is_file():
+                deleted.append(local_file)
 
-        if source_mtime > local_mtime:
-            return True
+        if self.manifest.dirty:
+            self.manifest.save()
 
-        # ファイルサイズ比較
-        source_size = source_file.stat().st_size
-        local_size = local_file.stat().st_size
+        self._snapshot = {
+            "added": added,
+            "modified": modified,
+            "deleted": deleted
+        }
+        return self._snapshot
 
-        if source_size != local_size:
-            return True
+    def _is_file_modified(self, key: str, source_file: Path, local_file: Path) -> bool:
+        """ファイルの内容が変更されているかチェック
 
-        return False
+        元ファイルを1回だけstatし、サイズと更新日時が前回同期時と同じならハッシュを計算しない。
+        異なる場合は内容ハッシュを前回同期時（マニフェストがない場合はローカルファイル）と比較する。
+
+        Args:
+            key: 相対パス（POSIX形式）
+            source_file: 元ファイル
+            local_file: ローカルファイル
+
+        Returns:
+            変更されている場合True
+        """
+        stat_result = source_file.stat()
+        if self.manifest.is_unchanged(key, stat_result):
+            return False
+
+        entry = self.manifest.get(key)
+        if entry is not None:
+            if entry['size'] != stat_result.st_size:
+                return True
+            baseline_hash = entry['hash']
+        else:
+            # マニフェスト未作成（初回）の場合はローカルファイルと比較
+            if local_file.stat().st_size != stat_result.st_size:
+                return True
+            baseline_hash = self.calculate_file_hash(local_file)
+
+        source_hash = self.calculate_file_hash(source_file)
+        if source_hash == baseline_hash:
+            # 更新日時のみ変わった（内容は同じ）
+            self.manifest.set(key, stat_result.st_size, stat_result.st_mtime_ns, source_hash)
+            return False
+
+        self._pending_entries[key] = (stat_result.st_size, stat_result.st_mtime_ns, source_hash)
+        return True
 
     def has_updates(self) -> bool:
         """更新があるかチェック
@@ -129,7 +251,7 @@ class FileSyncManager:
         Returns:
             更新がある場合True
         """
-        updates = self.check_updates()
+        updates = self.get_updates()
         return any([
             updates["added"],
             updates["modified"],
@@ -142,7 +264,7 @@ class FileSyncManager:
         Returns:
             更新サマリー文字列
         """
-        updates = self.check_updates()
+        updates = self.get_updates()
 
         summary_parts = []
 
@@ -164,17 +286,27 @@ class FileSyncManager:
         self,
         updates: Dict[str, List[Path]] = None,
         preserve_user_labels: bool = True,
-        progress_callback: Optional[Callable[[str], None]] = None
+        progress_callback: Optional[Callable[[str], None]] = None,
+        cancel_event: Optional[threading.Event] = None
     ) -> Tuple[int, Optional[Dict[str, int]]]:
         """ファイルを同期
 
+        UIスレッドから直接呼び出さず、SyncJob 経由でワーカースレッドから実行することを想定。
+        マニフェストはライブラリCSVの保存後に更新する。キャンセル時はコピー済みのファイルは
+        そのまま残り、ライブラリCSVもマニフェストも更新されない（コピー済みのファイルを含め、
+        次回の同期で再検出される）。
+
         Args:
             updates: 更新情報（Noneの場合は自動検出）
             preserve_user_labels: ユーザーラベルを保持するか
             progress_callback: 進捗コールバック
+            cancel_event: キャンセル要求を通知するイベント
 
         Returns:
             (同期したファイル数, ラベル保持統計)
+
+        Raises:
+            SyncCancelledError: キャンセルされた場合
         """
         if updates is None:
             updates = self.check_updates()
@@ -206,76 +338,179 @@ class FileSyncManager:
         if progress_callback:
             progress_callback("ファイルを同期中...")
 
-        for file_list in [updates["added"], updates["modified"]]:
-            for source_file in file_list:
+        copy_pairs = [
+            (source_file, self.local_dir / source_file.relative_to(self.source_dir))
+            for source_file in updates["added"] + updates["modified"]
+        ]
+
+        # マニフェストへの記録はライブラリCSVの保存後にまとめて行う
+        # （先に記録すると、キャンセル時にCSVに反映されていないファイルが同期済みとして扱われる）
+        synced_entries: Dict[str, Tuple[int, int, str]] = {}
+        completed = False
+
+        try:
+            # 並列コピー（一時ファイル経由で置き換え）
+            self._check_cancelled(cancel_event)
+            last_percent = -1
+            for done, (source_file, _, copied_bytes, total_bytes) in enumerate(
+                copy_files_parallel(copy_pairs, self.COPY_MAX_WORKERS), 1
+            ):
                 rel_path = source_file.relative_to(self.source_dir)
-                dest_file = self.local_dir / rel_path
+                synced_entries[rel_path.as_posix()] = self._get_synced_entry(
+                    rel_path.as_posix(), source_file
+                )
+                sync_count += 1
+                self.logger.debug(f"同期: {rel_path}")
 
-                # 親ディレクトリ作成
-                dest_file.parent.mkdir(parents=True, exist_ok=True)
+                # 中断するとコピー待ちのファイルは取り消される
+                self._check_cancelled(cancel_event)
 
-                # ファイルコピー
-                import shutil
-                shutil.copy2(source_file, dest_file)
+                percent = int(copied_bytes / total_bytes * 100) if total_bytes else 100
+                if progress_callback and (percent != last_percent or done == len(copy_pairs)):
+                    last_percent = percent
+                    progress_callback(
+                        f"ファイルを同期中... {done}/{len(copy_pairs)}ファイル "
+                        f"({format_bytes(copied_bytes)} / {format_bytes(total_bytes)})"
+                    )
 
-                sync_count += 1
-                self.logger.debug(f"同期: {rel_path}")
+            self.logger.info(f"ファイルコピー完了: {len(synced_entries)}ファイル")
 
-        # 削除ファイルを削除
-        for local_file in updates["deleted"]:
-            if local_file.exists():
-                local_file.unlink()
-                sync_count += 1
+            # ユーザーラベル保持処理（変更されたファイルのみ、ライブラリCSVを保存）
+            if preserve_user_labels and old_prompts:
+                if progress_callback:
+                    progress_callback("ユーザーラベルを保持中...")
+
+                label_stats = self._preserve_user_labels_after_sync(
+                    old_prompts, updates, progress_callback, cancel_event
+                )
+
+            # 削除ファイルを削除（CSVから取り除いた後に削除し、キャンセル時は次回も検出されるようにする）
+            for local_file in updates["deleted"]:
                 rel_path = local_file.relative_to(self.local_dir)
-                self.logger.debug(f"削除: {rel_path}")
+                self.manifest.remove(rel_path.as_posix())
+                if local_file.exists():
+                    local_file.unlink()
+                    sync_count += 1
+                    self.logger.debug(f"削除: {rel_path}")
+
+            for key, (size, mtime_ns, file_hash) in synced_entries.items():
+                self.manifest.set(key, size, mtime_ns, file_hash)
+            completed = True
+
+        finally:
+            if not completed:
+                # コピー済みでCSVに反映されていないファイルは、次回の同期で再検出されるようにする
+                # （以前の記録があるファイルは内容ハッシュの比較で検出される）
+                for key in synced_entries:
+                    if self.manifest.get(key) is None:
+                        self.manifest.mark_unsynced(key)
+            if self.manifest.dirty:
+                self.manifest.save()
+            self._snapshot = None
 
         self.logger.info(f"ファイル同期完了: {sync_count}ファイル")
 
-        # ユーザーラベル保持処理
-        if preserve_user_labels and old_prompts:
-            if progress_callback:
-                progress_callback("ユーザーラベルを保持中...")
+        return sync_count, label_stats
 
-            label_stats = self._preserve_user_labels_after_sync(old_prompts, progress_callback)
+    def _get_synced_entry(self, key: str, source_file: Path) -> Tuple[int, int, str]:
+        """同期したファイルのマニフェストのエントリを作成
 
-        return sync_count, label_stats
+        更新チェック時に計算したハッシュがあれば再利用する。
+
+        Args:
+            key: 相対パス（POSIX形式）
+            source_file: 元ファイル
+
+        Returns:
+            (サイズ, 更新日時（ナノ秒）, 内容ハッシュ)
+        """
+        stat_result = source_file.stat()
+        pending = self._pending_entries.pop(key, None)
+
+        if pending and pending[:2] == (stat_result.st_size, stat_result.st_mtime_ns):
+            file_hash = pending[2]
+        else:
+            file_hash = self.calculate_file_hash(source_file)
+
+        return stat_result.st_size, stat_result.st_mtime_ns, file_hash
+
+    @staticmethod
+    def _check_cancelled(cancel_event: Optional[threading.Event]):
+        """キャンセル要求があれば例外を送出
+
+        Args:
+            cancel_event: キャンセル要求を通知するイベント
+
+        Raises:
+            SyncCancelledError: キャンセルされた場合
+        """
+        if cancel_event is not None and cancel_event.is_set():
+            raise SyncCancelledError("同期がキャンセルされました")
 
     def _preserve_user_labels_after_sync(
         self,
         old_prompts: List,
-        progress_callback: Optional[Callable[[str], None]] = None
+        updates: Dict[str, List[Path]],
+        progress_callback: Optional[Callable[[str], None]] = None,
+        cancel_event: Optional[threading.Event] = None
     ) -> Dict[str, int]:
         """同期後にユーザーラベルを保持
 
+        追加・更新されたファイルのみを再パースしてラベルを引き継ぎ、
+        削除されたファイルのプロンプトを取り除く。その他のファイルのプロンプトはそのまま残す。
+
         Args:
-            old_prompts: 既存のプロンプトリスト
+            old_prompts: 既存のプロンプトリスト（ライブラリ全体）
+            updates: 同期した更新情報
+            progress_callback: 進捗コールバック
+            cancel_event: キャンセル要求を通知するイベント
 
         Returns:
-            ラベル保持統計
+            ラベル保持統計（変更されたファイルのみが対象）
         """
         from core.library_manager import LibraryManager
         from core.label_preserver import LabelPreserver
 
-        self.logger.info("ユーザーラベル保持処理開始")
+        changed_files = [
+            str(source_file.relative_to(self.source_dir))
+            for source_file in updates["added"] + updates["modified"]
+        ]
+        deleted_files = [
+            str(local_file.relative_to(self.local_dir))
+            for local_file in updates["deleted"]
+        ]
 
-        # 新しいプロンプトを再スキャン
+        self.logger.info(
+            f"ユーザーラベル保持処理開始: 変更={len(changed_files)}ファイル, "
+            f"削除={len(deleted_files)}ファイル"
+        )
+
+        # 変更されたファイルのみ再パース（IDによるラベルマージは全体スキャンと同じ）
         manager = LibraryManager(self.settings)
-        new_prompts = manager.scan_and_build_library()
+        new_file_prompts = manager.scan_files(changed_files, existing_prompts=old_prompts)
+        self._check_cancelled(cancel_event)
+
+        # ラベル保持（変更されたファイルのプロンプト同士のみ照合）
+        changed = set(changed_files)
+        old_changed_prompts = [p for p in old_prompts if p.source_file in changed]
+        new_changed_prompts = [p for file_prompts in new_file_prompts.values() for p in file_prompts]
 
-        # ラベル保持
         preserver = LabelPreserver()
-        preserved_prompts = preserver.preserve_labels(old_prompts, new_prompts, progress_callback)
+        preserver.preserve_labels(
+            old_changed_prompts, new_changed_prompts, progress_callback, cancel_event
+        )
 
-        # 統計情報取得
-        stats = preserver.get_preservation_stats(old_prompts, preserved_prompts)
+        # 統計情報取得（照合時の集計を再利用）
+        stats = preserver.get_preservation_stats(old_changed_prompts, new_changed_prompts)
 
         self.logger.info(
             f"ラベル保持完了: 保持={stats['preserved']}件, "
             f"失われた={stats['lost']}件"
         )
 
-        # CSVに保存
-        manager.prompts = preserved_prompts
+        # 変更・削除されたファイルのプロンプトを差し替えてCSVに保存
+        # （ここまで来たらキャンセルせずに書き込む）
+        manager.replace_file_prompts(old_prompts, new_file_prompts, deleted_files)
         manager.save_to_csv()
 
         return stats
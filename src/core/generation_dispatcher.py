@@ -0,0 +1,598 @@
+"""画像生成ディスパッチャー
+
+構築済みのシーンプロンプトを複数のStable Diffusion WebUI（txt2img API）へ
+非同期に振り分けて送信します。
+
+- エンドポイントごとの同時実行数制限
+- キュー深さ（待機中 + 実行中 / 同時実行数）が最小のエンドポイントへ振り分け
+- 失敗時は指数バックオフで再試行（可能なら別のエンドポイントへ）
+
+HTTP通信には httpx（openaiパッケージの依存関係）の非同期クライアントを使用する。
+"""
+
+import asyncio
+import base64
+import json
+import random
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from models import Project
+from core.prompt_exporter import build_a1111_payload
+from utils.logger import get_logger
+
+
+# txt2img APIのパス
+TXT2IMG_PATH = "/sdapi/v1/txt2img"
+
+# 再試行対象のHTTPステータス
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+
+class WebUIRequestError(Exception):
+    """WebUIへのリクエスト失敗
+
+    Attributes:
+        status: HTTPステータス（接続エラー等の場合はNone）
+        retryable: 再試行で回復する可能性があるか
+        retry_after: サーバーが指定した再試行までの秒数
+    """
+
+    def __init__(self, message: str, status: Optional[int] = None,
+                 retryable: bool = True, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status = status
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+
+@dataclass
+class WebUIEndpoint:
+    """WebUIエンドポイント設定
+
+    Attributes:
+        url: WebUIのベースURL（例: http://127.0.0.1:7860）
+        max_concurrent: 同時実行数
+        name: 表示名（空の場合はURL）
+    """
+    url: str
+    max_concurrent: int = 1
+    name: str = ""
+
+    def __post_init__(self):
+        self.url = self.url.rstrip('/')
+        self.max_concurrent = max(1, int(self.max_concurrent))
+        if not self.name:
+            self.name = self.url
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'WebUIEndpoint':
+        """辞書から復元
+
+        Args:
+            data: {"url": ..., "max_concurrent": ..., "name": ...}
+
+        Returns:
+            WebUIEndpointオブジェクト
+        """
+        return cls(
+            url=data["url"],
+            max_concurrent=data.get("max_concurrent", 1),
+            name=data.get("name", "")
+        )
+
+
+@dataclass
+class GenerationJob:
+    """生成ジョブ（1シーン = 1リクエスト）
+
+    Attributes:
+        job_id: ジョブID（投入順の連番）
+        payload: txt2img APIのペイロード
+        scene_id: シーンID
+        scene_name: シーン名
+        attempts: 送信試行回数
+        last_endpoint: 最後に送信したエンドポイント名
+    """
+    job_id: int
+    payload: Dict[str, Any]
+    scene_id: Optional[int] = None
+    scene_name: str = ""
+    attempts: int = 0
+    last_endpoint: str = ""
+
+
+@dataclass
+class GenerationResult:
+    """生成結果
+
+    Attributes:
+        job_id: ジョブID
+        scene_id: シーンID
+        scene_name: シーン名
+        endpoint: 処理したエンドポイント名
+        success: 成功したか
+        images: 生成画像（Base64文字列）のリスト
+        info: WebUIが返した生成情報（JSON文字列）
+        error: エラーメッセージ
+        attempts: 試行回数
+        elapsed: 最終試行の所要時間（秒）
+        image_paths: 保存した画像ファイルのパス
+    """
+    job_id: int
+    scene_id: Optional[int]
+    scene_name: str
+    endpoint: str = ""
+    success: bool = False
+    images: List[str] = field(default_factory=list)
+    info: str = ""
+    error: str = ""
+    attempts: int = 0
+    elapsed: float = 0.0
+    image_paths: List[str] = field(default_factory=list)
+
+
+@dataclass
+class EndpointStatus:
+    """エンドポイントの実行状況
+
+    Attributes:
+        endpoint: エンドポイント設定
+        queued: 待機中ジョブ数
+        in_flight: 実行中ジョブ数
+        completed: 成功数
+        failed: 失敗（再試行含む）数
+    """
+    endpoint: WebUIEndpoint
+    queued: int = 0
+    in_flight: int = 0
+    completed: int = 0
+    failed: int = 0
+
+    @property
+    def depth(self) -> float:
+        """同時実行数で正規化したキュー深さ"""
+        return (self.queued + self.in_flight) / self.endpoint.max_concurrent
+
+
+async def post_json(
+    client: httpx.AsyncClient,
+    url: str,
+    payload: Dict[str, Any],
+    timeout: float
+) -> Dict[str, Any]:
+    """JSONをPOSTしてJSONレスポンスを取得
+
+    Args:
+        client: HTTPクライアント（接続を再利用するため実行ごとに共有）
+        url: 送信先URL
+        payload: 送信するデータ
+        timeout: タイムアウト（秒）
+
+    Returns:
+        レスポンスのJSON
+
+    Raises:
+        WebUIRequestError: 接続エラー、タイムアウト、HTTPエラーの場合
+    """
+    try:
+        response = await client.post(url, json=payload, timeout=timeout)
+    except httpx.TimeoutException:
+        raise WebUIRequestError(f"タイムアウト ({timeout}秒)")
+    except httpx.HTTPError as e:
+        raise WebUIRequestError(f"接続エラー: {e}")
+
+    status = response.status_code
+    if status >= 400:
+        retry_after = None
+        if "retry-after" in response.headers:
+            try:
+                retry_after = float(response.headers["retry-after"])
+            except ValueError:
+                pass
+        raise WebUIRequestError(
+            f"HTTP {status}: {response.text[:200]}",
+            status=status,
+            retryable=status in RETRYABLE_STATUS,
+            retry_after=retry_after
+        )
+
+    try:
+        return response.json()
+    except ValueError as e:
+        raise WebUIRequestError(f"JSONの解析に失敗しました: {e}", status=status)
+
+
+def create_jobs_from_project(
+    project: Project,
+    prompt_builder,
+    completed_only: bool = False,
+    payload_defaults: Optional[Dict[str, Any]] = None
+) -> List[GenerationJob]:
+    """プロジェクトのシーンから生成ジョブを作成
+
+    Args:
+        project: プロジェクトオブジェクト
+        prompt_builder: PromptBuilderオブジェクト
+        completed_only: 完成シーンのみを対象にするか
+        payload_defaults: ペイロードの既定値（steps, width など）
+
+    Returns:
+        生成ジョブのリスト
+    """
+    jobs = []
+    for scene, prompt in prompt_builder.iter_scene_prompts(project, completed_only):
+        if not prompt:
+            continue
+        jobs.append(GenerationJob(
+            job_id=len(jobs),
+            payload=build_a1111_payload(prompt, payload_defaults),
+            scene_id=scene.scene_id,
+            scene_name=scene.scene_name
+        ))
+    return jobs
+
+
+def create_jobs_from_prompts(
+    prompts: List[str],
+    payload_defaults: Optional[Dict[str, Any]] = None
+) -> List[GenerationJob]:
+    """プロンプト文字列（ワイルドカード展開済みなど）から生成ジョブを作成
+
+    Args:
+        prompts: プロンプトのリスト
+        payload_defaults: ペイロードの既定値
+
+    Returns:
+        生成ジョブのリスト
+    """
+    return [
+        GenerationJob(job_id=i, payload=build_a1111_payload(prompt, payload_defaults))
+        for i, prompt in enumerate(prompts)
+    ]
+
+
+def save_result_images(result: GenerationResult, output_dir: Path, run_id: str = "") -> List[str]:
+    """生成結果の画像をPNGファイルとして保存
+
+    ファイル名: {実行ID}_scene_{シーンID}_{連番}.png（シーンIDがない場合はジョブID）
+    既存のファイルは上書きしない（同名のファイルがある場合はエラー）。
+
+    Args:
+        result: 生成結果
+        output_dir: 保存先ディレクトリ
+        run_id: 実行ID（実行ごとに異なる値を指定し、以前の実行の画像を上書きしないようにする）
+
+    Returns:
+        保存したファイルパスのリスト
+
+    Raises:
+        FileExistsError: 同名のファイルが既に存在する場合
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    prefix = f"scene_{result.scene_id:03d}" if result.scene_id is not None else f"job_{result.job_id:05d}"
+    if run_id:
+        prefix = f"{run_id}_{prefix}"
+    paths = []
+    for i, image in enumerate(result.images, 1):
+        # "data:image/png;base64,..." 形式にも対応
+        data = image.split(",", 1)[1] if image.startswith("data:") else image
+        path = output_dir / f"{prefix}_{i:02d}.png"
+        with path.open('xb') as f:
+            f.write(base64.b64decode(data))
+        paths.append(str(path))
+
+    result.image_paths = paths
+    return paths
+
+
+class GenerationDispatcher:
+    """画像生成ディスパッチャー
+
+    投入されたジョブを、キュー深さが最も浅いエンドポイントへ順次振り分ける。
+    各エンドポイントは max_concurrent 個のワーカーで自身のキューを処理する。
+    振り分けはエンドポイントに空きがある場合のみ行うため、
+    速いエンドポイントほど多くのジョブを処理する。
+    """
+
+    def __init__(
+        self,
+        endpoints: List[WebUIEndpoint],
+        max_retries: int = 3,
+        backoff_base: float = 1.0,
+        backoff_max: float = 30.0,
+        request_timeout: float = 600.0,
+        prefetch: int = 1
+    ):
+        """初期化
+
+        Args:
+            endpoints: エンドポイントのリスト
+            max_retries: 最大再試行回数（初回送信を除く）
+            backoff_base: バックオフの基準秒数（試行ごとに2倍）
+            backoff_max: バックオフの上限秒数
+            request_timeout: 1リクエストのタイムアウト（秒）
+            prefetch: エンドポイントごとに同時実行数を超えて先読みするジョブ数
+        """
+        if not endpoints:
+            raise ValueError("エンドポイントが1つも指定されていません")
+
+        self.endpoints = endpoints
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.request_timeout = request_timeout
+        self.prefetch = prefetch
+
+        self.statuses: Dict[str, EndpointStatus] = {}
+        self._cancelled = False
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._cancel_event: Optional[asyncio.Event] = None
+
+    def cancel(self):
+        """実行中のディスパッチを中止（他スレッドから呼び出し可能）"""
+        self._cancelled = True
+        if self._loop and self._cancel_event:
+            self._loop.call_soon_threadsafe(self._cancel_event.set)
+
+    def get_status_text(self) -> str:
+        """エンドポイントごとの実行状況を文字列で取得
+
+        Returns:
+            状況の文字列（1エンドポイント1行）
+        """
+        return "\n".join(
+            f"{s.endpoint.name}: 実行中 {s.in_flight}/{s.endpoint.max_concurrent}, "
+            f"待機 {s.queued}, 完了 {s.completed}, 失敗 {s.failed}"
+            for s in self.statuses.values()
+        )
+
+    def run(
+        self,
+        jobs: List[GenerationJob],
+        progress_callback=None,
+        result_callback=None,
+        output_dir: Optional[Path] = None
+    ) -> List[GenerationResult]:
+        """ジョブを実行（同期呼び出し用）
+
+        新しいイベントループを作成して dispatch() を実行する。
+        UIのワーカースレッドから呼び出すことを想定。
+
+        Args:
+            jobs: 生成ジョブのリスト
+            progress_callback: 進捗コールバック関数(current, total, message)
+            result_callback: 結果コールバック関数(GenerationResult)
+            output_dir: 画像の保存先（Noneの場合は保存しない）
+
+        Returns:
+            生成結果のリスト（ジョブID順）
+        """
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(
+                self.dispatch(jobs, progress_callback, result_callback, output_dir)
+            )
+        finally:
+            loop.close()
+
+    async def dispatch(
+        self,
+        jobs: List[GenerationJob],
+        progress_callback=None,
+        result_callback=None,
+        output_dir: Optional[Path] = None
+    ) -> List[GenerationResult]:
+        """ジョブを非同期に実行
+
+        Args:
+            jobs: 生成ジョブのリスト
+            progress_callback: 進捗コールバック関数(current, total, message)
+            result_callback: 結果コールバック関数(GenerationResult)
+            output_dir: 画像の保存先（Noneの場合は保存しない）
+
+        Returns:
+            生成結果のリスト（ジョブID順）
+        """
+        total = len(jobs)
+        results: Dict[int, GenerationResult] = {}
+        if total == 0:
+            return []
+
+        self._loop = asyncio.get_running_loop()
+        self._cancel_event = asyncio.Event()
+        if self._cancelled:
+            self._cancel_event.set()
+
+        self.statuses = {ep.name: EndpointStatus(ep) for ep in self.endpoints}
+        backlog: asyncio.Queue = asyncio.Queue()
+        queues = {ep.name: asyncio.Queue() for ep in self.endpoints}
+        capacity_changed = asyncio.Condition()
+        all_done = asyncio.Event()
+        pending_tasks = set()
+
+        for job in jobs:
+            backlog.put_nowait(job)
+
+        # 画像のファイル名に付ける実行ID（以前の実行の画像を上書きしない）
+        run_id = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        loop = self._loop
+        # タイムアウトはリクエストごとに指定する
+        client = httpx.AsyncClient(timeout=None)
+
+        def report(message: str):
+            if progress_callback:
+                progress_callback(len(results), total, message)
+
+        async def notify_capacity():
+            async with capacity_changed:
+                capacity_changed.notify_all()
+
+        async def finish(job: GenerationJob, result: GenerationResult):
+            if output_dir and result.success and result.images:
+                try:
+                    # デコードと書き込みはイベントループを止めないようスレッドプールで実行
+                    await loop.run_in_executor(None, save_result_images, result, output_dir, run_id)
+                except Exception as e:
+                    result.error = f"画像の保存に失敗しました: {e}"
+            results[job.job_id] = result
+            if result_callback:
+                try:
+                    result_callback(result)
+                except Exception as e:
+                    get_logger().warning(f"生成結果コールバックでエラー: {e}")
+            report(f"[{result.endpoint}] シーン{result.scene_id}: {'完了' if result.success else '失敗'}")
+            if len(results) == total:
+                all_done.set()
+
+        def pick_endpoint(job: GenerationJob) -> Optional[EndpointStatus]:
+            """空きのあるエンドポイントのうちキュー深さが最小のものを選ぶ"""
+            available = [
+                s for s in self.statuses.values()
+                if s.queued + s.in_flight < s.endpoint.max_concurrent + self.prefetch
+            ]
+            if not available:
+                return None
+            # 再試行時は直前と別のエンドポイントを優先
+            others = [s for s in available if s.endpoint.name != job.last_endpoint]
+            return min(others or available, key=lambda s: s.depth)
+
+        async def router():
+            while True:
+                job = await backlog.get()
+                async with capacity_changed:
+                    await capacity_changed.wait_for(lambda: pick_endpoint(job) is not None)
+                    status = pick_endpoint(job)
+                status.queued += 1
+                queues[status.endpoint.name].put_nowait(job)
+
+        async def retry_later(job: GenerationJob, delay: float):
+            await asyncio.sleep(delay)
+            backlog.put_nowait(job)
+
+        async def worker(status: EndpointStatus):
+            endpoint = status.endpoint
+            queue = queues[endpoint.name]
+            while True:
+                job = await queue.get()
+                status.queued -= 1
+                status.in_flight += 1
+                job.attempts += 1
+                job.last_endpoint = endpoint.name
+                started = time.monotonic()
+
+                try:
+                    response = await post_json(
+                        client, endpoint.url + TXT2IMG_PATH, job.payload, self.request_timeout
+                    )
+
+                except WebUIRequestError as e:
+                    status.failed += 1
+                    if e.retryable and job.attempts <= self.max_retries:
+                        delay = self._get_backoff(job.attempts, e.retry_after)
+                        report(
+                            f"[{endpoint.name}] シーン{job.scene_id}: {e} "
+                            f"（{delay:.1f}秒後に再試行 {job.attempts}/{self.max_retries}）"
+                        )
+                        task = asyncio.ensure_future(retry_later(job, delay))
+                        pending_tasks.add(task)
+                        task.add_done_callback(pending_tasks.discard)
+                    else:
+                        await finish(job, GenerationResult(
+                            job_id=job.job_id,
+                            scene_id=job.scene_id,
+                            scene_name=job.scene_name,
+                            endpoint=endpoint.name,
+                            success=False,
+                            error=str(e),
+                            attempts=job.attempts,
+                            elapsed=time.monotonic() - started
+                        ))
+
+                except Exception as e:
+                    # 想定外のエラーは再試行しない（ワーカーは継続）
+                    status.failed += 1
+                    await finish(job, GenerationResult(
+                        job_id=job.job_id,
+                        scene_id=job.scene_id,
+                        scene_name=job.scene_name,
+                        endpoint=endpoint.name,
+                        success=False,
+                        error=f"予期しないエラー: {e}",
+                        attempts=job.attempts,
+                        elapsed=time.monotonic() - started
+                    ))
+
+                else:
+                    status.completed += 1
+                    info = response.get("info", "")
+                    await finish(job, GenerationResult(
+                        job_id=job.job_id,
+                        scene_id=job.scene_id,
+                        scene_name=job.scene_name,
+                        endpoint=endpoint.name,
+                        success=True,
+                        images=response.get("images") or [],
+                        info=info if isinstance(info, str) else json.dumps(info, ensure_ascii=False),
+                        attempts=job.attempts,
+                        elapsed=time.monotonic() - started
+                    ))
+
+                finally:
+                    status.in_flight -= 1
+                    await notify_capacity()
+
+        tasks = [asyncio.ensure_future(router())]
+        for status in self.statuses.values():
+            for _ in range(status.endpoint.max_concurrent):
+                tasks.append(asyncio.ensure_future(worker(status)))
+
+        report(f"{total}件のジョブを{len(self.endpoints)}個のエンドポイントへ送信します")
+
+        cancel_wait = asyncio.ensure_future(self._cancel_event.wait())
+        done_wait = asyncio.ensure_future(all_done.wait())
+        try:
+            await asyncio.wait([cancel_wait, done_wait], return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in tasks + list(pending_tasks) + [cancel_wait, done_wait]:
+                task.cancel()
+            await asyncio.gather(*tasks, *pending_tasks, cancel_wait, done_wait,
+                                 return_exceptions=True)
+            await client.aclose()
+            self._loop = None
+
+        # 中止された場合、未完了のジョブは失敗として扱う
+        for job in jobs:
+            if job.job_id not in results:
+                results[job.job_id] = GenerationResult(
+                    job_id=job.job_id,
+                    scene_id=job.scene_id,
+                    scene_name=job.scene_name,
+                    endpoint=job.last_endpoint,
+                    error="中止されました",
+                    attempts=job.attempts
+                )
+
+        return [results[job.job_id] for job in jobs]
+
+    def _get_backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """再試行までの待機秒数を取得（指数バックオフ + ジッター）
+
+        Args:
+            attempt: これまでの試行回数
+            retry_after: サーバーが指定した待機秒数
+
+        Returns:
+            待機秒数
+        """
+        if retry_after is not None:
+            return min(retry_after, self.backoff_max)
+        delay = min(self.backoff_base * (2 ** (attempt - 1)), self.backoff_max)
+        return delay * random.uniform(0.5, 1.0)
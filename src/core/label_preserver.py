@@ -3,13 +3,186 @@
 ワイルドカードファイル更新時に、ユーザーが設定した日本語ラベル・タグを保持します。
 """
 
+import os
+import threading
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from typing import List, Dict, Optional, Tuple, Callable
 from difflib import SequenceMatcher
 
 from models import Prompt
+from core.sync_job import SyncCancelledError
 from utils.logger import get_logger
 
 
+class SimilarityIndex:
+    """類似度照合用の候補インデックス（1ファイル分）
+
+    SequenceMatcher.ratio() は高コストなため、結果を変えない上界フィルタで
+    候補を絞り込んでから計算する。
+
+    1. 長さ比の上界（real_quick_ratio と同値）
+    2. q-gramカウントフィルタ（編集距離のq-gram補題）
+    3. quick_ratio（文字の多重集合の上界）
+
+    いずれも ratio() の上界のみで除外するため、照合結果は全件照合と同一になる。
+    候補数が多い場合は、長さでソートした索引から二分探索で長さの範囲を絞り込む。
+
+    Attributes:
+        prompts: 候補プロンプトのリスト（元の順序）
+        threshold: 類似度閾値
+    """
+
+    # q-gramの長さ
+    QGRAM_SIZE = 2
+
+    # 長さ索引を使う候補数の下限
+    LARGE_INDEX_THRESHOLD = 200
+
+    def __init__(self, prompts: List[Prompt], threshold: float):
+        """初期化
+
+        Args:
+            prompts: 候補プロンプトのリスト
+            threshold: 類似度閾値
+        """
+        self.prompts = prompts
+        self.threshold = threshold
+        self._lengths = [len(p.prompt) for p in prompts]
+
+        # SequenceMatcher は seq2 側の解析結果をキャッシュするため、
+        # 候補（古いプロンプト）ごとに seq2 を固定して使い回す
+        self._matchers: List[Optional[SequenceMatcher]] = [None] * len(prompts)
+        self._qgrams: List[Optional[Counter]] = [None] * len(prompts)
+
+        # 大きいファイル用の長さ索引
+        self._sorted_indices: Optional[List[int]] = None
+        self._sorted_lengths: Optional[List[int]] = None
+        if len(prompts) >= self.LARGE_INDEX_THRESHOLD and 0 < threshold <= 1:
+            self._sorted_indices = sorted(range(len(prompts)), key=self._lengths.__getitem__)
+            self._sorted_lengths = [self._lengths[i] for i in self._sorted_indices]
+
+    def find_first(self, text: str) -> Optional[Tuple[Prompt, float]]:
+        """類似度が閾値以上となる最初の候補を検索
+
+        Args:
+            text: 照合するプロンプト文字列
+
+        Returns:
+            (マッチしたプロンプト, 類似度)、見つからない場合None
+        """
+        text_qgrams = None
+
+        for i in self._iter_candidate_indices(len(text)):
+            length_a = len(text)
+            length_b = self._lengths[i]
+            total = length_a + length_b
+
+            if total:
+                # 1. 長さ比の上界
+                if 2.0 * min(length_a, length_b) / total < self.threshold:
+                    continue
+
+                # 2. q-gramカウントフィルタ
+                required = self._required_common_qgrams(length_a, length_b)
+                if required > 0:
+                    if text_qgrams is None:
+                        text_qgrams = self._count_qgrams(text)
+                    if self._common_qgrams(text_qgrams, self._get_qgrams(i)) < required:
+                        continue
+
+            # 3. quick_ratio → ratio
+            matcher = self._get_matcher(i)
+            matcher.set_seq1(text)
+            if matcher.quick_ratio() < self.threshold:
+                continue
+
+            similarity = matcher.ratio()
+            if similarity >= self.threshold:
+                return self.prompts[i], similarity
+
+        return None
+
+    def _iter_candidate_indices(self, length: int):
+        """長さの条件を満たし得る候補のインデックスを元の順序で返す
+
+        Args:
+            length: 照合するプロンプトの長さ
+
+        Returns:
+            インデックスのイテラブル
+        """
+        if self._sorted_indices is None:
+            return range(len(self.prompts))
+
+        # 2*min/(a+b) >= t となる長さの範囲（端は個別判定するため余裕を持たせる）
+        min_length = int(length * self.threshold / (2 - self.threshold)) - 1
+        max_length = int(length * (2 - self.threshold) / self.threshold) + 1
+        low = bisect_left(self._sorted_lengths, min_length)
+        high = bisect_right(self._sorted_lengths, max_length)
+        return sorted(self._sorted_indices[low:high])
+
+    def _required_common_qgrams(self, length_a: int, length_b: int) -> int:
+        """閾値を満たすために必要な共通q-gram数の下限
+
+        ratio = 2M/(a+b) >= t のとき、挿入・削除の回数 d = a+b-2M は (a+b)(1-t) 以下。
+        編集距離 d 以内の2文字列は max(a,b) - q + 1 - q*d 個以上のq-gramを共有する。
+
+        Args:
+            length_a: 文字列1の長さ
+            length_b: 文字列2の長さ
+
+        Returns:
+            必要な共通q-gram数（0以下の場合はフィルタ不可）
+        """
+        q = self.QGRAM_SIZE
+        # 浮動小数点誤差を考慮して1多めに見積もる
+        max_distance = int((length_a + length_b) * (1 - self.threshold)) + 1
+        return max(length_a, length_b) - q + 1 - q * max_distance
+
+    def _count_qgrams(self, text: str) -> Counter:
+        """q-gramの出現数を数える"""
+        q = self.QGRAM_SIZE
+        return Counter(text[i:i + q] for i in range(len(text) - q + 1))
+
+    @staticmethod
+    def _common_qgrams(counts_a: Counter, counts_b: Counter) -> int:
+        """共通q-gram数（多重集合の共通部分の大きさ）"""
+        if len(counts_a) > len(counts_b):
+            counts_a, counts_b = counts_b, counts_a
+        return sum(min(count, counts_b[gram]) for gram, count in counts_a.items() if gram in counts_b)
+
+    def _get_qgrams(self, index: int) -> Counter:
+        """候補のq-gramを取得（遅延計算）"""
+        qgrams = self._qgrams[index]
+        if qgrams is None:
+            qgrams = self._qgrams[index] = self._count_qgrams(self.prompts[index].prompt)
+        return qgrams
+
+    def _get_matcher(self, index: int) -> SequenceMatcher:
+        """候補のSequenceMatcherを取得（遅延作成）"""
+        matcher = self._matchers[index]
+        if matcher is None:
+            matcher = self._matchers[index] = SequenceMatcher(None, "", self.prompts[index].prompt)
+        return matcher
+
+
+def _match_partition_chunk(
+    partitions: List[Tuple[List[Prompt], List[Prompt]]]
+) -> List[List[Tuple[int, Optional[str]]]]:
+    """ワーカープロセスで複数ファイル分の照合を実行
+
+    Args:
+        partitions: (古いプロンプト, 新しいプロンプト) のリスト
+
+    Returns:
+        分割ごとの照合結果のリスト
+    """
+    preserver = LabelPreserver()
+    return [preserver.match_partition(old, new) for old, new in partitions]
+
+
 class LabelPreserver:
     """ユーザーラベル保持クラス
 
@@ -18,115 +191,294 @@ class LabelPreserver:
 
     照合方法:
     1. original_number（14→ の14）で照合
-    2. プロンプト内容の類似度90%以上で照合
-    3. source_fileとプロンプト内容の完全一致で照合
+    2. source_fileと正規化したプロンプト内容の完全一致で照合
+    3. source_fileとプロンプト内容の最初の30文字で照合
+    4. プロンプト内容の類似度90%以上で照合
     """
 
     # 類似度閾値（90%以上で同一とみなす）
     SIMILARITY_THRESHOLD = 0.9
 
-    # 進捗更新の間隔（100件ごと）
+    # 進捗更新・キャンセル確認の間隔（100件ごと）
     PROGRESS_UPDATE_INTERVAL = 100
 
+    # プロセスプールで並列化する新しいプロンプト数の下限
+    PARALLEL_MIN_PROMPTS = 5000
+
+    # 照合中にエラーが発生した場合の照合方法
+    MATCH_ERROR = 'エラー'
+
     def __init__(self):
         """初期化"""
         self.logger = get_logger()
+        self.last_stats: Optional[Dict[str, int]] = None
+        self._last_lists: Optional[Tuple[int, int]] = None
 
     def preserve_labels(
         self,
         old_prompts: List[Prompt],
         new_prompts: List[Prompt],
-        progress_callback: Optional[Callable[[str], None]] = None
+        progress_callback: Optional[Callable[[str], None]] = None,
+        cancel_event: Optional[threading.Event] = None,
+        max_workers: Optional[int] = None
     ) -> List[Prompt]:
         """ユーザーラベルを保持
 
         古いプロンプトリストから、ユーザーが設定したラベル・タグを抽出し、
         新しいプロンプトリストに引き継ぎます。
+        UIに依存しないため、ワーカースレッドから呼び出せます。
+
+        照合はすべて同じsource_file内で行うため、ファイル単位に分割して処理する。
+        件数が多い場合は分割をプロセスプールで並列に照合し、結果を統合する。
+        統計情報は last_stats に保存される。
 
         Args:
             old_prompts: 既存のプロンプトリスト
             new_prompts: 新しいプロンプトリスト
             progress_callback: 進捗コールバック関数
+            cancel_event: キャンセル要求を通知するイベント
+            max_workers: 最大ワーカープロセス数（Noneの場合はCPUコア数、1の場合は並列化しない）
 
         Returns:
             ラベル・タグが引き継がれた新しいプロンプトリスト
+
+        Raises:
+            SyncCancelledError: キャンセルされた場合
         """
+        self.last_stats = None
+        self._last_lists = None
+
         try:
             self.logger.info(
                 f"ラベル保持処理開始: 既存{len(old_prompts)}件 → 新規{len(new_prompts)}件"
             )
 
-            # ユーザー設定があるプロンプトを抽出
-            user_modified_prompts = [
-                p for p in old_prompts
-                if self._has_user_modifications(p)
+            # ユーザー設定があるプロンプトをファイル別に抽出
+            old_by_file: Dict[str, List[Prompt]] = {}
+            user_modified_count = 0
+            for prompt in old_prompts:
+                if self._has_user_modifications(prompt):
+                    user_modified_count += 1
+                    old_by_file.setdefault(prompt.source_file, []).append(prompt)
+
+            self.logger.info(f"ユーザー設定があるプロンプト: {user_modified_count}件")
+
+            # 照合対象の新しいプロンプトをファイル別に分割（インデックスで保持）
+            new_by_file: Dict[str, List[int]] = {}
+            for index, prompt in enumerate(new_prompts):
+                if prompt.source_file in old_by_file:
+                    new_by_file.setdefault(prompt.source_file, []).append(index)
+
+            partitions = [
+                (old_by_file[file_key], [new_prompts[i] for i in indices])
+                for file_key, indices in new_by_file.items()
             ]
+            partition_indices = list(new_by_file.values())
 
-            self.logger.info(f"ユーザー設定があるプロンプト: {len(user_modified_prompts)}件")
-
-            # 照合用のインデックスを作成
-            old_prompt_index = self._create_prompt_index(user_modified_prompts)
-
+            # ファイル単位で照合し、結果（古いプロンプトの位置と照合方法）を統合
+            matches: Dict[int, Tuple[Prompt, str]] = {}
+            error_count = 0
+            for part_no, part_results in self._match_partitions(
+                partitions, progress_callback, cancel_event, max_workers
+            ):
+                file_old_prompts = partitions[part_no][0]
+                for new_index, (old_index, method) in zip(partition_indices[part_no], part_results):
+                    if method == self.MATCH_ERROR:
+                        error_count += 1
+                    elif old_index >= 0:
+                        matches[new_index] = (file_old_prompts[old_index], method)
+
+            # ラベル・タグを引き継ぎ、統計を集計
             preserved_count = 0
             not_found_count = 0
-            error_count = 0
-            total_prompts = len(new_prompts)
-
-            # 新しいプロンプトに対して照合
+            modified_after_count = 0
+            # 照合方法別の件数（1件ごとのDEBUGログは大量件数で支配的なコストになるため集計のみ）
+            method_counts: Dict[str, int] = {}
             for index, new_prompt in enumerate(new_prompts):
-                try:
-                    matched_old_prompt = self._find_matching_prompt(
-                        new_prompt,
-                        old_prompt_index,
-                        user_modified_prompts
-                    )
-
-                    if matched_old_prompt:
-                        # ラベル・タグを引き継ぐ
-                        self._copy_user_data(matched_old_prompt, new_prompt)
-                        preserved_count += 1
-                        self.logger.debug(
-                            f"ラベル保持: {new_prompt.source_file}:{new_prompt.original_line_number} "
-                            f"← {matched_old_prompt.label_ja}"
-                        )
-                    else:
-                        # 照合失敗
-                        if self._has_user_modifications(new_prompt):
-                            not_found_count += 1
-
-                except Exception as e:
-                    # 1件のエラーで全体を止めない
-                    error_count += 1
-                    self.logger.error(
-                        f"プロンプト処理エラー (index={index}, "
-                        f"file={getattr(new_prompt, 'source_file', 'unknown')}): {e}"
-                    )
-                    # 処理を継続
-
-                # 進捗更新（100件ごと、またはQtアプリケーション更新のため）
-                if progress_callback and (index % self.PROGRESS_UPDATE_INTERVAL == 0 or index == total_prompts - 1):
-                    progress_percent = int((index + 1) / total_prompts * 100)
-                    progress_callback(f"ユーザーラベルを保持中... ({progress_percent}%)")
-
-                    # UIスレッドの更新を許可
-                    try:
-                        from PyQt6.QtWidgets import QApplication
-                        QApplication.processEvents()
-                    except Exception as e:
-                        self.logger.warning(f"UI更新エラー: {e}")
+                match = matches.get(index)
+                if match:
+                    self._copy_user_data(match[0], new_prompt)
+                    preserved_count += 1
+                    method_counts[match[1]] = method_counts.get(match[1], 0) + 1
+
+                if self._has_user_modifications(new_prompt):
+                    modified_after_count += 1
+                    if not match:
+                        not_found_count += 1
+
+            self.last_stats = {
+                'total_old': len(old_prompts),
+                'total_new': len(new_prompts),
+                'user_modified': user_modified_count,
+                'preserved': modified_after_count,
+                'lost': user_modified_count - modified_after_count
+            }
+            self._last_lists = (id(old_prompts), id(new_prompts))
 
             self.logger.info(
                 f"ラベル保持完了: 保持={preserved_count}件, 未照合={not_found_count}件, "
                 f"エラー={error_count}件"
             )
+            if method_counts:
+                self.logger.debug(
+                    "照合方法の内訳: " + ", ".join(f"{k}={v}件" for k, v in method_counts.items())
+                )
 
             return new_prompts
 
+        except SyncCancelledError:
+            raise
+
         except Exception as e:
             self.logger.error(f"ラベル保持処理で致命的エラー: {e}", exc_info=True)
             # 致命的エラーの場合は新しいプロンプトをそのまま返す
             return new_prompts
 
+    def _match_partitions(
+        self,
+        partitions: List[Tuple[List[Prompt], List[Prompt]]],
+        progress_callback: Optional[Callable[[str], None]] = None,
+        cancel_event: Optional[threading.Event] = None,
+        max_workers: Optional[int] = None
+    ):
+        """ファイル単位の分割を照合
+
+        Args:
+            partitions: (古いプロンプト, 新しいプロンプト) のリスト
+            progress_callback: 進捗コールバック関数
+            cancel_event: キャンセル要求を通知するイベント
+            max_workers: 最大ワーカープロセス数
+
+        Yields:
+            (分割の番号, 照合結果のリスト)（完了順）
+
+        Raises:
+            SyncCancelledError: キャンセルされた場合
+        """
+        total_prompts = sum(len(new) for _, new in partitions) or 1
+        done_prompts = 0
+
+        def report(part_no: int):
+            nonlocal done_prompts
+            done_prompts += len(partitions[part_no][1])
+            if progress_callback:
+                progress_percent = int(done_prompts / total_prompts * 100)
+                progress_callback(f"ユーザーラベルを保持中... ({progress_percent}%)")
+
+        def check_cancelled():
+            if cancel_event is not None and cancel_event.is_set():
+                raise SyncCancelledError("ラベル保持がキャンセルされました")
+
+        check_cancelled()
+        max_workers = max_workers or os.cpu_count() or 1
+        use_processes = (
+            max_workers > 1
+            and len(partitions) > 1
+            and total_prompts >= self.PARALLEL_MIN_PROMPTS
+        )
+
+        if not use_processes:
+            for part_no, (old, new) in enumerate(partitions):
+                check_cancelled()
+                yield part_no, self.match_partition(old, new, cancel_event)
+                report(part_no)
+            return
+
+        # 分割をワーカー数の数倍のチャンクにまとめ、プロセス起動とデータ転送の回数を抑える
+        chunks = self._chunk_partitions(partitions, max_workers * 4)
+        self.logger.info(
+            f"ラベル保持を並列実行: {len(partitions)}ファイル, {len(chunks)}チャンク, "
+            f"最大{max_workers}プロセス"
+        )
+
+        executor = ProcessPoolExecutor(max_workers=min(max_workers, len(chunks)))
+        try:
+            futures = {
+                executor.submit(_match_partition_chunk, [partitions[i] for i in chunk]): chunk
+                for chunk in chunks
+            }
+            for future in as_completed(futures):
+                check_cancelled()
+                for part_no, part_results in zip(futures[future], future.result()):
+                    yield part_no, part_results
+                    report(part_no)
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    @staticmethod
+    def _chunk_partitions(
+        partitions: List[Tuple[List[Prompt], List[Prompt]]],
+        chunk_count: int
+    ) -> List[List[int]]:
+        """分割を件数が均等になるようにチャンクへ割り当て
+
+        Args:
+            partitions: (古いプロンプト, 新しいプロンプト) のリスト
+            chunk_count: チャンク数の上限
+
+        Returns:
+            チャンクごとの分割番号のリスト
+        """
+        chunk_count = max(1, min(chunk_count, len(partitions)))
+        chunks: List[List[int]] = [[] for _ in range(chunk_count)]
+        loads = [0] * chunk_count
+
+        # 大きい分割から、負荷が最も小さいチャンクへ割り当てる
+        order = sorted(
+            range(len(partitions)),
+            key=lambda i: len(partitions[i][0]) * len(partitions[i][1]),
+            reverse=True
+        )
+        for part_no in order:
+            target = loads.index(min(loads))
+            chunks[target].append(part_no)
+            loads[target] += len(partitions[part_no][0]) + len(partitions[part_no][1])
+
+        return [chunk for chunk in chunks if chunk]
+
+    def match_partition(
+        self,
+        old_prompts: List[Prompt],
+        new_prompts: List[Prompt],
+        cancel_event: Optional[threading.Event] = None
+    ) -> List[Tuple[int, Optional[str]]]:
+        """同じsource_fileのプロンプト同士を照合
+
+        Args:
+            old_prompts: ユーザー設定がある古いプロンプト（同じファイル）
+            new_prompts: 新しいプロンプト（同じファイル）
+            cancel_event: キャンセル要求を通知するイベント（同一プロセス内のみ）
+
+        Returns:
+            新しいプロンプトごとの (古いプロンプトの位置, 照合方法)。
+            マッチなしは (-1, None)、エラーは (-1, MATCH_ERROR)
+        """
+        old_prompt_index = self._create_prompt_index(old_prompts)
+        positions = {id(prompt): i for i, prompt in enumerate(old_prompts)}
+
+        results = []
+        for index, new_prompt in enumerate(new_prompts):
+            # 大きいファイルでも応答できるよう一定件数ごとにキャンセル確認
+            if (cancel_event is not None and index % self.PROGRESS_UPDATE_INTERVAL == 0
+                    and cancel_event.is_set()):
+                raise SyncCancelledError("ラベル保持がキャンセルされました")
+
+            try:
+                matched, method = self._find_matching_prompt(
+                    new_prompt, old_prompt_index, old_prompts
+                )
+                results.append((positions[id(matched)], method) if matched else (-1, None))
+
+            except Exception as e:
+                # 1件のエラーで全体を止めない
+                self.logger.error(
+                    f"プロンプト処理エラー (index={index}, "
+                    f"file={getattr(new_prompt, 'source_file', 'unknown')}): {e}"
+                )
+                results.append((-1, self.MATCH_ERROR))
+
+        return results
+
     def _has_user_modifications(self, prompt: Prompt) -> bool:
         """ユーザーによる変更があるかチェック
 
@@ -161,10 +513,15 @@ class LabelPreserver:
     ) -> Dict[str, List[Prompt]]:
         """プロンプトインデックスを作成
 
-        照合を高速化するため、以下のキーでインデックス化:
+        照合を高速化するため、1回の走査で以下のキーでインデックス化:
         - source_file
         - original_number
-        - prompt内容の最初の30文字
+        - source_file + 正規化したprompt内容
+        - source_file + prompt内容の最初の30文字
+        - source_file別の類似度照合インデックス
+
+        同じキーに複数のプロンプトがある場合は、先に現れたものを優先する
+        （original_numberのみ後勝ち）。
 
         Args:
             prompts: プロンプトリスト
@@ -175,7 +532,9 @@ class LabelPreserver:
         index = {
             'by_file': {},
             'by_number': {},
-            'by_content': {}
+            'by_exact': {},
+            'by_content': {},
+            'similarity': {}
         }
 
         for prompt in prompts:
@@ -190,11 +549,16 @@ class LabelPreserver:
                 number_key = f"{prompt.source_file}:{prompt.original_number}"
                 index['by_number'][number_key] = prompt
 
+            # 内容の完全一致（正規化済み）
+            exact_key = (file_key, self._normalize_prompt(prompt.prompt))
+            index['by_exact'].setdefault(exact_key, prompt)
+
             # 内容別（最初の30文字）
-            content_key = prompt.prompt[:30].strip().lower()
-            if content_key not in index['by_content']:
-                index['by_content'][content_key] = []
-            index['by_content'][content_key].append(prompt)
+            content_key = (file_key, prompt.prompt[:30].strip().lower())
+            index['by_content'].setdefault(content_key, prompt)
+
+        for file_key, file_prompts in index['by_file'].items():
+            index['similarity'][file_key] = SimilarityIndex(file_prompts, self.SIMILARITY_THRESHOLD)
 
         return index
 
@@ -203,13 +567,16 @@ class LabelPreserver:
         new_prompt: Prompt,
         old_index: Dict[str, any],
         old_prompts: List[Prompt]
-    ) -> Optional[Prompt]:
+    ) -> Tuple[Optional[Prompt], Optional[str]]:
         """マッチするプロンプトを検索
 
         優先順位:
         1. original_numberで照合（最高精度）
-        2. プロンプト内容の類似度90%以上（高精度）
-        3. source_fileとプロンプト内容の完全一致（中精度）
+        2. source_fileと正規化したプロンプト内容の完全一致（高精度）
+        3. source_fileとプロンプト内容の最初の30文字の一致（中精度）
+        4. プロンプト内容の類似度90%以上（中精度）
+
+        1〜3は辞書引きのみで判定できるため、高コストな類似度計算は最後に行う。
 
         Args:
             new_prompt: 新しいプロンプト
@@ -217,49 +584,48 @@ class LabelPreserver:
             old_prompts: 古いプロンプトリスト
 
         Returns:
-            マッチしたプロンプト、見つからない場合None
+            (マッチしたプロンプト, 照合方法)、見つからない場合(None, None)
         """
         # 方法1: original_numberで照合
         if new_prompt.original_number is not None:
             number_key = f"{new_prompt.source_file}:{new_prompt.original_number}"
             if number_key in old_index['by_number']:
-                matched = old_index['by_number'][number_key]
-                self.logger.debug(
-                    f"照合成功(original_number): {number_key}"
-                )
-                return matched
+                return old_index['by_number'][number_key], 'original_number'
 
-        # 方法2: 同じファイル内でプロンプト類似度が90%以上
-        if new_prompt.source_file in old_index['by_file']:
-            candidates = old_index['by_file'][new_prompt.source_file]
-
-            for old_prompt in candidates:
-                similarity = self._calculate_similarity(
-                    new_prompt.prompt,
-                    old_prompt.prompt
-                )
-
-                if similarity >= self.SIMILARITY_THRESHOLD:
-                    self.logger.debug(
-                        f"照合成功(類似度{similarity:.2%}): "
-                        f"{new_prompt.source_file}:{new_prompt.original_line_number}"
-                    )
-                    return old_prompt
+        # 方法2: 正規化した内容の完全一致（行の移動に対応）
+        exact_key = (new_prompt.source_file, self._normalize_prompt(new_prompt.prompt))
+        matched = old_index['by_exact'].get(exact_key)
+        if matched:
+            return matched, '完全一致'
 
         # 方法3: 内容の最初の30文字で照合
-        content_key = new_prompt.prompt[:30].strip().lower()
-        if content_key in old_index['by_content']:
-            candidates = old_index['by_content'][content_key]
+        content_key = (new_prompt.source_file, new_prompt.prompt[:30].strip().lower())
+        matched = old_index['by_content'].get(content_key)
+        if matched:
+            return matched, '内容一致'
+
+        # 方法4: 同じファイル内でプロンプト類似度が90%以上
+        #        （上界フィルタで候補を絞り込むが、結果は全件照合と同一）
+        if new_prompt.source_file in old_index['similarity']:
+            match = old_index['similarity'][new_prompt.source_file].find_first(new_prompt.prompt)
 
-            for old_prompt in candidates:
-                if old_prompt.source_file == new_prompt.source_file:
-                    self.logger.debug(
-                        f"照合成功(内容一致): {content_key}"
-                    )
-                    return old_prompt
+            if match:
+                return match[0], '類似度'
 
         # マッチなし
-        return None
+        return None, None
+
+    @staticmethod
+    def _normalize_prompt(text: str) -> str:
+        """照合用にプロンプトを正規化（空白の連続を1つにまとめ、大文字小文字を無視）
+
+        Args:
+            text: プロンプト文字列
+
+        Returns:
+            正規化した文字列
+        """
+        return " ".join(text.split()).casefold()
 
     def _calculate_similarity(self, text1: str, text2: str) -> float:
         """テキスト類似度を計算
@@ -318,6 +684,8 @@ class LabelPreserver:
     ) -> Dict[str, int]:
         """ラベル保持統計を取得
 
+        直前の preserve_labels() と同じリストの場合は、照合時に集計した統計を返す。
+
         Args:
             old_prompts: 既存のプロンプトリスト
             new_prompts: 新しいプロンプトリスト
@@ -325,6 +693,9 @@ class LabelPreserver:
         Returns:
             統計情報の辞書
         """
+        if self.last_stats and self._last_lists == (id(old_prompts), id(new_prompts)):
+            return dict(self.last_stats)
+
         user_modified_count = sum(
             1 for p in old_prompts
             if self._has_user_modifications(p)
@@ -4,9 +4,8 @@
 """
 
 import csv
-import shutil
 from pathlib import Path
-from typing import List, Optional, Callable
+from typing import Dict, List, Optional, Callable
 from datetime import datetime
 
 from models import Prompt
@@ -25,6 +24,9 @@ class LibraryManager:
     - ファイル更新チェック
     """
 
+    # 初回コピーの並列スレッド数
+    COPY_MAX_WORKERS = 16
+
     def __init__(self, settings: Optional[Settings] = None):
         """初期化
 
@@ -69,28 +71,24 @@ class LibraryManager:
             # ローカルディレクトリを作成
             local_dir.mkdir(parents=True, exist_ok=True)
 
-            # 全ファイルをコピー（除外パターンを考慮）
-            from utils.file_utils import scan_text_files
+            # 全ファイルを並列コピー（除外パターンを考慮、進捗はバイト単位）
+            from utils.file_utils import scan_text_files, copy_files_parallel
             txt_files = scan_text_files(
                 source_dir,
                 recursive=True,
                 exclude_patterns=self.settings.exclude_patterns
             )
-            total_files = len(txt_files)
-
-            for i, source_file in enumerate(txt_files, 1):
-                # 相対パスを取得
-                relative_path = source_file.relative_to(source_dir)
-                dest_file = local_dir / relative_path
-
-                # 親ディレクトリを作成
-                dest_file.parent.mkdir(parents=True, exist_ok=True)
-
-                # ファイルをコピー
-                shutil.copy2(source_file, dest_file)
-
+            copy_pairs = [
+                (source_file, local_dir / source_file.relative_to(source_dir))
+                for source_file in txt_files
+            ]
+
+            for source_file, _, copied_bytes, total_bytes in copy_files_parallel(
+                copy_pairs, self.COPY_MAX_WORKERS
+            ):
                 if progress_callback:
-                    progress_callback(i, total_files, f"Copied: {relative_path}")
+                    relative_path = source_file.relative_to(source_dir)
+                    progress_callback(copied_bytes, total_bytes, f"Copied: {relative_path}")
 
         if progress_callback:
             progress_callback(1, 1, "File copy completed")
@@ -133,6 +131,72 @@ class LibraryManager:
 
         return self.prompts
 
+    def scan_files(
+        self,
+        relative_paths: List[str],
+        existing_prompts: Optional[List[Prompt]] = None
+    ) -> Dict[str, List[Prompt]]:
+        """指定したワイルドカードファイルのみをパース
+
+        同期で変更されたファイルだけを再パースするために使用します。
+        ラベル情報のマージは scan_and_build_library() と同じくID単位で行います。
+
+        Args:
+            relative_paths: ローカルディレクトリからの相対パスのリスト
+            existing_prompts: 既存のプロンプト（ラベルマージ用）
+
+        Returns:
+            相対パス → Promptリストの辞書（存在しないファイルは含まない）
+        """
+        if existing_prompts is not None:
+            self.parser.set_existing_prompts(existing_prompts)
+
+        local_dir = self.settings.get_local_dir()
+        results = {}
+        for relative_path in relative_paths:
+            file_path = local_dir / relative_path
+            if file_path.exists():
+                results[relative_path] = self.parser.parse_file(file_path)
+
+        return results
+
+    def replace_file_prompts(
+        self,
+        prompts: List[Prompt],
+        file_prompts: Dict[str, List[Prompt]],
+        removed_files: Optional[List[str]] = None
+    ) -> List[Prompt]:
+        """ファイル単位でプロンプトを差し替え
+
+        file_prompts に含まれるファイルのプロンプトを置き換え、removed_files のプロンプトを削除します。
+        その他のファイルのプロンプトはそのまま残し、並び順は全体スキャンと同じファイルパス順にします。
+
+        Args:
+            prompts: 現在のプロンプトリスト
+            file_prompts: 相対パス → 新しいPromptリストの辞書
+            removed_files: 削除するファイルの相対パスのリスト
+
+        Returns:
+            差し替え後のプロンプトリスト（self.promptsにも設定）
+        """
+        removed = set(removed_files or [])
+
+        by_file: Dict[str, List[Prompt]] = {}
+        for prompt in prompts:
+            by_file.setdefault(prompt.source_file, []).append(prompt)
+
+        for relative_path in removed:
+            by_file.pop(relative_path, None)
+        by_file.update(file_prompts)
+
+        local_dir = self.settings.get_local_dir()
+        self.prompts = [
+            prompt
+            for relative_path in sorted(by_file, key=lambda f: local_dir / f)
+            for prompt in by_file[relative_path]
+        ]
+        return self.prompts
+
     def save_to_csv(self, csv_path: Optional[Path] = None):
         """ライブラリをCSVに保存
 
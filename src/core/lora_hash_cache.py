@@ -0,0 +1,229 @@
+"""LoRAハッシュキャッシュ
+
+LoRAファイルのSHA256（Civitaiの AutoV2 は先頭10桁）を計算し、
+(パス, サイズ, 更新日時) をキーとして永続的にキャッシュします。
+新規・変更されたファイルのみハッシュを計算します。
+"""
+
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional
+
+from core.sync_job import SyncCancelledError
+from utils.logger import get_logger
+
+
+HASH_CHUNK_SIZE = 4 * 1024 * 1024  # ハッシュ計算の読み込み単位（4MB）
+AUTOV2_LENGTH = 10  # AutoV2ハッシュの桁数
+
+
+def calculate_sha256(
+    file_path: Path,
+    chunk_size: int = HASH_CHUNK_SIZE,
+    cancel_event: Optional[threading.Event] = None
+) -> str:
+    """ファイルのSHA256をストリーミングで計算
+
+    固定サイズのバッファに読み込むため、ファイルサイズに関係なくメモリ使用量は一定。
+    hashlib は大きなデータの処理中にGILを解放するため、複数スレッドで並列に計算できる。
+
+    Args:
+        file_path: ファイルパス
+        chunk_size: 読み込み単位（バイト）
+        cancel_event: キャンセル要求を通知するイベント（読み込み単位ごとに確認）
+
+    Returns:
+        SHA256ハッシュ（16進数小文字）
+
+    Raises:
+        SyncCancelledError: キャンセルされた場合
+    """
+    sha256 = hashlib.sha256()
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
+
+    with file_path.open('rb', buffering=0) as f:
+        while size := f.readinto(buffer):
+            if cancel_event is not None and cancel_event.is_set():
+                raise SyncCancelledError("ハッシュ計算がキャンセルされました")
+            sha256.update(view[:size])
+
+    return sha256.hexdigest()
+
+
+def to_autov2(sha256: str) -> str:
+    """SHA256からAutoV2ハッシュ（Civitai・WebUIで使用される短縮形）を取得
+
+    Args:
+        sha256: SHA256ハッシュ
+
+    Returns:
+        AutoV2ハッシュ（先頭10桁、大文字）
+    """
+    return sha256[:AUTOV2_LENGTH].upper()
+
+
+class LoraHashCache:
+    """LoRAハッシュキャッシュ
+
+    キーはファイルの絶対パス。サイズ・更新日時が変わった場合はハッシュを再計算する。
+
+    Attributes:
+        path: キャッシュファイルのパス
+        entries: パス → {"size", "mtime_ns", "sha256"} の辞書
+    """
+
+    VERSION = 1
+    HASH_MAX_WORKERS = 4  # ハッシュ計算の最大並列数（ディスク帯域を奪い合わない程度）
+
+    def __init__(self, path: Path):
+        """初期化
+
+        Args:
+            path: キャッシュファイルのパス
+        """
+        self.path = path
+        self.entries: Dict[str, dict] = {}
+        self.logger = get_logger()
+        self.load()
+
+    def load(self):
+        """ファイルから読み込み（存在しない・壊れている場合は空）"""
+        self.entries = {}
+        if not self.path.exists():
+            return
+
+        try:
+            with self.path.open('r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == self.VERSION:
+                self.entries = data.get('files', {})
+        except Exception as e:
+            self.logger.warning(f"LoRAハッシュキャッシュの読み込みに失敗（再作成します）: {e}")
+
+    def save(self):
+        """ファイルに保存（一時ファイル経由で置き換え）"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+
+        with temp_path.open('w', encoding='utf-8') as f:
+            f.write(json.dumps({'version': self.VERSION, 'files': self.entries}, ensure_ascii=False))
+        os.replace(temp_path, self.path)
+
+    def get(self, file_path: Path, stat_result: os.stat_result) -> Optional[str]:
+        """キャッシュ済みのハッシュを取得
+
+        Args:
+            file_path: ファイルパス
+            stat_result: 現在のstat結果
+
+        Returns:
+            SHA256ハッシュ（未計算、またはサイズ・更新日時が変わった場合None）
+        """
+        entry = self.entries.get(str(file_path))
+        if (
+            entry is not None
+            and entry['size'] == stat_result.st_size
+            and entry['mtime_ns'] == stat_result.st_mtime_ns
+        ):
+            return entry['sha256']
+        return None
+
+    def set(self, file_path: Path, stat_result: os.stat_result, sha256: str):
+        """ハッシュを設定
+
+        Args:
+            file_path: ファイルパス
+            stat_result: ハッシュ計算前のstat結果
+            sha256: SHA256ハッシュ
+        """
+        self.entries[str(file_path)] = {
+            'size': stat_result.st_size,
+            'mtime_ns': stat_result.st_mtime_ns,
+            'sha256': sha256,
+        }
+
+    def hash_files(
+        self,
+        file_paths: Iterable[Path],
+        progress_callback: Optional[Callable[[int, int, str], None]] = None,
+        max_workers: Optional[int] = None,
+        cancel_event: Optional[threading.Event] = None
+    ) -> Dict[Path, str]:
+        """複数ファイルのハッシュを取得（未キャッシュ分のみ並列に計算）
+
+        計算後にキャッシュを保存する。対象に含まれないエントリは削除する。
+        キャンセル時も計算済みの分は保存する（次回は残りのファイルのみ計算）。
+
+        Args:
+            file_paths: ファイルパスのリスト
+            progress_callback: 進捗コールバック(current, total, message)
+            max_workers: 最大並列数（Noneの場合は HASH_MAX_WORKERS）
+            cancel_event: キャンセル要求を通知するイベント
+
+        Returns:
+            ファイルパス → SHA256ハッシュ の辞書（読み込めなかったファイルは含まない）
+
+        Raises:
+            SyncCancelledError: キャンセルされた場合
+        """
+        results: Dict[Path, str] = {}
+        pending = []
+
+        for file_path in file_paths:
+            try:
+                stat_result = file_path.stat()
+            except OSError as e:
+                self.logger.warning(f"LoRAファイルの情報を取得できません: {file_path}: {e}")
+                continue
+
+            sha256 = self.get(file_path, stat_result)
+            if sha256:
+                results[file_path] = sha256
+            else:
+                pending.append((file_path, stat_result))
+
+        # 対象外になったファイルのエントリを削除
+        keep = {str(path) for path in results} | {str(path) for path, _ in pending}
+        removed = [key for key in self.entries if key not in keep]
+        for key in removed:
+            del self.entries[key]
+
+        total = len(pending)
+        if pending:
+            self.logger.info(f"LoRAハッシュ計算: {total}ファイル（キャッシュ済み: {len(results)}）")
+            max_workers = max_workers or self.HASH_MAX_WORKERS
+
+            with ThreadPoolExecutor(max_workers=min(max_workers, total)) as executor:
+                futures = {
+                    executor.submit(calculate_sha256, file_path, cancel_event=cancel_event): (file_path, stat_result)
+                    for file_path, stat_result in pending
+                }
+                try:
+                    for i, future in enumerate(as_completed(futures)):
+                        file_path, stat_result = futures[future]
+                        try:
+                            sha256 = future.result()
+                        except OSError as e:
+                            self.logger.warning(f"LoRAハッシュの計算に失敗: {file_path}: {e}")
+                        else:
+                            results[file_path] = sha256
+                            self.set(file_path, stat_result, sha256)
+
+                        if progress_callback:
+                            progress_callback(i + 1, total, f"Hashing: {file_path.name}")
+                except BaseException:
+                    # 中断時は未着手の計算を取り消し、計算済みの分は保存
+                    for future in futures:
+                        future.cancel()
+                    self.save()
+                    raise
+
+        if pending or removed:
+            self.save()
+
+        return results
@@ -4,13 +4,18 @@ LoRAファイルの読み込み、CSV保存、同期を管理。
 """
 
 import csv
+import json
+import os
+import threading
 from pathlib import Path
-from typing import List, Optional, Callable
+from typing import Dict, List, Optional, Callable
 from datetime import datetime
 
 from models import Prompt
 from config.settings import Settings
+from core.lora_hash_cache import LoraHashCache, to_autov2
 from core.lora_parser import LoraParser
+from core.sync_job import SyncCancelledError
 
 
 class LoraLibraryManager:
@@ -22,8 +27,15 @@ class LoraLibraryManager:
     - LoRAファイルのスキャン
     - CSV形式でのライブラリ保存・読み込み
     - メタデータ管理
+    - ファイルハッシュ（SHA256 / AutoV2）による重複検出
     """
 
+    HASH_CACHE_FILENAME = "lora_hash_cache.json"
+    SCAN_MANIFEST_FILENAME = "lora_scan_manifest.json"
+    SCAN_MANIFEST_VERSION = 1
+    # プレビュー画像の候補（優先順）
+    PREVIEW_SUFFIXES = (".preview.png", ".png", ".preview.jpg", ".jpg", ".jpeg", ".preview.webp", ".webp")
+
     def __init__(self, settings: Optional[Settings] = None):
         """初期化
 
@@ -36,16 +48,35 @@ class LoraLibraryManager:
 
     def scan_and_build_library(
         self,
-        progress_callback: Optional[Callable[[int, int, str], None]] = None
+        progress_callback: Optional[Callable[[int, int, str], None]] = None,
+        incremental: bool = True,
+        cancel_event: Optional[threading.Event] = None
     ) -> List[Prompt]:
         """LoRAフォルダをスキャンしてライブラリを構築
 
+        incremental=True の場合、前回スキャン時から .safetensors・サイドカーの
+        サイズと更新日時が変わっていないLoRAは再読み込みせず、CSVの行（ユーザーの編集を含む）をそのまま使用する。
+        変更されたLoRAも、ID・作成日時・最終使用日時と、ユーザーが編集したラベル・タグを引き継ぐ。
+        新規LoRAのハッシュ計算は数GBのファイル全体を読むため、UIスレッドからは直接呼び出さず
+        ワーカースレッドで実行することを想定。キャンセル時はスキャン結果を保存しない（計算済みのハッシュは保存する）。
+
         Args:
             progress_callback: 進捗コールバック(current, total, message)
+            incremental: 変更されたLoRAのみ再読み込みするか
+            cancel_event: キャンセル要求を通知するイベント
 
         Returns:
             Promptオブジェクトのリスト
+
+        Raises:
+            SyncCancelledError: キャンセルされた場合
         """
+        def report(current: int, total: int, message: str):
+            if cancel_event is not None and cancel_event.is_set():
+                raise SyncCancelledError("LoRAスキャンがキャンセルされました")
+            if progress_callback:
+                progress_callback(current, total, message)
+
         lora_dir = self.settings.get_lora_dir()
 
         if not lora_dir or not lora_dir.exists():
@@ -56,14 +87,166 @@ class LoraLibraryManager:
         if progress_callback:
             progress_callback(0, 1, "Scanning LoRA files...")
 
-        # ファイルをスキャン
-        self.prompts = self.parser.scan_directory(lora_dir, progress_callback)
+        # 前回のスキャン結果（CSVの行とファイルシグネチャ）
+        old_prompts = {prompt.source_file: prompt for prompt in self.load_from_csv()}
+        previous = {}
+        if incremental:
+            signatures = self._load_scan_manifest(lora_dir)
+            previous = {
+                source_file: (signature, old_prompts[source_file])
+                for source_file, signature in signatures.items()
+                if source_file in old_prompts
+            }
+
+        previous_prompts = self.prompts
+        try:
+            # ファイルをスキャン（変更されたLoRAのみ読み込み、パーサーのリストは次回のスキャンで消去されるためコピー）
+            self.prompts = list(self.parser.scan_directory(lora_dir, report, previous=previous))
+
+            # 読み込み直したLoRAにユーザーの編集を引き継ぐ
+            for prompt in self.prompts:
+                old_prompt = old_prompts.get(prompt.source_file)
+                if old_prompt is not None and old_prompt is not prompt:
+                    self._carry_over_user_edits(old_prompt, prompt)
+
+            # ファイルハッシュを付与（新規・変更されたファイルのみ計算）
+            self._attach_hashes(lora_dir, report, cancel_event)
+        except SyncCancelledError:
+            self.prompts = previous_prompts
+            raise
+
+        self._save_scan_manifest(lora_dir, self.parser.signatures)
 
         if progress_callback:
             progress_callback(1, 1, f"Found {len(self.prompts)} LoRA files")
 
         return self.prompts
 
+    @staticmethod
+    def _carry_over_user_edits(old_prompt: Prompt, new_prompt: Prompt):
+        """読み込み直したLoRAに前回の情報を引き継ぐ
+
+        Args:
+            old_prompt: 前回のPrompt（CSVの行）
+            new_prompt: 読み込み直したPrompt
+        """
+        new_prompt.id = old_prompt.id
+        new_prompt.created_date = old_prompt.created_date
+        new_prompt.last_used = old_prompt.last_used
+
+        # 自動抽出以外（手動・AI生成など）のラベルとタグは保持
+        if old_prompt.label_source != "auto_extract":
+            new_prompt.label_ja = old_prompt.label_ja
+            new_prompt.label_en = old_prompt.label_en
+            new_prompt.tags = old_prompt.tags
+            new_prompt.label_source = old_prompt.label_source
+
+    def _load_scan_manifest(self, lora_dir: Path) -> Dict[str, list]:
+        """前回スキャン時のファイルシグネチャを読み込み
+
+        Args:
+            lora_dir: LoRAディレクトリ（前回と異なる場合は空）
+
+        Returns:
+            source_file → ファイルシグネチャ の辞書
+        """
+        manifest_path = self.settings.get_data_dir() / self.SCAN_MANIFEST_FILENAME
+        if not manifest_path.exists():
+            return {}
+
+        try:
+            with manifest_path.open('r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == self.SCAN_MANIFEST_VERSION and data.get('lora_dir') == str(lora_dir):
+                return data.get('files', {})
+        except Exception as e:
+            print(f"[Warning] Failed to load {manifest_path}: {e}")
+        return {}
+
+    def _save_scan_manifest(self, lora_dir: Path, signatures: Dict[str, list]):
+        """スキャン時のファイルシグネチャを保存（一時ファイル経由で置き換え）
+
+        Args:
+            lora_dir: LoRAディレクトリ
+            signatures: source_file → ファイルシグネチャ の辞書
+        """
+        manifest_path = self.settings.get_data_dir() / self.SCAN_MANIFEST_FILENAME
+        manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = manifest_path.with_name(f"{manifest_path.name}.{os.getpid()}.tmp")
+
+        with temp_path.open('w', encoding='utf-8') as f:
+            # json.dump() は純Pythonのエンコーダーを使うため、dumps() で一括変換して書き込む
+            f.write(json.dumps({
+                'version': self.SCAN_MANIFEST_VERSION,
+                'lora_dir': str(lora_dir),
+                'files': signatures
+            }, ensure_ascii=False))
+        os.replace(temp_path, manifest_path)
+
+    def _attach_hashes(
+        self,
+        lora_dir: Path,
+        progress_callback: Optional[Callable[[int, int, str], None]] = None,
+        cancel_event: Optional[threading.Event] = None
+    ):
+        """各LoRAのSHA256・AutoV2ハッシュを lora_metadata に追加
+
+        Args:
+            lora_dir: LoRAディレクトリ
+            progress_callback: 進捗コールバック(current, total, message)
+            cancel_event: キャンセル要求を通知するイベント
+        """
+        hash_cache = LoraHashCache(self.settings.get_data_dir() / self.HASH_CACHE_FILENAME)
+        hashes = hash_cache.hash_files(
+            [lora_dir / prompt.source_file for prompt in self.prompts],
+            progress_callback,
+            cancel_event=cancel_event
+        )
+
+        for prompt in self.prompts:
+            sha256 = hashes.get(lora_dir / prompt.source_file)
+            if not sha256:
+                continue
+
+            metadata = json.loads(prompt.lora_metadata) if prompt.lora_metadata else {}
+            metadata['sha256'] = sha256
+            metadata['autov2'] = to_autov2(sha256)
+            prompt.lora_metadata = json.dumps(metadata, ensure_ascii=False)
+
+    @staticmethod
+    def get_lora_hash(prompt: Prompt) -> Optional[str]:
+        """LoRAのSHA256ハッシュを取得
+
+        Args:
+            prompt: Promptオブジェクト
+
+        Returns:
+            SHA256ハッシュ（未計算の場合None）
+        """
+        if not prompt.lora_metadata:
+            return None
+        try:
+            return json.loads(prompt.lora_metadata).get('sha256')
+        except (ValueError, AttributeError):
+            return None
+
+    def find_duplicates(self, prompts: Optional[List[Prompt]] = None) -> Dict[str, List[Prompt]]:
+        """内容が同じLoRA（名前を変えたコピーなど）を検出
+
+        Args:
+            prompts: 対象のPromptリスト（Noneの場合は現在のライブラリ）
+
+        Returns:
+            SHA256ハッシュ → 同じ内容のPromptリスト（2件以上のもののみ）
+        """
+        groups: Dict[str, List[Prompt]] = {}
+        for prompt in (self.prompts if prompts is None else prompts):
+            sha256 = self.get_lora_hash(prompt)
+            if sha256:
+                groups.setdefault(sha256, []).append(prompt)
+
+        return {sha256: group for sha256, group in groups.items() if len(group) > 1}
+
     def save_to_csv(self, csv_path: Optional[Path] = None):
         """ライブラリをCSVに保存
 
@@ -199,3 +382,22 @@ class LoraLibraryManager:
 
         # source_fileは常にUnix形式（/）で保存されているので、Pathで自動変換
         return lora_dir / prompt.source_file
+
+    def find_preview_image(self, prompt: Prompt) -> Optional[Path]:
+        """LoRAのプレビュー画像を検索
+
+        Args:
+            prompt: Promptオブジェクト
+
+        Returns:
+            プレビュー画像のパス（見つからない場合None）
+        """
+        lora_path = self.get_lora_absolute_path(prompt)
+        if not lora_path:
+            return None
+
+        for suffix in self.PREVIEW_SUFFIXES:
+            preview_path = lora_path.with_name(lora_path.stem + suffix)
+            if preview_path.is_file():
+                return preview_path
+        return None
@@ -4,9 +4,12 @@ LoRAフォルダをスキャンしてプロンプトライブラリを構築し
 """
 
 import json
+import os
 import re
+import struct
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Optional, Callable
+from typing import Dict, List, Optional, Callable, Tuple
 
 from models import Prompt, generate_id
 
@@ -19,56 +22,192 @@ class LoraParser:
     """
 
     DEFAULT_WEIGHT = 0.8  # デフォルトのLoRA重み
+    METADATA_MAX_WORKERS = 16  # メタデータ読み込みの最大並列数（ネットワークドライブの待ち時間対策）
+    MAX_HEADER_SIZE = 100 * 1024 * 1024  # safetensorsヘッダーの上限（仕様上の上限100MB）
+    TRIGGER_CANDIDATES_LIMIT = 10  # タグ出現頻度から抽出するトリガーワード候補数
 
     def __init__(self):
         """初期化"""
         self.prompts: List[Prompt] = []
+        # 直近のスキャン結果（source_file → ファイルシグネチャ）
+        self.signatures: Dict[str, list] = {}
+        # 直近のスキャンで読み込み直したLoRAの数
+        self.parsed_count = 0
 
     def scan_directory(
         self,
         lora_dir: Path,
-        progress_callback: Optional[Callable[[int, int, str], None]] = None
+        progress_callback: Optional[Callable[[int, int, str], None]] = None,
+        max_workers: Optional[int] = None,
+        previous: Optional[Dict[str, Tuple[list, Prompt]]] = None
     ) -> List[Prompt]:
         """LoRAディレクトリを再帰的にスキャン
 
+        メタデータファイルの読み込みはスレッドプールで並列に行う。
+        結果の順序は逐次処理（rglob順）と同じ。
+        previous を指定した場合、.safetensors・サイドカーのサイズと更新日時が
+        前回と同じLoRAは再読み込みせず、前回のPromptをそのまま使用する。
+
         Args:
             lora_dir: LoRAディレクトリ
             progress_callback: 進捗コールバック関数（オプション）
                               progress_callback(current, total, message)
+            max_workers: 最大並列数（Noneの場合は METADATA_MAX_WORKERS）
+            previous: 前回のスキャン結果（source_file → (ファイルシグネチャ, Prompt)）
 
         Returns:
             Promptオブジェクトのリスト
         """
         self.prompts.clear()
+        self.signatures = {}
+        self.parsed_count = 0
 
         if not lora_dir.exists():
             if progress_callback:
                 progress_callback(0, 0, f"[Error] LoRA directory not found: {lora_dir}")
             return []
 
-        # .safetensorsファイルを再帰的に検索
-        safetensors_files = list(lora_dir.rglob("*.safetensors"))
-        total_files = len(safetensors_files)
-
-        for i, safetensors_file in enumerate(safetensors_files):
-            # ファイルをパース
-            prompt = self.parse_lora_file(safetensors_file, lora_dir)
-            if prompt:
-                self.prompts.append(prompt)
+        # .safetensorsファイルとサイドカーファイル名を1回の走査で収集
+        entries = self._find_lora_files(lora_dir)
+        total_files = len(entries)
+        max_workers = max_workers or self.METADATA_MAX_WORKERS
+        previous = previous or {}
+
+        # 変更されていないLoRAは前回の結果を使用（Windowsではos.DirEntryのstatは追加のI/Oなし）
+        signatures = []
+        reused: Dict[int, Prompt] = {}
+        for i, (safetensors_file, sidecars) in enumerate(entries):
+            signature = self.get_file_signature(safetensors_file, sidecars)
+            signatures.append(signature)
+            source_file = safetensors_file.relative_to(lora_dir).as_posix()
+            if source_file in previous and previous[source_file][0] == signature:
+                reused[i] = previous[source_file][1]
+
+        # 新規・変更されたLoRAのみメタデータを読み込み
+        to_parse = [entry for i, entry in enumerate(entries) if i not in reused]
+        self.parsed_count = len(to_parse)
+
+        def parse(entry: Tuple[Path, Dict[str, os.DirEntry]]) -> Optional[Prompt]:
+            safetensors_file, sidecars = entry
+            return self.parse_lora_file(safetensors_file, lora_dir, sidecars)
+
+        if max_workers <= 1 or len(to_parse) <= 1:
+            results = map(parse, to_parse)
+            executor = None
+        else:
+            executor = ThreadPoolExecutor(max_workers=min(max_workers, len(to_parse)))
+            results = executor.map(parse, to_parse)
 
-            # 進捗通知
-            if progress_callback:
+        try:
+            # map は入力順に結果を返すため、順序は逐次処理と同じ
+            for i, (safetensors_file, _) in enumerate(entries):
+                prompt = reused[i] if i in reused else next(results)
                 relative_path = safetensors_file.relative_to(lora_dir)
-                progress_callback(i + 1, total_files, f"Parsing: {relative_path}")
+                if prompt:
+                    self.prompts.append(prompt)
+                    self.signatures[relative_path.as_posix()] = signatures[i]
+
+                # 進捗通知
+                if progress_callback:
+                    progress_callback(i + 1, total_files, f"Parsing: {relative_path}")
+        finally:
+            if executor:
+                executor.shutdown(wait=True, cancel_futures=True)
 
         return self.prompts
 
-    def parse_lora_file(self, safetensors_path: Path, base_dir: Path) -> Optional[Prompt]:
+    @staticmethod
+    def get_file_signature(
+        safetensors_path: Path,
+        sidecars: Optional[Dict[str, os.DirEntry]] = None
+    ) -> list:
+        """LoRAファイルとサイドカーのシグネチャ（変更検出用）を取得
+
+        Args:
+            safetensors_path: .safetensorsファイルのパス
+            sidecars: 同じディレクトリのエントリ（normcase済みのファイル名 → os.DirEntry、
+                      Noneの場合はstatで取得）
+
+        Returns:
+            [.safetensors, .civitai.info, .json] それぞれの [サイズ, 更新日時ns]（存在しない場合None）
+        """
+        signature = []
+        for path in (
+            safetensors_path,
+            safetensors_path.with_suffix('.civitai.info'),
+            safetensors_path.with_suffix('.json')
+        ):
+            try:
+                if sidecars is None:
+                    stat_result = path.stat()
+                else:
+                    entry = sidecars.get(os.path.normcase(path.name))
+                    stat_result = entry.stat() if entry else None
+            except OSError:
+                stat_result = None
+
+            signature.append([stat_result.st_size, stat_result.st_mtime_ns] if stat_result else None)
+        return signature
+
+    @staticmethod
+    def _find_lora_files(lora_dir: Path) -> List[Tuple[Path, Dict[str, os.DirEntry]]]:
+        """.safetensorsファイルを検索（os.scandirで1回走査）
+
+        順序は lora_dir.rglob("*.safetensors") と同じ
+        （各ディレクトリのファイル → サブディレクトリの順、シンボリックリンクのディレクトリは辿らない）。
+
+        Args:
+            lora_dir: LoRAディレクトリ
+
+        Returns:
+            (.safetensorsファイルのパス, 同じディレクトリのエントリ（normcase済みのファイル名 → os.DirEntry）) のリスト
+        """
+        results = []
+
+        def walk(directory: Path):
+            try:
+                with os.scandir(directory) as it:
+                    dir_entries = list(it)
+            except OSError:
+                return
+
+            files = {}
+            subdirs = []
+            lora_files = []
+            for entry in dir_entries:
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                if is_dir:
+                    if not entry.is_symlink():
+                        subdirs.append(entry.name)
+                    continue
+
+                name = os.path.normcase(entry.name)
+                files[name] = entry
+                if name.endswith(".safetensors"):
+                    lora_files.append(directory / entry.name)
+
+            results.extend((path, files) for path in lora_files)
+            for name in subdirs:
+                walk(directory / name)
+
+        walk(lora_dir)
+        return results
+
+    def parse_lora_file(
+        self,
+        safetensors_path: Path,
+        base_dir: Path,
+        sidecars: Optional[Dict[str, os.DirEntry]] = None
+    ) -> Optional[Prompt]:
         """LoRAファイルをパース
 
         Args:
             safetensors_path: .safetensorsファイルのパス
             base_dir: LoRAベースディレクトリ
+            sidecars: 同じディレクトリのエントリ（normcase済みのファイル名 → os.DirEntry、Noneの場合は存在確認する）
 
         Returns:
             Promptオブジェクト（パース失敗時はNone）
@@ -85,7 +224,7 @@ class LoraParser:
         category = f"LoRA/{parent_dir}" if parent_dir != base_dir.name else "LoRA"
 
         # メタデータ読み込み
-        metadata = self._load_metadata(safetensors_path)
+        metadata = self._load_metadata(safetensors_path, sidecars)
 
         # プロンプト生成
         weight = metadata.get('default_weight', self.DEFAULT_WEIGHT)
@@ -115,24 +254,31 @@ class LoraParser:
 
         return prompt
 
-    def _load_metadata(self, safetensors_path: Path) -> dict:
+    def _load_metadata(self, safetensors_path: Path, sidecars: Optional[Dict[str, os.DirEntry]] = None) -> dict:
         """メタデータファイルを読み込み
 
         優先順位:
         1. .civitai.info
         2. .json
+        3. .safetensors ヘッダーの学習メタデータ（ss_*、トリガーワード・ベースモデルが未設定の場合のみ）
 
         Args:
             safetensors_path: .safetensorsファイルのパス
+            sidecars: 同じディレクトリのエントリ（normcase済みのファイル名 → os.DirEntry、Noneの場合は存在確認する）
 
         Returns:
             統合されたメタデータ辞書
         """
         metadata = {}
 
+        def has_sidecar(path: Path) -> bool:
+            if sidecars is None:
+                return path.exists()
+            return os.path.normcase(path.name) in sidecars
+
         # 1. .civitai.info を読み込み
         civitai_path = safetensors_path.with_suffix('.civitai.info')
-        if civitai_path.exists():
+        if has_sidecar(civitai_path):
             try:
                 with civitai_path.open('r', encoding='utf-8') as f:
                     civitai_data = json.load(f)
@@ -163,7 +309,7 @@ class LoraParser:
 
         # 2. .json を読み込み（civitai.infoの情報を補完）
         json_path = safetensors_path.with_suffix('.json')
-        if json_path.exists():
+        if has_sidecar(json_path):
             try:
                 with json_path.open('r', encoding='utf-8') as f:
                     json_data = json.load(f)
@@ -181,6 +327,13 @@ class LoraParser:
             except Exception as e:
                 print(f"[Warning] Failed to load {json_path}: {e}")
 
+        # 3. .safetensors ヘッダーの学習メタデータ（サイドカーの情報を補完）
+        if not metadata.get('trigger_words') or 'base_model' not in metadata:
+            try:
+                self._apply_header_metadata(metadata, self.read_safetensors_metadata(safetensors_path))
+            except Exception as e:
+                print(f"[Warning] Failed to read header of {safetensors_path}: {e}")
+
         # デフォルト値を設定
         if 'default_weight' not in metadata:
             metadata['default_weight'] = self.DEFAULT_WEIGHT
@@ -190,6 +343,92 @@ class LoraParser:
 
         return metadata
 
+    @classmethod
+    def read_safetensors_metadata(cls, safetensors_path: Path) -> dict:
+        """safetensorsヘッダーの __metadata__ を読み込み
+
+        先頭8バイト（ヘッダー長、リトルエンディアンu64）とヘッダーのJSONのみを読み込み、
+        テンソルデータには触れない（ファイルサイズに関係なくヘッダーサイズ分のI/Oのみ）。
+
+        Args:
+            safetensors_path: .safetensorsファイルのパス
+
+        Returns:
+            __metadata__ の辞書（値はすべて文字列、存在しない場合は空）
+
+        Raises:
+            ValueError: ヘッダーが不正な場合
+        """
+        with safetensors_path.open('rb') as f:
+            length_bytes = f.read(8)
+            if len(length_bytes) < 8:
+                raise ValueError("file too short for safetensors header")
+
+            (header_size,) = struct.unpack('<Q', length_bytes)
+            if header_size > cls.MAX_HEADER_SIZE:
+                raise ValueError(f"header too large: {header_size} bytes")
+
+            header_bytes = f.read(header_size)
+            if len(header_bytes) < header_size:
+                raise ValueError("truncated safetensors header")
+
+        header = json.loads(header_bytes)
+        metadata = header.get('__metadata__') if isinstance(header, dict) else None
+        return metadata if isinstance(metadata, dict) else {}
+
+    def _apply_header_metadata(self, metadata: dict, header_metadata: dict):
+        """safetensorsヘッダーの学習メタデータを反映（未設定の項目のみ）
+
+        Args:
+            metadata: 反映先のメタデータ辞書
+            header_metadata: read_safetensors_metadata() の結果
+        """
+        if header_metadata.get('ss_output_name'):
+            metadata.setdefault('output_name', header_metadata['ss_output_name'])
+
+        base_model = header_metadata.get('ss_base_model_version') or header_metadata.get('ss_sd_model_name')
+        if base_model:
+            metadata.setdefault('base_model', base_model)
+
+        candidates = self._extract_trigger_candidates(header_metadata.get('ss_tag_frequency'))
+        if candidates:
+            # 出現頻度の高いタグは汎用タグ（1girl等）の場合もあるため候補としてのみ保持し、
+            # trigger_words はサイドカーまたはユーザーが指定した場合のみ設定する
+            metadata['trigger_candidates'] = candidates
+
+    def _extract_trigger_candidates(self, tag_frequency) -> List[str]:
+        """タグ出現頻度からトリガーワード候補を抽出
+
+        Args:
+            tag_frequency: ss_tag_frequency（{データセット: {タグ: 出現数}} のJSON文字列）
+
+        Returns:
+            出現数の多い順のタグのリスト（最大 TRIGGER_CANDIDATES_LIMIT 件）
+        """
+        if not tag_frequency:
+            return []
+
+        try:
+            datasets = json.loads(tag_frequency) if isinstance(tag_frequency, str) else tag_frequency
+        except ValueError:
+            return []
+        if not isinstance(datasets, dict):
+            return []
+
+        # データセットごとの出現数を合算（タグの前後の空白は除去）
+        counts = {}
+        for tags in datasets.values():
+            if not isinstance(tags, dict):
+                continue
+            for tag, count in tags.items():
+                tag = tag.strip()
+                if tag and isinstance(count, (int, float)):
+                    counts[tag] = counts.get(tag, 0) + count
+
+        # 出現数の降順（同数の場合は先に現れた順）
+        ranked = sorted(counts, key=lambda tag: -counts[tag])
+        return ranked[:self.TRIGGER_CANDIDATES_LIMIT]
+
     def _build_lora_prompt(self, file_name: str, weight: float, trigger_words: str) -> str:
         """LoRAプロンプトを生成
 
@@ -4,7 +4,7 @@
 """
 
 import re
-from typing import List, Optional
+from typing import Iterator, List, Optional, Tuple
 
 from models import Scene, Project, BlockType
 
@@ -99,6 +99,29 @@ class PromptBuilder:
 
         return prompt
 
+    def iter_scene_prompts(
+        self,
+        project: Project,
+        completed_only: bool = False
+    ) -> Iterator[Tuple[Scene, str]]:
+        """全シーンのプロンプトを1シーンずつ構築
+
+        出力全体をメモリに保持せずに処理するためのジェネレーター。
+
+        Args:
+            project: プロジェクトオブジェクト
+            completed_only: 完成シーンのみを含めるか
+
+        Yields:
+            (シーン, プロンプト)
+        """
+        for scene in project.scenes:
+            # 完成シーンのみフィルタ
+            if completed_only and not scene.is_completed:
+                continue
+
+            yield scene, self.build_scene_prompt(scene)
+
     def build_all_prompts(
         self,
         project: Project,
@@ -117,17 +140,12 @@ class PromptBuilder:
         """
         lines = []
 
-        for scene in project.scenes:
-            # 完成シーンのみフィルタ
-            if completed_only and not scene.is_completed:
-                continue
-
+        for scene, prompt in self.iter_scene_prompts(project, completed_only):
             # コメント追加（オプション）
             if include_comment:
                 lines.append(f"# Scene {scene.scene_id}: {scene.scene_name}")
 
             # プロンプト追加
-            prompt = self.build_scene_prompt(scene)
             lines.append(prompt)
 
         return lines
@@ -170,10 +188,12 @@ class PromptBuilder:
             include_comment: シーン番号コメントを含めるか
             completed_only: 完成シーンのみを含めるか
         """
-        from pathlib import Path
-
-        lines = self.build_all_prompts(project, include_comment, completed_only)
-
-        # ファイルに書き込み（1シーン = 1行）
-        output_file = Path(output_path)
-        output_file.write_text("\n".join(lines), encoding="utf-8")
+        from core.prompt_exporter import StreamingExporter, TextExportTarget
+
+        # 1シーンずつ書き込み（1シーン = 1行）
+        exporter = StreamingExporter(self)
+        exporter.export_to_files(
+            project,
+            [(TextExportTarget(include_comment), output_path)],
+            completed_only=completed_only
+        )
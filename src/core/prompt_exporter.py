@@ -0,0 +1,431 @@
+"""ストリーミング出力
+
+シーンを1つずつ処理しながら、複数形式のファイルへ同時に書き出します。
+出力全体をメモリに保持せず、シーン数・バイト数でファイルを分割できます。
+
+対応形式:
+    - txt: 1シーン1行（Prompts from file形式）
+    - jsonl: シーンのメタデータ付きJSONL
+    - a1111: Stable Diffusion WebUI txt2img APIのペイロードJSONL
+"""
+
+import json
+import os
+import secrets
+import stat
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from models import Project, Scene
+
+
+class ExportTarget(ABC):
+    """出力形式の基底クラス
+
+    1シーンを1レコード（文字列）に変換する。
+
+    Attributes:
+        name: 形式名（コマンドライン指定用）
+        extension: 出力ファイルの拡張子
+        line_terminated: Trueの場合は各レコード末尾に改行を付与（JSONL）、
+                         Falseの場合はレコード間を改行で区切る（末尾改行なし）
+        newline: 書き込み時の改行コード（Noneの場合はプラットフォームの改行コード）
+    """
+    name = ""
+    extension = ".txt"
+    line_terminated = False
+    newline: Optional[str] = "\n"
+
+    @abstractmethod
+    def format_record(self, project: Project, scene: Scene, prompt: str) -> str:
+        """シーンをレコードに変換
+
+        Args:
+            project: プロジェクトオブジェクト
+            scene: シーンオブジェクト
+            prompt: 構築済みプロンプト
+
+        Returns:
+            レコード文字列（改行は含めない）
+        """
+
+
+class TextExportTarget(ExportTarget):
+    """1シーン1行のテキスト形式（Prompts from file形式）"""
+    name = "txt"
+    extension = ".txt"
+    line_terminated = False
+    newline = None  # テキストエディタで扱うためプラットフォームの改行コード
+
+    def __init__(self, include_comment: bool = False):
+        """初期化
+
+        Args:
+            include_comment: シーン番号コメントを含めるか
+        """
+        self.include_comment = include_comment
+
+    def format_record(self, project: Project, scene: Scene, prompt: str) -> str:
+        if self.include_comment:
+            # コメントとプロンプトは同じ分割ファイルに入るよう1レコードにまとめる
+            return f"# Scene {scene.scene_id}: {scene.scene_name}\n{prompt}"
+        return prompt
+
+
+class JsonlExportTarget(ExportTarget):
+    """シーンのメタデータ付きJSONL形式"""
+    name = "jsonl"
+    extension = ".jsonl"
+    line_terminated = True
+
+    def format_record(self, project: Project, scene: Scene, prompt: str) -> str:
+        record = {
+            "project": project.name,
+            "scene_id": scene.scene_id,
+            "scene_name": scene.scene_name,
+            "is_completed": scene.is_completed,
+            "source_library_id": scene.source_library_id,
+            "prompt": prompt,
+            "blocks": [block.to_dict() for block in scene.blocks],
+        }
+        return json.dumps(record, ensure_ascii=False)
+
+
+class A1111PayloadExportTarget(ExportTarget):
+    """Stable Diffusion WebUI txt2img APIのペイロードJSONL形式
+
+    各行をそのまま `/sdapi/v1/txt2img` にPOSTできる。
+    """
+    name = "a1111"
+    extension = ".a1111.jsonl"
+    line_terminated = True
+
+    def __init__(self, payload_defaults: Optional[Dict[str, Any]] = None):
+        """初期化
+
+        Args:
+            payload_defaults: 全ペイロードに含める既定値（例: {"steps": 28, "width": 832}）
+        """
+        self.payload_defaults = dict(payload_defaults or {})
+
+    def format_record(self, project: Project, scene: Scene, prompt: str) -> str:
+        return json.dumps(build_a1111_payload(prompt, self.payload_defaults), ensure_ascii=False)
+
+
+# 形式名 → 出力形式クラス
+EXPORT_TARGETS = {
+    TextExportTarget.name: TextExportTarget,
+    JsonlExportTarget.name: JsonlExportTarget,
+    A1111PayloadExportTarget.name: A1111PayloadExportTarget,
+}
+
+
+def build_a1111_payload(prompt: str, payload_defaults: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """txt2img APIのペイロードを作成
+
+    Args:
+        prompt: プロンプト
+        payload_defaults: ペイロードの既定値
+
+    Returns:
+        ペイロード辞書
+    """
+    payload = dict(payload_defaults or {})
+    payload["prompt"] = prompt
+    return payload
+
+
+def create_export_target(
+    name: str,
+    include_comment: bool = False,
+    payload_defaults: Optional[Dict[str, Any]] = None
+) -> ExportTarget:
+    """形式名から出力形式を作成
+
+    Args:
+        name: 形式名（txt / jsonl / a1111）
+        include_comment: シーン番号コメントを含めるか（txtのみ）
+        payload_defaults: ペイロードの既定値（a1111のみ）
+
+    Returns:
+        出力形式オブジェクト
+
+    Raises:
+        ValueError: 未対応の形式名の場合
+    """
+    if name == TextExportTarget.name:
+        return TextExportTarget(include_comment)
+    if name == JsonlExportTarget.name:
+        return JsonlExportTarget()
+    if name == A1111PayloadExportTarget.name:
+        return A1111PayloadExportTarget(payload_defaults)
+    raise ValueError(f"未対応の出力形式です: {name}")
+
+
+class ShardedWriter:
+    """分割ファイルライター
+
+    レコードを順次書き込み、シーン数またはバイト数の上限に達したら
+    次のファイルに切り替える。各ファイルは一時ファイルに書き込み、
+    完了時に置き換える。
+
+    分割なし: `prompts.txt`
+    分割あり: `prompts_001.txt`, `prompts_002.txt`, ...
+    """
+
+    def __init__(
+        self,
+        output_path: Path,
+        line_terminated: bool = False,
+        max_scenes: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        newline: Optional[str] = "\n"
+    ):
+        """初期化
+
+        Args:
+            output_path: 出力ファイルパス（分割時は連番を付与）
+            line_terminated: 各レコード末尾に改行を付与するか
+            max_scenes: 1ファイルあたりの最大シーン数（Noneの場合は無制限）
+            max_bytes: 1ファイルあたりの最大バイト数（Noneの場合は無制限）
+            newline: 改行コード（Noneの場合はプラットフォームの改行コード）
+        """
+        self.output_path = Path(output_path)
+        self.line_terminated = line_terminated
+        self.newline = newline
+        self.max_scenes = max_scenes
+        self.max_bytes = max_bytes
+        self.is_sharded = bool(max_scenes or max_bytes)
+
+        self.output_paths: List[Path] = []
+        self._file = None
+        self._temp_path: Optional[Path] = None
+        self._scene_count = 0
+        self._byte_count = 0
+
+    def __enter__(self) -> 'ShardedWriter':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def _shard_path(self, index: int) -> Path:
+        """分割ファイルのパスを取得
+
+        Args:
+            index: 分割番号（1から）
+
+        Returns:
+            ファイルパス
+        """
+        if not self.is_sharded:
+            return self.output_path
+        return self.output_path.with_name(
+            f"{self.output_path.stem}_{index:03d}{self.output_path.suffix}"
+        )
+
+    def _open_next(self):
+        """次の分割ファイルを開く"""
+        self._finish_current()
+
+        path = self._shard_path(len(self.output_paths) + 1)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        # 一時ファイル名は一意にする（同じ出力先に並列で書き込んでも衝突しない）
+        # パーミッションは通常のファイル作成と同じ（0666からumaskを除いたもの）
+        flags = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0)
+        while True:
+            temp_path = path.with_name(f".{path.name}.{secrets.token_hex(4)}.tmp")
+            try:
+                fd = os.open(temp_path, flags, 0o666)
+                break
+            except FileExistsError:
+                continue
+        self._temp_path = temp_path
+        self._file = os.fdopen(fd, 'w', encoding='utf-8', newline=self.newline)
+        self.output_paths.append(path)
+        self._scene_count = 0
+        self._byte_count = 0
+
+    def _finish_current(self):
+        """現在の分割ファイルを閉じて確定"""
+        if self._file is None:
+            return
+        self._file.close()
+        # 既存のファイルを置き換える場合はそのパーミッションを引き継ぐ
+        try:
+            os.chmod(self._temp_path, stat.S_IMODE(os.stat(self.output_paths[-1]).st_mode))
+        except FileNotFoundError:
+            pass
+        os.replace(self._temp_path, self.output_paths[-1])
+        self._file = None
+        self._temp_path = None
+
+    def _encoded_size(self, data: str) -> int:
+        """書き込み後のバイト数を取得（改行コードの変換を含む）
+
+        Args:
+            data: 書き込む文字列
+
+        Returns:
+            バイト数
+        """
+        size = len(data.encode('utf-8'))
+        if self.newline is None:
+            size += data.count("\n") * (len(os.linesep) - 1)
+        return size
+
+    def write(self, record: str):
+        """レコードを書き込み
+
+        Args:
+            record: レコード文字列（改行は含めない）
+        """
+        if self.line_terminated:
+            data = record + "\n"
+        elif self._file is not None and self._scene_count > 0:
+            data = "\n" + record
+        else:
+            data = record
+        size = self._encoded_size(data)
+
+        # 上限に達したら次のファイルへ
+        if self._file is None:
+            self._open_next()
+        elif self._scene_count > 0 and (
+            (self.max_scenes and self._scene_count >= self.max_scenes) or
+            (self.max_bytes and self._byte_count + size > self.max_bytes)
+        ):
+            self._open_next()
+            if not self.line_terminated:
+                data = record
+                size = self._encoded_size(data)
+
+        self._file.write(data)
+        self._scene_count += 1
+        self._byte_count += size
+
+    def close(self) -> List[Path]:
+        """書き込みを完了
+
+        レコードが1件もない場合は空のファイルを1つ作成する。
+
+        Returns:
+            出力したファイルパスのリスト
+        """
+        if not self.output_paths:
+            self._open_next()
+        self._finish_current()
+        return self.output_paths
+
+    def abort(self):
+        """書き込みを中断（一時ファイルを削除）"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self._temp_path is not None and self._temp_path.exists():
+            self._temp_path.unlink()
+        self._temp_path = None
+
+
+class StreamingExporter:
+    """ストリーミング出力クラス
+
+    シーンごとにプロンプトを1回だけ構築し、指定された全形式へ書き出す。
+    """
+
+    def __init__(self, prompt_builder):
+        """初期化
+
+        Args:
+            prompt_builder: PromptBuilderオブジェクト
+        """
+        self.prompt_builder = prompt_builder
+
+    @staticmethod
+    def get_target_path(output_base: Path, target: ExportTarget) -> Path:
+        """出力形式ごとのファイルパスを取得
+
+        Args:
+            output_base: 出力ファイルのベースパス（拡張子なし）
+            target: 出力形式
+
+        Returns:
+            ファイルパス（例: output/prompts.jsonl）
+        """
+        output_base = Path(output_base)
+        return output_base.with_name(output_base.name + target.extension)
+
+    def export(
+        self,
+        project: Project,
+        output_base: Path,
+        targets: List[ExportTarget],
+        completed_only: bool = False,
+        max_scenes_per_file: Optional[int] = None,
+        max_bytes_per_file: Optional[int] = None
+    ) -> Dict[str, List[Path]]:
+        """プロジェクトを複数形式で出力
+
+        Args:
+            project: プロジェクトオブジェクト
+            output_base: 出力ファイルのベースパス（拡張子は形式ごとに付与）
+            targets: 出力形式のリスト
+            completed_only: 完成シーンのみを含めるか
+            max_scenes_per_file: 1ファイルあたりの最大シーン数
+            max_bytes_per_file: 1ファイルあたりの最大バイト数
+
+        Returns:
+            形式名 → 出力したファイルパスのリスト
+        """
+        target_paths = [
+            (target, self.get_target_path(output_base, target))
+            for target in targets
+        ]
+        return self.export_to_files(
+            project, target_paths, completed_only,
+            max_scenes_per_file, max_bytes_per_file
+        )
+
+    def export_to_files(
+        self,
+        project: Project,
+        target_paths: List[Tuple[ExportTarget, Path]],
+        completed_only: bool = False,
+        max_scenes_per_file: Optional[int] = None,
+        max_bytes_per_file: Optional[int] = None
+    ) -> Dict[str, List[Path]]:
+        """プロジェクトを出力形式ごとに指定したファイルへ出力
+
+        Args:
+            project: プロジェクトオブジェクト
+            target_paths: (出力形式, 出力ファイルパス) のリスト
+            completed_only: 完成シーンのみを含めるか
+            max_scenes_per_file: 1ファイルあたりの最大シーン数
+            max_bytes_per_file: 1ファイルあたりの最大バイト数
+
+        Returns:
+            形式名 → 出力したファイルパスのリスト
+        """
+        writers = [
+            (target, ShardedWriter(
+                Path(path), target.line_terminated,
+                max_scenes_per_file, max_bytes_per_file, target.newline
+            ))
+            for target, path in target_paths
+        ]
+
+        try:
+            for scene, prompt in self.prompt_builder.iter_scene_prompts(project, completed_only):
+                for target, writer in writers:
+                    writer.write(target.format_record(project, scene, prompt))
+        except BaseException:
+            for _, writer in writers:
+                writer.abort()
+            raise
+
+        return {target.name: writer.close() for target, writer in writers}
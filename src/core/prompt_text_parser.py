@@ -0,0 +1,266 @@
+"""プロンプトテキストパーサー
+
+エディタのテキストをBREAK区切りでブロックに変換します。
+差分パースに対応し、編集されたBREAKセグメントのみを再パースします。
+"""
+
+import re
+from typing import List, Optional, Tuple
+
+from models import Block, BlockType
+
+
+# BREAK区切りパターン（大文字小文字を区別しない）
+BREAK_PATTERN = re.compile(r',\s*BREAK\s*,?|BREAK', re.IGNORECASE)
+
+# BREAK区切りに含まれ得る文字（これ以外の文字を区切りのマッチは跨げない）
+_SEPARATOR_CHARS = frozenset(",BREAKbreak")
+
+
+def _is_separator_char(char: str) -> bool:
+    """BREAK区切りの一部になり得る文字かどうか
+
+    Args:
+        char: 判定する1文字
+
+    Returns:
+        区切りの一部になり得る場合True
+    """
+    return char in _SEPARATOR_CHARS or char.isspace()
+
+
+def split_segments(prompt_text: str) -> List[str]:
+    """プロンプトをBREAKで分割
+
+    Args:
+        prompt_text: 分割するプロンプト
+
+    Returns:
+        分割されたセグメントのリスト（未整形）
+    """
+    return BREAK_PATTERN.split(prompt_text)
+
+
+def create_segment_block(segment: str, block_id: int) -> Optional[Block]:
+    """セグメントからブロックを作成
+
+    Args:
+        segment: BREAKで分割されたセグメント（未整形）
+        block_id: 付与するブロックID
+
+    Returns:
+        ブロック（空セグメントの場合None）
+    """
+    segment = segment.strip().strip(',').strip()
+
+    if not segment:
+        return None
+
+    # ワイルドカード形式かチェック
+    is_wildcard = segment.startswith('__') and segment.endswith('__')
+
+    return Block(
+        block_id=block_id,
+        type=BlockType.WILDCARD if is_wildcard else BlockType.FIXED_TEXT,
+        content=segment
+    )
+
+
+class PromptTextParser:
+    """プロンプトテキストパーサー
+
+    テキスト → ブロック変換を行う。前回のパース結果を保持し、
+    前回テキストとの共通接頭辞・接尾辞の外側にあるセグメントは
+    再パースせず、既存のBlockオブジェクトを再利用する。
+
+    変換ルール:
+        - BREAKで分割し、各セグメントを1ブロックにする
+        - `__xxx__` 形式はワイルドカードブロック、それ以外は固定テキスト
+        - 最後のセグメント以外の後ろにはBREAKブロックを挿入
+        - 空セグメントはスキップ
+    """
+
+    def __init__(self):
+        """初期化"""
+        self._text = ""
+        self._separators: List[Tuple[int, int]] = []  # 区切りの(開始, 終了)位置
+        self._segment_blocks: List[Optional[Block]] = [None]  # セグメントごとのブロック
+        self._break_blocks: List[Optional[Block]] = [None]    # セグメント後のBREAKブロック
+        self._next_block_id = 1
+
+    def reset(self, start_block_id: int = 1):
+        """パース状態をリセット
+
+        Args:
+            start_block_id: 以降に作成するブロックの開始ID
+        """
+        self._text = ""
+        self._separators = []
+        self._segment_blocks = [None]
+        self._break_blocks = [None]
+        self._next_block_id = start_block_id
+
+    def parse(self, prompt_text: str) -> List[Block]:
+        """テキストをブロックリストに変換（差分パース）
+
+        前回パースしたテキストとの差分範囲を含むセグメントのみを再パースする。
+        変更のないセグメントのブロックは同一オブジェクトが返される。
+
+        Args:
+            prompt_text: プロンプトテキスト
+
+        Returns:
+            ブロックのリスト
+        """
+        old_text = self._text
+
+        if prompt_text != old_text:
+            # 共通接頭辞・接尾辞から編集範囲を特定
+            prefix = 0
+            max_prefix = min(len(old_text), len(prompt_text))
+            while prefix < max_prefix and old_text[prefix] == prompt_text[prefix]:
+                prefix += 1
+
+            suffix = 0
+            max_suffix = max_prefix - prefix
+            while (suffix < max_suffix and
+                   old_text[-1 - suffix] == prompt_text[-1 - suffix]):
+                suffix += 1
+
+            self._reparse_range(prompt_text, prefix, len(old_text) - suffix)
+
+        return self._collect_blocks()
+
+    def _reparse_range(self, new_text: str, edit_start: int, old_edit_end: int):
+        """編集範囲を含むセグメントを再パース
+
+        区切り文字以外の文字は区切りのマッチに含まれないため、
+        編集範囲を区切り文字以外の文字まで広げれば、その外側の区切りは
+        前回と同一になる。
+
+        Args:
+            new_text: 新しいテキスト
+            edit_start: 編集範囲の開始位置（新旧共通）
+            old_edit_end: 旧テキストでの編集範囲の終了位置
+        """
+        old_text = self._text
+        delta = len(new_text) - len(old_text)
+
+        # 編集範囲を区切りに含まれ得ない文字まで広げる
+        window_start = edit_start
+        while window_start > 0 and _is_separator_char(old_text[window_start - 1]):
+            window_start -= 1
+
+        window_end = old_edit_end
+        while window_end < len(old_text) and _is_separator_char(old_text[window_end]):
+            window_end += 1
+
+        # 影響を受けるセグメント範囲（旧テキストの区切りインデックス）
+        first_sep = 0
+        while (first_sep < len(self._separators) and
+               self._separators[first_sep][1] <= window_start):
+            first_sep += 1
+
+        last_sep = first_sep
+        while (last_sep < len(self._separators) and
+               self._separators[last_sep][0] < window_end):
+            last_sep += 1
+
+        # セグメントfirst_sep〜last_sepを再パース
+        slice_start = self._separators[first_sep - 1][1] if first_sep > 0 else 0
+        if last_sep < len(self._separators):
+            slice_end = self._separators[last_sep][0] + delta
+        else:
+            slice_end = len(new_text)
+
+        new_separators = []
+        new_segment_blocks = []
+        position = slice_start
+        for match in BREAK_PATTERN.finditer(new_text, slice_start, slice_end):
+            new_segment_blocks.append(self._create_block(new_text[position:match.start()]))
+            new_separators.append((match.start(), match.end()))
+            position = match.end()
+        new_segment_blocks.append(self._create_block(new_text[position:slice_end]))
+
+        # 接尾辞側の区切り位置をずらして結合
+        shifted_separators = [
+            (start + delta, end + delta)
+            for start, end in self._separators[last_sep:]
+        ]
+        self._separators = self._separators[:first_sep] + new_separators + shifted_separators
+
+        self._segment_blocks = (
+            self._segment_blocks[:first_sep]
+            + new_segment_blocks
+            + self._segment_blocks[last_sep + 1:]
+        )
+        self._break_blocks = (
+            self._break_blocks[:first_sep]
+            + [None] * len(new_segment_blocks)
+            + self._break_blocks[last_sep + 1:]
+        )
+
+        self._text = new_text
+
+    def _create_block(self, segment: str) -> Optional[Block]:
+        """セグメントからブロックを作成（ID採番付き）
+
+        Args:
+            segment: セグメント（未整形）
+
+        Returns:
+            ブロック（空セグメントの場合None）
+        """
+        block = create_segment_block(segment, self._next_block_id)
+        if block:
+            self._next_block_id += 1
+        return block
+
+    def _collect_blocks(self) -> List[Block]:
+        """セグメントごとのブロックからブロックリストを組み立て
+
+        Returns:
+            ブロックのリスト
+        """
+        blocks = []
+        last_index = len(self._segment_blocks) - 1
+
+        for i, block in enumerate(self._segment_blocks):
+            if block is None:
+                continue
+
+            blocks.append(block)
+
+            # 最後のセグメント以外はBREAKを追加
+            if i < last_index:
+                break_block = self._break_blocks[i]
+                if break_block is None:
+                    break_block = Block(
+                        block_id=self._next_block_id,
+                        type=BlockType.BREAK,
+                        content=""
+                    )
+                    self._next_block_id += 1
+                    self._break_blocks[i] = break_block
+                blocks.append(break_block)
+
+        return blocks
+
+
+def parse_prompt_text(prompt_text: str, start_block_id: int = 1) -> List[Block]:
+    """テキストをブロックリストに変換（一括パース）
+
+    Args:
+        prompt_text: プロンプトテキスト
+        start_block_id: 最初に付与するブロックID
+
+    Returns:
+        ブロックのリスト
+    """
+    blocks = PromptTextParser().parse(prompt_text)
+
+    # 先頭から連番でIDを振り直す
+    for i, block in enumerate(blocks):
+        block.block_id = start_block_id + i
+
+    return blocks
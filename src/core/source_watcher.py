@@ -0,0 +1,370 @@
+"""元ワイルドカードディレクトリの監視
+
+元ディレクトリの変更をバックグラウンドで監視し、まとめた変更を
+FileSyncManager に渡して最新の差分情報を通知します。
+
+監視方式（バックエンド）:
+- WatchdogBackend: OSのファイル変更通知（Linux: inotify, Windows: ReadDirectoryChangesW 等）
+  watchdog パッケージがインストールされている場合に使用
+- PollingBackend: 一定間隔でサイズ・更新日時を比較（マニフェストを初期状態として使用）
+
+Qtに依存しないため、通知はワーカースレッドから呼び出されます。
+UIで使用する場合はシグナル経由でUIスレッドに渡してください。
+"""
+
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from utils.logger import get_logger
+
+
+class WatcherBackend(ABC):
+    """監視バックエンドの基底クラス
+
+    start() で監視を開始し、変更を検出したら on_paths(変更されたパスの集合) を呼び出す。
+    """
+
+    name = ""
+
+    @abstractmethod
+    def start(self, root: Path, on_paths: Callable[[Set[Path]], None]):
+        """監視を開始
+
+        Args:
+            root: 監視するディレクトリ
+            on_paths: 変更通知のコールバック（任意のスレッドから呼び出される）
+        """
+
+    @abstractmethod
+    def stop(self):
+        """監視を停止"""
+
+
+class WatchdogBackend(WatcherBackend):
+    """OSのファイル変更通知を使うバックエンド（watchdogパッケージ）"""
+
+    name = "watchdog"
+
+    def __init__(self):
+        """初期化"""
+        self._observer = None
+
+    @staticmethod
+    def is_available() -> bool:
+        """watchdogパッケージが利用可能か"""
+        try:
+            import watchdog.observers  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+    def start(self, root: Path, on_paths: Callable[[Set[Path]], None]):
+        """監視を開始"""
+        from watchdog.observers import Observer
+        from watchdog.events import FileSystemEventHandler
+
+        class Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                if event.event_type in ("opened", "closed_no_write"):
+                    return
+                paths = {Path(os.fsdecode(event.src_path))}
+                dest_path = getattr(event, "dest_path", "")
+                if dest_path:
+                    paths.add(Path(os.fsdecode(dest_path)))
+                on_paths(paths)
+
+        self._observer = Observer()
+        self._observer.schedule(Handler(), str(root), recursive=True)
+        self._observer.start()
+
+    def stop(self):
+        """監視を停止"""
+        if self._observer:
+            self._observer.stop()
+            self._observer.join()
+            self._observer = None
+
+
+class PollingBackend(WatcherBackend):
+    """一定間隔でサイズ・更新日時を比較するバックエンド
+
+    前回のポーリング結果（初回はマニフェスト）と比較し、
+    サイズ・更新日時が変わったファイル、追加・削除されたファイルのみを通知する。
+    ハッシュ計算は変更が通知されたファイルに対してのみ FileSyncManager で行われる。
+
+    ディレクトリの更新日時が前回の走査時から変わっていない場合は、そのディレクトリの
+    一覧の取得と配下のファイルのstatを省略し、前回の結果を使用する（ディレクトリ単位のstatのみ）。
+    ファイルの追加・削除・リネーム（一時ファイル経由の保存を含む）はディレクトリの更新日時に
+    反映されるが、既存ファイルへの直接の上書きは反映されないため、full_scan_every 回に1回は
+    全ファイルのstatを取得する。
+    走査に時間がかかる場合に監視がCPU・ディスクを占有しないよう、
+    次のポーリングまでの間隔は直前の走査時間の SCAN_TIME_FACTOR 倍以上に延ばす。
+    """
+
+    name = "polling"
+    SCAN_TIME_FACTOR = 10.0  # 走査時間に対するポーリング間隔の最小倍率（走査の割合を約1/10以下に）
+    FULL_SCAN_EVERY = 12  # 全ファイルのstatを取得する頻度（ポーリング回数、既定の間隔で約1分）
+
+    def __init__(
+        self,
+        interval: float = 5.0,
+        baseline: Optional[Dict[str, Tuple[int, int]]] = None,
+        full_scan_every: int = FULL_SCAN_EVERY
+    ):
+        """初期化
+
+        Args:
+            interval: ポーリング間隔（秒、走査に時間がかかる場合はこれより延ばす）
+            baseline: 相対パス（POSIX形式）→ (サイズ, 更新日時ns) の初期状態
+            full_scan_every: 全ファイルのstatを取得する頻度（ポーリング回数、1の場合は毎回）
+        """
+        self.interval = interval
+        self.full_scan_every = max(1, full_scan_every)
+        self._state: Optional[Dict[str, Tuple[int, int]]] = dict(baseline) if baseline is not None else None
+        # 相対パス（"" または "/" 終わり）→ (更新日時ns, サブディレクトリ名, テキストファイル名)
+        self._dirs: Dict[str, Tuple[int, List[str], List[str]]] = {}
+        self._poll_count = 0
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, root: Path, on_paths: Callable[[Set[Path]], None]):
+        """監視を開始"""
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run, args=(root, on_paths), name="SourcePolling", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        """監視を停止"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def poll(self, root: Path) -> Set[Path]:
+        """1回分のポーリング
+
+        Args:
+            root: 監視するディレクトリ
+
+        Returns:
+            前回から変更されたパスの集合
+        """
+        full = self._poll_count % self.full_scan_every == 0
+        self._poll_count += 1
+        current = self._scan(root, full)
+        previous = self._state
+        self._state = current
+
+        if previous is None:
+            return set()
+
+        changed = {
+            key for key, value in current.items()
+            if previous.get(key) != value
+        }
+        changed.update(key for key in previous if key not in current)
+        return {root / key for key in changed}
+
+    def _run(self, root: Path, on_paths: Callable[[Set[Path]], None]):
+        """ポーリングスレッド"""
+        logger = get_logger()
+        while True:
+            scan_time = 0.0
+            try:
+                started = time.monotonic()
+                changed = self.poll(root)
+                scan_time = time.monotonic() - started
+                if changed:
+                    on_paths(changed)
+            except Exception as e:
+                logger.warning(f"ポーリング中にエラー: {e}")
+
+            if self._stop_event.wait(max(self.interval, scan_time * self.SCAN_TIME_FACTOR)):
+                return
+
+    def _scan(self, root: Path, full: bool) -> Dict[str, Tuple[int, int]]:
+        """テキストファイルのサイズ・更新日時を収集（os.scandirでディレクトリ単位に取得）
+
+        Args:
+            root: 監視するディレクトリ
+            full: Trueの場合は更新日時が変わっていないディレクトリも走査する
+
+        Returns:
+            相対パス（POSIX形式）→ (サイズ, 更新日時ns)
+        """
+        previous = self._state if self._state is not None else {}
+        state = {}
+        dirs = {}
+        stack = [(root, "")]
+        while stack:
+            directory, prefix = stack.pop()
+            try:
+                # 一覧の取得より前に更新日時を取得する（取得中の変更は次回の走査で検出される）
+                dir_mtime = os.stat(directory).st_mtime_ns
+            except OSError:
+                continue
+
+            cached = self._dirs.get(prefix)
+            if not full and cached is not None and cached[0] == dir_mtime:
+                _, subdirs, files = cached
+                for name in files:
+                    key = f"{prefix}{name}"
+                    if key in previous:
+                        state[key] = previous[key]
+            else:
+                subdirs, files = [], []
+                try:
+                    with os.scandir(directory) as entries:
+                        for entry in entries:
+                            if entry.is_dir(follow_symlinks=False):
+                                subdirs.append(entry.name)
+                            elif entry.name.lower().endswith(".txt"):
+                                stat_result = entry.stat()
+                                state[f"{prefix}{entry.name}"] = (stat_result.st_size, stat_result.st_mtime_ns)
+                                files.append(entry.name)
+                except OSError:
+                    continue
+
+            dirs[prefix] = (dir_mtime, subdirs, files)
+            stack.extend((os.path.join(directory, name), f"{prefix}{name}/") for name in subdirs)
+
+        self._dirs = dirs
+        return state
+
+
+class SourceWatcher:
+    """元ディレクトリ監視サービス
+
+    バックエンドから届いた変更をまとめ（一定時間変更が途切れるまで待機）、
+    FileSyncManager.apply_changes() で差分情報を更新して on_updates に通知する。
+
+    Attributes:
+        sync_manager: ファイル同期マネージャー（監視専用のインスタンス）
+        backend: 監視バックエンド
+        coalesce_delay: 変更をまとめる待機時間（秒）
+    """
+
+    def __init__(
+        self,
+        sync_manager,
+        on_updates: Callable[[Dict[str, List[Path]]], None],
+        backend: Optional[WatcherBackend] = None,
+        coalesce_delay: float = 1.0
+    ):
+        """初期化
+
+        Args:
+            sync_manager: ファイル同期マネージャー
+            on_updates: 差分情報の通知先（監視スレッドから呼び出される）
+            backend: 監視バックエンド（Noneの場合は自動選択）
+            coalesce_delay: 変更をまとめる待機時間（秒）
+        """
+        self.sync_manager = sync_manager
+        self.on_updates = on_updates
+        self.backend = backend or self.create_default_backend(sync_manager)
+        self.coalesce_delay = coalesce_delay
+        self.logger = get_logger()
+
+        self._lock = threading.Lock()
+        self._pending: Set[Path] = set()
+        self._refresh_requested = True  # 開始時に一度だけ全体をチェック
+        self._wake_event = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def create_default_backend(sync_manager) -> WatcherBackend:
+        """利用可能なバックエンドを選択
+
+        Args:
+            sync_manager: ファイル同期マネージャー（ポーリングの初期状態にマニフェストを使用）
+
+        Returns:
+            監視バックエンド
+        """
+        if WatchdogBackend.is_available():
+            return WatchdogBackend()
+
+        baseline = {
+            key: (entry['size'], entry['mtime_ns'])
+            for key, entry in sync_manager.manifest.entries.items()
+        }
+        return PollingBackend(baseline=baseline)
+
+    def start(self):
+        """監視を開始"""
+        source_dir = self.sync_manager.source_dir
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="SourceWatcher", daemon=True)
+        self._thread.start()
+        self._wake_event.set()
+
+        if source_dir.exists():
+            self.backend.start(source_dir, self._on_paths)
+            self.logger.info(f"元ディレクトリの監視を開始: {source_dir} ({self.backend.name})")
+        else:
+            self.logger.warning(f"元ディレクトリが存在しないため監視しません: {source_dir}")
+
+    def stop(self):
+        """監視を停止"""
+        self._stop_event.set()
+        self._wake_event.set()
+        try:
+            self.backend.stop()
+        except Exception as e:
+            self.logger.warning(f"監視の停止中にエラー: {e}")
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def refresh(self):
+        """全体を再チェック（同期完了後など、ローカル側が変わった場合に呼び出す）"""
+        with self._lock:
+            self._refresh_requested = True
+        self._wake_event.set()
+
+    def _on_paths(self, paths: Set[Path]):
+        """バックエンドからの変更通知（任意のスレッド）"""
+        with self._lock:
+            self._pending.update(paths)
+        self._wake_event.set()
+
+    def _run(self):
+        """変更をまとめて差分情報を更新するスレッド"""
+        while not self._stop_event.is_set():
+            self._wake_event.wait()
+            if self._stop_event.is_set():
+                return
+
+            # 変更が途切れるまで待機してまとめる
+            self._wake_event.clear()
+            while self._wake_event.wait(self.coalesce_delay):
+                if self._stop_event.is_set():
+                    return
+                self._wake_event.clear()
+
+            with self._lock:
+                pending, self._pending = self._pending, set()
+                refresh, self._refresh_requested = self._refresh_requested, False
+
+            try:
+                if refresh:
+                    self.sync_manager.manifest.load()
+                    updates = self.sync_manager.check_updates()
+                else:
+                    updates = self.sync_manager.apply_changes(pending)
+                    self.logger.debug(f"元ディレクトリの変更を反映: {len(pending)}件")
+            except Exception as e:
+                self.logger.error(f"更新チェック中にエラー: {e}", exc_info=True)
+                continue
+
+            try:
+                self.on_updates(updates)
+            except Exception as e:
+                self.logger.error(f"更新通知の処理中にエラー: {e}", exc_info=True)
@@ -0,0 +1,124 @@
+"""ファイル同期ジョブ
+
+ファイル同期とユーザーラベル保持をバックグラウンドスレッドで実行します。
+進捗はスレッドセーフなキューで受け渡すため、Qtに依存せずヘッドレスでも利用できます。
+
+使用例:
+    job = SyncJob(FileSyncManager(settings))
+    job.start()
+    while not job.wait(0.1):
+        for message in job.get_progress_messages():
+            print(message)
+    sync_count, label_stats = job.result
+"""
+
+import queue
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from utils.logger import get_logger
+
+
+class SyncCancelledError(Exception):
+    """同期がキャンセルされた"""
+
+
+class SyncJob:
+    """ファイル同期ジョブ
+
+    FileSyncManager.sync_files() をワーカースレッドで実行する。
+
+    Attributes:
+        sync_manager: ファイル同期マネージャー
+        updates: 更新情報（Noneの場合は自動検出）
+        preserve_user_labels: ユーザーラベルを保持するか
+        result: (同期したファイル数, ラベル保持統計)（完了後）
+        error: 発生した例外（失敗時）
+    """
+
+    def __init__(
+        self,
+        sync_manager,
+        updates: Optional[Dict[str, List[Path]]] = None,
+        preserve_user_labels: bool = True
+    ):
+        """初期化
+
+        Args:
+            sync_manager: ファイル同期マネージャー
+            updates: 更新情報（Noneの場合は自動検出）
+            preserve_user_labels: ユーザーラベルを保持するか
+        """
+        self.sync_manager = sync_manager
+        self.updates = updates
+        self.preserve_user_labels = preserve_user_labels
+        self.logger = get_logger()
+
+        self.result: Optional[Tuple[int, Optional[Dict[str, int]]]] = None
+        self.error: Optional[BaseException] = None
+
+        self._messages: queue.Queue = queue.Queue()
+        self._cancel_event = threading.Event()
+        self._done_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def cancelled(self) -> bool:
+        """キャンセルされたか"""
+        return isinstance(self.error, SyncCancelledError)
+
+    def start(self):
+        """ワーカースレッドで実行を開始"""
+        self._thread = threading.Thread(target=self.run, name="SyncJob", daemon=True)
+        self._thread.start()
+
+    def run(self):
+        """同期を実行（呼び出し元のスレッドで実行）"""
+        try:
+            self.result = self.sync_manager.sync_files(
+                self.updates,
+                preserve_user_labels=self.preserve_user_labels,
+                progress_callback=self._messages.put,
+                cancel_event=self._cancel_event
+            )
+        except SyncCancelledError as e:
+            self.logger.info("ファイル同期がキャンセルされました")
+            self.error = e
+        except Exception as e:
+            self.logger.error(f"ファイル同期中にエラー: {e}", exc_info=True)
+            self.error = e
+        finally:
+            self._done_event.set()
+
+    def cancel(self):
+        """キャンセルを要求（他スレッドから呼び出し可能）"""
+        self._cancel_event.set()
+
+    def is_done(self) -> bool:
+        """完了（成功・失敗・キャンセル）したか"""
+        return self._done_event.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """完了を待機
+
+        Args:
+            timeout: タイムアウト（秒、Noneの場合は無制限）
+
+        Returns:
+            完了した場合True
+        """
+        return self._done_event.wait(timeout)
+
+    def get_progress_messages(self) -> List[str]:
+        """未取得の進捗メッセージを取得
+
+        Returns:
+            進捗メッセージのリスト（古い順）
+        """
+        messages = []
+        while True:
+            try:
+                messages.append(self._messages.get_nowait())
+            except queue.Empty:
+                return messages
@@ -0,0 +1,145 @@
+"""同期マニフェスト
+
+前回同期した元ファイルの (サイズ, 更新日時, 内容ハッシュ) を保存し、
+内容が実際に変わったファイルだけを更新として検出するために使用します。
+"""
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+from utils.logger import get_logger
+
+
+class SyncManifest:
+    """同期マニフェスト
+
+    キーは元ディレクトリからの相対パス（POSIX形式）。
+    保存時はファイルを読み直して変更したキーのみを反映するため、
+    複数のインスタンス（ファイル監視と同期など）が同じマニフェストを更新しても上書きし合わない。
+
+    Attributes:
+        path: マニフェストファイルのパス
+        entries: 相対パス → {"size", "mtime_ns", "hash"} の辞書
+    """
+
+    VERSION = 1
+
+    def __init__(self, path: Path):
+        """初期化
+
+        Args:
+            path: マニフェストファイルのパス
+        """
+        self.path = path
+        self.entries: Dict[str, dict] = {}
+        self.logger = get_logger()
+        # 未保存の変更（キー → エントリ、削除はNone）
+        self._changes: Dict[str, Optional[dict]] = {}
+        self.load()
+
+    @property
+    def dirty(self) -> bool:
+        """未保存の変更があるか"""
+        return bool(self._changes)
+
+    def load(self):
+        """ファイルから読み込み（存在しない・壊れている場合は空、未保存の変更は破棄）"""
+        self.entries = self._read_entries()
+        self._changes = {}
+
+    def _read_entries(self) -> Dict[str, dict]:
+        """ファイルのエントリを読み込み"""
+        if not self.path.exists():
+            return {}
+
+        try:
+            with self.path.open('r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == self.VERSION:
+                return data.get('files', {})
+        except Exception as e:
+            self.logger.warning(f"同期マニフェストの読み込みに失敗（再作成します）: {e}")
+        return {}
+
+    def save(self):
+        """ファイルに保存（最新の内容に変更分を反映し、一時ファイル経由で置き換え）"""
+        entries = self._read_entries()
+        for key, entry in self._changes.items():
+            if entry is None:
+                entries.pop(key, None)
+            else:
+                entries[key] = entry
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+        with temp_path.open('w', encoding='utf-8') as f:
+            json.dump({'version': self.VERSION, 'files': entries}, f, ensure_ascii=False)
+        os.replace(temp_path, self.path)
+
+        self.entries = entries
+        self._changes = {}
+
+    def get(self, key: str) -> Optional[dict]:
+        """エントリを取得
+
+        Args:
+            key: 相対パス（POSIX形式）
+
+        Returns:
+            {"size", "mtime_ns", "hash"}、存在しない場合None
+        """
+        return self.entries.get(key)
+
+    def is_unchanged(self, key: str, stat_result: os.stat_result) -> bool:
+        """サイズと更新日時が前回同期時と同じか
+
+        Args:
+            key: 相対パス（POSIX形式）
+            stat_result: 現在のstat結果
+
+        Returns:
+            同じ場合True（ハッシュ計算不要）
+        """
+        entry = self.entries.get(key)
+        return (
+            entry is not None
+            and entry['size'] == stat_result.st_size
+            and entry['mtime_ns'] == stat_result.st_mtime_ns
+        )
+
+    def set(self, key: str, size: int, mtime_ns: int, file_hash: str):
+        """エントリを設定
+
+        Args:
+            key: 相対パス（POSIX形式）
+            size: ファイルサイズ
+            mtime_ns: 更新日時（ナノ秒）
+            file_hash: 内容のSHA256ハッシュ
+        """
+        entry = {'size': size, 'mtime_ns': mtime_ns, 'hash': file_hash}
+        self.entries[key] = entry
+        self._changes[key] = entry
+
+    def mark_unsynced(self, key: str):
+        """未同期として記録（次回の更新チェックで必ず変更ありと判定される）
+
+        ローカルにコピー済みだが同期が完了しなかったファイル用。
+        記録がないとローカルファイルとの比較で同じ内容と判定されてしまうため使用する。
+
+        Args:
+            key: 相対パス（POSIX形式）
+        """
+        self.set(key, -1, -1, '')
+
+    def remove(self, key: str):
+        """エントリを削除
+
+        Args:
+            key: 相対パス（POSIX形式）
+        """
+        if self.entries.pop(key, None) is not None:
+            self._changes[key] = None
@@ -0,0 +1,165 @@
+"""サムネイルのディスクキャッシュ
+
+縮小済みのプレビュー画像をディスクに保存し、合計サイズが上限を超えた場合は
+最も長く使われていないもの（LRU）から削除します。
+
+画像のデコード・縮小は呼び出し側（UI）で行い、このクラスはエンコード済みのバイト列のみを扱います。
+"""
+
+import hashlib
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from utils.logger import get_logger
+
+
+class ThumbnailDiskCache:
+    """サムネイルのディスクキャッシュ（サイズ上限付きLRU）
+
+    キーは元画像のパス・サイズ・更新日時とサムネイルの大きさから生成するため、
+    元画像が変更された場合は別のエントリとして扱われる（古いエントリはLRUで削除される）。
+    最終使用日時はキャッシュファイルの更新日時として保存する。
+    複数スレッドから同時に呼び出し可能。
+
+    Attributes:
+        cache_dir: キャッシュディレクトリ
+        max_bytes: 合計サイズの上限（バイト）
+    """
+
+    DEFAULT_MAX_BYTES = 200 * 1024 * 1024  # 200MB
+    EXTENSION = ".png"
+
+    def __init__(self, cache_dir: Path, max_bytes: int = DEFAULT_MAX_BYTES):
+        """初期化
+
+        Args:
+            cache_dir: キャッシュディレクトリ
+            max_bytes: 合計サイズの上限（バイト）
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.logger = get_logger()
+
+        self._lock = threading.Lock()
+        # ファイル名 → (サイズ, 最終使用日時ns)
+        self._entries: Optional[Dict[str, Tuple[int, int]]] = None
+        self._total_bytes = 0
+
+    @classmethod
+    def make_key(cls, source_path: Path, stat_result: os.stat_result, size: int) -> str:
+        """キャッシュキーを生成
+
+        Args:
+            source_path: 元画像のパス
+            stat_result: 元画像のstat結果
+            size: サムネイルの大きさ（ピクセル）
+
+        Returns:
+            キャッシュキー
+        """
+        raw = f"{source_path}|{stat_result.st_size}|{stat_result.st_mtime_ns}|{size}"
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[bytes]:
+        """サムネイルを取得（最終使用日時を更新）
+
+        Args:
+            key: キャッシュキー
+
+        Returns:
+            エンコード済みの画像データ（キャッシュにない場合None）
+        """
+        name = key + self.EXTENSION
+        path = self.cache_dir / name
+
+        with self._lock:
+            self._ensure_index()
+            if name not in self._entries:
+                return None
+
+        try:
+            data = path.read_bytes()
+            os.utime(path)
+        except OSError:
+            with self._lock:
+                self._forget(name)
+            return None
+
+        with self._lock:
+            if name in self._entries:
+                self._entries[name] = (len(data), path.stat().st_mtime_ns)
+        return data
+
+    def put(self, key: str, data: bytes):
+        """サムネイルを保存（上限を超えた場合は古いものから削除）
+
+        Args:
+            key: キャッシュキー
+            data: エンコード済みの画像データ
+        """
+        name = key + self.EXTENSION
+        path = self.cache_dir / name
+        temp_path = path.with_name(f"{name}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            temp_path.write_bytes(data)
+            os.replace(temp_path, path)
+            mtime_ns = path.stat().st_mtime_ns
+        except OSError as e:
+            self.logger.warning(f"サムネイルの保存に失敗: {e}")
+            temp_path.unlink(missing_ok=True)
+            return
+
+        with self._lock:
+            self._ensure_index()
+            self._forget(name)
+            self._entries[name] = (len(data), mtime_ns)
+            self._total_bytes += len(data)
+            self._evict()
+
+    @property
+    def total_bytes(self) -> int:
+        """キャッシュの合計サイズ（バイト）"""
+        with self._lock:
+            self._ensure_index()
+            return self._total_bytes
+
+    def _ensure_index(self):
+        """キャッシュディレクトリの一覧を読み込み（初回のみ、ロック取得済みで呼び出す）"""
+        if self._entries is not None:
+            return
+
+        self._entries = {}
+        self._total_bytes = 0
+        try:
+            with os.scandir(self.cache_dir) as it:
+                for entry in it:
+                    if entry.name.endswith(self.EXTENSION) and entry.is_file():
+                        stat_result = entry.stat()
+                        self._entries[entry.name] = (stat_result.st_size, stat_result.st_mtime_ns)
+                        self._total_bytes += stat_result.st_size
+        except FileNotFoundError:
+            pass
+
+    def _forget(self, name: str):
+        """インデックスからエントリを削除（ロック取得済みで呼び出す）"""
+        entry = self._entries.pop(name, None)
+        if entry:
+            self._total_bytes -= entry[0]
+
+    def _evict(self):
+        """合計サイズが上限以下になるまで最も古いエントリを削除（ロック取得済みで呼び出す）"""
+        if self._total_bytes <= self.max_bytes:
+            return
+
+        for name, _ in sorted(self._entries.items(), key=lambda item: item[1][1]):
+            if self._total_bytes <= self.max_bytes:
+                break
+            self._forget(name)
+            try:
+                (self.cache_dir / name).unlink()
+            except OSError:
+                pass
@@ -28,7 +28,7 @@ class Prompt(SerializableMixin):
         tags: タグリスト
         created_date: 作成日時
         last_used: 最終使用日時
-        label_source: ラベルのソース（auto_extract, ai_generated, manual, auto_word_split）
+        label_source: ラベルのソース（auto_extract, ai_generated, manual, auto_word_split, suggested）
         lora_metadata: LoRA専用メタデータ（JSON文字列）
     """
     id: str
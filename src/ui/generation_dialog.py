@@ -0,0 +1,301 @@
+"""画像生成ダイアログ
+
+プロジェクトのシーンを複数のStable Diffusion WebUIへ振り分けて画像生成します。
+生成はワーカースレッドで実行し、進捗と結果をシグナルでUIへ通知します。
+"""
+
+from pathlib import Path
+from PyQt6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QLineEdit,
+    QCheckBox, QProgressBar, QPlainTextEdit, QFileDialog, QMessageBox
+)
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from models import Project
+from config.settings import Settings
+from core.prompt_builder import PromptBuilder
+from core.generation_dispatcher import (
+    GenerationDispatcher, GenerationResult, WebUIEndpoint, create_jobs_from_project
+)
+from utils.logger import get_logger
+
+
+class GenerationWorker(QThread):
+    """画像生成ワーカースレッド
+
+    GenerationDispatcher.run() を別スレッドで実行する。
+
+    Signals:
+        progress: 進捗(current, total, message)
+        result_ready: 1ジョブの結果(GenerationResult)
+        error: 生成を継続できないエラー(メッセージ)
+        finished_all: 全ジョブの結果リスト（エラー時も必ず通知）
+    """
+
+    progress = pyqtSignal(int, int, str)
+    result_ready = pyqtSignal(object)
+    error = pyqtSignal(str)
+    finished_all = pyqtSignal(list)
+
+    def __init__(self, dispatcher: GenerationDispatcher, jobs: list, output_dir: Path, parent=None):
+        """初期化
+
+        Args:
+            dispatcher: 画像生成ディスパッチャー
+            jobs: 生成ジョブのリスト
+            output_dir: 画像の保存先
+            parent: 親オブジェクト
+        """
+        super().__init__(parent)
+        self.dispatcher = dispatcher
+        self.jobs = jobs
+        self.output_dir = output_dir
+
+    def run(self):
+        """スレッド処理"""
+        results = []
+        try:
+            results = self.dispatcher.run(
+                self.jobs,
+                progress_callback=self.progress.emit,
+                result_callback=self.result_ready.emit,
+                output_dir=self.output_dir
+            )
+        except Exception as e:
+            get_logger().exception("画像生成中にエラーが発生")
+            self.error.emit(str(e))
+        finally:
+            self.finished_all.emit(results)
+
+
+class GenerationDialog(QDialog):
+    """画像生成ダイアログ
+
+    Attributes:
+        project: プロジェクトオブジェクト
+        settings: 設定オブジェクト
+        worker: 実行中のワーカースレッド
+    """
+
+    def __init__(self, project: Project, parent=None):
+        """初期化
+
+        Args:
+            project: プロジェクトオブジェクト
+            parent: 親ウィジェット
+        """
+        super().__init__(parent)
+
+        self.logger = get_logger()
+        self.project = project
+        self.settings = Settings()
+        self.prompt_builder = PromptBuilder(self.settings)
+        self.dispatcher: GenerationDispatcher | None = None
+        self.worker: GenerationWorker | None = None
+        self._error: str | None = None
+
+        # ダイアログ設定
+        self.setWindowTitle("画像生成")
+        self.setMinimumWidth(600)
+
+        # UI構築
+        self._create_ui()
+
+    def _create_ui(self):
+        """UI構築"""
+        layout = QVBoxLayout(self)
+        layout.setSpacing(10)
+
+        # タイトル
+        title_label = QLabel("画像生成（WebUI API）")
+        title_label.setStyleSheet("font-size: 14pt; font-weight: bold;")
+        layout.addWidget(title_label)
+
+        # エンドポイント
+        layout.addWidget(QLabel("エンドポイント（カンマ区切り、URL|同時実行数）:"))
+        self.endpoints_edit = QLineEdit()
+        self.endpoints_edit.setText(", ".join(
+            f"{ep.get('url', '')}|{ep.get('max_concurrent', 1)}"
+            for ep in self.settings.webui_endpoints
+        ))
+        layout.addWidget(self.endpoints_edit)
+
+        # 保存先
+        output_layout = QHBoxLayout()
+        output_layout.addWidget(QLabel("保存先:"))
+        self.output_dir_edit = QLineEdit()
+        output_layout.addWidget(self.output_dir_edit)
+
+        browse_btn = QPushButton("参照...")
+        browse_btn.clicked.connect(self._on_browse)
+        output_layout.addWidget(browse_btn)
+        layout.addLayout(output_layout)
+
+        # オプション
+        self.completed_only_checkbox = QCheckBox("完成済みシーンのみ")
+        self.completed_only_checkbox.setChecked(True)
+        layout.addWidget(self.completed_only_checkbox)
+
+        # 進捗
+        self.progress_bar = QProgressBar()
+        layout.addWidget(self.progress_bar)
+
+        self.status_label = QLabel()
+        self.status_label.setStyleSheet("color: gray;")
+        layout.addWidget(self.status_label)
+
+        self.log_view = QPlainTextEdit()
+        self.log_view.setReadOnly(True)
+        layout.addWidget(self.log_view)
+
+        # ボタン
+        button_layout = QHBoxLayout()
+        button_layout.addStretch()
+
+        self.cancel_btn = QPushButton("閉じる")
+        self.cancel_btn.clicked.connect(self._on_cancel)
+        button_layout.addWidget(self.cancel_btn)
+
+        self.start_btn = QPushButton("生成開始")
+        self.start_btn.setDefault(True)
+        self.start_btn.clicked.connect(self._on_start)
+        button_layout.addWidget(self.start_btn)
+
+        layout.addLayout(button_layout)
+
+    def _parse_endpoints(self) -> list:
+        """入力欄からエンドポイント設定を取得
+
+        Returns:
+            エンドポイント設定（辞書）のリスト
+        """
+        endpoints = []
+        for item in self.endpoints_edit.text().split(","):
+            item = item.strip()
+            if not item:
+                continue
+            url, _, concurrent = item.partition("|")
+            endpoints.append({
+                "url": url.strip(),
+                "max_concurrent": int(concurrent) if concurrent.strip().isdigit() else 1
+            })
+        return endpoints
+
+    def _on_browse(self):
+        """参照ボタンクリック"""
+        dir_path = QFileDialog.getExistingDirectory(self, "画像の保存先を選択")
+        if dir_path:
+            self.output_dir_edit.setText(dir_path)
+
+    def _on_start(self):
+        """生成開始ボタンクリック"""
+        endpoint_data = self._parse_endpoints()
+        output_dir = self.output_dir_edit.text().strip()
+
+        if not endpoint_data:
+            QMessageBox.warning(self, "エラー", "エンドポイントを指定してください")
+            return
+        if not output_dir:
+            QMessageBox.warning(self, "エラー", "保存先を指定してください")
+            return
+
+        jobs = create_jobs_from_project(
+            self.project,
+            self.prompt_builder,
+            completed_only=self.completed_only_checkbox.isChecked(),
+            payload_defaults=self.settings.webui_payload_defaults
+        )
+        if not jobs:
+            QMessageBox.warning(self, "エラー", "生成するシーンがありません")
+            return
+
+        # エンドポイント設定を保存
+        self.settings.webui_endpoints = endpoint_data
+        self.settings.save()
+
+        self.dispatcher = GenerationDispatcher(
+            [WebUIEndpoint.from_dict(data) for data in endpoint_data]
+        )
+        self.worker = GenerationWorker(self.dispatcher, jobs, Path(output_dir), self)
+        self.worker.progress.connect(self._on_progress)
+        self.worker.result_ready.connect(self._on_result)
+        self.worker.error.connect(self._on_error)
+        self.worker.finished_all.connect(self._on_finished)
+        self._error = None
+
+        self.progress_bar.setRange(0, len(jobs))
+        self.progress_bar.setValue(0)
+        self.log_view.clear()
+        self.start_btn.setEnabled(False)
+        self.cancel_btn.setText("中止")
+
+        self.logger.info(f"画像生成開始: {len(jobs)}件, {len(endpoint_data)}エンドポイント")
+        self.worker.start()
+
+    def _on_progress(self, current: int, total: int, message: str):
+        """進捗通知
+
+        Args:
+            current: 完了件数
+            total: 全件数
+            message: メッセージ
+        """
+        self.progress_bar.setValue(current)
+        if self.dispatcher:
+            self.status_label.setText(self.dispatcher.get_status_text())
+
+    def _on_result(self, result: GenerationResult):
+        """1ジョブ完了時
+
+        Args:
+            result: 生成結果
+        """
+        if result.success:
+            self.log_view.appendPlainText(
+                f"[OK] シーン{result.scene_id} ({result.endpoint}, {result.elapsed:.1f}秒)"
+            )
+        else:
+            self.log_view.appendPlainText(f"[NG] シーン{result.scene_id}: {result.error}")
+
+    def _on_error(self, message: str):
+        """生成を継続できないエラー発生時
+
+        Args:
+            message: エラーメッセージ
+        """
+        self._error = message
+        self.log_view.appendPlainText(f"[エラー] {message}")
+
+    def _on_finished(self, results: list):
+        """全ジョブ完了時（エラーで中断した場合も呼び出される）
+
+        Args:
+            results: 生成結果のリスト
+        """
+        success_count = sum(1 for r in results if r.success)
+        self.log_view.appendPlainText(f"完了: {success_count}/{len(results)}件成功")
+        self.logger.info(f"画像生成完了: {success_count}/{len(results)}件成功")
+
+        self.worker = None
+        self.start_btn.setEnabled(True)
+        self.cancel_btn.setEnabled(True)
+        self.cancel_btn.setText("閉じる")
+
+        if self._error:
+            QMessageBox.critical(self, "エラー", f"画像生成に失敗しました:\n{self._error}")
+
+    def _on_cancel(self):
+        """中止/閉じるボタンクリック"""
+        if self.worker and self.dispatcher:
+            self.dispatcher.cancel()
+            self.cancel_btn.setEnabled(False)
+            self.worker.finished.connect(lambda: self.cancel_btn.setEnabled(True))
+        else:
+            self.reject()
+
+    def reject(self):
+        """ダイアログを閉じる時（Escキー・ウィンドウの閉じるボタンを含む、実行中は中止して待機）"""
+        if self.worker and self.dispatcher:
+            self.dispatcher.cancel()
+            self.worker.wait()
+        super().reject()
@@ -0,0 +1,86 @@
+"""ラベル生成ワーカー
+
+ラベル一括生成（Batch APIの送信・ポーリング・結果の取得を含む）をワーカースレッドで実行し、
+進捗と結果をシグナルでUIへ通知します。
+"""
+
+import threading
+from typing import Callable, List, Optional
+
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from models import Prompt
+from ai.label_generator import LabelGenerator
+from ai.label_job import LabelJobJournal
+from utils.logger import get_logger
+
+
+class LabelGenerationWorker(QThread):
+    """ラベル生成ワーカースレッド
+
+    LabelGenerator.generate_labels_batch() を別スレッドで実行し、終了後にジェネレーターを閉じる。
+
+    Signals:
+        progress: 進捗(current, total, message)
+        generation_finished: 結果(成功数, 失敗数, エラーメッセージリスト)
+        error: 生成を継続できないエラー(メッセージ)
+    """
+
+    progress = pyqtSignal(int, int, str)
+    generation_finished = pyqtSignal(int, int, list)
+    error = pyqtSignal(str)
+
+    def __init__(
+        self,
+        generator: LabelGenerator,
+        prompts: List[Prompt],
+        mode: str,
+        journal: Optional[LabelJobJournal] = None,
+        label_callback: Optional[Callable[[Prompt], None]] = None,
+        parent=None
+    ):
+        """初期化
+
+        Args:
+            generator: ラベルジェネレーター
+            prompts: 対象のプロンプトのリスト
+            mode: 処理モード（generate_labels_batch と同じ）
+            journal: ジョブの記録（オプション）
+            label_callback: ラベルを設定するたびにワーカースレッドで呼び出す関数(prompt)
+            parent: 親オブジェクト
+        """
+        super().__init__(parent)
+        self.generator = generator
+        self.prompts = prompts
+        self.mode = mode
+        self.journal = journal
+        self.label_callback = label_callback
+        self._cancel_event = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        """キャンセルが要求されたか"""
+        return self._cancel_event.is_set()
+
+    def cancel(self):
+        """キャンセルを要求（UIスレッドから呼び出し可能）"""
+        self._cancel_event.set()
+
+    def run(self):
+        """スレッド処理"""
+        try:
+            success_count, failure_count, errors = self.generator.generate_labels_batch(
+                self.prompts,
+                progress_callback=self.progress.emit,
+                mode=self.mode,
+                journal=self.journal,
+                label_callback=self.label_callback,
+                cancel_event=self._cancel_event
+            )
+        except Exception as e:
+            get_logger().exception("ラベル生成中にエラーが発生")
+            self.error.emit(str(e))
+        else:
+            self.generation_finished.emit(success_count, failure_count, errors)
+        finally:
+            self.generator.close()
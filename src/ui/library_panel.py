@@ -3,14 +3,16 @@
 プロンプトライブラリの表示・検索を行うパネル。
 """
 
+import time
+
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLineEdit, QTreeWidget,
     QTreeWidgetItem, QLabel, QPushButton, QApplication, QComboBox,
     QTabWidget, QFrame, QScrollArea, QSizePolicy, QMenu, QInputDialog,
-    QMessageBox
+    QMessageBox, QCheckBox
 )
-from PyQt6.QtCore import Qt, pyqtSignal, QTimer
-from PyQt6.QtGui import QAction
+from PyQt6.QtCore import Qt, pyqtSignal, QTimer, QSize
+from PyQt6.QtGui import QAction, QColor, QIcon
 from typing import List
 
 from models import Prompt
@@ -21,8 +23,12 @@ from core.custom_prompt_manager import CustomPromptManager
 from core.scene_library_manager import SceneLibraryManager
 from core.project_library_manager import ProjectLibraryManager
 from core.lora_library_manager import LoraLibraryManager
+from core.lora_hash_cache import to_autov2
+from core.sync_job import SyncJob
 from config.settings import Settings
 from utils.logger import get_logger
+from .lora_scan_worker import LoraScanWorker
+from .lora_thumbnail_loader import LoraThumbnailLoader
 
 
 class LibraryPanel(QWidget):
@@ -40,6 +46,9 @@ class LibraryPanel(QWidget):
     scene_selected = pyqtSignal(object)   # SceneLibraryItem (シーン挿入)
     project_selected = pyqtSignal(object)  # ProjectLibraryItem (作品全体挿入)
     project_scene_selected = pyqtSignal(object, int)  # ProjectLibraryItem, scene_index (作品内の個別シーン挿入)
+    library_synced = pyqtSignal()  # ファイル同期ジョブ完了（キャンセル・失敗を含む）
+
+    LABEL_SAVE_INTERVAL = 5.0  # ラベル生成中にCSVへ途中保存する間隔（秒）
 
     def __init__(self):
         """初期化"""
@@ -66,6 +75,15 @@ class LibraryPanel(QWidget):
         # LoRAライブラリ管理
         self.lora_library_manager = LoraLibraryManager(settings)
         self.lora_prompts: List[Prompt] = []
+        self.lora_thumbnail_loader = LoraThumbnailLoader(self.lora_library_manager, self)
+        self.lora_thumbnail_loader.thumbnail_ready.connect(self._on_lora_thumbnail_ready)
+        self._lora_items: dict = {}  # source_file → QTreeWidgetItem（表示中の項目）
+        self._lora_scan_worker: LoraScanWorker | None = None  # 実行中のLoRAスキャン
+
+        # 実行中のファイル同期ジョブ
+        self._sync_job: SyncJob | None = None
+        # 実行中のラベル生成（LabelGenerationWorker）
+        self._label_generation_worker = None
 
         # UI構築
         self._create_ui()
@@ -761,12 +779,19 @@ class LibraryPanel(QWidget):
             )
 
     def _on_sync_files(self):
-        """ファイル同期"""
+        """ファイル同期
+
+        同期とユーザーラベル保持は SyncJob でワーカースレッドに逃がし、
+        進捗はタイマーでキューから取得して表示する。
+        """
         from core.file_sync_manager import FileSyncManager
-        from core.library_manager import LibraryManager
         from config.settings import Settings
         from PyQt6.QtWidgets import QMessageBox, QProgressDialog
 
+        # 同期中の再実行を防止
+        if self._sync_job and not self._sync_job.is_done():
+            return
+
         try:
             settings = Settings()
             sync_manager = FileSyncManager(settings)
@@ -794,69 +819,134 @@ class LibraryPanel(QWidget):
             if reply != QMessageBox.StandardButton.Yes:
                 return
 
-            # プログレスダイアログ
-            progress = QProgressDialog("ファイルを同期しています...", "キャンセル", 0, 100, self)
+            # プログレスダイアログ（処理中は進捗のみ表示）
+            progress = QProgressDialog("ファイルを同期しています...", "キャンセル", 0, 0, self)
             progress.setWindowTitle("同期")
             progress.setWindowModality(Qt.WindowModality.WindowModal)
             progress.setMinimumDuration(0)
-            progress.setValue(0)
+            progress.setAutoClose(False)
+            progress.setAutoReset(False)
 
-            # 進捗コールバック
-            def on_sync_progress(message: str):
-                progress.setLabelText(message)
-                QApplication.processEvents()
-
-            # ファイル同期（ユーザーラベル保持込み）
+            # ファイル同期（ユーザーラベル保持込み）をワーカースレッドで実行
             self.logger.info("ファイル同期開始（ユーザーラベル保持あり）")
-            sync_count, label_stats = sync_manager.sync_files(
-                updates,
-                preserve_user_labels=True,
-                progress_callback=on_sync_progress
+            job = SyncJob(sync_manager, updates, preserve_user_labels=True)
+            progress.canceled.connect(job.cancel)
+
+            self.sync_button.setEnabled(False)
+            self._sync_job = job
+            self._sync_progress = progress
+            self._sync_settings = settings
+            self._sync_poll_timer = QTimer(self)
+            self._sync_poll_timer.timeout.connect(self._poll_sync_job)
+            job.start()
+            self._sync_poll_timer.start(100)
+
+        except Exception as e:
+            self.logger.exception("ファイル同期中にエラーが発生")
+            QMessageBox.critical(
+                self,
+                "エラー",
+                f"同期中にエラーが発生しました:\n{e}"
             )
 
-            progress.setValue(100)
+    def _poll_sync_job(self):
+        """同期ジョブの進捗を反映（UIスレッドのタイマーから呼び出し）"""
+        job = self._sync_job
+        progress = self._sync_progress
 
-            # 新しいプロンプトをUIに表示
-            manager = LibraryManager(settings)
-            prompts = manager.load_from_csv()
-            self.load_prompts(prompts)
+        messages = job.get_progress_messages()
+        if messages and not progress.wasCanceled():
+            progress.setLabelText(messages[-1])
 
-            progress.close()
+        if not job.is_done():
+            return
 
-            # 完了メッセージ（ラベル保持統計付き）
-            message = f"同期が完了しました。\n\n"
-            message += f"同期ファイル数: {sync_count}\n"
-            message += f"プロンプト数: {len(prompts)}\n"
+        self._sync_poll_timer.stop()
+        self._sync_poll_timer.deleteLater()
+        progress.close()
+        self.sync_button.setEnabled(True)
+        self._on_sync_finished(job)
 
-            if label_stats:
-                message += f"\n【ユーザーラベル保持】\n"
-                message += f"保持: {label_stats['preserved']}件\n"
-                if label_stats['lost'] > 0:
-                    message += f"⚠️ 失われたラベル: {label_stats['lost']}件"
-                else:
-                    message += f"✅ 全てのラベルを保持しました"
+    def _on_sync_finished(self, job: SyncJob):
+        """同期ジョブ完了時
 
-            self.logger.info(f"同期完了: {sync_count}ファイル, ラベル保持: {label_stats}")
+        Args:
+            job: 完了した同期ジョブ
+        """
+        from core.library_manager import LibraryManager
 
+        # ローカルディレクトリが変わった可能性があるため通知
+        self.library_synced.emit()
+
+        if job.cancelled:
             QMessageBox.information(
                 self,
-                "完了",
-                message
+                "同期",
+                "同期をキャンセルしました。\n\n未同期のファイルは次回の同期で反映されます。"
+            )
+            return
+
+        if job.error:
+            QMessageBox.critical(
+                self,
+                "エラー",
+                f"同期中にエラーが発生しました:\n{job.error}"
             )
+            return
 
+        sync_count, label_stats = job.result
+
+        try:
+            # 新しいプロンプトをUIに表示
+            manager = LibraryManager(self._sync_settings)
+            prompts = manager.load_from_csv()
+            self.load_prompts(prompts)
         except Exception as e:
-            self.logger.exception("ファイル同期中にエラーが発生")
+            self.logger.exception("同期後のライブラリ読み込み中にエラーが発生")
             QMessageBox.critical(
                 self,
                 "エラー",
-                f"同期中にエラーが発生しました:\n{e}"
+                f"同期後のライブラリ読み込みに失敗しました:\n{e}"
             )
+            return
+
+        # 完了メッセージ（ラベル保持統計付き）
+        message = f"同期が完了しました。\n\n"
+        message += f"同期ファイル数: {sync_count}\n"
+        message += f"プロンプト数: {len(prompts)}\n"
+
+        if label_stats:
+            message += f"\n【ユーザーラベル保持】\n"
+            message += f"保持: {label_stats['preserved']}件\n"
+            if label_stats['lost'] > 0:
+                message += f"⚠️ 失われたラベル: {label_stats['lost']}件"
+            else:
+                message += f"✅ 全てのラベルを保持しました"
+
+        self.logger.info(f"同期完了: {sync_count}ファイル, ラベル保持: {label_stats}")
+
+        QMessageBox.information(
+            self,
+            "完了",
+            message
+        )
 
     def _on_generate_labels(self):
-        """ラベル一括生成（AI）"""
+        """ラベル一括生成（AI）
+
+        生成（Batch APIの送信・ポーリングを含む）は LabelGenerationWorker でワーカースレッドに逃がす。
+        """
         from PyQt6.QtWidgets import QProgressDialog, QMessageBox
         from ai import LabelGenerator, APIKeyManager, CostEstimator
+        from ai.label_cache import LabelCache, make_label_cache_key
+        from ai.label_job import LabelJobJournal
+        from ai.label_suggester import LabelSuggester
         from config.settings import Settings
+        from .label_generation_worker import LabelGenerationWorker
+
+        # 生成中の再実行を防止
+        if self._label_generation_worker is not None:
+            return
 
         # label_jaが空のプロンプトをカウント
         empty_label_prompts = [
@@ -879,7 +969,7 @@ class LibraryPanel(QWidget):
         if total_prompts > 1000:
             recommended_mode = "batch"
             mode_text = "Batch API（推奨）"
-            mode_desc = "バックグラウンド処理、50%コスト削減\n※完了まで最大1時間"
+            mode_desc = "バックグラウンド処理、50%コスト削減\n※通常は1時間以内に完了（最大24時間）"
         elif total_prompts > 50:
             recommended_mode = "async"
             mode_text = "並列処理（推奨）"
@@ -889,9 +979,42 @@ class LibraryPanel(QWidget):
             mode_text = "通常処理"
             mode_desc = "1件ずつ順番に処理"
 
-        # コスト見積もり
+        # 中断したラベル生成ジョブがあれば再開（送信済みのバッチは再送信しない）
+        settings = Settings()
+        journal = LabelJobJournal(settings.get_data_dir() / LabelJobJournal.FILENAME)
+        job_state = journal.load()
+        resume_text = ""
+        estimate_prompts = empty_label_prompts
+        if job_state:
+            if job_state.batches:
+                recommended_mode = "batch"
+                mode_text = "Batch API（中断したジョブを再開）"
+                mode_desc = "送信済みのバッチの結果を取得します"
+            resume_text = (
+                f"【再開】前回中断したラベル生成を再開します\n"
+                f"生成済み: {len(job_state.labels)}件 / 送信済みバッチ: {len(job_state.batches)}件\n\n"
+            )
+            estimate_prompts = [
+                p for p in empty_label_prompts if make_label_cache_key(p.prompt) not in job_state.labels
+            ]
+
+        # ラベル候補の学習をライブラリの変更分だけ更新（確信度の高い候補はAPIに送信しない）
+        label_suggester = LabelSuggester(
+            settings.get_data_dir() / LabelSuggester.FILENAME, settings.label_suggestion_threshold
+        )
+        if label_suggester.update(self.prompts):
+            try:
+                label_suggester.save()
+            except OSError as e:
+                self.logger.warning(f"ラベル候補の学習データの保存に失敗: {e}")
+
+        # コスト見積もり（Batch API以外は複数プロンプトを1リクエストにまとめる）
+        label_cache = LabelCache(settings.get_data_dir() / LabelCache.FILENAME)
+        prompts_per_request = 1 if recommended_mode == "batch" else settings.label_prompts_per_request
         estimator = CostEstimator(model="claude-3-haiku-20240307")
-        total_cost, count, details = estimator.estimate_label_generation_cost(empty_label_prompts)
+        total_cost, count, details = estimator.estimate_label_generation_cost(
+            estimate_prompts, prompts_per_request, label_cache, label_suggester
+        )
         cost_summary = estimator.format_cost_summary(details)
 
         # Batch APIの場合は50%オフ
@@ -904,6 +1027,7 @@ class LibraryPanel(QWidget):
             self,
             "ラベル一括生成",
             f"AIを使用して{total_prompts}件のプロンプトに\n日本語ラベルを自動生成します。\n\n"
+            f"{resume_text}"
             f"【処理モード】\n{mode_text}\n{mode_desc}\n\n"
             f"{cost_summary}\n\n実行しますか？",
             QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
@@ -926,61 +1050,94 @@ class LibraryPanel(QWidget):
         progress.setWindowTitle("ラベル生成")
         progress.setWindowModality(Qt.WindowModality.WindowModal)
         progress.setMinimumDuration(0)
+        progress.setAutoClose(False)
+        progress.setAutoReset(False)
         progress.setValue(0)
 
         try:
             # APIキー管理とラベルジェネレーター初期化
-            settings = Settings()
             api_key_manager = APIKeyManager(settings.get_data_dir())
 
-            # APIキーの確認
+            # APIキーの確認（未設定の場合はタグ辞書でオフライン生成も選択可能）
+            use_claude = True
             if not api_key_manager.has_api_key("claude"):
-                progress.close()
                 reply = QMessageBox.question(
                     self,
                     "APIキー未設定",
-                    "Claude APIキーが設定されていません。\n\n設定ダイアログを開きますか？",
+                    "Claude APIキーが設定されていません。\n\n"
+                    "タグ辞書でラベルを生成しますか？（APIを使用せずオフラインで生成）\n\n"
+                    "「いいえ」を選ぶと設定ダイアログを開きます。",
                     QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+                    | QMessageBox.StandardButton.Cancel
                 )
 
-                if reply == QMessageBox.StandardButton.Yes:
-                    from .settings_dialog import SettingsDialog
-                    dialog = SettingsDialog(self)
-                    dialog.exec()
+                if reply != QMessageBox.StandardButton.Yes:
+                    progress.close()
+                    if reply == QMessageBox.StandardButton.No:
+                        from .settings_dialog import SettingsDialog
+                        dialog = SettingsDialog(self)
+                        dialog.exec()
+                    return
 
-                return
+                use_claude = False
+                selected_mode = "dictionary"
 
-            generator = LabelGenerator(api_key_manager, use_claude=True)
+            generator = LabelGenerator(
+                api_key_manager, use_claude=use_claude, settings=settings,
+                prompts_per_request=prompts_per_request, label_cache=label_cache,
+                label_suggester=label_suggester
+            )
 
-            # 進捗コールバック
-            def on_progress(current: int, total: int, message: str):
-                if total > 0:
-                    percent = int((current / total) * 100)
-                    progress.setValue(percent)
-                progress.setLabelText(message)
-                QApplication.processEvents()
+            # 生成したラベルは一定間隔でCSVに途中保存（中断時も失われない、ワーカースレッドで呼び出される）
+            from core.library_manager import LibraryManager
+            manager = LibraryManager(settings)
+            manager.prompts = self.prompts
+            last_saved = time.monotonic()
+
+            def on_label(prompt: Prompt):
+                nonlocal last_saved
+                if time.monotonic() - last_saved >= self.LABEL_SAVE_INTERVAL:
+                    manager.save_to_csv()
+                    last_saved = time.monotonic()
 
-            # ラベル生成実行（選択されたモードで）
-            success_count, failure_count, errors = generator.generate_labels_batch(
-                empty_label_prompts,
-                progress_callback=on_progress,
-                mode=selected_mode
+        except Exception as e:
+            self.logger.exception("ラベル生成中にエラーが発生")
+            progress.close()
+            QMessageBox.critical(
+                self,
+                "エラー",
+                f"ラベル生成中にエラーが発生しました:\n{e}"
             )
+            return
 
-            progress.setValue(100)
+        def on_progress(current: int, total: int, message: str):
+            if progress.wasCanceled():
+                return
+            if total > 0:
+                progress.setValue(int((current / total) * 100))
+            progress.setLabelText(message)
 
+        def on_generation_finished(success_count: int, failure_count: int, errors: list):
             # 成功した場合はCSVを更新
             if success_count > 0:
                 progress.setLabelText("CSVを更新しています...")
-                from core.library_manager import LibraryManager
-                manager = LibraryManager(settings)
-                manager.prompts = self.prompts
-                manager.save_to_csv()
-
+                try:
+                    manager.save_to_csv()
+                except OSError as e:
+                    self.logger.exception("ライブラリCSVの保存に失敗")
+                    errors = [f"ライブラリCSVの保存に失敗: {e}"] + errors
             progress.close()
 
             # 結果表示
-            if failure_count == 0:
+            if worker.cancelled:
+                QMessageBox.information(
+                    self,
+                    "キャンセル",
+                    f"ラベル生成をキャンセルしました。\n\n"
+                    f"生成済み: {success_count}件\n\n"
+                    f"次回のラベル生成で続きから再開します（送信済みのバッチは再送信しません）。"
+                )
+            elif failure_count == 0:
                 QMessageBox.information(
                     self,
                     "完了",
@@ -1005,14 +1162,35 @@ class LibraryPanel(QWidget):
             # UIを更新
             self._update_tree()
 
-        except Exception as e:
-            self.logger.exception("ラベル生成中にエラーが発生")
+        def on_error(message: str):
             progress.close()
             QMessageBox.critical(
                 self,
                 "エラー",
-                f"ラベル生成中にエラーが発生しました:\n{e}"
+                f"ラベル生成中にエラーが発生しました:\n{message}"
             )
+            self._update_tree()
+
+        def on_finished():
+            progress.close()
+            self.generate_labels_button.setEnabled(True)
+            self._label_generation_worker = None
+            worker.deleteLater()
+
+        # ラベル生成をワーカースレッドで実行（選択されたモードで、途中経過をジョブの記録に保存）
+        # キャンセル時、Batch APIは送信済みのバッチを記録に残して次回の実行で結果を取得する
+        worker = LabelGenerationWorker(
+            generator, empty_label_prompts, selected_mode, journal, on_label, self
+        )
+        worker.progress.connect(on_progress)
+        worker.generation_finished.connect(on_generation_finished)
+        worker.error.connect(on_error)
+        worker.finished.connect(on_finished)
+        progress.canceled.connect(worker.cancel)
+
+        self.generate_labels_button.setEnabled(False)
+        self._label_generation_worker = worker
+        worker.start()
 
     def _auto_load_library(self):
         """起動時にライブラリを自動読み込み（CSVが存在する場合のみ）"""
@@ -2284,17 +2462,33 @@ class LibraryPanel(QWidget):
         self.lora_category_filter.currentTextChanged.connect(self._on_lora_category_changed)
         category_layout.addWidget(self.lora_category_filter)
 
+        # 重複フィルタ（内容が同じLoRAのみ表示）
+        self.lora_duplicates_only = QCheckBox("重複のみ")
+        self.lora_duplicates_only.toggled.connect(lambda _: self._update_lora_tree())
+        category_layout.addWidget(self.lora_duplicates_only)
+
         layout.addLayout(category_layout)
 
         # LoRA一覧ツリー
         self.lora_tree = QTreeWidget()
-        self.lora_tree.setHeaderLabels(["名前", "プロンプト", "タグ"])
+        self.lora_tree.setHeaderLabels(["名前", "プロンプト", "タグ", "AutoV2"])
         self.lora_tree.setColumnWidth(0, 250)
         self.lora_tree.setColumnWidth(1, 300)
         self.lora_tree.setColumnWidth(2, 150)
+        self.lora_tree.setColumnWidth(3, 100)
         self.lora_tree.itemDoubleClicked.connect(self._on_lora_item_double_clicked)
+        self.lora_tree.setIconSize(QSize(LoraThumbnailLoader.THUMBNAIL_SIZE, LoraThumbnailLoader.THUMBNAIL_SIZE))
+        self.lora_tree.setUniformRowHeights(True)
         layout.addWidget(self.lora_tree)
 
+        # サムネイルは表示中の行のみ読み込む（スクロール・リサイズ後にまとめて要求）
+        self.lora_thumbnail_timer = QTimer(self)
+        self.lora_thumbnail_timer.setSingleShot(True)
+        self.lora_thumbnail_timer.setInterval(50)
+        self.lora_thumbnail_timer.timeout.connect(self._request_visible_lora_thumbnails)
+        self.lora_tree.verticalScrollBar().valueChanged.connect(lambda _: self.lora_thumbnail_timer.start())
+        self.lora_tree.verticalScrollBar().rangeChanged.connect(lambda *_: self.lora_thumbnail_timer.start())
+
         # LoRAライブラリステータス
         self.lora_status_label = QLabel("LoRAライブラリ: 0件")
         self.lora_status_label.setStyleSheet("color: gray; font-size: 9pt;")
@@ -2316,9 +2510,16 @@ class LibraryPanel(QWidget):
             self.logger.error(f"LoRAライブラリ読み込み失敗: {e}")
 
     def _on_lora_scan(self):
-        """LoRAフォルダをスキャン"""
+        """LoRAフォルダをスキャン
+
+        スキャン（新規ファイルのハッシュ計算を含む）とCSV保存は LoraScanWorker でワーカースレッドに逃がす。
+        """
         from PyQt6.QtWidgets import QProgressDialog
 
+        # スキャン中の再実行を防止
+        if self._lora_scan_worker is not None:
+            return
+
         # LoRAディレクトリが設定されているか確認
         lora_dir = self.lora_library_manager.settings.get_lora_dir()
         if not lora_dir or not lora_dir.exists():
@@ -2330,47 +2531,71 @@ class LibraryPanel(QWidget):
             )
             return
 
-        # プログレスダイアログ
+        # プログレスダイアログ（ファイル解析・ハッシュ計算の段階ごとに最大値が変わるため自動で閉じない）
         progress = QProgressDialog("LoRAファイルをスキャン中...", "キャンセル", 0, 100, self)
         progress.setWindowTitle("LoRAスキャン")
         progress.setWindowModality(Qt.WindowModality.WindowModal)
+        progress.setAutoClose(False)
+        progress.setAutoReset(False)
         progress.show()
 
-        def progress_callback(current, total, message):
+        def on_progress(current: int, total: int, message: str):
+            if progress.wasCanceled():
+                return
             if total > 0:
                 progress.setMaximum(total)
                 progress.setValue(current)
             progress.setLabelText(message)
-            QApplication.processEvents()
-
-        try:
-            # スキャン実行
-            self.lora_prompts = self.lora_library_manager.scan_and_build_library(progress_callback)
 
-            # CSVに保存
-            self.lora_library_manager.save_to_csv()
+        def on_finished():
+            progress.close()
+            self.lora_scan_button.setEnabled(True)
+            self._lora_scan_worker = None
+            worker.deleteLater()
 
-            # UI更新
+        def on_scan_finished(prompts: list):
+            progress.close()
+            # UI更新（プレビュー画像が変わっている可能性があるためサムネイルを再読み込み）
+            self.lora_prompts = prompts
+            self.lora_thumbnail_loader.clear()
             self._update_lora_tree()
             self._update_lora_categories()
 
-            progress.close()
-
             QMessageBox.information(
                 self,
                 "スキャン完了",
                 f"{len(self.lora_prompts)}件のLoRAファイルを検出しました。"
             )
 
-        except Exception as e:
+        def on_cancelled():
+            progress.close()
+            QMessageBox.information(
+                self,
+                "LoRAスキャン",
+                "LoRAスキャンをキャンセルしました。\n\n計算済みのハッシュは次回のスキャンで再利用されます。"
+            )
+
+        def on_error(message: str):
             progress.close()
-            self.logger.error(f"LoRAスキャン失敗: {e}")
+            self.logger.error(f"LoRAスキャン失敗: {message}")
             QMessageBox.critical(
                 self,
                 "エラー",
-                f"LoRAスキャンに失敗しました。\n\n{str(e)}"
+                f"LoRAスキャンに失敗しました。\n\n{message}"
             )
 
+        worker = LoraScanWorker(self.lora_library_manager, self)
+        worker.progress.connect(on_progress)
+        worker.scan_finished.connect(on_scan_finished)
+        worker.cancelled.connect(on_cancelled)
+        worker.error.connect(on_error)
+        worker.finished.connect(on_finished)
+        progress.canceled.connect(worker.cancel)
+
+        self.lora_scan_button.setEnabled(False)
+        self._lora_scan_worker = worker
+        worker.start()
+
     def _on_lora_reload(self):
         """LoRAライブラリを再読み込み"""
         self._load_lora_library()
@@ -2391,12 +2616,21 @@ class LibraryPanel(QWidget):
     def _update_lora_tree(self, search_text: str = ""):
         """LoRAツリーを更新"""
         self.lora_tree.clear()
+        self._lora_items = {}
+        self.lora_thumbnail_loader.cancel_pending()
 
         if not search_text:
             search_text = self.lora_search_bar.text()
 
         category_filter = self.lora_category_filter.currentText()
 
+        # 重複（内容が同じLoRA）
+        duplicates = self.lora_library_manager.find_duplicates(self.lora_prompts)
+        duplicate_of = {
+            id(lora): group for group in duplicates.values() for lora in group
+        }
+        duplicates_only = self.lora_duplicates_only.isChecked()
+
         # フィルタリング
         filtered_loras = []
         for lora in self.lora_prompts:
@@ -2404,6 +2638,10 @@ class LibraryPanel(QWidget):
             if category_filter != "全て" and lora.category != category_filter:
                 continue
 
+            # 重複フィルタ
+            if duplicates_only and id(lora) not in duplicate_of:
+                continue
+
             # 検索フィルタ
             if search_text:
                 search_lower = search_text.lower()
@@ -2417,16 +2655,57 @@ class LibraryPanel(QWidget):
 
         # ツリーに追加
         for lora in filtered_loras:
+            sha256 = self.lora_library_manager.get_lora_hash(lora)
             item = QTreeWidgetItem([
                 lora.label_ja or lora.source_file,
                 lora.prompt,
-                ", ".join(lora.tags[:3]) if lora.tags else ""
+                ", ".join(lora.tags[:3]) if lora.tags else "",
+                to_autov2(sha256) if sha256 else ""
             ])
             item.setData(0, Qt.ItemDataRole.UserRole, lora)
+
+            # 重複を強調表示
+            group = duplicate_of.get(id(lora))
+            if group:
+                others = "\n".join(other.source_file for other in group if other is not lora)
+                for column in range(item.columnCount()):
+                    item.setForeground(column, QColor("#d35400"))
+                    item.setToolTip(column, f"同じ内容のLoRA:\n{others}")
+
             self.lora_tree.addTopLevelItem(item)
+            self._lora_items[lora.source_file] = item
+
+        self.lora_thumbnail_timer.start()
 
         # ステータス更新
-        self.lora_status_label.setText(f"LoRAライブラリ: {len(filtered_loras)}件 / 全{len(self.lora_prompts)}件")
+        status = f"LoRAライブラリ: {len(filtered_loras)}件 / 全{len(self.lora_prompts)}件"
+        if duplicates:
+            status += f"（重複: {sum(len(group) for group in duplicates.values())}件）"
+        self.lora_status_label.setText(status)
+
+    def _request_visible_lora_thumbnails(self):
+        """表示中の行のサムネイルを要求（スクロールで見えなくなった行の要求は取り消す）"""
+        self.lora_thumbnail_loader.cancel_pending()
+        viewport_height = self.lora_tree.viewport().height()
+        item = self.lora_tree.itemAt(0, 0)
+
+        while item is not None:
+            if self.lora_tree.visualItemRect(item).top() > viewport_height:
+                break
+
+            lora = item.data(0, Qt.ItemDataRole.UserRole)
+            if lora and item.icon(0).isNull():
+                pixmap = self.lora_thumbnail_loader.request(lora)
+                if pixmap is not None:
+                    item.setIcon(0, QIcon(pixmap))
+
+            item = self.lora_tree.itemBelow(item)
+
+    def _on_lora_thumbnail_ready(self, source_file: str, pixmap):
+        """サムネイル作成完了時"""
+        item = self._lora_items.get(source_file)
+        if item is not None:
+            item.setIcon(0, QIcon(pixmap))
 
     def _update_lora_categories(self):
         """LoRAカテゴリリストを更新"""
@@ -0,0 +1,62 @@
+"""LoRAスキャンワーカー
+
+LoRAフォルダのスキャン（メタデータの読み込み・新規ファイルのハッシュ計算）とCSV保存を
+ワーカースレッドで実行し、進捗と結果をシグナルでUIへ通知します。
+"""
+
+import threading
+
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from core.lora_library_manager import LoraLibraryManager
+from core.sync_job import SyncCancelledError
+from utils.logger import get_logger
+
+
+class LoraScanWorker(QThread):
+    """LoRAスキャンワーカースレッド
+
+    LoraLibraryManager.scan_and_build_library() と save_to_csv() を別スレッドで実行する。
+
+    Signals:
+        progress: 進捗(current, total, message)
+        scan_finished: スキャン結果のPromptリスト
+        cancelled: キャンセルされた（スキャン結果は保存しない）
+        error: エラー(メッセージ)
+    """
+
+    progress = pyqtSignal(int, int, str)
+    scan_finished = pyqtSignal(list)
+    cancelled = pyqtSignal()
+    error = pyqtSignal(str)
+
+    def __init__(self, lora_library_manager: LoraLibraryManager, parent=None):
+        """初期化
+
+        Args:
+            lora_library_manager: LoRAライブラリマネージャー
+            parent: 親オブジェクト
+        """
+        super().__init__(parent)
+        self.lora_library_manager = lora_library_manager
+        self._cancel_event = threading.Event()
+
+    def cancel(self):
+        """キャンセルを要求（UIスレッドから呼び出し可能）"""
+        self._cancel_event.set()
+
+    def run(self):
+        """スレッド処理"""
+        try:
+            prompts = self.lora_library_manager.scan_and_build_library(
+                self.progress.emit, cancel_event=self._cancel_event
+            )
+            self.lora_library_manager.save_to_csv()
+        except SyncCancelledError:
+            get_logger().info("LoRAスキャンがキャンセルされました")
+            self.cancelled.emit()
+        except Exception as e:
+            get_logger().exception("LoRAスキャン中にエラーが発生")
+            self.error.emit(str(e))
+        else:
+            self.scan_finished.emit(prompts)
@@ -0,0 +1,194 @@
+"""LoRAサムネイルローダー
+
+LoRAのプレビュー画像をバックグラウンドのスレッドプールでデコード・縮小し、
+ディスクキャッシュ（ThumbnailDiskCache）とメモリキャッシュに保存します。
+"""
+
+from collections import OrderedDict
+from typing import Optional, Set
+
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, QBuffer, QByteArray, QIODevice, QSize, Qt, pyqtSignal
+from PyQt6.QtGui import QImage, QImageReader, QPixmap
+
+from models import Prompt
+from core.lora_library_manager import LoraLibraryManager
+from core.thumbnail_cache import ThumbnailDiskCache
+from utils.logger import get_logger
+
+
+class _ThumbnailSignals(QObject):
+    """ワーカーからの通知用シグナル（QRunnableはシグナルを持てないため）"""
+
+    # source_file, QImage（プレビュー画像がない・読み込めない場合はNone）
+    finished = pyqtSignal(str, object)
+
+
+class _ThumbnailTask(QRunnable):
+    """サムネイル作成タスク（スレッドプールで実行）"""
+
+    def __init__(
+        self,
+        prompt: Prompt,
+        lora_library_manager: LoraLibraryManager,
+        disk_cache: ThumbnailDiskCache,
+        size: int,
+        signals: _ThumbnailSignals
+    ):
+        """初期化
+
+        Args:
+            prompt: LoRAのPromptオブジェクト
+            lora_library_manager: LoRAライブラリマネージャー（プレビュー画像の検索に使用）
+            disk_cache: ディスクキャッシュ
+            size: サムネイルの大きさ（ピクセル）
+            signals: 完了通知用シグナル
+        """
+        super().__init__()
+        self.prompt = prompt
+        self.lora_library_manager = lora_library_manager
+        self.disk_cache = disk_cache
+        self.size = size
+        self.signals = signals
+
+    def run(self):
+        """サムネイルを作成"""
+        image = None
+        try:
+            image = self._load_thumbnail()
+        except Exception as e:
+            get_logger().warning(f"サムネイルの作成に失敗: {self.prompt.source_file}: {e}")
+        self.signals.finished.emit(self.prompt.source_file, image)
+
+    def _load_thumbnail(self) -> Optional[QImage]:
+        """ディスクキャッシュから読み込み、なければプレビュー画像から作成
+
+        Returns:
+            サムネイル画像（プレビュー画像がない場合None）
+        """
+        preview_path = self.lora_library_manager.find_preview_image(self.prompt)
+        if not preview_path:
+            return None
+
+        key = ThumbnailDiskCache.make_key(preview_path, preview_path.stat(), self.size)
+        data = self.disk_cache.get(key)
+        if data:
+            image = QImage.fromData(data)
+            if not image.isNull():
+                return image
+
+        # 縮小しながらデコード（元画像の全体をメモリに展開しない）
+        reader = QImageReader(str(preview_path))
+        reader.setAutoTransform(True)
+        original_size = reader.size()
+        if original_size.isValid():
+            reader.setScaledSize(original_size.scaled(
+                QSize(self.size, self.size), Qt.AspectRatioMode.KeepAspectRatio
+            ))
+        image = reader.read()
+        if image.isNull():
+            return None
+        if image.width() > self.size or image.height() > self.size:
+            image = image.scaled(
+                self.size, self.size,
+                Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation
+            )
+
+        # ディスクキャッシュに保存
+        buffer_data = QByteArray()
+        buffer = QBuffer(buffer_data)
+        buffer.open(QIODevice.OpenModeFlag.WriteOnly)
+        image.save(buffer, "PNG")
+        buffer.close()
+        self.disk_cache.put(key, buffer_data.data())
+
+        return image
+
+
+class LoraThumbnailLoader(QObject):
+    """LoRAサムネイルローダー
+
+    request() で要求されたサムネイルをバックグラウンドで作成し、thumbnail_ready で通知する。
+    作成済みのサムネイルはメモリ上のLRUキャッシュから即座に返す。
+
+    Signals:
+        thumbnail_ready: サムネイルが作成された (source_file, QPixmap)
+    """
+
+    thumbnail_ready = pyqtSignal(str, QPixmap)
+
+    THUMBNAIL_SIZE = 64  # サムネイルの大きさ（ピクセル）
+    MAX_THREADS = 4  # デコードの最大並列数
+    MEMORY_CACHE_SIZE = 1000  # メモリに保持するサムネイル数
+
+    def __init__(self, lora_library_manager: LoraLibraryManager, parent: Optional[QObject] = None):
+        """初期化
+
+        Args:
+            lora_library_manager: LoRAライブラリマネージャー
+            parent: 親オブジェクト
+        """
+        super().__init__(parent)
+        self.lora_library_manager = lora_library_manager
+        self.disk_cache = ThumbnailDiskCache(
+            lora_library_manager.settings.get_data_dir() / "thumbnails" / "lora"
+        )
+
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(self.MAX_THREADS)
+        self._signals = _ThumbnailSignals(self)
+        self._signals.finished.connect(self._on_task_finished)
+
+        # source_file → QPixmap（プレビュー画像がない場合はNone）
+        self._memory_cache: "OrderedDict[str, Optional[QPixmap]]" = OrderedDict()
+        self._pending: Set[str] = set()
+
+    def request(self, prompt: Prompt) -> Optional[QPixmap]:
+        """サムネイルを要求
+
+        Args:
+            prompt: LoRAのPromptオブジェクト
+
+        Returns:
+            作成済みの場合はQPixmap
+            （未作成の場合はNoneを返し、作成後に thumbnail_ready で通知。プレビュー画像がない場合も常にNone）
+        """
+        source_file = prompt.source_file
+        if source_file in self._memory_cache:
+            self._memory_cache.move_to_end(source_file)
+            return self._memory_cache[source_file]
+
+        if source_file not in self._pending:
+            self._pending.add(source_file)
+            self._pool.start(_ThumbnailTask(
+                prompt, self.lora_library_manager, self.disk_cache, self.THUMBNAIL_SIZE, self._signals
+            ))
+        return None
+
+    def cancel_pending(self):
+        """未着手の要求を取り消し（表示範囲が変わった場合など）"""
+        self._pool.clear()
+        self._pending.clear()
+
+    def clear(self):
+        """メモリキャッシュを破棄（LoRAの再スキャン後など）"""
+        self.cancel_pending()
+        self._memory_cache.clear()
+
+    def shutdown(self):
+        """実行中のタスクの完了を待機して終了"""
+        self._pool.clear()
+        self._pool.waitForDone()
+
+    def _on_task_finished(self, source_file: str, image: Optional[QImage]):
+        """タスク完了時（UIスレッド）"""
+        self._pending.discard(source_file)
+
+        # QPixmapはUIスレッドでのみ作成できる
+        pixmap = QPixmap.fromImage(image) if image is not None else None
+        self._memory_cache[source_file] = pixmap
+        self._memory_cache.move_to_end(source_file)
+        while len(self._memory_cache) > self.MEMORY_CACHE_SIZE:
+            self._memory_cache.popitem(last=False)
+
+        if pixmap is not None:
+            self.thumbnail_ready.emit(source_file, pixmap)
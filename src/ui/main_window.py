@@ -19,6 +19,7 @@ from .update_notification_banner import UpdateNotificationBanner
 from models import Project
 from config.settings import Settings
 from core.file_sync_manager import FileSyncManager
+from core.source_watcher import SourceWatcher
 from core.template_manager import TemplateManager
 from utils.logger import get_logger
 
@@ -37,6 +38,7 @@ class MainWindow(QMainWindow):
 
     # シグナル定義
     project_changed = pyqtSignal()
+    source_updates_detected = pyqtSignal(object)  # Dict[str, List[Path]]（監視スレッドから送出）
 
     def __init__(self):
         """初期化"""
@@ -60,6 +62,10 @@ class MainWindow(QMainWindow):
         # 起動時チェック完了フラグ
         self._startup_check_done = False
 
+        # 元ディレクトリ監視
+        self._source_watcher: SourceWatcher | None = None
+        self._dismissed_updates = None
+
         # ウィンドウ設定
         self.setWindowTitle("Pfft_maker")
         self.resize(1920, 1080)
@@ -169,6 +175,12 @@ class MainWindow(QMainWindow):
         export_action.triggered.connect(self._on_export_prompts)
         file_menu.addAction(export_action)
 
+        # 画像生成（WebUI API）
+        generate_action = QAction("画像生成(&G)...", self)
+        generate_action.setShortcut(QKeySequence("Ctrl+Shift+G"))
+        generate_action.triggered.connect(self._on_generate_images)
+        file_menu.addAction(generate_action)
+
         file_menu.addSeparator()
 
         # 終了
@@ -270,6 +282,10 @@ class MainWindow(QMainWindow):
         self.update_banner.sync_requested.connect(self._on_banner_sync_requested)
         self.update_banner.dismissed.connect(self._on_banner_dismissed)
 
+        # 元ディレクトリ監視 → 更新通知バナー（監視スレッドからUIスレッドへ）
+        self.source_updates_detected.connect(self._on_source_updates_detected)
+        self.library_panel.library_synced.connect(self._on_library_synced)
+
     def _create_new_project(self):
         """新規プロジェクト作成"""
         self.current_project = Project.create_new("無題のプロジェクト", "")
@@ -405,6 +421,21 @@ class MainWindow(QMainWindow):
         dialog = OutputDialog(self.current_project, self)
         dialog.exec()
 
+    def _on_generate_images(self):
+        """画像生成"""
+        from .generation_dialog import GenerationDialog
+
+        if not self.current_project or not self.current_project.scenes:
+            QMessageBox.warning(
+                self,
+                "エラー",
+                "生成するシーンがありません"
+            )
+            return
+
+        dialog = GenerationDialog(self.current_project, self)
+        dialog.exec()
+
     def _on_settings(self):
         """設定ダイアログ表示"""
         from .settings_dialog import SettingsDialog
@@ -787,34 +818,58 @@ class MainWindow(QMainWindow):
         # 起動時チェック（一度だけ実行）
         if not self._startup_check_done:
             self._startup_check_done = True
-            self._check_library_updates()
+            self._start_source_watcher()
 
-    def _check_library_updates(self):
-        """ライブラリ更新チェック"""
+    def _start_source_watcher(self):
+        """元ディレクトリの監視を開始
+
+        起動時の更新チェックは監視スレッドで実行され、以降は変更があるたびに
+        source_updates_detected シグナルで通知される。
+        """
         try:
             self.logger.info("起動時のライブラリ更新チェックを開始")
+            self._source_watcher = SourceWatcher(
+                FileSyncManager(self.settings),
+                self.source_updates_detected.emit
+            )
+            self._source_watcher.start()
+        except Exception as e:
+            self.logger.error(f"元ディレクトリの監視開始中にエラーが発生: {e}", exc_info=True)
 
-            # FileSyncManagerで更新チェック
-            sync_manager = FileSyncManager(self.settings)
+    def _on_source_updates_detected(self, updates):
+        """元ディレクトリの差分情報が更新された
 
-            if not sync_manager.has_updates():
-                self.logger.info("更新はありません")
-                return
+        Args:
+            updates: 更新情報辞書（FileSyncManager.check_updates() と同じ形式）
+        """
+        signature = {key: frozenset(paths) for key, paths in updates.items()}
+        if not any(signature.values()):
+            self._dismissed_updates = None
+            if self.update_banner.isVisible():
+                self.update_banner.hide()
+                self.status_bar.showMessage("準備完了")
+            return
 
-            # 更新情報を取得
-            updates = sync_manager.check_updates()
-            summary = sync_manager.get_update_summary()
+        # 閉じられたときと同じ内容なら再表示しない
+        if signature == self._dismissed_updates:
+            return
 
-            self.logger.info(f"更新を検出:\n{summary}")
+        self.logger.info(
+            "更新を検出: 追加 {}, 更新 {}, 削除 {}".format(
+                len(updates["added"]), len(updates["modified"]), len(updates["deleted"])
+            )
+        )
 
-            # バナー表示
-            self.update_banner.show_update(updates)
+        # バナー表示
+        self.update_banner.show_update(updates)
 
-            # ステータスバーにも通知
-            self.status_bar.showMessage("ライブラリに更新があります")
+        # ステータスバーにも通知
+        self.status_bar.showMessage("ライブラリに更新があります")
 
-        except Exception as e:
-            self.logger.error(f"更新チェック中にエラーが発生: {e}", exc_info=True)
+    def _on_library_synced(self):
+        """ファイル同期完了時（差分情報を再チェック）"""
+        if self._source_watcher:
+            self._source_watcher.refresh()
 
     def _on_banner_sync_requested(self):
         """バナーから同期リクエスト"""
@@ -826,11 +881,17 @@ class MainWindow(QMainWindow):
     def _on_banner_dismissed(self):
         """バナーが閉じられた"""
         self.logger.info("更新通知バナーが閉じられました")
+        updates = self.update_banner.updates or {}
+        self._dismissed_updates = {key: frozenset(paths) for key, paths in updates.items()}
         self.status_bar.showMessage("準備完了")
 
     def closeEvent(self, event):
         """ウィンドウクローズ時"""
         if self._confirm_save():
+            if self._source_watcher:
+                self._source_watcher.stop()
+                self._source_watcher = None
+            self.library_panel.lora_thumbnail_loader.shutdown()
             event.accept()
         else:
             event.ignore()
@@ -11,13 +11,14 @@ from PyQt6.QtWidgets import (
     QLineEdit, QCheckBox, QMessageBox, QDialog, QDialogButtonBox,
     QTextEdit
 )
-from PyQt6.QtCore import Qt, pyqtSignal
+from PyQt6.QtCore import Qt, pyqtSignal, QTimer
 from pathlib import Path
 
 from models import Project, Scene, Block, BlockType, Prompt
 from config.settings import Settings
 from core.custom_prompt_manager import CustomPromptManager
 from core.scene_library_manager import SceneLibraryManager
+from core.prompt_text_parser import PromptTextParser, parse_prompt_text
 
 
 class SceneEditorPanel(QWidget):
@@ -48,9 +49,18 @@ class SceneEditorPanel(QWidget):
         # シーンライブラリ管理
         self.scene_library_manager = SceneLibraryManager(settings.get_data_dir())
 
+        # テキスト→ブロック差分パーサー（プレビュー用）
+        self.text_parser = PromptTextParser()
+        self.preview_scene: Scene | None = None
+
         # UI構築
         self._create_ui()
 
+        # デバウンスタイマー（テキスト編集時のプレビュー更新用）
+        self.preview_timer = QTimer(self)
+        self.preview_timer.setSingleShot(True)
+        self.preview_timer.timeout.connect(self._emit_text_preview)
+
     def _create_ui(self):
         """UI構築（新設計：テキストエディタ中心）"""
         layout = QVBoxLayout(self)
@@ -311,6 +321,9 @@ class SceneEditorPanel(QWidget):
         Args:
             index: シーンインデックス
         """
+        # 切り替え前のシーンのテキストでプレビューを更新しない
+        self.preview_timer.stop()
+
         if not self.project or index < 0 or index >= len(self.project.scenes):
             return
 
@@ -412,6 +425,9 @@ class SceneEditorPanel(QWidget):
         from utils.logger import get_logger
         logger = get_logger()
 
+        # 保存後のプレビューを編集中のプレビューで上書きしない
+        self.preview_timer.stop()
+
         if not self.current_scene:
             QMessageBox.warning(
                 self,
@@ -448,42 +464,9 @@ class SceneEditorPanel(QWidget):
         logger.info(f"[シーン保存] ブロッククリア完了（削除数: {old_block_count}）")
 
         # テキストをパースしてブロックに変換
-        import re
-        segments = re.split(r',\s*BREAK\s*,?|BREAK', prompt_text, flags=re.IGNORECASE)
-
-        for i, segment in enumerate(segments):
-            segment = segment.strip().strip(',').strip()
-
-            if not segment:
-                continue
-
-            # ワイルドカード形式かチェック
-            is_wildcard = segment.startswith('__') and segment.endswith('__')
-
-            if is_wildcard:
-                block = Block(
-                    block_id=self.current_scene.get_next_block_id(),
-                    type=BlockType.WILDCARD,
-                    content=segment
-                )
-            else:
-                block = Block(
-                    block_id=self.current_scene.get_next_block_id(),
-                    type=BlockType.FIXED_TEXT,
-                    content=segment
-                )
-
+        for block in parse_prompt_text(prompt_text, self.current_scene.get_next_block_id()):
             self.current_scene.add_block(block)
 
-            # 最後のセグメント以外はBREAKを追加
-            if i < len(segments) - 1 and segment:
-                break_block = Block(
-                    block_id=self.current_scene.get_next_block_id(),
-                    type=BlockType.BREAK,
-                    content=""
-                )
-                self.current_scene.add_block(break_block)
-
         logger.info(f"[シーン保存] ブロック作成完了（作成数: {len(self.current_scene.blocks)}）")
 
         # エディタの内容を保存されたブロックから再生成（表示を更新）
@@ -523,6 +506,8 @@ class SceneEditorPanel(QWidget):
         from utils.logger import get_logger
         logger = get_logger()
 
+        self.preview_timer.stop()
+
         if not self.current_scene:
             QMessageBox.warning(
                 self,
@@ -1057,46 +1042,12 @@ class SceneEditorPanel(QWidget):
         original_block_count = len(self.current_scene.blocks)
 
         # BREAKで分割（大文字小文字を区別しない）
-        import re
-        segments = re.split(r',\s*BREAK\s*,?|BREAK', prompt_text, flags=re.IGNORECASE)
-
-        added_blocks = 0
-
-        for i, segment in enumerate(segments):
-            segment = segment.strip().strip(',').strip()
-
-            if not segment:
-                continue
-
-            # ワイルドカード形式かチェック
-            is_wildcard = segment.startswith('__') and segment.endswith('__')
-
-            if is_wildcard:
-                # ワイルドカードブロック
-                block = Block(
-                    block_id=self.current_scene.get_next_block_id(),
-                    type=BlockType.WILDCARD,
-                    content=segment
-                )
-            else:
-                # 固定テキストブロック
-                block = Block(
-                    block_id=self.current_scene.get_next_block_id(),
-                    type=BlockType.FIXED_TEXT,
-                    content=segment
-                )
+        blocks = parse_prompt_text(prompt_text, self.current_scene.get_next_block_id())
 
+        for block in blocks:
             self.current_scene.add_block(block)
-            added_blocks += 1
-
-            # 最後のセグメント以外はBREAKを追加
-            if i < len(segments) - 1 and segment:
-                break_block = Block(
-                    block_id=self.current_scene.get_next_block_id(),
-                    type=BlockType.BREAK,
-                    content=""
-                )
-                self.current_scene.add_block(break_block)
+
+        added_blocks = sum(1 for b in blocks if b.type != BlockType.BREAK)
 
         # UI更新
         self._update_block_list()
@@ -1176,62 +1127,41 @@ class SceneEditorPanel(QWidget):
         self._split_and_add_blocks(prompt_text)
 
     def _on_text_mode_changed(self):
-        """テキストモードでの編集時"""
-        # リアルタイムでプレビューを更新
+        """テキストモードでの編集時（デバウンス処理）"""
         if not self.current_scene:
             return
 
-        # 一時的にブロックに同期してプレビュー更新
-        prompt_text = self.prompt_text_edit.toPlainText().strip()
+        # 入力が落ち着いてからプレビューを更新（300ms後）
+        self.preview_timer.stop()
+        self.preview_timer.start(300)
 
-        if prompt_text:
-            # プレビュー用の一時シーンを作成
-            from models import Scene
-            temp_scene = Scene(
-                scene_id=self.current_scene.scene_id,
-                scene_name=self.current_scene.scene_name,
-                is_completed=self.current_scene.is_completed
-            )
-
-            # テキストをパースして一時シーンにブロックを追加
-            import re
-            segments = re.split(r',\s*BREAK\s*,?|BREAK', prompt_text, flags=re.IGNORECASE)
-
-            for i, segment in enumerate(segments):
-                segment = segment.strip().strip(',').strip()
-
-                if not segment:
-                    continue
+    def _emit_text_preview(self):
+        """編集中のテキストでプレビューを更新
 
-                # ワイルドカード形式かチェック
-                is_wildcard = segment.startswith('__') and segment.endswith('__')
+        差分パーサーで編集されたBREAKセグメントのみを再パースし、
+        プレビュー用の一時シーンのブロックを差し替える。
+        """
+        if not self.current_scene:
+            return
 
-                if is_wildcard:
-                    block = Block(
-                        block_id=temp_scene.get_next_block_id(),
-                        type=BlockType.WILDCARD,
-                        content=segment
-                    )
-                else:
-                    block = Block(
-                        block_id=temp_scene.get_next_block_id(),
-                        type=BlockType.FIXED_TEXT,
-                        content=segment
-                    )
+        prompt_text = self.prompt_text_edit.toPlainText().strip()
 
-                temp_scene.add_block(block)
+        if prompt_text:
+            # プレビュー用の一時シーンを作成（対象シーンが変わった場合のみ）
+            if (self.preview_scene is None or
+                    self.preview_scene.scene_id != self.current_scene.scene_id):
+                self.preview_scene = Scene(
+                    scene_id=self.current_scene.scene_id,
+                    scene_name=self.current_scene.scene_name,
+                    is_completed=self.current_scene.is_completed
+                )
 
-                # 最後のセグメント以外はBREAKを追加
-                if i < len(segments) - 1 and segment:
-                    break_block = Block(
-                        block_id=temp_scene.get_next_block_id(),
-                        type=BlockType.BREAK,
-                        content=""
-                    )
-                    temp_scene.add_block(break_block)
+            self.preview_scene.scene_name = self.current_scene.scene_name
+            self.preview_scene.is_completed = self.current_scene.is_completed
+            self.preview_scene.blocks = self.text_parser.parse(prompt_text)
 
             # プレビュー更新
-            self.scene_changed.emit(temp_scene)
+            self.scene_changed.emit(self.preview_scene)
         else:
             self.scene_changed.emit(self.current_scene)
 
@@ -151,6 +151,11 @@ class UpdateNotificationBanner(QFrame):
             }
         """)
 
+    @property
+    def updates(self) -> Optional[Dict[str, List[Path]]]:
+        """表示中（または最後に表示した）更新情報"""
+        return self._updates
+
     def show_update(self, updates: Dict[str, List[Path]]):
         """更新情報を表示
 
@@ -0,0 +1,122 @@
+"""LLMスタブサーバー（テスト用）
+
+LM Studio（OpenAI互換API）の `/v1/chat/completions` を模したローカルHTTPサーバー。
+同時処理数が capacity を超えたリクエストには 429（Retry-After付き）を返します。
+番号付きで複数のプロンプトを含むリクエストには、JSON（{"labels": [...]}）で応答します。
+
+単体起動:
+    python tests/stub_llm_server.py --port 1234 --capacity 2
+"""
+
+import argparse
+import asyncio
+import json
+import re
+import time
+from typing import Dict, List, Optional, Set
+
+from stub_webui_server import StubWebUIServer
+
+
+class StubLLMServer(StubWebUIServer):
+    """LLMスタブサーバー
+
+    応答はユーザーメッセージの先頭行（"プロンプト: ..."）から "ラベル:..." を返す。
+    番号付きの場合は各番号の "ラベル:..." をJSONで返す。
+
+    Attributes:
+        capacity: 同時に処理できるリクエスト数（超えた分は429）
+        omit: まとめて送信された場合に応答から除外するプロンプト
+        throttled: 429を返した回数
+        arrivals: プロンプト → 受信時刻（time.monotonic）のリスト
+        rejections: プロンプト → 429を返した時刻のリスト
+    """
+
+    def __init__(self, delay: float = 0.0, capacity: int = 2, retry_after: float = 0.2,
+                 omit: Optional[Set[str]] = None):
+        super().__init__(delay=delay, retry_after=retry_after)
+        self.capacity = capacity
+        self.omit = omit or set()
+        self.throttled = 0
+        self.arrivals: Dict[str, List[float]] = {}
+        self.rejections: Dict[str, List[float]] = {}
+
+    @property
+    def url(self) -> str:
+        """OpenAI互換APIのベースURL"""
+        return self._url + "/v1"
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request_line = (await reader.readline()).decode('latin-1').split()
+            headers = {}
+            while True:
+                line = (await reader.readline()).decode('latin-1')
+                if line in ("\r\n", "\n", ""):
+                    break
+                key, _, value = line.partition(":")
+                headers[key.strip().lower()] = value.strip()
+            body = await reader.readexactly(int(headers.get("content-length", 0)))
+
+            if len(request_line) < 2 or request_line[1] != "/v1/chat/completions":
+                self._respond(writer, 404, {"error": "Not Found"})
+                await writer.drain()
+                return
+
+            payload = json.loads(body.decode('utf-8'))
+            content = payload["messages"][-1]["content"]
+            items = re.findall(r"^(\d+)\. (.*)$", content, re.MULTILINE)
+            if items:
+                text = content
+                answer = json.dumps({"labels": [
+                    {"id": int(number), "label": f"ラベル:{item}"}
+                    for number, item in items if item not in self.omit
+                ]}, ensure_ascii=False)
+            else:
+                text = content.split("\n")[0].replace("プロンプト: ", "")
+                answer = f"ラベル:{text}\n"
+            now = time.monotonic()
+            self.arrivals.setdefault(text, []).append(now)
+
+            if self.active >= self.capacity:
+                self.throttled += 1
+                self.rejections.setdefault(text, []).append(now)
+                self._respond(writer, 429, {"error": "rate limited"}, {"Retry-After": str(self.retry_after)})
+                await writer.drain()
+                return
+
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+            try:
+                await asyncio.sleep(self.delay)
+            finally:
+                self.active -= 1
+
+            self.requests.append(payload)
+            self._respond(writer, 200, {
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": answer}}],
+            })
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+async def _serve_forever(port: int, delay: float, capacity: int):
+    server = StubLLMServer(delay=delay, capacity=capacity)
+    await server.start(port=port)
+    print(f"Stub LLM server: {server.url}")
+    await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="LLMスタブサーバー")
+    parser.add_argument("--port", type=int, default=1234)
+    parser.add_argument("--delay", type=float, default=0.0)
+    parser.add_argument("--capacity", type=int, default=2)
+    args = parser.parse_args()
+    try:
+        asyncio.run(_serve_forever(args.port, args.delay, args.capacity))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,139 @@
+"""WebUIスタブサーバー（テスト用）
+
+Stable Diffusion WebUIの `/sdapi/v1/txt2img` を模したローカルHTTPサーバー。
+応答遅延・失敗の注入、リクエストの記録ができます。
+
+単体起動:
+    python tests/stub_webui_server.py --port 7860 --delay 0.5
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+from typing import List, Optional
+
+# 1x1 PNG（透明）
+STUB_PNG = base64.b64encode(bytes.fromhex(
+    "89504e470d0a1a0a0000000d4948445200000001000000010806000000"
+    "1f15c4890000000d49444154789c6360000002000154a24f5d0000000049454e44ae426082"
+)).decode('ascii')
+
+
+class StubWebUIServer:
+    """WebUIスタブサーバー
+
+    Attributes:
+        delay: 応答までの遅延（秒）
+        fail_first: 最初のN件を失敗させる
+        fail_status: 失敗時のHTTPステータス
+        retry_after: 失敗時に返すRetry-Afterヘッダー（秒）
+        requests: 受信したペイロードのリスト
+        max_active: 同時処理数の最大値
+    """
+
+    def __init__(self, delay: float = 0.0, fail_first: int = 0,
+                 fail_status: int = 503, retry_after: Optional[float] = None):
+        self.delay = delay
+        self.fail_first = fail_first
+        self.fail_status = fail_status
+        self.retry_after = retry_after
+        self.requests: List[dict] = []
+        self.active = 0
+        self.max_active = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._url = ""
+        self._received = 0
+
+    @property
+    def url(self) -> str:
+        """ベースURL（停止後も起動時の値を返す）"""
+        return self._url
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0):
+        """サーバーを起動（port=0の場合は空きポート）"""
+        self._server = await asyncio.start_server(self._handle, host, port)
+        bound_host, bound_port = self._server.sockets[0].getsockname()[:2]
+        self._url = f"http://{bound_host}:{bound_port}"
+
+    async def stop(self):
+        """サーバーを停止"""
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def __aenter__(self) -> 'StubWebUIServer':
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.stop()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request_line = (await reader.readline()).decode('latin-1').split()
+            headers = {}
+            while True:
+                line = (await reader.readline()).decode('latin-1')
+                if line in ("\r\n", "\n", ""):
+                    break
+                key, _, value = line.partition(":")
+                headers[key.strip().lower()] = value.strip()
+            body = await reader.readexactly(int(headers.get("content-length", 0)))
+
+            self._received += 1
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+            try:
+                await asyncio.sleep(self.delay)
+            finally:
+                self.active -= 1
+
+            if len(request_line) < 2 or request_line[1] != "/sdapi/v1/txt2img":
+                self._respond(writer, 404, {"detail": "Not Found"})
+            elif self._received <= self.fail_first:
+                extra = {"Retry-After": str(self.retry_after)} if self.retry_after is not None else {}
+                self._respond(writer, self.fail_status, {"detail": "stub failure"}, extra)
+            else:
+                payload = json.loads(body.decode('utf-8'))
+                self.requests.append(payload)
+                self._respond(writer, 200, {
+                    "images": [STUB_PNG] * payload.get("batch_size", 1),
+                    "parameters": payload,
+                    "info": json.dumps({"prompt": payload.get("prompt", "")}),
+                })
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    def _respond(writer: asyncio.StreamWriter, status: int, data: dict, extra_headers=None):
+        body = json.dumps(data).encode('utf-8')
+        headers = [
+            f"HTTP/1.1 {status} STUB",
+            "Content-Type: application/json",
+            f"Content-Length: {len(body)}",
+            "Connection: close",
+        ]
+        for key, value in (extra_headers or {}).items():
+            headers.append(f"{key}: {value}")
+        writer.write(("\r\n".join(headers) + "\r\n\r\n").encode('latin-1') + body)
+
+
+async def _serve_forever(port: int, delay: float):
+    server = StubWebUIServer(delay=delay)
+    await server.start(port=port)
+    print(f"Stub WebUI server: {server.url}")
+    await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="WebUIスタブサーバー")
+    parser.add_argument("--port", type=int, default=7860)
+    parser.add_argument("--delay", type=float, default=0.0)
+    args = parser.parse_args()
+    try:
+        asyncio.run(_serve_forever(args.port, args.delay))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,371 @@
+"""ファイル同期のテスト
+
+Qtを使わずに、同期ジョブの実行・進捗・キャンセルを確認します。
+"""
+
+import os
+import shutil
+import sys
+import threading
+from pathlib import Path
+
+# srcディレクトリをパスに追加
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from config.settings import Settings
+from core.file_sync_manager import FileSyncManager
+from core.label_preserver import LabelPreserver
+from core.library_manager import LibraryManager
+from core.sync_job import SyncJob, SyncCancelledError
+from models import Prompt
+
+
+def create_test_env() -> Settings:
+    """テスト用の元ディレクトリ・ローカルディレクトリ・設定を作成"""
+    root = Path(__file__).parent / "test_sync_env"
+    if root.exists():
+        shutil.rmtree(root)
+    (root / "source" / "posing").mkdir(parents=True)
+    (root / "local").mkdir()
+    (root / "data").mkdir()
+
+    (root / "source" / "posing" / "arm.txt").write_text("arms up\narms behind back\n", encoding="utf-8")
+    (root / "source" / "hair.txt").write_text("long hair\n", encoding="utf-8")
+    (root / "local" / "old.txt").write_text("deleted\n", encoding="utf-8")
+
+    settings = Settings(root / "settings.json")
+    settings.source_wildcard_dir = str(root / "source")
+    settings.local_wildcard_dir = str(root / "local")
+    settings.data_dir = str(root / "data")
+    return settings
+
+
+def cleanup_test_env():
+    """テスト用ディレクトリを削除"""
+    shutil.rmtree(Path(__file__).parent / "test_sync_env", ignore_errors=True)
+
+
+def test_sync_job_headless():
+    """同期ジョブをワーカースレッドで実行するテスト"""
+    print("=== SyncJob Test ===")
+
+    try:
+        settings = create_test_env()
+        job = SyncJob(FileSyncManager(settings), preserve_user_labels=False)
+        job.start()
+
+        assert job.wait(10)
+        assert job.error is None and not job.cancelled
+        assert job.result == (3, None)
+        assert "ファイルを同期中..." in job.get_progress_messages()
+
+        local_dir = settings.get_local_dir()
+        assert (local_dir / "posing" / "arm.txt").exists()
+        assert not (local_dir / "old.txt").exists()
+        assert not FileSyncManager(settings).has_updates()
+
+        print("[OK] 同期ジョブテスト成功\n")
+    finally:
+        cleanup_test_env()
+
+
+def test_sync_job_cancel():
+    """キャンセル時にコピーを中断するテスト"""
+    print("=== SyncJob Cancel Test ===")
+
+    try:
+        settings = create_test_env()
+        job = SyncJob(FileSyncManager(settings), preserve_user_labels=False)
+        job.cancel()
+        job.run()
+
+        assert job.cancelled and job.result is None
+        assert FileSyncManager(settings).has_updates()
+
+        print("[OK] キャンセルテスト成功\n")
+    finally:
+        cleanup_test_env()
+
+
+def test_cancelled_sync_is_resumed():
+    """途中でキャンセルした同期のファイルが次回の同期でライブラリに反映されるテスト"""
+    print("=== Cancelled Sync Resume Test ===")
+
+    try:
+        settings = create_test_env()
+        FileSyncManager(settings).sync_files(preserve_user_labels=False)
+        manager = LibraryManager(settings)
+        manager.scan_and_build_library()
+        manager.save_to_csv()
+
+        source_dir = settings.get_source_dir()
+        (source_dir / "a.txt").write_text("smile\n", encoding="utf-8")
+        (source_dir / "b.txt").write_text("crying\n", encoding="utf-8")
+
+        # 最初のファイルをコピーした時点でキャンセル
+        cancel_event = threading.Event()
+
+        def on_progress(message):
+            if message.startswith("ファイルを同期中... 1/"):
+                cancel_event.set()
+
+        try:
+            FileSyncManager(settings).sync_files(progress_callback=on_progress, cancel_event=cancel_event)
+            assert False, "SyncCancelledError が送出されていません"
+        except SyncCancelledError:
+            pass
+
+        # コピー済みのファイルも含めて再検出される
+        updates = FileSyncManager(settings).check_updates()
+        assert sorted(f.name for f in updates["added"] + updates["modified"]) == ["a.txt", "b.txt"]
+
+        FileSyncManager(settings).sync_files()
+        prompts = {p.prompt for p in LibraryManager(settings).load_from_csv()}
+        assert {"smile", "crying", "long hair"} <= prompts
+        assert not FileSyncManager(settings).has_updates()
+
+        print("[OK] キャンセル後の同期テスト成功\n")
+    finally:
+        cleanup_test_env()
+
+
+def test_incremental_label_preservation():
+    """変更されたファイルのみ再パースしてラベルを保持するテスト"""
+    print("=== Incremental Sync Test ===")
+
+    try:
+        settings = create_test_env()
+        source_dir = settings.get_source_dir()
+        (source_dir / "legs.txt").write_text("crossed legs\n", encoding="utf-8")
+        FileSyncManager(settings).sync_files(preserve_user_labels=False)
+
+        # ライブラリを構築してユーザーラベルを設定
+        manager = LibraryManager(settings)
+        prompts = manager.scan_and_build_library()
+        for prompt in prompts:
+            if prompt.prompt in ("arms behind back", "crossed legs"):
+                prompt.label_ja = f"ラベル:{prompt.prompt}"
+                prompt.label_source = "manual"
+        manager.save_to_csv()
+
+        # 1ファイルを更新し、1ファイルを削除
+        arm_file = source_dir / "posing" / "arm.txt"
+        arm_file.write_text("arms up\narms behind backs\nw arms\n", encoding="utf-8")
+        future = arm_file.stat().st_mtime + 10
+        os.utime(arm_file, (future, future))
+        (source_dir / "hair.txt").unlink()
+
+        sync_count, label_stats = FileSyncManager(settings).sync_files()
+
+        assert sync_count == 2
+        # 統計は変更されたファイルのみが対象
+        assert label_stats["total_new"] == 3 and label_stats["lost"] == 0
+
+        labels = {p.prompt: p.label_ja for p in LibraryManager(settings).load_from_csv()}
+        assert labels["arms behind backs"] == "ラベル:arms behind back"
+        assert labels["crossed legs"] == "ラベル:crossed legs"
+        assert "long hair" not in labels and "w arms" in labels
+
+        print("[OK] 差分同期テスト成功\n")
+    finally:
+        cleanup_test_env()
+
+
+def test_manifest_detects_content_changes_only():
+    """更新日時のみ変わったファイルを更新として検出しないテスト"""
+    print("=== Sync Manifest Test ===")
+
+    try:
+        settings = create_test_env()
+        FileSyncManager(settings).sync_files(preserve_user_labels=False)
+
+        source_dir = settings.get_source_dir()
+        touched = source_dir / "hair.txt"
+        changed = source_dir / "posing" / "arm.txt"
+        future = touched.stat().st_mtime + 10
+        os.utime(touched, (future, future))
+        changed.write_text("arms up\narms crossed\n", encoding="utf-8")
+        os.utime(changed, (future, future))
+
+        sync_manager = FileSyncManager(settings)
+        updates = sync_manager.check_updates()
+        assert updates["modified"] == [changed] and not updates["added"] and not updates["deleted"]
+        # スナップショットを再利用
+        assert sync_manager.get_updates() is updates
+        assert sync_manager.get_update_summary() == "更新: 1ファイル"
+
+        sync_manager.sync_files(updates, preserve_user_labels=False)
+        assert not FileSyncManager(settings).has_updates()
+
+        # マニフェストがない場合もローカルファイルとの内容比較で判定
+        (settings.get_data_dir() / FileSyncManager.MANIFEST_FILENAME).unlink()
+        os.utime(touched, (future + 10, future + 10))
+        assert not FileSyncManager(settings).has_updates()
+
+        print("[OK] マニフェストテスト成功\n")
+    finally:
+        cleanup_test_env()
+
+
+def test_copy_file_atomic():
+    """アトミックコピーと並列コピーのテスト"""
+    print("=== Atomic Copy Test ===")
+
+    from utils.file_utils import copy_file_atomic, copy_files_parallel
+
+    root = Path(__file__).parent / "test_sync_env"
+    try:
+        (root / "src").mkdir(parents=True)
+        sources = []
+        for i in range(20):
+            path = root / "src" / f"file{i}.txt"
+            path.write_bytes(os.urandom(1000 + i * 100))
+            sources.append(path)
+
+        dest = root / "dst" / "single.txt"
+        assert copy_file_atomic(sources[0], dest) == 1000
+        assert dest.read_bytes() == sources[0].read_bytes()
+        assert dest.stat().st_mtime_ns == sources[0].stat().st_mtime_ns
+
+        # copy_file_range が何もコピーせずに0を返すファイルシステムでも、内容をコピーする
+        from unittest import mock
+        with mock.patch("utils.file_utils._try_reflink", return_value=False), \
+                mock.patch("os.copy_file_range", return_value=0, create=True):
+            assert copy_file_atomic(sources[1], dest) == 1100
+        assert dest.read_bytes() == sources[1].read_bytes()
+
+        pairs = [(path, root / "dst" / "sub" / path.name) for path in sources]
+        progress = list(copy_files_parallel(pairs, max_workers=4))
+
+        total = sum(path.stat().st_size for path in sources)
+        assert [p[2] for p in progress] == sorted(p[2] for p in progress)
+        assert progress[-1][2] == progress[-1][3] == total
+        assert all(dst.read_bytes() == src.read_bytes() for src, dst in pairs)
+        # 一時ファイルが残っていないこと
+        assert not list((root / "dst").rglob("*.tmp"))
+
+        print("[OK] アトミックコピーテスト成功\n")
+    finally:
+        cleanup_test_env()
+
+
+def test_source_watcher_polling():
+    """ポーリング監視で変更をまとめて差分情報に反映するテスト"""
+    print("=== SourceWatcher Test ===")
+
+    from core.source_watcher import SourceWatcher, PollingBackend
+
+    try:
+        settings = create_test_env()
+        FileSyncManager(settings).sync_files(preserve_user_labels=False)
+        source_dir = settings.get_source_dir()
+
+        sync_manager = FileSyncManager(settings)
+        notifications = []
+        notified = threading.Event()
+
+        def on_updates(updates):
+            notifications.append(updates)
+            notified.set()
+
+        watcher = SourceWatcher(
+            sync_manager, on_updates,
+            backend=PollingBackend(interval=0.05, full_scan_every=1), coalesce_delay=0.3
+        )
+        watcher.start()
+        try:
+            # 起動時の全体チェック
+            assert notified.wait(5)
+            assert not any(notifications[-1].values())
+
+            # 連続した変更は1回の通知にまとめる
+            notified.clear()
+            (source_dir / "hair.txt").write_text("short hair\n", encoding="utf-8")
+            (source_dir / "posing" / "new.txt").write_text("kneeling\n", encoding="utf-8")
+            assert notified.wait(5)
+            updates = notifications[-1]
+            assert updates["modified"] == [source_dir / "hair.txt"]
+            assert updates["added"] == [source_dir / "posing" / "new.txt"]
+            assert len(notifications) == 2
+        finally:
+            watcher.stop()
+
+        # 変更されたパスのみの再判定（ディレクトリ削除は配下のファイルに展開）
+        shutil.rmtree(source_dir / "posing")
+        updates = sync_manager.apply_changes([source_dir / "posing"])
+        assert updates["deleted"] == [settings.get_local_dir() / "posing" / "arm.txt"]
+        assert updates["added"] == [] and updates["modified"] == [source_dir / "hair.txt"]
+
+        print("[OK] ファイル監視テスト成功\n")
+    finally:
+        cleanup_test_env()
+
+
+def test_polling_backend_prune():
+    """更新日時が変わっていないディレクトリの走査を省略するテスト"""
+    print("=== PollingBackend Prune Test ===")
+
+    from core.source_watcher import PollingBackend
+
+    try:
+        settings = create_test_env()
+        source_dir = settings.get_source_dir()
+        backend = PollingBackend(full_scan_every=3)
+        assert backend.poll(source_dir) == set()
+
+        # 追加はディレクトリの更新日時に反映されるため次のポーリングで検出
+        (source_dir / "posing" / "new.txt").write_text("kneeling\n", encoding="utf-8")
+        assert backend.poll(source_dir) == {source_dir / "posing" / "new.txt"}
+
+        # 直接の上書きは全ファイルを走査するポーリングで検出
+        arm = source_dir / "posing" / "arm.txt"
+        arm.write_text("arms crossed\n", encoding="utf-8")
+        stat_result = arm.stat()
+        os.utime(arm, ns=(stat_result.st_atime_ns, stat_result.st_mtime_ns + 10 ** 9))
+        assert backend.poll(source_dir) == set()
+        assert backend.poll(source_dir) == {arm}
+
+        print("[OK] ポーリング走査省略テスト成功\n")
+    finally:
+        cleanup_test_env()
+
+
+def test_label_preserver_cancel():
+    """ラベル保持のキャンセルテスト"""
+    print("=== LabelPreserver Cancel Test ===")
+
+    prompts = [
+        Prompt(id=f"p{i}", source_file="a.txt", original_line_number=i, original_number=None,
+               label_ja="", label_en="", prompt=f"prompt {i}", category="a",
+               label_source="manual")
+        for i in range(10)
+    ]
+    cancel_event = threading.Event()
+    cancel_event.set()
+
+    try:
+        LabelPreserver().preserve_labels(prompts, prompts, cancel_event=cancel_event)
+        assert False, "SyncCancelledError が送出されていません"
+    except SyncCancelledError:
+        pass
+
+    print("[OK] ラベル保持キャンセルテスト成功\n")
+
+
+if __name__ == "__main__":
+    try:
+        test_sync_job_headless()
+        test_sync_job_cancel()
+        test_cancelled_sync_is_resumed()
+        test_incremental_label_preservation()
+        test_manifest_detects_content_changes_only()
+        test_copy_file_atomic()
+        test_source_watcher_polling()
+        test_polling_backend_prune()
+        test_label_preserver_cancel()
+        sys.exit(0)
+    except Exception as e:
+        print(f"\n[ERROR] Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,120 @@
+"""画像生成ディスパッチャーのテスト
+
+ローカルのWebUIスタブサーバーに対して、振り分け・同時実行数・再試行を確認します。
+"""
+
+import asyncio
+import shutil
+import sys
+from pathlib import Path
+
+# srcディレクトリをパスに追加
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from models import Project, Scene, Block, BlockType
+from core.prompt_builder import PromptBuilder
+from core.generation_dispatcher import (
+    GenerationDispatcher, WebUIEndpoint, create_jobs_from_project, create_jobs_from_prompts
+)
+from stub_webui_server import StubWebUIServer
+
+
+def test_dispatch_across_endpoints():
+    """複数エンドポイントへの振り分けと同時実行数制限のテスト"""
+    print("=== Dispatch Test ===")
+
+    project = Project.create_new("生成テスト")
+    for i in range(1, 13):
+        project.add_scene(Scene(scene_id=i, scene_name=f"シーン{i}", blocks=[
+            Block(block_id=1, type=BlockType.FIXED_TEXT, content=f"prompt {i}"),
+        ]))
+    jobs = create_jobs_from_project(project, PromptBuilder(), payload_defaults={"steps": 4})
+
+    async def run():
+        async with StubWebUIServer(delay=0.05) as fast, StubWebUIServer(delay=0.05) as slow:
+            dispatcher = GenerationDispatcher([
+                WebUIEndpoint(fast.url, max_concurrent=2, name="fast"),
+                WebUIEndpoint(slow.url, max_concurrent=1, name="slow"),
+            ])
+            streamed = []
+            results = await dispatcher.dispatch(jobs, result_callback=streamed.append)
+            return fast, slow, results, streamed
+
+    fast, slow, results, streamed = asyncio.run(run())
+
+    assert all(r.success for r in results)
+    assert [r.scene_id for r in results] == list(range(1, 13))
+    assert len(streamed) == 12
+    assert len(fast.requests) + len(slow.requests) == 12
+    assert fast.max_active <= 2 and slow.max_active <= 1
+    # 同時実行数の多いエンドポイントがより多く処理する
+    assert len(fast.requests) > len(slow.requests)
+    assert results[0].images and fast.requests[0]["steps"] == 4
+
+    print("[OK] 振り分けテスト成功\n")
+
+
+def test_retry_with_backoff():
+    """失敗時の再試行（Retry-After対応）と画像保存のテスト"""
+    print("=== Retry Test ===")
+
+    output_dir = Path(__file__).parent / "test_generation_output"
+    if output_dir.exists():
+        shutil.rmtree(output_dir)
+
+    async def run():
+        async with StubWebUIServer(fail_first=2, retry_after=0.01) as server:
+            dispatcher = GenerationDispatcher([WebUIEndpoint(server.url)], max_retries=3)
+            return await dispatcher.dispatch(
+                create_jobs_from_prompts(["a", "b"]), output_dir=output_dir
+            )
+
+    try:
+        results = asyncio.run(run())
+
+        assert all(r.success for r in results)
+        assert sum(r.attempts for r in results) == 4
+        assert all(Path(p).exists() for r in results for p in r.image_paths)
+        print("[OK] 再試行テスト成功\n")
+    finally:
+        if output_dir.exists():
+            shutil.rmtree(output_dir)
+
+
+def test_non_retryable_failure():
+    """再試行しないエラーと接続不可エンドポイントのテスト"""
+    print("=== Failure Test ===")
+
+    async def run():
+        async with StubWebUIServer(fail_first=10, fail_status=422) as server:
+            dispatcher = GenerationDispatcher([WebUIEndpoint(server.url)], max_retries=3)
+            failed = await dispatcher.dispatch(create_jobs_from_prompts(["a"]))
+
+        # 停止済みサーバーへの接続は再試行の後に失敗
+        dispatcher = GenerationDispatcher(
+            [WebUIEndpoint(server.url)], max_retries=1, backoff_base=0.01
+        )
+        unreachable = await dispatcher.dispatch(create_jobs_from_prompts(["b"]))
+        return failed, unreachable
+
+    failed, unreachable = asyncio.run(run())
+
+    assert not failed[0].success and failed[0].attempts == 1
+    assert "422" in failed[0].error
+    assert not unreachable[0].success and unreachable[0].attempts == 2
+
+    print("[OK] 失敗テスト成功\n")
+
+
+if __name__ == "__main__":
+    try:
+        test_dispatch_across_endpoints()
+        test_retry_with_backoff()
+        test_non_retryable_failure()
+        sys.exit(0)
+    except Exception as e:
+        print(f"\n[ERROR] Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
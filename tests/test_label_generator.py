@@ -0,0 +1,573 @@
+"""ラベル自動生成のテスト
+
+SDKクライアントの再利用とAPIキーのキャッシュ、並列処理のレート制御を確認します。
+SDK（anthropic）はテスト用の偽モジュールに差し替え、LM StudioはローカルのLLMスタブサーバーを使用します。
+"""
+
+import asyncio
+import shutil
+import sys
+import threading
+import time
+import types
+from pathlib import Path
+from unittest import mock
+
+# srcディレクトリをパスに追加
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from ai.api_key_manager import APIKeyManager
+from ai.cost_estimator import CostEstimator
+from ai.label_cache import LabelCache
+from ai.label_job import LabelJobJournal
+from ai.label_suggester import LabelSuggester
+from ai.label_generator import LabelGenerator, _parse_packed_labels
+from ai.tag_dictionary import TagDictionary
+from models import Prompt
+from stub_llm_server import StubLLMServer
+
+
+class FakeAnthropic:
+    """anthropic.Anthropic の代わり（作成回数を記録）"""
+
+    instances = []
+
+    def __init__(self, api_key):
+        self.api_key = api_key
+        self.closed = False
+        self.messages = types.SimpleNamespace(create=self._create)
+        type(self).instances.append(self)
+
+    def _create(self, **kwargs):
+        text = kwargs["messages"][0]["content"].split("\n")[0].replace("プロンプト: ", "")
+        return types.SimpleNamespace(content=[types.SimpleNamespace(text=f"ラベル:{text}")])
+
+    def close(self):
+        self.closed = True
+
+
+class FakeAsyncAnthropic(FakeAnthropic):
+    """anthropic.AsyncAnthropic の代わり"""
+
+    instances = []
+
+    def __init__(self, api_key, max_retries=2):
+        super().__init__(api_key)
+
+    async def _create(self, **kwargs):
+        return super()._create(**kwargs)
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeBatches:
+    """anthropic.Anthropic().messages.batches の代わり"""
+
+    def __init__(self, polls_until_end=None):
+        self.created = []
+        self.fail_retrieve = False
+        self.polls_until_end = polls_until_end or {}
+
+    def create(self, requests):
+        self.created.append(requests)
+        return types.SimpleNamespace(id=f"batch_{len(self.created)}")
+
+    def retrieve(self, batch_id):
+        if self.fail_retrieve:
+            raise ConnectionError("network down")
+        remaining = self.polls_until_end.get(batch_id, 0)
+        self.polls_until_end[batch_id] = remaining - 1
+        return types.SimpleNamespace(
+            processing_status="ended" if remaining <= 0 else "in_progress",
+            request_counts=types.SimpleNamespace(succeeded=0, errored=0)
+        )
+
+    def results(self, batch_id):
+        requests = self.created[int(batch_id.split("_")[1]) - 1]
+        for request in requests:
+            text = request["params"]["messages"][0]["content"].split("\n")[0].replace("プロンプト: ", "")
+            message = types.SimpleNamespace(content=[types.SimpleNamespace(text=f"バッチ:{text}")])
+            yield types.SimpleNamespace(
+                custom_id=request["custom_id"],
+                result=types.SimpleNamespace(type="succeeded", message=message)
+            )
+
+
+class SimulatedCrash(BaseException):
+    """アプリの異常終了を模した例外"""
+
+
+def create_prompt(index: int, text: str = None) -> Prompt:
+    """テスト用プロンプトを作成"""
+    return Prompt(
+        id=f"p{index}", source_file="a.txt", original_line_number=index, original_number=None,
+        label_ja="", label_en="", prompt=text or f"prompt {index}", category="a"
+    )
+
+
+def test_clients_and_keys_are_reused():
+    """同期・並列処理でSDKクライアントとAPIキーを再利用するテスト"""
+    print("=== Client Pool Test ===")
+
+    data_dir = Path(__file__).parent / "test_label_env"
+    try:
+        key_manager = APIKeyManager(data_dir)
+        key_manager.save_api_key("claude", "sk-test")
+
+        FakeAnthropic.instances = []
+        FakeAsyncAnthropic.instances = []
+        fake_module = types.SimpleNamespace(Anthropic=FakeAnthropic, AsyncAnthropic=FakeAsyncAnthropic)
+        with mock.patch.dict(sys.modules, {"anthropic": fake_module}), \
+                mock.patch.object(Path, "read_text", autospec=True, side_effect=Path.read_text) as read_text:
+            generator = LabelGenerator(key_manager, use_claude=True)
+            prompts = [create_prompt(i) for i in range(60)]
+            assert generator.generate_labels_batch(prompts[:20], mode="sync")[:2] == (20, 0)
+            assert generator.generate_labels_batch(prompts[20:], mode="async")[:2] == (40, 0)
+            generator.close()
+
+            # キーファイルは最初の1回のみ読み込み、クライアントは1つだけ作成
+            assert read_text.call_count <= 1
+        # 同期クライアントは1つ、非同期クライアントは並列処理ごとに1つ作成して閉じる
+        assert len(FakeAnthropic.instances) == 1 and FakeAnthropic.instances[0].closed
+        assert len(FakeAsyncAnthropic.instances) == 1 and FakeAsyncAnthropic.instances[0].closed
+        assert prompts[59].label_ja == "ラベル:prompt 59"
+
+        # 保存・削除でキャッシュを破棄
+        key_manager.save_api_key("claude", "sk-new")
+        assert key_manager.get_api_key("claude") == "sk-new"
+        key_manager.delete_api_key("claude")
+        assert key_manager.get_api_key("claude") is None and not key_manager.has_api_key("claude")
+
+        print("[OK] クライアント再利用テスト成功\n")
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+def test_async_adapts_to_rate_limits():
+    """並列処理が429（Retry-After）に応じて同時実行数を減らすテスト"""
+    print("=== Adaptive Concurrency Test ===")
+
+    prompts = [create_prompt(i) for i in range(60)]
+
+    async def run():
+        async with StubLLMServer(delay=0.02, capacity=3, retry_after=0.2) as server:
+            settings = types.SimpleNamespace(
+                lm_studio_endpoint=server.url, lm_studio_model="stub", lm_studio_max_concurrent=12
+            )
+            generator = LabelGenerator(use_claude=False, use_lm_studio=True, settings=settings)
+            generator.ASYNC_REQUESTS_PER_SECOND = 1000.0
+            result = await generator._async_generate_all(prompts)
+            return server, generator, result
+
+    server, generator, (success, failure, errors) = asyncio.run(run())
+
+    assert (success, failure) == (60, 0), errors
+    # 辞書ベースへのフォールバックなしで、すべてスタブサーバーのラベル
+    assert all(p.label_ja == f"ラベル:{p.prompt}" for p in prompts)
+    assert len(server.requests) == 60
+    assert server.throttled > 0
+
+    # レート制限を受けて同時実行数を下げる
+    limiter = generator.rate_limiters["LM Studio"]
+    assert limiter.throttled_count == server.throttled
+    assert limiter.concurrency < 12
+
+    # 429を受けたリクエストは Retry-After 以上待ってから再送
+    for text, rejected in server.rejections.items():
+        arrivals = server.arrivals[text]
+        for rejected_at in rejected:
+            retry_at = min(t for t in arrivals if t > rejected_at)
+            assert retry_at - rejected_at >= 0.19
+
+    print(f"  429: {server.throttled}回, 同時実行数: 12 → {limiter.concurrency}")
+    print("[OK] 同時実行数の自動調整テスト成功\n")
+
+
+def test_packed_requests():
+    """複数プロンプトを1リクエストにまとめ、失敗した項目のみ再送信するテスト"""
+    print("=== Packed Request Test ===")
+
+    prompts = [create_prompt(i) for i in range(60)]
+
+    async def run():
+        async with StubLLMServer(capacity=10, omit={"prompt 7", "prompt 42"}) as server:
+            settings = types.SimpleNamespace(
+                lm_studio_endpoint=server.url, lm_studio_model="stub", lm_studio_max_concurrent=4
+            )
+            generator = LabelGenerator(
+                use_claude=False, use_lm_studio=True, settings=settings, prompts_per_request=20
+            )
+            result = await generator._async_generate_all(prompts)
+            return server, result
+
+    server, (success, failure, errors) = asyncio.run(run())
+
+    assert (success, failure) == (60, 0), errors
+    assert all(p.label_ja == f"ラベル:{p.prompt}" for p in prompts)
+    # 20件ずつ3リクエスト + 応答に含まれなかった2件の個別再送信
+    assert len(server.requests) == 5
+
+    # 応答の検証（範囲外・重複した番号、空のラベル、JSON以外は除外）
+    assert _parse_packed_labels(
+        '```json\n{"labels": [{"id": 1, "label": "教室"}, {"id": 1, "label": "重複"}, '
+        '{"id": 2, "label": " "}, {"id": 9, "label": "範囲外"}, {"id": "3", "label": "文字列"}]}\n```', 3
+    ) == {1: "教室"}
+    assert _parse_packed_labels("教室", 1) == {}
+
+    # コスト見積もりはシステムプロンプトをリクエストごとに数える
+    estimator = CostEstimator()
+    single = estimator.estimate_label_generation_cost(prompts)[2]
+    packed = estimator.estimate_label_generation_cost(prompts, prompts_per_request=20)[2]
+    assert packed["request_count"] == 3 and packed["input_tokens"] < single["input_tokens"] / 5
+
+    print("[OK] まとめて送信テスト成功\n")
+
+
+def test_label_cache_and_dedup():
+    """ラベルキャッシュと同一テキストの重複排除のテスト"""
+    print("=== Label Cache Test ===")
+
+    data_dir = Path(__file__).parent / "test_label_cache_env"
+    texts = [f"prompt {i % 10}" for i in range(30)] + ["Prompt 3", "prompt   3 ", "PROMPT 4"]
+
+    async def run(prompts, cache):
+        async with StubLLMServer(capacity=10) as server:
+            settings = types.SimpleNamespace(
+                lm_studio_endpoint=server.url, lm_studio_model="stub", lm_studio_max_concurrent=4,
+                get_data_dir=lambda: data_dir
+            )
+            generator = LabelGenerator(
+                use_claude=False, use_lm_studio=True, settings=settings, label_cache=cache
+            )
+            result = await asyncio.get_running_loop().run_in_executor(
+                None, lambda: generator.generate_labels_batch(prompts, mode="async")
+            )
+            return server, result
+
+    try:
+        cache_path = data_dir / LabelCache.FILENAME
+        prompts = [create_prompt(i, text) for i, text in enumerate(texts)]
+        server, (success, failure, _) = asyncio.run(run(prompts, LabelCache(cache_path)))
+
+        # 重複を除いた10件のみ送信し、すべてのプロンプトに反映
+        assert (success, failure) == (33, 0)
+        assert len(server.requests) == 10
+        assert prompts[-3].label_ja == prompts[3].label_ja == "ラベル:prompt 3"
+        assert prompts[-1].label_ja == "ラベル:prompt 4" and prompts[-1].label_source == "ai_generated"
+
+        # 再読み込みしたキャッシュからはAPIに送信しない
+        cache = LabelCache(cache_path)
+        assert len(cache) == 10 and cache.get(" Prompt  7")["model"] == "stub"
+        prompts = [create_prompt(i, text) for i, text in enumerate(texts + ["prompt 99"])]
+        server, (success, failure, _) = asyncio.run(run(prompts, cache))
+        assert (success, failure) == (34, 0)
+        assert len(server.requests) == 1
+
+        # コスト見積もりはキャッシュ済み・重複を除外
+        prompts = [create_prompt(i, text) for i, text in enumerate(texts + ["prompt 100", "prompt 100"])]
+        details = CostEstimator().estimate_label_generation_cost(prompts, label_cache=cache)[2]
+        assert (details["count"], details["cached_count"], details["duplicate_count"]) == (1, 33, 1)
+
+        # すべてのAPIで失敗した場合の辞書ベースのラベルはAI生成として扱わない（キャッシュしない）
+        settings = types.SimpleNamespace(
+            lm_studio_model="stub", lm_studio_max_concurrent=4, get_data_dir=lambda: data_dir
+        )
+        generator = LabelGenerator(use_claude=False, use_lm_studio=True, settings=settings, label_cache=cache)
+        prompts = [create_prompt(0, "prompt 200")]
+        with mock.patch.object(generator, "_generate_with_lm_studio", return_value=None):
+            assert generator.generate_labels_batch(prompts, mode="sync")[:2] == (1, 0)
+        assert prompts[0].label_ja == "prompt 200" and prompts[0].label_source == "auto_extract"
+        assert cache.get("prompt 200") is None
+
+        print("[OK] ラベルキャッシュテスト成功\n")
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+def test_resume_interrupted_job():
+    """中断したラベル生成ジョブの再開テスト"""
+    print("=== Resume Test ===")
+
+    data_dir = Path(__file__).parent / "test_label_job_env"
+    try:
+        key_manager = APIKeyManager(data_dir)
+        key_manager.save_api_key("claude", "sk-test")
+        journal = LabelJobJournal(data_dir / LabelJobJournal.FILENAME)
+        fake_module = types.SimpleNamespace(Anthropic=FakeAnthropic, AsyncAnthropic=FakeAsyncAnthropic)
+
+        with mock.patch.dict(sys.modules, {"anthropic": fake_module}):
+            # 同期処理: 5件目で異常終了 → 記録済みの5件は再送信しない
+            prompts = [create_prompt(i) for i in range(12)]
+
+            def crash_after_five(prompt):
+                if prompt.id == "p4":
+                    raise SimulatedCrash()
+
+            generator = LabelGenerator(key_manager, use_claude=True)
+            try:
+                generator.generate_labels_batch(prompts, mode="sync", journal=journal, label_callback=crash_after_five)
+                assert False, "SimulatedCrash was not raised"
+            except SimulatedCrash:
+                pass
+            assert len(journal.load().labels) == 5
+
+            prompts = [create_prompt(i) for i in range(12)]
+            client = generator.client_pool.get_claude_client()
+            client.messages.create = mock.Mock(side_effect=client.messages.create)
+            saved = []
+            assert generator.generate_labels_batch(
+                prompts, mode="sync", journal=journal, label_callback=saved.append
+            )[:2] == (12, 0)
+            assert client.messages.create.call_count == 7
+            assert len(saved) == 12 and prompts[0].label_ja == "ラベル:prompt 0"
+            assert not journal.path.exists()
+
+            # Batch API: 送信後に通信エラー → 再実行時はバッチを再送信せずに結果を取得
+            batches = FakeBatches()
+            client.messages.batches = batches
+            batches.fail_retrieve = True
+            prompts = [create_prompt(i) for i in range(8)]
+            success, failure, _ = generator.generate_labels_batch(prompts, mode="batch", journal=journal)
+            assert (success, failure) == (0, 8)
+            assert list(journal.load().batches) == ["batch_1"]
+
+            batches.fail_retrieve = False
+            prompts = [create_prompt(i) for i in range(8)]
+            assert generator.generate_labels_batch(prompts, mode="batch", journal=journal)[:2] == (8, 0)
+            assert len(batches.created) == 1
+            assert prompts[7].label_ja == "バッチ:prompt 7"
+            assert not journal.path.exists()
+
+            # Batch API: 待機中にキャンセル → 待機を中断し、バッチは記録に残して次回再開
+            batches = FakeBatches({"batch_1": 1000})
+            client.messages.batches = batches
+            cancel_event = threading.Event()
+            prompts = [create_prompt(i) for i in range(8)]
+            started = time.monotonic()
+            success, failure, errors = generator.generate_labels_batch(
+                prompts, mode="batch", journal=journal,
+                progress_callback=lambda current, total, message: cancel_event.set(), cancel_event=cancel_event
+            )
+            assert time.monotonic() - started < generator.BATCH_POLL_INITIAL
+            assert (success, failure) == (0, 8) and "キャンセル" in errors[0]
+            assert list(journal.load().batches) == ["batch_1"]
+
+            # 辞書モードで実行しても、結果を取得していないバッチは記録に残す
+            generator.generate_labels_batch([create_prompt(50, "other prompt")], mode="dictionary", journal=journal)
+            assert list(journal.load().batches) == ["batch_1"]
+
+            # 同期で行がずれてプロンプトIDが変わっても、テキストで照合して正しいプロンプトに適用
+            batches.polls_until_end["batch_1"] = 0
+            prompts = [create_prompt(0, "inserted line")] + [create_prompt(i + 1, f"prompt {i}") for i in range(8)]
+            assert generator.generate_labels_batch(prompts, mode="batch", journal=journal)[:2] == (9, 0)
+            assert len(batches.created) == 2 and len(batches.created[1]) == 1
+            assert prompts[0].label_ja == "バッチ:inserted line"
+            assert prompts[1].label_ja == "バッチ:prompt 0"
+            assert not journal.path.exists()
+            generator.close()
+
+        print("[OK] 再開テスト成功\n")
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+def test_sharded_batch_api():
+    """Batch APIのバッチ分割と指数バックオフでのポーリングのテスト"""
+    print("=== Sharded Batch API Test ===")
+
+    data_dir = Path(__file__).parent / "test_label_batch_env"
+    try:
+        key_manager = APIKeyManager(data_dir)
+        key_manager.save_api_key("claude", "sk-test")
+        fake_module = types.SimpleNamespace(Anthropic=FakeAnthropic)
+
+        with mock.patch.dict(sys.modules, {"anthropic": fake_module}), \
+                mock.patch.object(LabelGenerator, "_sleep_between_polls", return_value=False) as sleep:
+            generator = LabelGenerator(key_manager, use_claude=True)
+            generator.BATCH_MAX_REQUESTS = 3
+            batches = FakeBatches({"batch_1": 3, "batch_2": 1, "batch_3": 0})
+            generator.client_pool.get_claude_client().messages.batches = batches
+
+            prompts = [create_prompt(i) for i in range(8)]
+            applied = []
+            success, failure, errors = generator.generate_labels_batch(
+                prompts, mode="batch", label_callback=lambda p: applied.append(p.id)
+            )
+            generator.close()
+
+        assert (success, failure) == (8, 0), errors
+        assert [len(requests) for requests in batches.created] == [3, 3, 2]
+        # 完了したバッチから順に結果を適用
+        assert applied == ["p6", "p7", "p3", "p4", "p5", "p0", "p1", "p2"]
+        assert prompts[4].label_ja == "バッチ:prompt 4"
+        # 待機間隔は倍増し、バッチが完了したら初期値に戻る
+        assert [c.args[0] for c in sleep.call_args_list] == [5.0, 5.0, 10.0]
+
+        print("[OK] バッチ分割テスト成功\n")
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+def test_offline_dictionary_labels():
+    """タグ辞書によるオフラインのラベル生成のテスト"""
+    print("=== Offline Dictionary Test ===")
+
+    # 長い一致を優先し、単語の途中・品質タグ（日本語が空）は無視する
+    dictionary = TagDictionary({
+        "school": "学校", "school uniform": "制服", "cat": "猫", "smile": "笑顔",
+        "classroom": "教室", "looking back": "振り返り", "masterpiece": "",
+    })
+    assert dictionary.generate_label("masterpiece, (School_Uniform:1.2), catgirl, smile") == "制服・笑顔"
+    assert dictionary.generate_label("school, cat, classroom, looking  back, smile") == "学校・猫・教室"
+    assert dictionary.generate_label("masterpiece, scat") is None
+
+    data_dir = Path(__file__).parent / "test_tag_dictionary_env"
+    try:
+        # ユーザー辞書は同梱の辞書に追加・上書きする
+        data_dir.mkdir(parents=True, exist_ok=True)
+        (data_dir / TagDictionary.USER_FILENAME).write_text(
+            "tag,label\n# コメント\nclassroom,放課後の教室\nfoo bar,フーバー\n", encoding="utf-8"
+        )
+        settings = types.SimpleNamespace(get_data_dir=lambda: data_dir)
+        generator = LabelGenerator(use_claude=False, settings=settings)
+
+        prompts = [
+            create_prompt(i, f"masterpiece, 1girl, foo_bar, classroom, smile, seed {i}") for i in range(100000)
+        ]
+        prompts.append(create_prompt(100000, "zzz qqq"))
+
+        start = time.perf_counter()
+        success, failure, _ = generator.generate_labels_batch(prompts, mode="sync")
+        elapsed = time.perf_counter() - start
+
+        # APIを使用しない場合はネットワークなしでタグ辞書のみ
+        assert (success, failure) == (100001, 0)
+        assert prompts[0].label_ja == "少女・フーバー・放課後の教室"
+        assert prompts[0].label_source == "auto_extract"
+        # 一致するタグがない場合はプロンプトの先頭部分
+        assert prompts[-1].label_ja == "zzz qqq"
+        assert elapsed < 30.0
+
+        print(f"  100,000件: {elapsed:.2f}秒")
+        print("[OK] オフライン辞書テスト成功\n")
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+def test_learned_label_suggestions():
+    """学習済みのラベル候補（確信度の低いプロンプトのみAPIに送信）のテスト"""
+    print("=== Label Suggestion Test ===")
+
+    def create_labeled(index: int, text: str, label: str, source: str = "manual") -> Prompt:
+        prompt = create_prompt(index, text)
+        prompt.label_ja = label
+        prompt.label_source = source
+        return prompt
+
+    library = [
+        create_labeled(i, f"1girl, (school uniform:1.2), classroom, seed {i}", "制服・教室") for i in range(20)
+    ] + [
+        create_labeled(100 + i, f"1girl, swimsuit, beach, seed {i}", "水着・ビーチ", "ai_generated") for i in range(20)
+    ] + [create_labeled(200, "1girl, kimono, shrine", "1girl, kimono, shrine", "auto_extract")]
+
+    data_dir = Path(__file__).parent / "test_label_suggester_env"
+    try:
+        # manual / ai_generated のみ学習し、変更がなければ学習し直さない
+        model_path = data_dir / LabelSuggester.FILENAME
+        suggester = LabelSuggester(model_path)
+        assert suggester.update(library) == 40 and len(suggester) == 40
+        assert suggester.update(library) == 0
+
+        suggestion = suggester.suggest("1girl, school_uniform, classroom, smile")
+        assert suggestion.label == "制服・教室" and suggestion.confidence >= suggester.threshold
+        assert suggester.suggest("1girl, kimono, shrine") is None
+
+        # ラベルの変更・削除は差分のみ反映し、全件から学習し直した場合と一致する
+        library[0].label_ja = "セーラー服"
+        del library[1]
+        assert suggester.update(library) == 2
+        fresh = LabelSuggester()
+        fresh.update(library)
+        assert (suggester._token_counts, suggester._cooccurrence) == (fresh._token_counts, fresh._cooccurrence)
+
+        suggester.save()
+        suggester = LabelSuggester(model_path)
+        assert suggester.suggest("swimsuit, beach").label == "水着・ビーチ"
+
+        # 確信度の高い候補はAPIに送信せず、生成したラベルは学習に加える
+        prompts = [
+            create_prompt(300, "1girl, swimsuit, beach, sunset"),
+            create_prompt(301, "1girl, school uniform, classroom"),
+            create_prompt(302, "1girl, kimono, shrine"),
+        ]
+        details = CostEstimator().estimate_label_generation_cost(prompts, label_suggester=suggester)[2]
+        assert (details["count"], details["suggested_count"]) == (1, 2)
+
+        async def run():
+            async with StubLLMServer(capacity=10) as server:
+                settings = types.SimpleNamespace(
+                    lm_studio_endpoint=server.url, lm_studio_model="stub", lm_studio_max_concurrent=4,
+                    get_data_dir=lambda: data_dir
+                )
+                generator = LabelGenerator(
+                    use_claude=False, use_lm_studio=True, settings=settings, label_suggester=suggester
+                )
+                result = await asyncio.get_running_loop().run_in_executor(
+                    None, lambda: generator.generate_labels_batch(prompts, mode="async")
+                )
+                return server, result
+
+        server, (success, failure, _) = asyncio.run(run())
+        assert (success, failure) == (3, 0)
+        assert len(server.requests) == 1
+        assert [p.label_source for p in prompts] == ["suggested", "suggested", "ai_generated"]
+        assert prompts[0].label_ja == "水着・ビーチ"
+        suggester = LabelSuggester(model_path)
+        assert len(suggester) == 40 and suggester.suggest("kimono, shrine", min_confidence=0.0) is not None
+
+        print("[OK] ラベル候補テスト成功\n")
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+def test_sparse_label_suggestions():
+    """学習例が少ないラベル候補は確信度が下がるテスト"""
+    print("=== Sparse Label Suggestion Test ===")
+
+    def create_labeled(index: int, text: str, label: str) -> Prompt:
+        prompt = create_prompt(index, text)
+        prompt.label_ja = label
+        prompt.label_source = "manual"
+        return prompt
+
+    suggester = LabelSuggester()
+    suggester.update([create_labeled(0, "red hair, smile", "赤髪笑顔")])
+    assert suggester.suggest("smile") is None
+    assert suggester.suggest("smile", min_confidence=0.0).confidence < suggester.threshold
+
+    # 同じ対応の学習例が増えれば採用される
+    suggester.update([create_labeled(i, f"red hair, smile, seed {i}", "赤髪笑顔") for i in range(5)])
+    assert suggester.suggest("smile").label == "赤髪笑顔"
+
+    print("[OK] 少数の学習例のラベル候補テスト成功\n")
+
+
+if __name__ == "__main__":
+    try:
+        test_clients_and_keys_are_reused()
+        test_async_adapts_to_rate_limits()
+        test_packed_requests()
+        test_label_cache_and_dedup()
+        test_resume_interrupted_job()
+        test_sharded_batch_api()
+        test_offline_dictionary_labels()
+        test_learned_label_suggestions()
+        test_sparse_label_suggestions()
+        sys.exit(0)
+    except Exception as e:
+        print(f"\n[ERROR] Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
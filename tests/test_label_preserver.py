@@ -0,0 +1,193 @@
+"""ユーザーラベル保持のテスト
+
+類似度照合の候補絞り込みが、全件照合と同一の結果になるかを確認します。
+"""
+
+import random
+import sys
+from difflib import SequenceMatcher
+from pathlib import Path
+
+# srcディレクトリをパスに追加
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from models import Prompt
+from core.label_preserver import LabelPreserver, SimilarityIndex
+
+WORDS = [
+    "1girl", "smile", "looking at viewer", "arms up", "sitting", "standing",
+    "from above", "from below", "blue hair", "long hair", "school uniform",
+    "outdoors", "night", "cherry blossoms", "holding cup", "BREAK", "(masterpiece:1.2)",
+]
+
+
+def create_prompt(text: str, index: int, source_file: str = "posing/arm.txt") -> Prompt:
+    """テスト用プロンプトを作成"""
+    return Prompt(
+        id=f"p{index}",
+        source_file=source_file,
+        original_line_number=index,
+        original_number=None,
+        label_ja=f"ラベル{index}",
+        label_en="",
+        prompt=text,
+        category="posing",
+        label_source="manual",
+    )
+
+
+def mutate(rng: random.Random, text: str) -> str:
+    """ランダムに少しだけ編集した文字列を返す"""
+    chars = list(text)
+    for _ in range(rng.randint(0, 4)):
+        op = rng.random()
+        pos = rng.randint(0, len(chars))
+        if op < 0.4 and chars:
+            del chars[min(pos, len(chars) - 1)]
+        elif op < 0.8:
+            chars.insert(pos, rng.choice("abcxyz, "))
+        elif chars:
+            chars[min(pos, len(chars) - 1)] = rng.choice("abcxyz")
+    return "".join(chars)
+
+
+def brute_force_match(text: str, prompts: list):
+    """全件照合（従来の実装）"""
+    for prompt in prompts:
+        if SequenceMatcher(None, text, prompt.prompt).ratio() >= LabelPreserver.SIMILARITY_THRESHOLD:
+            return prompt
+    return None
+
+
+def test_similarity_index_matches_brute_force():
+    """候補絞り込みの結果が全件照合と一致するかのテスト（小・大ファイル）"""
+    print("=== SimilarityIndex Test ===")
+
+    rng = random.Random(0)
+    for size in (30, SimilarityIndex.LARGE_INDEX_THRESHOLD + 50):
+        texts = [
+            ", ".join(rng.choice(WORDS) for _ in range(rng.randint(0, 8)))
+            for _ in range(size)
+        ]
+        old_prompts = [create_prompt(text, i) for i, text in enumerate(texts)]
+        index = SimilarityIndex(old_prompts, LabelPreserver.SIMILARITY_THRESHOLD)
+
+        queries = [mutate(rng, rng.choice(texts)) for _ in range(300)]
+        queries += ["", "x", "completely different prompt " * 5]
+
+        matched = 0
+        for query in queries:
+            expected = brute_force_match(query, old_prompts)
+            result = index.find_first(query)
+            assert (result[0] if result else None) is expected, query
+            matched += expected is not None
+
+        # 照合成功・失敗の両方を含むこと
+        assert 0 < matched < len(queries)
+
+    print("[OK] 候補絞り込みテスト成功\n")
+
+
+def test_preserve_labels():
+    """ラベル保持の統合テスト"""
+    print("=== preserve_labels Test ===")
+
+    old_prompts = [
+        create_prompt("1girl, arms up, smile, looking at viewer", 1),
+        create_prompt("1girl, sitting, from above, cherry blossoms", 2),
+        create_prompt("1girl, sitting, from above, cherry blossoms", 3, source_file="other.txt"),
+    ]
+    new_prompts = [
+        Prompt(id="n1", source_file="posing/arm.txt", original_line_number=1, original_number=None,
+               label_ja="", label_en="", prompt="1girl, arms up, smile, looking at viewer,",
+               category="posing"),
+        Prompt(id="n2", source_file="posing/arm.txt", original_line_number=2, original_number=None,
+               label_ja="", label_en="", prompt="1boy, standing, night",
+               category="posing"),
+    ]
+
+    result = LabelPreserver().preserve_labels(old_prompts, new_prompts)
+
+    assert result[0].id == "p1" and result[0].label_ja == "ラベル1"
+    assert result[1].id == "n2" and result[1].label_ja == ""
+
+    print("[OK] ラベル保持テスト成功\n")
+
+
+def test_exact_match_tier():
+    """正規化した内容の完全一致で、移動した行のラベルを引き継ぐテスト"""
+    print("=== Exact Match Test ===")
+
+    old_prompts = [
+        create_prompt("1girl, arms up", 1),
+        create_prompt("1girl,  Arms  Up", 2),
+        create_prompt("1girl, arms up", 3, source_file="other.txt"),
+    ]
+    # 行の順序が入れ替わり、空白と大文字小文字が変わった
+    new_prompts = [
+        Prompt(id="n1", source_file="other.txt", original_line_number=1, original_number=None,
+               label_ja="", label_en="", prompt="1GIRL,   arms up", category="posing"),
+        Prompt(id="n2", source_file="posing/arm.txt", original_line_number=2, original_number=None,
+               label_ja="", label_en="", prompt="1girl, arms  up ", category="posing"),
+    ]
+
+    result = LabelPreserver().preserve_labels(old_prompts, new_prompts)
+
+    assert result[0].id == "p3"
+    # 同じ正規化結果の場合は先に現れたものを優先
+    assert result[1].id == "p1"
+
+    print("[OK] 完全一致テスト成功\n")
+
+
+def test_parallel_preservation():
+    """ファイル単位の並列照合が逐次照合と同じ結果・統計になるかのテスト"""
+    print("=== Parallel Preservation Test ===")
+
+    rng = random.Random(1)
+
+    def build():
+        rng.seed(1)
+        old_prompts, new_prompts = [], []
+        for file_no in range(12):
+            source_file = f"file{file_no}.txt"
+            texts = [", ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 6))) for _ in range(20)]
+            for i, text in enumerate(texts):
+                old_prompts.append(create_prompt(text, len(old_prompts), source_file))
+                new_prompts.append(Prompt(
+                    id=f"n{len(new_prompts)}", source_file=source_file, original_line_number=i,
+                    original_number=None, label_ja="", label_en="",
+                    prompt=mutate(rng, text), category="a"
+                ))
+        return old_prompts, new_prompts
+
+    outcomes = []
+    for max_workers in (1, 2):
+        old_prompts, new_prompts = build()
+        preserver = LabelPreserver()
+        preserver.PARALLEL_MIN_PROMPTS = 1
+        preserver.preserve_labels(old_prompts, new_prompts, max_workers=max_workers)
+        stats = preserver.get_preservation_stats(old_prompts, new_prompts)
+
+        # 統合した統計が再集計と一致すること
+        assert stats == LabelPreserver().get_preservation_stats(old_prompts, new_prompts)
+        outcomes.append(([(p.id, p.label_ja) for p in new_prompts], stats))
+
+    assert outcomes[0] == outcomes[1]
+    assert 0 < outcomes[0][1]['preserved'] < len(outcomes[0][0])
+
+    print("[OK] 並列照合テスト成功\n")
+
+
+if __name__ == "__main__":
+    try:
+        test_similarity_index_matches_brute_force()
+        test_preserve_labels()
+        test_exact_match_tier()
+        test_parallel_preservation()
+        sys.exit(0)
+    except Exception as e:
+        print(f"\n[ERROR] Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,329 @@
+"""LoRAパーサーのテスト
+
+LoRAフォルダのスキャン結果（順序・メタデータ）を確認します。
+"""
+
+import json
+import os
+import shutil
+import struct
+import sys
+import threading
+from pathlib import Path
+
+# srcディレクトリをパスに追加
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from config.settings import Settings
+from core.lora_hash_cache import LoraHashCache, calculate_sha256
+from core.lora_library_manager import LoraLibraryManager
+from core.lora_parser import LoraParser
+from core.sync_job import SyncCancelledError
+
+
+def write_safetensors(path: Path, metadata: dict = None, data_size: int = 0):
+    """テスト用の.safetensorsファイルを作成（テンソルデータは疎ファイル）"""
+    header = {"w": {"dtype": "F32", "shape": [data_size // 4], "data_offsets": [0, data_size]}}
+    if metadata is not None:
+        header["__metadata__"] = metadata
+    header_bytes = json.dumps(header).encode("utf-8")
+    with path.open("wb") as f:
+        f.write(struct.pack("<Q", len(header_bytes)))
+        f.write(header_bytes)
+        f.truncate(8 + len(header_bytes) + data_size)
+
+
+def create_lora_env() -> Path:
+    """テスト用のLoRAディレクトリを作成"""
+    root = Path(__file__).parent / "test_lora_env"
+    if root.exists():
+        shutil.rmtree(root)
+
+    for i, sub in enumerate(["", "style", "style/old", "character", "character/a", ""]):
+        directory = root / sub
+        directory.mkdir(parents=True, exist_ok=True)
+        for j in range(3):
+            stem = f"lora{i}_{j}.v1" if j == 2 else f"lora{i}_{j}"
+            write_safetensors(directory / f"{stem}.safetensors", {"ss_output_name": f"{sub}/{stem}"})
+            if j == 0:
+                (directory / f"{stem}.civitai.info").write_text(json.dumps({
+                    "trainedWords": [f"trigger {i}"],
+                    "model": {"name": f"Model {i}", "tags": ["tag"]},
+                    "modelId": i,
+                }), encoding="utf-8")
+            if j != 1:
+                (directory / f"{stem}.json").write_text(json.dumps({
+                    "activation text": f"activation {i}",
+                    "preferred weight": 0.6,
+                }), encoding="utf-8")
+    (root / "readme.txt").write_text("not a lora", encoding="utf-8")
+    return root
+
+
+def cleanup_lora_env():
+    """テスト用ディレクトリを削除"""
+    shutil.rmtree(Path(__file__).parent / "test_lora_env", ignore_errors=True)
+
+
+def test_parallel_scan_matches_sequential():
+    """並列スキャンが逐次スキャン（rglob + 存在確認）と同じ結果・順序になるかのテスト"""
+    print("=== LoRA Parallel Scan Test ===")
+
+    try:
+        root = create_lora_env()
+
+        parser = LoraParser()
+        expected = [
+            (p.source_file, p.prompt, p.label_ja, p.lora_metadata)
+            for p in (parser.parse_lora_file(f, root) for f in root.rglob("*.safetensors"))
+        ]
+        assert len(expected) == 18
+
+        for max_workers in (1, 8):
+            progress = []
+            prompts = LoraParser().scan_directory(
+                root, lambda current, total, message: progress.append((current, total)),
+                max_workers=max_workers
+            )
+            assert [(p.source_file, p.prompt, p.label_ja, p.lora_metadata) for p in prompts] == expected
+            assert progress == [(i + 1, 18) for i in range(18)]
+
+        by_file = {p.source_file: p for p in prompts}
+        assert by_file["style/lora1_0.safetensors"].prompt == "<lora:lora1_0:0.6>, trigger 1"
+        assert by_file["style/lora1_2.v1.safetensors"].prompt == "<lora:lora1_2.v1:0.6>, activation 1"
+        assert by_file["style/lora1_1.safetensors"].prompt == "<lora:lora1_1:0.8>"
+
+        print("[OK] 並列スキャンテスト成功\n")
+    finally:
+        cleanup_lora_env()
+
+
+def test_safetensors_header_metadata():
+    """サイドカーがない場合にヘッダーの学習メタデータを使用するテスト"""
+    print("=== safetensors Header Test ===")
+
+    try:
+        root = create_lora_env()
+        tag_frequency = {
+            "10_mychar": {" mychar": 10, "1girl": 9, "smile": 3},
+            "5_mychar": {"mychar": 5, "smile": 8},
+        }
+        # 数GBのファイルでもヘッダーのみ読み込む
+        large_file = root / "large.safetensors"
+        write_safetensors(large_file, {
+            "ss_output_name": "mychar_v2",
+            "ss_base_model_version": "sdxl_base_v1-0",
+            "ss_tag_frequency": json.dumps(tag_frequency),
+        }, data_size=4 * 1024 ** 3)
+
+        metadata = LoraParser.read_safetensors_metadata(large_file)
+        assert metadata["ss_output_name"] == "mychar_v2"
+
+        prompt = LoraParser().parse_lora_file(large_file, root)
+        lora_metadata = json.loads(prompt.lora_metadata)
+        assert lora_metadata["trigger_candidates"] == ["mychar", "smile", "1girl"]
+        assert lora_metadata["base_model"] == "sdxl_base_v1-0"
+        # 候補は汎用タグの場合もあるため trigger_words には使用しない
+        assert not lora_metadata.get("trigger_words")
+        assert prompt.prompt == "<lora:large:0.8>"
+
+        # サイドカーの情報が優先される
+        prompt = LoraParser().parse_lora_file(root / "lora0_0.safetensors", root)
+        assert prompt.prompt == "<lora:lora0_0:0.6>, trigger 0"
+
+        # 不正なヘッダーは無視してサイドカーの情報のみ使用
+        broken = root / "broken.safetensors"
+        broken.write_bytes(struct.pack("<Q", 2 ** 40))
+        assert LoraParser().parse_lora_file(broken, root).prompt == "<lora:broken:0.8>"
+
+        print("[OK] ヘッダー読み込みテスト成功\n")
+    finally:
+        cleanup_lora_env()
+
+
+def test_hash_cache_and_duplicates():
+    """ハッシュの永続キャッシュと重複検出のテスト"""
+    print("=== LoRA Hash Cache Test ===")
+
+    import hashlib
+    from unittest import mock
+
+    try:
+        root = create_lora_env()
+        data = os.urandom(3 * 1024 * 1024 + 123)
+        (root / "style" / "lora1_0.safetensors").write_bytes(data)
+        (root / "character" / "renamed.safetensors").write_bytes(data)
+        assert calculate_sha256(root / "style" / "lora1_0.safetensors", chunk_size=1024 * 1024) == \
+            hashlib.sha256(data).hexdigest()
+
+        settings = Settings(root / "settings.json")
+        settings.lora_directory = str(root)
+        settings.data_dir = str(root / "data")
+
+        manager = LoraLibraryManager(settings)
+        prompts = manager.scan_and_build_library()
+        duplicates = manager.find_duplicates()
+        assert list(duplicates) == [hashlib.sha256(data).hexdigest()]
+        assert sorted(p.source_file for p in duplicates[hashlib.sha256(data).hexdigest()]) == [
+            "character/renamed.safetensors", "style/lora1_0.safetensors"
+        ]
+        metadata = json.loads(next(p for p in prompts if p.source_file == "style/lora1_0.safetensors").lora_metadata)
+        assert metadata["autov2"] == hashlib.sha256(data).hexdigest()[:10].upper()
+
+        # 2回目は変更されたファイルのみ計算
+        changed = root / "character" / "renamed.safetensors"
+        changed.write_bytes(data + b"x")
+        with mock.patch("core.lora_hash_cache.calculate_sha256", side_effect=calculate_sha256) as hasher:
+            manager = LoraLibraryManager(settings)
+            manager.scan_and_build_library()
+            assert [call.args[0] for call in hasher.call_args_list] == [changed]
+        assert not manager.find_duplicates()
+
+        cache = LoraHashCache(settings.get_data_dir() / LoraLibraryManager.HASH_CACHE_FILENAME)
+        assert len(cache.entries) == 19
+
+        print("[OK] ハッシュキャッシュテスト成功\n")
+    finally:
+        cleanup_lora_env()
+
+
+def test_incremental_rescan():
+    """変更されたLoRAのみ再読み込みし、ユーザーの編集を保持するテスト"""
+    print("=== LoRA Incremental Rescan Test ===")
+
+    try:
+        root = create_lora_env()
+        settings = Settings(root / "settings.json")
+        settings.lora_directory = str(root)
+        settings.data_dir = str(root / "data")
+
+        manager = LoraLibraryManager(settings)
+        manager.scan_and_build_library()
+        assert manager.parser.parsed_count == 18
+        for prompt in manager.prompts:
+            if prompt.source_file in ("style/lora1_1.safetensors", "style/lora1_0.safetensors"):
+                prompt.label_ja = "ユーザーラベル"
+                prompt.tags = ["edited"]
+                prompt.label_source = "manual"
+        manager.save_to_csv()
+        ids = {p.source_file: p.id for p in manager.prompts}
+
+        # サイドカーの変更と新規ファイルの追加
+        (root / "style" / "lora1_0.json").write_text(json.dumps({"preferred weight": 0.5}), encoding="utf-8")
+        write_safetensors(root / "style" / "added.safetensors", {"ss_output_name": "added"})
+
+        manager = LoraLibraryManager(settings)
+        prompts = manager.scan_and_build_library()
+        assert manager.parser.parsed_count == 2
+        assert len(prompts) == 19
+
+        by_file = {p.source_file: p for p in prompts}
+        # 変更されていないLoRAはCSVの行をそのまま使用
+        assert by_file["style/lora1_1.safetensors"].label_ja == "ユーザーラベル"
+        # 変更されたLoRAは再読み込みし、ユーザーの編集とIDを引き継ぐ
+        changed = by_file["style/lora1_0.safetensors"]
+        assert changed.prompt == "<lora:lora1_0:0.5>, trigger 1"
+        assert changed.label_ja == "ユーザーラベル" and changed.tags == ["edited"]
+        assert changed.id == ids["style/lora1_0.safetensors"]
+        assert json.loads(changed.lora_metadata)["sha256"]
+
+        # 全件スキャンでもユーザーの編集は保持
+        manager = LoraLibraryManager(settings)
+        prompts = manager.scan_and_build_library(incremental=False)
+        assert manager.parser.parsed_count == 19
+        assert {p.source_file: p for p in prompts}["style/lora1_1.safetensors"].label_ja == "ユーザーラベル"
+
+        print("[OK] 差分スキャンテスト成功\n")
+    finally:
+        cleanup_lora_env()
+
+
+def test_scan_cancel():
+    """LoRAスキャンのキャンセルテスト（結果は保存せず、計算済みのハッシュは再利用）"""
+    print("=== LoRA Scan Cancel Test ===")
+
+    try:
+        root = create_lora_env()
+        settings = Settings(root / "settings.json")
+        settings.lora_directory = str(root)
+        settings.data_dir = str(root / "data")
+
+        # 最初のハッシュを計算した時点でキャンセル
+        cancel_event = threading.Event()
+
+        def on_progress(current, total, message):
+            if message.startswith("Hashing"):
+                cancel_event.set()
+
+        manager = LoraLibraryManager(settings)
+        try:
+            manager.scan_and_build_library(on_progress, cancel_event=cancel_event)
+            assert False, "SyncCancelledError が送出されていません"
+        except SyncCancelledError:
+            pass
+        assert manager.prompts == []
+        assert not (settings.get_data_dir() / LoraLibraryManager.SCAN_MANIFEST_FILENAME).exists()
+        cached = len(LoraHashCache(settings.get_data_dir() / LoraLibraryManager.HASH_CACHE_FILENAME).entries)
+        assert cached >= 1
+
+        manager = LoraLibraryManager(settings)
+        assert len(manager.scan_and_build_library()) == 18
+        assert all(json.loads(p.lora_metadata)["sha256"] for p in manager.prompts)
+
+        print("[OK] スキャンキャンセルテスト成功\n")
+    finally:
+        cleanup_lora_env()
+
+
+def test_thumbnail_disk_cache_lru():
+    """サムネイルのディスクキャッシュがLRUで上限を守るテスト"""
+    print("=== Thumbnail Cache Test ===")
+
+    from core.thumbnail_cache import ThumbnailDiskCache
+
+    try:
+        root = create_lora_env()
+        preview = root / "style" / "lora1_0.preview.png"
+        preview.write_bytes(b"image")
+        settings = Settings(root / "settings.json")
+        settings.lora_directory = str(root)
+        manager = LoraLibraryManager(settings)
+        prompts = {p.source_file: p for p in LoraParser().scan_directory(root)}
+        assert manager.find_preview_image(prompts["style/lora1_0.safetensors"]) == preview
+        assert manager.find_preview_image(prompts["style/lora1_1.safetensors"]) is None
+
+        cache_dir = root / "thumbnails"
+        cache = ThumbnailDiskCache(cache_dir, max_bytes=2500)
+        keys = [ThumbnailDiskCache.make_key(preview, preview.stat(), size) for size in (32, 64, 96)]
+        cache.put(keys[0], b"a" * 1000)
+        cache.put(keys[1], b"b" * 1000)
+        os.utime(cache_dir / f"{keys[0]}.png", ns=(1, 1))
+        os.utime(cache_dir / f"{keys[1]}.png", ns=(2, 2))
+
+        # 別インスタンス（再起動後）でもLRUの順序を維持し、使用したものは残る
+        cache = ThumbnailDiskCache(cache_dir, max_bytes=2500)
+        assert cache.get(keys[0]) == b"a" * 1000
+        cache.put(keys[2], b"c" * 1000)
+        assert cache.get(keys[1]) is None
+        assert cache.get(keys[0]) and cache.get(keys[2])
+        assert cache.total_bytes == 2000 and len(list(cache_dir.iterdir())) == 2
+
+        print("[OK] サムネイルキャッシュテスト成功\n")
+    finally:
+        cleanup_lora_env()
+
+
+if __name__ == "__main__":
+    try:
+        test_parallel_scan_matches_sequential()
+        test_safetensors_header_metadata()
+        test_hash_cache_and_duplicates()
+        test_incremental_rescan()
+        test_scan_cancel()
+        test_thumbnail_disk_cache_lru()
+        sys.exit(0)
+    except Exception as e:
+        print(f"\n[ERROR] Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
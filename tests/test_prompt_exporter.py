@@ -0,0 +1,175 @@
+"""ストリーミング出力のテスト
+
+複数形式の同時出力とファイル分割を確認します。
+"""
+
+import json
+import os
+import shutil
+import stat
+import sys
+from pathlib import Path
+
+# srcディレクトリをパスに追加
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from models import Project, Scene, Block, BlockType
+from core.batch_exporter import BatchExporter
+from core.prompt_builder import PromptBuilder
+from core.prompt_exporter import (
+    StreamingExporter, TextExportTarget, JsonlExportTarget, A1111PayloadExportTarget
+)
+
+
+def create_test_project(scene_count: int = 5) -> Project:
+    """テスト用プロジェクトを作成"""
+    project = Project.create_new("出力テスト")
+    for i in range(1, scene_count + 1):
+        project.add_scene(Scene(scene_id=i, scene_name=f"シーン{i}", is_completed=(i % 2 == 1), blocks=[
+            Block(block_id=1, type=BlockType.FIXED_TEXT, content=f"prompt {i}"),
+            Block(block_id=2, type=BlockType.BREAK, content=""),
+            Block(block_id=3, type=BlockType.WILDCARD, content="__posing/arm__"),
+        ]))
+    return project
+
+
+def get_output_dir() -> Path:
+    """テスト用出力ディレクトリを作成"""
+    output_dir = Path(__file__).parent / "test_export_output"
+    if output_dir.exists():
+        shutil.rmtree(output_dir)
+    output_dir.mkdir()
+    return output_dir
+
+
+def test_export_to_file_matches_build_all_prompts():
+    """export_to_fileの出力がbuild_all_promptsと一致するかのテスト"""
+    print("=== export_to_file Test ===")
+
+    output_dir = get_output_dir()
+    try:
+        builder = PromptBuilder()
+        project = create_test_project()
+        output_path = output_dir / "prompts.txt"
+
+        builder.export_to_file(project, str(output_path), include_comment=True)
+
+        expected = "\n".join(builder.build_all_prompts(project, include_comment=True))
+        assert output_path.read_text(encoding="utf-8") == expected
+
+        # 既存のファイルを置き換える場合はパーミッションを引き継ぐ
+        if os.name == "posix":
+            output_path.chmod(0o640)
+            builder.export_to_file(project, str(output_path))
+            assert stat.S_IMODE(output_path.stat().st_mode) == 0o640
+        print("[OK] export_to_fileテスト成功\n")
+    finally:
+        shutil.rmtree(output_dir)
+
+
+def test_multi_format_sharded_export():
+    """複数形式・シーン数分割のテスト"""
+    print("=== Multi Format Export Test ===")
+
+    output_dir = get_output_dir()
+    try:
+        exporter = StreamingExporter(PromptBuilder())
+        project = create_test_project()
+        targets = [
+            TextExportTarget(),
+            JsonlExportTarget(),
+            A1111PayloadExportTarget({"steps": 28}),
+        ]
+
+        outputs = exporter.export(project, output_dir / "prompts", targets, max_scenes_per_file=2)
+
+        # 5シーンを2シーンずつ → 3ファイル
+        assert [p.name for p in outputs["txt"]] == ["prompts_001.txt", "prompts_002.txt", "prompts_003.txt"]
+        assert outputs["txt"][2].read_text(encoding="utf-8") == "prompt 5, BREAK __posing/arm__"
+
+        records = [
+            json.loads(line)
+            for path in outputs["jsonl"]
+            for line in path.read_text(encoding="utf-8").splitlines()
+        ]
+        assert [r["scene_id"] for r in records] == [1, 2, 3, 4, 5]
+        assert records[0]["scene_name"] == "シーン1"
+
+        payload = json.loads(outputs["a1111"][0].read_text(encoding="utf-8").splitlines()[0])
+        assert payload == {"steps": 28, "prompt": "prompt 1, BREAK __posing/arm__"}
+
+        # 一時ファイルが残っていないこと
+        assert not list(output_dir.glob("*.tmp"))
+        print("[OK] 複数形式出力テスト成功\n")
+    finally:
+        shutil.rmtree(output_dir)
+
+
+def test_byte_sharded_export():
+    """バイト数分割のテスト"""
+    print("=== Byte Shard Export Test ===")
+
+    output_dir = get_output_dir()
+    try:
+        exporter = StreamingExporter(PromptBuilder())
+        project = create_test_project(10)
+
+        outputs = exporter.export(
+            project, output_dir / "prompts", [TextExportTarget()],
+            completed_only=True, max_bytes_per_file=70
+        )
+
+        lines = []
+        for path in outputs["txt"]:
+            assert path.stat().st_size <= 70
+            lines.extend(path.read_text(encoding="utf-8").split("\n"))
+
+        assert lines == PromptBuilder().build_all_prompts(project, completed_only=True)
+        print("[OK] バイト数分割テスト成功\n")
+    finally:
+        shutil.rmtree(output_dir)
+
+
+def test_batch_export_same_project_names():
+    """別ディレクトリの同名プロジェクト・重複した形式指定の一括出力テスト"""
+    print("=== Batch Export Name Collision Test ===")
+
+    output_dir = get_output_dir()
+    try:
+        project_paths = []
+        for name, scene_count in (("a", 1), ("b", 3)):
+            project_path = output_dir / "projects" / name / "proj.json"
+            project_path.parent.mkdir(parents=True)
+            project_path.write_text(
+                json.dumps(create_test_project(scene_count).to_dict(), ensure_ascii=False), encoding="utf-8"
+            )
+            project_paths.append(project_path)
+
+        results = BatchExporter(max_workers=2).export(
+            project_paths, output_dir / "out", formats=["txt", "txt", "jsonl"]
+        )
+
+        # 上書きせず、親ディレクトリ名で区別して出力
+        assert all(r.success for r in results), [r.error for r in results]
+        assert [Path(p).name for r in results for p in r.output_paths] == [
+            "a_proj.txt", "a_proj.jsonl", "b_proj.txt", "b_proj.jsonl"
+        ]
+        assert (output_dir / "out" / "b_proj.txt").read_text(encoding="utf-8").count("\n") == 2
+        assert not list((output_dir / "out").glob("*.tmp"))
+        print("[OK] 同名プロジェクトの一括出力テスト成功\n")
+    finally:
+        shutil.rmtree(output_dir)
+
+
+if __name__ == "__main__":
+    try:
+        test_export_to_file_matches_build_all_prompts()
+        test_multi_format_sharded_export()
+        test_byte_sharded_export()
+        test_batch_export_same_project_names()
+        sys.exit(0)
+    except Exception as e:
+        print(f"\n[ERROR] Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
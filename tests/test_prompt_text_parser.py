@@ -0,0 +1,110 @@
+"""プロンプトテキストパーサーのテスト
+
+差分パースの結果が一括パースと一致するか確認します。
+"""
+
+import random
+import re
+import sys
+from pathlib import Path
+
+# srcディレクトリをパスに追加
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from models import BlockType
+from core.prompt_text_parser import PromptTextParser, parse_prompt_text
+
+
+def reference_parse(prompt_text: str):
+    """従来のSceneEditorPanelと同じ方法でパース（比較用）"""
+    result = []
+    segments = re.split(r',\s*BREAK\s*,?|BREAK', prompt_text, flags=re.IGNORECASE)
+
+    for i, segment in enumerate(segments):
+        segment = segment.strip().strip(',').strip()
+
+        if not segment:
+            continue
+
+        is_wildcard = segment.startswith('__') and segment.endswith('__')
+        result.append((BlockType.WILDCARD if is_wildcard else BlockType.FIXED_TEXT, segment))
+
+        if i < len(segments) - 1 and segment:
+            result.append((BlockType.BREAK, ""))
+
+    return result
+
+
+def to_pairs(blocks):
+    """比較用に(type, content)のリストへ変換"""
+    return [(b.type, b.content) for b in blocks]
+
+
+def test_full_parse():
+    """一括パースのテスト"""
+    print("=== Full Parse Test ===")
+
+    text = "1girl, school uniform,\nBREAK,\n__posing/arm__\nBREAK,\nmasterpiece"
+    blocks = parse_prompt_text(text, start_block_id=5)
+
+    assert to_pairs(blocks) == reference_parse(text)
+    assert [b.block_id for b in blocks] == [5, 6, 7, 8, 9]
+    assert blocks[2].type == BlockType.WILDCARD
+
+    print("[OK] 一括パーステスト成功\n")
+
+
+def test_block_reuse():
+    """未編集セグメントのブロック再利用テスト"""
+    print("=== Block Reuse Test ===")
+
+    parser = PromptTextParser()
+    first = parser.parse("standing, corridor, BREAK __posing/arm__, BREAK masterpiece")
+    second = parser.parse("standing, corridor, BREAK __posing/arm__, BREAK masterpiece, best quality")
+
+    assert first[0] is second[0]
+    assert first[2] is second[2]
+    assert second[4].content == "masterpiece, best quality"
+
+    # ブロックIDはパーサー内で一意
+    ids = [b.block_id for b in second]
+    assert len(ids) == len(set(ids))
+
+    print("[OK] ブロック再利用テスト成功\n")
+
+
+def test_incremental_matches_full_parse():
+    """ランダム編集で差分パースと一括パースが一致するかのテスト"""
+    print("=== Incremental Parse Test ===")
+
+    rng = random.Random(0)
+    fragments = [
+        "a", "b", "x", " ", "  ", ",", "\n", "B", "R", "E", "A", "K",
+        "BREAK", "break", ", BREAK,", "__", "__posing/arm__", "1girl",
+    ]
+
+    for _ in range(200):
+        parser = PromptTextParser()
+        text = ""
+        for _ in range(60):
+            start = rng.randint(0, len(text))
+            end = rng.randint(start, min(len(text), start + 6))
+            insert = "".join(rng.choice(fragments) for _ in range(rng.randint(0, 3)))
+            text = text[:start] + insert + text[end:]
+
+            assert to_pairs(parser.parse(text)) == reference_parse(text), repr(text)
+
+    print("[OK] 差分パーステスト成功\n")
+
+
+if __name__ == "__main__":
+    try:
+        test_full_parse()
+        test_block_reuse()
+        test_incremental_matches_full_parse()
+        sys.exit(0)
+    except Exception as e:
+        print(f"\n[ERROR] Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)